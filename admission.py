@@ -0,0 +1,211 @@
+"""Admission control ของ route AI: token bucket ต่อลูกค้า + จำกัดจำนวนงานพร้อมกันพร้อมคิวสั้นๆ
+
+/api/ask-ai ไม่ต้อง login สคริปต์ตัวเดียวยิงคำถามใหม่รัวๆ ก็กิน quota ของ OpenAI และ worker thread ทั้งหมดได้
+คำถามที่ต้องเรียก OpenAI จึงต้องผ่านสองด่าน (คำตอบสำเร็จรูป/ใน cache ไม่ต้องผ่าน):
+
+- `TokenBucketStore`: bucket ต่อ key (visitor id ใน session หรือ IP) เก็บในตาราง SQLite ไฟล์เดียวกันของทุก
+  worker process ขอ token ด้วย transaction แบบ BEGIN IMMEDIATE ขีดจำกัดจึงเป็นของทั้งเครื่อง ไม่ใช่ต่อ process
+  ขอหลาย bucket พร้อมกันได้ (เช่น visitor + IP) ผ่านเมื่อทุก bucket มี token พอ ถ้าไม่ผ่านไม่มี bucket ไหนถูกหัก
+- `AdmissionGate`: จำกัดงานที่กำลังทำพร้อมกัน ที่เกินรอคิว FIFO ได้ไม่เกิน max_queue งาน นานไม่เกิน queue_timeout
+  คิวเต็มแล้วปฏิเสธทันที (ผู้เรียกตอบ 429 + Retry-After) ใช้ได้ทั้งจาก thread (Flask) และ event loop (asgi)
+"""
+import asyncio
+import math
+import sqlite3
+import threading
+import time
+from collections import deque
+
+
+class TokenBucketStore:
+    """token bucket หลายตัวในตาราง SQLite (ใช้ร่วมกันได้หลาย process)
+
+    take([(key, rate, burst), ...]) -> 0.0 ถ้าผ่าน หรือจำนวนวินาทีจนกว่าจะผ่าน
+    rate คือ token ต่อวินาที burst คือจำนวน token สูงสุด (bucket ใหม่เริ่มเต็ม)
+    db_path=None ใช้ SQLite ในหน่วยความจำ (ขีดจำกัดต่อ process)
+    """
+
+    def __init__(self, db_path: str = None, prune_every: int = 1000):
+        self._db_path = db_path
+        self.prune_every = prune_every
+        self._takes = 0
+        self._counters = {'allowed': 0, 'limited': 0, 'errors': 0}
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+
+    def _connect(self):
+        conn = sqlite3.connect(self._db_path or ':memory:', check_same_thread=False, isolation_level=None)
+        conn.execute('PRAGMA busy_timeout = 2000')
+        if self._db_path:
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('PRAGMA synchronous = NORMAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS rate_bucket ('
+            ' key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL, full_at REAL NOT NULL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS ix_rate_bucket_full_at ON rate_bucket (full_at)')
+        return conn
+
+    def after_fork(self):
+        """เรียกใน process ลูกหลัง fork: connection ของ SQLite ที่สืบทอดมาใช้ข้าม process ไม่ได้"""
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+
+    def take(self, buckets, cost: float = 1.0) -> float:
+        now = time.time()
+        with self._lock:
+            try:
+                self._conn.execute('BEGIN IMMEDIATE')
+                try:
+                    wait, updates = self._check(buckets, cost, now)
+                    if not wait:
+                        self._conn.executemany(
+                            'INSERT OR REPLACE INTO rate_bucket (key, tokens, updated_at, full_at) VALUES (?, ?, ?, ?)',
+                            updates
+                        )
+                    self._takes += 1
+                    if self._takes % self.prune_every == 0:
+                        # bucket ที่เต็มแล้วมีค่าเท่ากับไม่มีแถว ลบทิ้งได้
+                        self._conn.execute('DELETE FROM rate_bucket WHERE full_at < ?', (now,))
+                    self._conn.execute('COMMIT')
+                except BaseException:
+                    self._conn.execute('ROLLBACK')
+                    raise
+            except sqlite3.Error as e:
+                # ที่เก็บมีปัญหา (เช่น lock นานเกิน busy_timeout) ปล่อยผ่าน AdmissionGate ยังจำกัดงานพร้อมกันอยู่
+                print(f"Error checking rate limit: {e}")
+                self._counters['errors'] += 1
+                return 0.0
+            self._counters['limited' if wait else 'allowed'] += 1
+        return wait
+
+    def _check(self, buckets, cost, now):
+        """(วินาทีที่ต้องรอ, แถวที่จะเขียนเมื่อผ่าน) ต้องอยู่ใน transaction"""
+        wait, updates = 0.0, []
+        for key, rate, burst in buckets:
+            row = self._conn.execute('SELECT tokens, updated_at FROM rate_bucket WHERE key = ?', (key,)).fetchone()
+            tokens = burst if row is None else min(burst, row[0] + max(0.0, now - row[1]) * rate)
+            if tokens < cost:
+                wait = max(wait, (cost - tokens) / rate if rate > 0 else math.inf)
+                continue
+            tokens -= cost
+            updates.append((key, tokens, now, now + (burst - tokens) / rate if rate > 0 else math.inf))
+        return wait, updates
+
+    def reset(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM rate_bucket')
+
+    def stats(self) -> dict:
+        with self._lock:
+            data = dict(self._counters)
+            data['buckets'] = self._conn.execute('SELECT COUNT(*) FROM rate_bucket').fetchone()[0]
+        return data
+
+
+class _Waiter:
+    """งานที่รอ slot ในคิว wake() ถูกเรียกเมื่อ release() ส่ง slot ให้ (granted=True)"""
+
+    __slots__ = ('wake', 'granted')
+
+    def __init__(self, wake):
+        self.wake = wake
+        self.granted = False
+
+
+class AdmissionGate:
+    """จำกัดงานที่ทำพร้อมกันไม่เกิน max_in_flight งาน ที่เกินรอคิวได้ max_queue งาน นาน queue_timeout วินาที
+
+    acquire() / await acquire_async() คืน True เมื่อได้ slot (ต้องเรียก release() เมื่อเสร็จ)
+    คืน False เมื่อคิวเต็ม (ทันที) หรือรอเกิน queue_timeout
+    release() ส่ง slot ให้งานแรกในคิวโดยตรง งานที่มาใหม่จึงแซงคิวไม่ได้
+    """
+
+    def __init__(self, max_in_flight: int = 4, max_queue: int = 2, queue_timeout: float = 1.0):
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._waiters = deque()
+        self._counters = {'admitted': 0, 'queued': 0, 'shed': 0, 'timed_out': 0}
+
+    @property
+    def retry_after(self) -> int:
+        """ค่า Retry-After (วินาที) ที่แนะนำเมื่อถูกปฏิเสธ"""
+        return max(1, math.ceil(self.queue_timeout))
+
+    def _enter(self, make_waiter):
+        """(True, None) ได้ slot เลย, (False, None) คิวเต็ม, (None, waiter) ต้องรอ"""
+        with self._lock:
+            if self._in_flight < self.max_in_flight and not self._waiters:
+                self._in_flight += 1
+                self._counters['admitted'] += 1
+                return True, None
+            if len(self._waiters) >= self.max_queue:
+                self._counters['shed'] += 1
+                return False, None
+            waiter = make_waiter()
+            self._waiters.append(waiter)
+            self._counters['queued'] += 1
+            return None, waiter
+
+    def _abandon(self, waiter) -> bool:
+        """เลิกรอ คืน True ถ้า slot ถูกส่งมาให้พอดีก่อนเลิก (ผู้เรียกได้ slot นั้นไป)"""
+        with self._lock:
+            if waiter.granted:
+                return True
+            self._waiters.remove(waiter)
+            self._counters['timed_out'] += 1
+            return False
+
+    def acquire(self) -> bool:
+        event = threading.Event()
+        admitted, waiter = self._enter(lambda: _Waiter(event.set))
+        if waiter is None:
+            return admitted
+        if event.wait(self.queue_timeout):
+            return True
+        return self._abandon(waiter)
+
+    async def acquire_async(self) -> bool:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+        admitted, waiter = self._enter(lambda: _Waiter(wake))
+        if waiter is None:
+            return admitted
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+            return True
+        except asyncio.TimeoutError:
+            return self._abandon(waiter)
+        except asyncio.CancelledError:
+            if self._abandon(waiter):
+                self.release()
+            raise
+
+    def release(self):
+        with self._lock:
+            if self._waiters:
+                waiter = self._waiters.popleft()
+                waiter.granted = True
+                self._counters['admitted'] += 1
+            else:
+                self._in_flight -= 1
+                return
+        waiter.wake()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'in_flight': self._in_flight,
+                'waiting': len(self._waiters),
+                'max_in_flight': self.max_in_flight,
+                'max_queue': self.max_queue,
+                'queue_timeout': self.queue_timeout,
+                'counters': dict(self._counters),
+            }
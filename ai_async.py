@@ -0,0 +1,299 @@
+"""เส้นทาง AI แบบ async (ASGI) ที่ทำงานคู่กับ Flask app เดิมใน process เดียวกัน
+
+view ของ Flask ถือ worker thread ไว้ตลอดเวลาที่รอ OpenAI (หลายวินาที) ลูกค้าถาม AI พร้อมกันไม่กี่สิบคน
+ก็แย่ง thread จนหน้าเว็บโหลดช้า ที่นี่ route AI ทำงานใน event loop ด้วย AsyncOpenAI แทน:
+
+- `ASGIApp` ส่ง request ที่ตรงกับ route async (เช่น POST /api/ask-ai) ไปที่ handler ใน event loop
+  และส่ง request อื่นทั้งหมดต่อให้ Flask ผ่าน a2wsgi `WSGIMiddleware` (thread pool ขนาด wsgi_threads
+  ไม่ใช้ asgiref WsgiToAsgi เพราะรันทุก request ของ WSGI ใน thread เดียว)
+- `AsyncResilientClient` คือ ResilientClient ฉบับ async: deadline, circuit breaker (ใช้ตัวเดียวกับฝั่ง sync ได้)
+  และ asyncio.Semaphore จำกัดจำนวนการเรียก upstream พร้อมกัน คำถามที่เกินจะรอคิวได้ไม่เกิน acquire_timeout
+- `SingleFlight` รวมคำถามเดียวกันที่เข้ามาพร้อมกันให้เรียก OpenAI ครั้งเดียว
+
+รันด้วย ASGI server: `uvicorn asgi:app` หรือ `gunicorn asgi:app -k uvicorn.workers.UvicornWorker`
+"""
+import asyncio
+import json
+import threading
+import time
+from http.cookies import SimpleCookie
+from types import SimpleNamespace
+
+from ai_resilience import AIUnavailableError, CircuitBreaker, LatencyHistogram
+
+try:
+    from a2wsgi import WSGIMiddleware
+    A2WSGI_AVAILABLE = True
+except ImportError:
+    A2WSGI_AVAILABLE = False
+
+MAX_BODY_BYTES = 64 * 1024
+
+
+class AsyncResilientClient:
+    """ห่อ AsyncOpenAI client ด้วย deadline, concurrency cap และ circuit breaker
+
+    client_factory: สร้าง client เมื่อเรียกครั้งแรก (import openai ตอนนั้น)
+    max_concurrency: จำนวนการเรียก upstream พร้อมกันสูงสุด (ไม่ถือ thread จึงตั้งได้เป็นหลักร้อย)
+    acquire_timeout: เวลาที่คำถามรอ slot ว่างได้ก่อนได้รับคำตอบ fallback
+    breaker: CircuitBreaker ที่ใช้ร่วมกับ client ฝั่ง sync ได้ (สถานะของ upstream เดียวกัน)
+    """
+
+    def __init__(self, client_factory, timeout: float = 10.0, max_concurrency: int = 256,
+                 acquire_timeout: float = 5.0, breaker: CircuitBreaker = None):
+        self._client_factory = client_factory
+        self._client = None
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.acquire_timeout = acquire_timeout
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = LatencyHistogram()
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._waiting = 0
+        self._counters = {'calls': 0, 'successes': 0, 'failures': 0, 'short_circuited': 0, 'rejected_busy': 0}
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = self._client_factory()
+        return self._client
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    async def _enter(self):
+        if not self.breaker.allow():
+            self._count('short_circuited')
+            raise AIUnavailableError('AI circuit is open')
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self.breaker.release_probe()
+            self._count('rejected_busy')
+            raise AIUnavailableError('Too many concurrent AI calls')
+        finally:
+            self._waiting -= 1
+        self._in_flight += 1
+        self._count('calls')
+
+    def _exit(self, started, ok):
+        self._in_flight -= 1
+        self._slots.release()
+        self.latency.observe(time.perf_counter() - started)
+        if ok:
+            self.breaker.record_success()
+            self._count('successes')
+        else:
+            self.breaker.record_failure()
+            self._count('failures')
+
+    async def _create(self, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        await self._enter()
+        started = time.perf_counter()
+        try:
+            result = await self.client.chat.completions.create(**kwargs)
+        except Exception:
+            self._exit(started, False)
+            raise
+        if kwargs.get('stream'):
+            return self._guard_stream(result, started)
+        self._exit(started, True)
+        return result
+
+    async def _guard_stream(self, stream, started):
+        """ถือ slot ไว้จน stream จบ และตัดทิ้งถ้าเวลารวมเกิน deadline"""
+        ok = False
+        try:
+            async for chunk in stream:
+                if time.perf_counter() - started > self.timeout:
+                    raise TimeoutError('AI stream exceeded deadline')
+                yield chunk
+            ok = True
+        except GeneratorExit:
+            ok = True
+            raise
+        finally:
+            self._exit(started, ok)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.close()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+        return {
+            'breaker': self.breaker.snapshot(),
+            'in_flight': self._in_flight,
+            'waiting': self._waiting,
+            'max_concurrency': self.max_concurrency,
+            'timeout': self.timeout,
+            'counters': counters,
+            'latency_seconds': self.latency.snapshot(),
+        }
+
+
+class SingleFlight:
+    """รวมงาน async ที่มี key เดียวกันซึ่งเข้ามาพร้อมกันให้ทำครั้งเดียว (ทุกคนได้ผลเดียวกัน)"""
+
+    def __init__(self):
+        self._flights = {}
+
+    async def do(self, key, compute):
+        flight = self._flights.get(key)
+        if flight is not None:
+            try:
+                return await asyncio.shield(flight)
+            except asyncio.CancelledError:
+                # ผู้เริ่มงานถูกยกเลิก (เช่น client ตัดการเชื่อมต่อ) แต่ผู้รอรายนี้ยังต้องการผล: ทำงานเองแทน
+                task = asyncio.current_task()
+                if not flight.cancelled() or (task is not None and task.cancelling()):
+                    raise
+                return await self.do(key, compute)
+        flight = self._flights[key] = asyncio.get_running_loop().create_future()
+        try:
+            value = await compute()
+        except Exception as e:
+            flight.set_exception(e)
+            flight.exception()   # ไม่ให้ asyncio เตือนเมื่อไม่มีใครรอผลนี้
+            raise
+        except BaseException:
+            flight.cancel()      # CancelledError ฯลฯ: ปล่อยผู้รอทุกรายก่อน raise ต่อ
+            raise
+        else:
+            flight.set_result(value)
+            return value
+        finally:
+            del self._flights[key]
+
+
+# ==================== ASGI ====================
+
+class AsyncRequest:
+    """ข้อมูล request ที่ handler async ใช้: method, path, IP ของ client, headers (ชื่อตัวเล็ก), cookies และ body"""
+
+    def __init__(self, scope, body: bytes):
+        self.method = scope['method']
+        self.path = scope['path']
+        self.client = (scope.get('client') or ('',))[0]
+        self.headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope.get('headers', [])}
+        self.body = body
+        cookie = SimpleCookie()
+        cookie.load(self.headers.get('cookie', ''))
+        self.cookies = {name: morsel.value for name, morsel in cookie.items()}
+
+    def get_json(self):
+        """dict จาก body (None ถ้าไม่ใช่ JSON) เหมือน request.get_json(silent=True) ของ Flask"""
+        try:
+            return json.loads(self.body or b'null')
+        except ValueError:
+            return None
+
+
+class JSONResponse:
+    def __init__(self, payload, status: int = 200, headers: dict = None):
+        self.status = status
+        self.body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.headers = [(k.lower().encode(), str(v).encode()) for k, v in (headers or {}).items()]
+
+    async def send(self, send):
+        await send({'type': 'http.response.start', 'status': self.status, 'headers': [
+            (b'content-type', b'application/json'), (b'content-length', str(len(self.body)).encode()),
+        ] + self.headers})
+        await send({'type': 'http.response.body', 'body': self.body})
+
+
+class StreamingResponse:
+    """ส่ง chunk (str) จาก async generator ทีละชิ้น เช่น Server-Sent Events
+
+    on_close: callback เมื่อส่งจบหรือ client ตัดการเชื่อมต่อ (เช่นคืน slot ของ AdmissionGate)
+    """
+
+    def __init__(self, chunks, mimetype: str = 'text/event-stream', headers: dict = None, status: int = 200,
+                 on_close=None):
+        self.status = status
+        self.chunks = chunks
+        self.on_close = on_close
+        self.headers = [(b'content-type', mimetype.encode())]
+        self.headers += [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+
+    async def send(self, send):
+        try:
+            await send({'type': 'http.response.start', 'status': self.status, 'headers': self.headers})
+            async for chunk in self.chunks:
+                await send({'type': 'http.response.body', 'body': chunk.encode('utf-8'), 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            await self.chunks.aclose()
+            if self.on_close:
+                self.on_close()
+
+
+class ASGIApp:
+    """ASGI app: route async ตาม (method, path) ส่วน request อื่นส่งต่อให้ Flask (WSGI)
+
+    routes: {(method, path): async def handler(AsyncRequest) -> JSONResponse | StreamingResponse}
+    wsgi_threads: จำนวน thread ที่รัน request ของ Flask พร้อมกัน
+    on_request: callback(method, path, status, seconds) สำหรับ metrics ของ route async
+    on_shutdown: async callback ตอน server หยุด (เช่นปิด AsyncOpenAI client)
+    """
+
+    def __init__(self, wsgi_app, routes: dict, wsgi_threads: int = 8, on_request=None, on_shutdown=None):
+        if not A2WSGI_AVAILABLE:
+            raise RuntimeError('a2wsgi is required to serve the Flask app over ASGI (pip install a2wsgi)')
+        self.wsgi = WSGIMiddleware(wsgi_app, workers=wsgi_threads)
+        self.routes = routes
+        self.on_request = on_request
+        self.on_shutdown = on_shutdown
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        handler = self.routes.get((scope.get('method'), scope.get('path'))) if scope['type'] == 'http' else None
+        if handler is None:
+            return await self.wsgi(scope, receive, send)
+
+        started = time.perf_counter()
+        body = await self._read_body(receive)
+        if body is None:
+            response = JSONResponse({'error': 'Request body too large', 'success': False}, 413)
+        else:
+            try:
+                response = await handler(AsyncRequest(scope, body))
+            except Exception as e:
+                print(f"Error in async route {scope['path']}: {str(e)}")
+                response = JSONResponse({'error': str(e), 'success': False}, 500)
+        await response.send(send)
+        if self.on_request:
+            self.on_request(scope['method'], scope['path'], response.status, time.perf_counter() - started)
+
+    @staticmethod
+    async def _read_body(receive):
+        """body ทั้งหมดของ request (None ถ้าเกิน MAX_BODY_BYTES)"""
+        chunks, size = [], 0
+        while True:
+            message = await receive()
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > MAX_BODY_BYTES:
+                return None
+            chunks.append(chunk)
+            if not message.get('more_body'):
+                return b''.join(chunks)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self.on_shutdown:
+                    await self.on_shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
@@ -0,0 +1,225 @@
+"""Cache คำตอบจาก OpenAI (LRU + TTL ในหน่วยความจำ + SQLite ที่อยู่รอดหลัง restart)
+
+- key มาจากคำถามที่ normalize แล้ว (ตัวพิมพ์, ช่องว่าง, เครื่องหมายวรรคตอนไทย/อังกฤษ)
+- คำขอที่ miss พร้อมกันด้วย key เดียวกันจะรอผลจากการเรียก upstream ครั้งเดียว (single-flight)
+- ตัวนับ hit / miss / eviction อ่านได้จาก `stats()`
+- ตารางบนดิสก์ถูกเก็บกวาดทุก `prune_every` ครั้งที่เขียน: ลบแถวที่หมดอายุ และแถวที่เก่าที่สุดเมื่อเกิน `max_disk_entries`
+"""
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+# เครื่องหมายไทยที่ unicodedata ไม่ได้จัดเป็น punctuation (ไปยาลน้อย) และ zero-width space
+_EXTRA_PUNCT = {'ฯ', '​', '‌', '‍', '﻿'}
+
+
+def normalize_question(text: str) -> str:
+    """ทำให้คำถามที่ต่างกันแค่ตัวพิมพ์/ช่องว่าง/วรรคตอน ได้ key เดียวกัน"""
+    text = unicodedata.normalize('NFC', text or '').casefold()
+    cleaned = ''.join(
+        ' ' if (ch in _EXTRA_PUNCT or unicodedata.category(ch).startswith('P')) else ch
+        for ch in text
+    )
+    return ' '.join(cleaned.split())
+
+
+class _Flight:
+    """การเรียก upstream ที่กำลังทำงานอยู่ ผู้ขอรายอื่นรอที่ event นี้"""
+
+    __slots__ = ('event', 'value', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class AnswerCache:
+    """LRU + TTL cache ที่มี SQLite เป็นที่เก็บถาวร"""
+
+    def __init__(self, db_path: str, max_entries: int = 1024, ttl: float = 86400.0,
+                 max_disk_entries: int = 50_000, prune_every: int = 256):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_disk_entries = max_disk_entries
+        self.prune_every = max(1, prune_every)
+        self._disk_writes = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._flights = {}
+        self._counters = {
+            'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0,
+            'expired': 0, 'coalesced': 0, 'errors': 0, 'disk_pruned': 0,
+        }
+        self._db_lock = threading.Lock()
+        self._db_path = db_path
+        self._conn = None
+        if db_path:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS ai_answer_cache ('
+                ' key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)'
+            )
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS ai_answer_cache_expires ON ai_answer_cache (expires_at)'
+            )
+            with self._db_lock:
+                self._disk_prune()
+            self._conn.commit()
+
+    def after_fork(self):
+        """เรียกใน process ลูกหลัง fork (เช่น gunicorn --preload): เปิด connection ของ SQLite ใหม่
+        เพราะ connection ที่สืบทอดมาจาก process แม่ใช้ร่วมกันข้าม process ไม่ได้
+        """
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._flights = {}
+        if self._db_path:
+            self._conn = sqlite3.connect(self._db_path, check_same_thread=False)
+
+    @staticmethod
+    def make_key(namespace: str, *parts) -> str:
+        return namespace + ':' + '|'.join(normalize_question(str(p)) for p in parts)
+
+    # ---------- storage ----------
+
+    def _disk_get(self, key):
+        if self._conn is None:
+            return None
+        with self._db_lock:
+            row = self._conn.execute(
+                'SELECT value, expires_at FROM ai_answer_cache WHERE key = ?', (key,)
+            ).fetchone()
+        if row and row[1] > time.time():
+            return row
+        return None
+
+    def _disk_set(self, key, value, expires_at):
+        if self._conn is None:
+            return
+        with self._db_lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO ai_answer_cache (key, value, expires_at) VALUES (?, ?, ?)',
+                (key, value, expires_at),
+            )
+            self._disk_writes += 1
+            if self._disk_writes % self.prune_every == 0:
+                self._disk_prune()
+            self._conn.commit()
+
+    def _disk_prune(self):
+        """ลบแถวที่หมดอายุ แล้วตัดแถวที่หมดอายุเร็วที่สุด (เขียนไว้นานที่สุด) ให้เหลือไม่เกิน max_disk_entries
+        ต้องถือ self._db_lock อยู่ ผู้เรียก commit เอง
+        """
+        removed = self._conn.execute(
+            'DELETE FROM ai_answer_cache WHERE expires_at < ?', (time.time(),)
+        ).rowcount
+        removed += self._conn.execute(
+            'DELETE FROM ai_answer_cache WHERE key IN ('
+            ' SELECT key FROM ai_answer_cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?)',
+            (self.max_disk_entries,),
+        ).rowcount
+        if removed:
+            with self._lock:
+                self._counters['disk_pruned'] += removed
+
+    def _mem_put(self, key, value, expires_at):
+        """ต้องถือ self._lock อยู่"""
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters['evictions'] += 1
+
+    # ---------- public API ----------
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self._counters['hits'] += 1
+                    return entry[1]
+                del self._entries[key]
+                self._counters['expired'] += 1
+        row = self._disk_get(key)
+        if row is None:
+            return None
+        with self._lock:
+            self._mem_put(key, row[0], row[1])
+            self._counters['disk_hits'] += 1
+        return row[0]
+
+    def set(self, key, value: str):
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._mem_put(key, value, expires_at)
+        self._disk_set(key, value, expires_at)
+
+    def get_or_compute(self, key, compute):
+        """คืนค่าจาก cache หรือเรียก compute() ครั้งเดียวต่อ key แม้มีผู้ขอพร้อมกันหลายราย
+
+        ถ้า compute() raise exception ผลจะไม่ถูก cache และผู้รอทุกรายได้รับ exception เดียวกัน
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+                self._counters['misses'] += 1
+            else:
+                self._counters['coalesced'] += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+            self.set(key, flight.value)
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            with self._lock:
+                self._counters['errors'] += 1
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.event.set()
+
+    def record_miss(self):
+        """นับ miss ให้ผู้เรียกที่ไม่ผ่าน get_or_compute (เช่นคำตอบแบบ stream ที่เก็บลง cache เองด้วย set)"""
+        with self._lock:
+            self._counters['misses'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self._conn is not None:
+            with self._db_lock:
+                self._conn.execute('DELETE FROM ai_answer_cache')
+                self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            data = dict(self._counters)
+            data['size'] = len(self._entries)
+            data['in_flight'] = len(self._flights)
+        lookups = data['hits'] + data['disk_hits'] + data['misses'] + data['coalesced']
+        data['max_entries'] = self.max_entries
+        data['max_disk_entries'] = self.max_disk_entries
+        data['ttl_seconds'] = self.ttl
+        data['hit_ratio'] = round((data['hits'] + data['disk_hits'] + data['coalesced']) / lookups, 4) if lookups else 0.0
+        return data
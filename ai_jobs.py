@@ -0,0 +1,153 @@
+"""Job queue แบบ background สำหรับสร้างคำอธิบายสินค้าด้วย AI ทีละหลายชิ้น
+
+- thread pool ขนาดจำกัด (ไม่บล็อก Flask worker ระหว่างรอ OpenAI)
+- แบ่งสินค้าเป็นกลุ่ม (batch_size ชิ้นต่อ prompt) เพื่อลดจำนวน round trip
+- retry เฉพาะสินค้าที่ยังไม่ได้ผล พร้อม exponential backoff
+- ผลลัพธ์ถูกบันทึกผ่าน callback `save_results` (app.py เขียนลง Product.description)
+- สถานะ job เก็บใน store: `MemoryJobStore` (process เดียว) หรือ store ที่เก็บในฐานข้อมูล (app.py)
+  เมื่อมีหลาย worker process การ poll สถานะจึงได้ผลไม่ว่า request จะไปตก worker ไหน
+"""
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+def final_status(completed: int, failed: int) -> str:
+    """สถานะสุดท้ายของ job จากจำนวนที่สำเร็จ/ล้มเหลว"""
+    if failed == 0:
+        return 'done'
+    return 'failed' if completed == 0 else 'partial'
+
+
+class MemoryJobStore:
+    """สถานะ job ใน dict ของ process นี้ (ใช้เมื่อมี worker process เดียว หรือในสคริปต์/test)
+
+    store อื่นต้องมีเมธอดเหมือนกัน: create, start, record, chunk_done, get
+    """
+
+    def __init__(self, max_jobs: int = 100):
+        self.max_jobs = max_jobs
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+
+    def create(self, job_id: str, total: int, chunks: int):
+        with self._lock:
+            self._jobs[job_id] = {
+                'id': job_id, 'status': 'queued', 'total': total, 'completed': 0, 'failed': 0,
+                'results': {}, 'errors': {}, 'created_at': time.time(), 'finished_at': None,
+                '_pending_chunks': chunks,
+            }
+            self._prune()
+
+    def start(self, job_id: str):
+        with self._lock:
+            job = self._jobs[job_id]
+            if job['status'] == 'queued':
+                job['status'] = 'running'
+
+    def record(self, job_id: str, results: dict = None, errors: dict = None):
+        """เพิ่มผลสำเร็จ {product_id: description} และ error {product_id: ข้อความ}"""
+        with self._lock:
+            job = self._jobs[job_id]
+            job['results'].update(results or {})
+            job['completed'] += len(results or {})
+            job['errors'].update(errors or {})
+            job['failed'] += len(errors or {})
+
+    def chunk_done(self, job_id: str):
+        """นับกลุ่มที่เสร็จ เมื่อครบทุกกลุ่ม (หรือ job ไม่มีกลุ่มเลย) ตั้งสถานะสุดท้าย"""
+        with self._lock:
+            job = self._jobs[job_id]
+            job['_pending_chunks'] = max(0, job['_pending_chunks'] - 1)
+            if job['_pending_chunks'] == 0:
+                job['status'] = final_status(job['completed'], job['failed'])
+                job['finished_at'] = time.time()
+
+    def get(self, job_id: str):
+        """คืนสถานะ job (สำเนา) หรือ None ถ้าไม่พบ"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return {k: (dict(v) if isinstance(v, dict) else v) for k, v in job.items() if not k.startswith('_')}
+
+    def _prune(self):
+        """เก็บ job ล่าสุดไม่เกิน max_jobs (ลบเฉพาะ job ที่จบแล้ว) ต้องถือ self._lock อยู่"""
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            if self._jobs[job_id]['finished_at'] is not None:
+                del self._jobs[job_id]
+
+
+class DescriptionJobQueue:
+    """คิวงานสร้างคำอธิบายสินค้า
+
+    describe_batch(products) -> dict {product_id: description}
+        products เป็น list ของ dict ที่มี 'id', 'name', 'price'
+        อาจคืนผลไม่ครบทุกชิ้น สินค้าที่ขาดจะถูก retry
+    save_results(results) -> None
+        บันทึก dict {product_id: description} ลงฐานข้อมูล
+    store: ที่เก็บสถานะ job (ค่าเริ่มต้น MemoryJobStore)
+    """
+
+    def __init__(self, describe_batch, save_results, max_workers: int = 2, batch_size: int = 5,
+                 max_retries: int = 3, backoff: float = 1.0, max_jobs: int = 100, store=None):
+        self.describe_batch = describe_batch
+        self.save_results = save_results
+        self.batch_size = max(1, batch_size)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.store = store or MemoryJobStore(max_jobs)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ai-desc')
+
+    def submit(self, products) -> str:
+        """สร้าง job ใหม่และคืน job_id ทันที"""
+        job_id = uuid.uuid4().hex
+        chunks = [products[i:i + self.batch_size] for i in range(0, len(products), self.batch_size)]
+        self.store.create(job_id, len(products), len(chunks))
+        if not chunks:
+            self.store.chunk_done(job_id)
+        for chunk in chunks:
+            self._executor.submit(self._run_chunk, job_id, chunk)
+        return job_id
+
+    def get(self, job_id: str):
+        """คืนสถานะ job หรือ None ถ้าไม่พบ"""
+        return self.store.get(job_id)
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+    def _run_chunk(self, job_id, chunk):
+        try:
+            self.store.start(job_id)
+            pending = list(chunk)
+            last_error = None
+            for attempt in range(self.max_retries + 1):
+                if attempt:
+                    # exponential backoff + jitter เพื่อไม่ให้ทุก worker ยิงซ้ำพร้อมกัน
+                    time.sleep(self.backoff * (2 ** (attempt - 1)) * (1 + random.random() * 0.25))
+                try:
+                    results = self.describe_batch(pending) or {}
+                    results = {p['id']: results[p['id']] for p in pending if results.get(p['id'])}
+                    if results:
+                        self.save_results(results)
+                        self.store.record(job_id, results=results)
+                    pending = [p for p in pending if p['id'] not in results]
+                    if not pending:
+                        break
+                    last_error = 'missing from AI response'
+                except Exception as e:
+                    last_error = str(e)
+                    print(f"Error generating batch descriptions (attempt {attempt + 1}): {last_error}")
+
+            if pending:
+                self.store.record(job_id, errors={p['id']: last_error for p in pending})
+            self.store.chunk_done(job_id)
+        except Exception as e:
+            # store ใช้ไม่ได้ (เช่นฐานข้อมูลล่ม): สถานะ job ค้างที่เดิม แต่ไม่ให้ error หายเงียบใน thread pool
+            print(f"Error updating description job {job_id}: {e}")
@@ -0,0 +1,212 @@
+"""ชั้นป้องกันรอบ OpenAI client: deadline ต่อการเรียก, จำกัดจำนวนการเรียกพร้อมกัน และ circuit breaker
+
+`ResilientClient` ห่อ client เดิมโดยคง interface `client.chat.completions.create(...)` ไว้
+โค้ดใน app.py จึงไม่ต้องเปลี่ยน เมื่อ upstream ช้าหรือล่ม การเรียกจะ raise ทันที
+(`AIUnavailableError`) และ except เดิมใน app.py จะคืนข้อความ fallback ภาษาไทยภายในไม่กี่ ms
+"""
+import bisect
+import threading
+import time
+from types import SimpleNamespace
+
+
+class AIUnavailableError(Exception):
+    """ไม่ได้เรียก upstream เพราะ circuit เปิดอยู่ หรือจำนวนการเรียกพร้อมกันเต็ม"""
+
+
+class LatencyHistogram:
+    """Histogram แบบ bucket คงที่ (วินาที) สำหรับเวลาตอบของ upstream"""
+
+    BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        idx = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[idx] += 1
+            self.total += seconds
+            self.count += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self.counts)
+            total, count = self.total, self.count
+        cumulative, running = {}, 0
+        for bound, n in zip(self.buckets + (float('inf'),), counts):
+            running += n
+            cumulative['+Inf' if bound == float('inf') else str(bound)] = running
+        return {'buckets': cumulative, 'count': count, 'sum': round(total, 6)}
+
+
+class CircuitBreaker:
+    """closed -> (ล้มเหลวติดกัน failure_threshold ครั้ง) -> open
+    open -> (ครบ reset_timeout วินาที) -> half_open: ปล่อย probe ทีละ 1 การเรียก
+    half_open -> probe สำเร็จ -> closed / probe ล้มเหลว -> open อีกครั้ง
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.opened_count = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+            if self.state == 'half_open' and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == 'half_open' or self.consecutive_failures >= self.failure_threshold:
+                if self.state != 'open':
+                    self.opened_count += 1
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def release_probe(self):
+        """คืนสิทธิ์ probe ของ half-open เมื่อไม่ได้เรียก upstream จริง"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            data = {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'opened_count': self.opened_count,
+                'failure_threshold': self.failure_threshold,
+                'reset_timeout': self.reset_timeout,
+            }
+            if self.state == 'open':
+                data['retry_in'] = round(max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at)), 3)
+            return data
+
+
+class ResilientClient:
+    """ห่อ OpenAI client ด้วย deadline, concurrency cap และ circuit breaker
+
+    client: OpenAI client หรือ None ถ้าให้ client_factory สร้างเมื่อมีการเรียกครั้งแรก
+        (ไม่ต้อง import openai ตอนเริ่ม process)
+    timeout: deadline ต่อการเรียก (วินาที) ส่งเป็น `timeout=` ให้ client และใช้ตรวจเวลารวมของ stream
+    max_concurrency: จำนวนการเรียก upstream พร้อมกันสูงสุด
+    acquire_timeout: เวลารอ slot ว่างก่อนยอมแพ้ (สั้นๆ เพื่อไม่ให้ worker ค้าง)
+    """
+
+    def __init__(self, client, timeout: float = 10.0, max_concurrency: int = 8, acquire_timeout: float = 0.05,
+                 failure_threshold: int = 5, reset_timeout: float = 30.0, client_factory=None):
+        self._client = client
+        self._client_factory = client_factory
+        self.timeout = timeout
+        self.acquire_timeout = acquire_timeout
+        self.max_concurrency = max_concurrency
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.latency = LatencyHistogram()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._counters = {'calls': 0, 'successes': 0, 'failures': 0, 'short_circuited': 0, 'rejected_busy': 0}
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._client_factory()
+        return self._client
+
+    def _count(self, name, delta=1):
+        with self._lock:
+            self._counters[name] += delta
+
+    def _enter(self):
+        if not self.breaker.allow():
+            self._count('short_circuited')
+            raise AIUnavailableError('AI circuit is open')
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            # ไม่นับเป็น failure ของ upstream แต่ต้องคืน probe ถ้าเป็น half-open
+            self.breaker.release_probe()
+            self._count('rejected_busy')
+            raise AIUnavailableError('Too many concurrent AI calls')
+        with self._lock:
+            self._in_flight += 1
+            self._counters['calls'] += 1
+
+    def _exit(self, started, ok):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+        self.latency.observe(time.perf_counter() - started)
+        if ok:
+            self.breaker.record_success()
+            self._count('successes')
+        else:
+            self.breaker.record_failure()
+            self._count('failures')
+
+    def _create(self, *args, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        self._enter()
+        started = time.perf_counter()
+        try:
+            result = self.client.chat.completions.create(*args, **kwargs)
+        except Exception:
+            self._exit(started, False)
+            raise
+        if kwargs.get('stream'):
+            return self._guard_stream(result, started)
+        self._exit(started, True)
+        return result
+
+    def _guard_stream(self, stream, started):
+        """ถือ slot ไว้จน stream จบ และตัดทิ้งถ้าเวลารวมเกิน deadline"""
+        ok = False
+        try:
+            for chunk in stream:
+                if time.perf_counter() - started > self.timeout:
+                    raise TimeoutError('AI stream exceeded deadline')
+                yield chunk
+            ok = True
+        except GeneratorExit:
+            # ผู้ใช้ปิดการเชื่อมต่อกลางทาง ไม่ใช่ความผิดของ upstream
+            ok = True
+            raise
+        finally:
+            self._exit(started, ok)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            in_flight = self._in_flight
+        return {
+            'breaker': self.breaker.snapshot(),
+            'in_flight': in_flight,
+            'max_concurrency': self.max_concurrency,
+            'timeout': self.timeout,
+            'counters': counters,
+            'latency_seconds': self.latency.snapshot(),
+        }
@@ -1,14 +1,39 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, Response, make_response, send_file
 from flask_sqlalchemy import SQLAlchemy
 import os
-from werkzeug.utils import secure_filename
+import json
+import csv
 import socket
-import random
-try:
-    from openai import OpenAI
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
+import time
+import asyncio
+import importlib.util
+import zlib
+import atexit
+import math
+from faq import FAQEngine
+from ai_cache import AnswerCache
+from ai_jobs import DescriptionJobQueue, final_status
+from ai_resilience import ResilientClient
+from admission import AdmissionGate, TokenBucketStore
+from catalog_cache import CatalogCache, PageCache, ProductRecord
+from storage import database_uri, engine_options, insert_ignore, insert_or_update, run_migrations
+from images import ImageStore
+import images
+from assets import AssetManifest
+import assets
+import catalog_io
+import search
+from order_queue import WriteBehindQueue
+from counters import CoalescingCounter
+from metrics import Metrics
+from recommend import NUMPY_AVAILABLE, SimilarityIndex
+from ai_async import ASGIApp, AsyncResilientClient, JSONResponse, SingleFlight, StreamingResponse
+from itsdangerous import BadSignature
+from sqlalchemy.exc import IntegrityError
+import uuid
+from datetime import datetime, timedelta
+# openai ถูก import ตอนเรียก AI ครั้งแรก (ใช้เวลา import หลายร้อย ms) จึงตรวจแค่ว่าติดตั้งไว้หรือไม่
+OPENAI_AVAILABLE = importlib.util.find_spec('openai') is not None
 
 # สร้าง Flask Application
 app = Flask(__name__)
@@ -17,29 +42,168 @@ app = Flask(__name__)
 app.secret_key = 'deluxe_cafe_secret_key_2024'
 
 # ตั้งค่า Database
-# ใช้ SQLite เก็บไฟล์ shop.db ในตำแหน่งเดียวกับ app.py
+# ใช้ SQLite เก็บไฟล์ shop.db ในตำแหน่งเดียวกับ app.py (เปลี่ยนได้ด้วย DATABASE_URL)
+# pragmas (WAL, busy_timeout, ...) และ connection pool ตั้งค่าใน storage.py
 basedir = os.path.abspath(os.path.dirname(__file__))
-app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(basedir, "shop.db")}'
+app.config['SQLALCHEMY_DATABASE_URI'] = database_uri(os.path.join(basedir, 'shop.db'))
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
 # เริ่มต้น SQLAlchemy
 db = SQLAlchemy(app)
 
+# ==================== Metrics ====================
+# latency ต่อ route, จำนวน/เวลา SQL ต่อ request (ตรวจ slow query และ N+1) และเวลา/token ของ OpenAI
+# ดูได้ที่ /metrics (Prometheus text format) และ header Server-Timing เมื่อ SERVER_TIMING=1
+metrics = Metrics(
+    slow_query_ms=float(os.getenv('SLOW_QUERY_MS', '100')),
+    n_plus_one_threshold=int(os.getenv('N_PLUS_ONE_THRESHOLD', '10')),
+    server_timing=os.getenv('SERVER_TIMING', '0') != '0'
+)
+with app.app_context():
+    metrics.install_sql_hooks(db.engine)
+
+@app.before_request
+def start_request_metrics():
+    rule = request.url_rule
+    metrics.start_request(request.method, rule.rule if rule else 'unmatched')
+
+@app.after_request
+def finish_request_metrics(response):
+    stats = metrics.finish_request(response.status_code)
+    if stats is not None and metrics.server_timing:
+        response.headers['Server-Timing'] = metrics.server_timing_header(stats)
+    return response
+
 # ==================== OpenAI Configuration ====================
+# client ถูกห่อด้วย ResilientClient: timeout ต่อการเรียก, จำกัดการเรียกพร้อมกัน และ circuit breaker
+# เมื่อ upstream ช้า/ล่ม ผู้ใช้จะได้ข้อความ fallback ทันทีแทนการรอจน worker ค้าง
+# ตัว OpenAI client สร้างเมื่อมีการเรียกครั้งแรก (client_factory) ไม่ใช่ตอน import app
 openai_client = None
+async_openai_client = None
 if OPENAI_AVAILABLE:
     api_key = os.getenv('OPENAI_API_KEY')
     if api_key:
-        openai_client = OpenAI(api_key=api_key)
+        ai_timeout = float(os.getenv('AI_TIMEOUT', '10'))
 
-def generate_product_description(product_name: str, product_price: float = None) -> str:
-    """สร้างรายละเอียดสินค้าด้วย OpenAI API"""
-    if not openai_client:
-        return f"กาแฟพรีเมียม: {product_name}"
-    
+        def _make_openai_client():
+            from openai import OpenAI
+            return OpenAI(api_key=api_key, timeout=ai_timeout, max_retries=0)
+
+        openai_client = ResilientClient(
+            None,
+            client_factory=_make_openai_client,
+            timeout=ai_timeout,
+            max_concurrency=int(os.getenv('AI_MAX_CONCURRENCY', '8')),
+            failure_threshold=int(os.getenv('AI_BREAKER_FAILURES', '5')),
+            reset_timeout=float(os.getenv('AI_BREAKER_RESET', '30'))
+        )
+
+        # client ของ route AI แบบ async (asgi.py) ใช้ circuit breaker ตัวเดียวกัน
+        # แต่การรอ OpenAI ไม่ถือ thread จึงให้มีคำถามค้างพร้อมกันได้เป็นหลักร้อย
+        def _make_async_openai_client():
+            from openai import AsyncOpenAI
+            return AsyncOpenAI(api_key=api_key, timeout=ai_timeout, max_retries=0)
+
+        async_openai_client = AsyncResilientClient(
+            _make_async_openai_client,
+            timeout=ai_timeout,
+            max_concurrency=int(os.getenv('AI_ASYNC_MAX_CONCURRENCY', '256')),
+            acquire_timeout=float(os.getenv('AI_ASYNC_QUEUE_TIMEOUT', '5')),
+            breaker=openai_client.breaker
+        )
+
+def openai_chat(operation: str, **kwargs):
+    """เรียก chat completion และบันทึกเวลา/จำนวน token ลง metrics แยกตาม operation"""
+    started = time.perf_counter()
     try:
-        price_info = f" ราคา {product_price} บาท" if product_price else ""
-        prompt = f"""สร้างคำอธิบายสินค้ากาแฟสั้นๆ (ไม่เกิน 100 คำ) สำหรับ:
+        message = openai_client.chat.completions.create(**kwargs)
+    except Exception:
+        metrics.observe_ai(operation, time.perf_counter() - started, ok=False)
+        raise
+    metrics.observe_ai(operation, time.perf_counter() - started, getattr(message, 'usage', None))
+    return message
+
+# ==================== FAQ (canned answers) ====================
+# กฎ keyword -> answer อยู่ในไฟล์ faq_rules.json (แก้ไขได้โดยไม่ต้อง redeploy)
+faq_engine = FAQEngine(os.getenv('FAQ_RULES_PATH', os.path.join(basedir, 'faq_rules.json')))
+
+# ==================== AI Answer Cache ====================
+# cache คำตอบจาก OpenAI (LRU + TTL) เก็บถาวรใน ai_cache.db เพื่อให้อยู่รอดหลัง restart
+ai_cache_path = os.getenv('AI_CACHE_DB', os.path.join(basedir, 'ai_cache.db'))
+answer_cache = AnswerCache(
+    ai_cache_path,
+    max_entries=int(os.getenv('AI_CACHE_SIZE', '1024')),
+    ttl=float(os.getenv('AI_CACHE_TTL', '86400')),
+    max_disk_entries=int(os.getenv('AI_CACHE_DISK_SIZE', '50000'))
+)
+
+# ==================== AI Admission Control ====================
+# คำถามที่ต้องเรียก OpenAI ต้องผ่าน token bucket ต่อลูกค้าและ AdmissionGate ก่อน (admission.py)
+# คำตอบสำเร็จรูปและคำตอบใน cache ไม่ถึง OpenAI จึงตอบได้เสมอ
+# bucket เก็บในไฟล์ SQLite ที่ทุก worker ใช้ร่วมกัน (ค่าตั้งต้นคือไฟล์เดียวกับ AI cache)
+ai_rate_limits = TokenBucketStore(os.getenv('AI_RATE_LIMIT_DB', ai_cache_path))
+AI_RATE_PER_MINUTE = float(os.getenv('AI_RATE_LIMIT_PER_MINUTE', '6'))
+AI_RATE_BURST = float(os.getenv('AI_RATE_LIMIT_BURST', '5'))
+# bucket รวมต่อ IP ใหญ่กว่า bucket ต่อลูกค้า (ลูกค้าหลายคนอาจอยู่หลัง NAT เดียวกัน) กันการสร้าง session ใหม่เพื่อเลี่ยง
+AI_RATE_IP_FACTOR = float(os.getenv('AI_RATE_LIMIT_IP_FACTOR', '4'))
+
+# route AI ของ Flask ถือ worker thread ตลอดเวลาที่รอ OpenAI จึงให้ใช้ได้ไม่เกินครึ่งหนึ่งของ thread (รวมคิว)
+# ที่เหลือไว้ให้หน้าร้าน ส่วน route async ไม่ถือ thread จึงรับได้เท่า AI_ASYNC_MAX_CONCURRENCY
+web_threads = int(os.getenv('WEB_THREADS', '8'))
+ai_gate = AdmissionGate(
+    max_in_flight=int(os.getenv('AI_ADMISSION_MAX_IN_FLIGHT', str(max(1, web_threads * 3 // 8)))),
+    max_queue=int(os.getenv('AI_ADMISSION_QUEUE', str(max(1, web_threads // 8)))),
+    queue_timeout=float(os.getenv('AI_ADMISSION_WAIT', '1'))
+)
+ai_async_gate = AdmissionGate(
+    max_in_flight=int(os.getenv('AI_ASYNC_MAX_CONCURRENCY', '256')),
+    max_queue=int(os.getenv('AI_ASYNC_ADMISSION_QUEUE', '64')),
+    queue_timeout=float(os.getenv('AI_ASYNC_QUEUE_TIMEOUT', '5'))
+)
+AI_THROTTLED_MESSAGES = {
+    'rate': 'Too many questions, please wait before asking again',
+    'busy': 'The AI assistant is busy, please try again shortly',
+}
+
+def ai_rate_buckets(visitor, ip) -> list:
+    """bucket ที่คำถามหนึ่งข้อต้องหัก token: ต่อลูกค้า (visitor id หรือ IP ถ้าไม่มี session) และรวมต่อ IP"""
+    rate = AI_RATE_PER_MINUTE / 60
+    return [
+        (f'visitor:{visitor}' if visitor else f'ip:{ip}', rate, AI_RATE_BURST),
+        (f'ip-all:{ip}', rate * AI_RATE_IP_FACTOR, AI_RATE_BURST * AI_RATE_IP_FACTOR),
+    ]
+
+def ai_throttled(reason: str, retry_after: float) -> tuple:
+    """(payload, headers) ของคำตอบ 429"""
+    seconds = max(1, math.ceil(retry_after))
+    return ({'error': AI_THROTTLED_MESSAGES[reason], 'success': False, 'retry_after': seconds},
+            {'Retry-After': str(seconds)})
+
+def ready_ai_answer(question: str):
+    """คำตอบที่ได้โดยไม่เรียก OpenAI (คำตอบสำเร็จรูปหรืออยู่ใน cache) หรือ None
+
+    route ส่งคำตอบนี้ให้ลูกค้าเลยโดยไม่ผ่าน admission control และไม่ค้น cache ซ้ำ:
+    hit จึงนับครั้งเดียว และ entry ที่หมดอายุระหว่างตรวจกับตอบจะไม่ทำให้เรียก OpenAI โดยไม่ผ่าน rate limit
+    """
+    q = (question or '').strip()
+    return canned_ai_answer(q) or answer_cache.get(AnswerCache.make_key('ask', q))
+
+def admit_ai_request(visitor, ip):
+    """ตรวจ rate limit แล้วขอ slot จาก ai_gate คืน None เมื่อผ่าน (ผู้เรียกต้อง ai_gate.release()) หรือ response 429"""
+    wait = ai_rate_limits.take(ai_rate_buckets(visitor, ip))
+    if wait:
+        payload, headers = ai_throttled('rate', wait)
+    elif not ai_gate.acquire():
+        payload, headers = ai_throttled('busy', ai_gate.retry_after)
+    else:
+        return None
+    return jsonify(payload), 429, headers
+
+def description_messages(product_name: str, product_price: float = None) -> list:
+    """สร้าง messages สำหรับ chat completion ของคำอธิบายสินค้าหนึ่งชิ้น"""
+    price_info = f" ราคา {product_price} บาท" if product_price else ""
+    prompt = f"""สร้างคำอธิบายสินค้ากาแฟสั้นๆ (ไม่เกิน 100 คำ) สำหรับ:
 ชื่อสินค้า: {product_name}
 {price_info}
 
@@ -49,98 +213,188 @@ def generate_product_description(product_name: str, product_price: float = None)
 - อันดับเหมาะสำหรับคนไหน
 
 ตอบเป็นภาษาไทยเท่านั้น"""
-        
-        message = openai_client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a helpful coffee shop assistant that creates engaging product descriptions in Thai."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=150,
-            temperature=0.7
-        )
-        return message.choices[0].message.content.strip()
+    return [
+        {"role": "system", "content": "You are a helpful coffee shop assistant that creates engaging product descriptions in Thai."},
+        {"role": "user", "content": prompt}
+    ]
+
+def generate_product_description(product_name: str, product_price: float = None) -> str:
+    """สร้างรายละเอียดสินค้าด้วย OpenAI API"""
+    if not openai_client:
+        return f"กาแฟพรีเมียม: {product_name}"
+    
+    try:
+        def _call_openai():
+            message = openai_chat(
+                'description',
+                model="gpt-3.5-turbo",
+                messages=description_messages(product_name, product_price),
+                max_tokens=150,
+                temperature=0.7
+            )
+            return message.choices[0].message.content.strip()
+
+        cache_key = AnswerCache.make_key('desc', product_name, product_price or '')
+        return answer_cache.get_or_compute(cache_key, _call_openai)
     except Exception as e:
         print(f"Error generating description: {str(e)}")
         return f"กาแฟพรีเมียม: {product_name} - คุณภาพดี ลิ้มสดชื่น"
 
-def ask_ai_question(question: str) -> str:
-    """ตอบคำถามเกี่ยวกับกาแฟด้วย OpenAI API"""
-    # First, handle preset (canned) questions with deterministic answers
-    q = (question or '').strip()
-    q_norm = q.lower()
-    
-    # Check Thai keywords BEFORE lowercasing (Thai doesn't have case anyway)
-    # English keywords can use lowercased version
-    
-    # French and Espresso with both Thai and English
-    if 'french' in q_norm or 'french press' in q_norm or 'แฟรนช์' in q:
-        return (
-            "วิธีชง French Press: ใส่กาแฟบดหยาบลงในหม้อ โรยลงและเทน้ำร้อน 90-96°C หมั่นนึ่ง 30 วินาที แล้วเทหมดเพิ่มพื้นให้ได้ 90-96°C เฟชเซ (plunger) โดยค่อยๆ กดลง 3-4 นาที ได้รสชาติเข้มข้นและเต็มบอดี้"
-        )
-    if 'espresso' in q_norm or 'เอสเพรส' in q or 'เอสเพรสโซ' in q:
-        return (
-            "วิธีชง เอสเพรสโซ: ใช้เครื่องชงเอสเพรสโซ ใส่กาแฟบดละเอียด (fine grind) ประมาณ 18-20 เมล็ดบด กดแรงพอสมควร (tamping) ขึ้นเครื่องชง ใช้น้ำที่อุณหภูมิ 92-96°C ความดัน 9 บาร์ ชงประมาณ 25-30 วินาที ได้น้ำกาแฟประมาณ 30 มล. ที่มีกลิ่นหอมและรสเข้มข้น"
-        )
-    
-    # Preset mappings (matches by keyword)
-    if any(k in q_norm for k in ['pour-over', 'pour over', 'pourover', 'pour-over?', 'pour'] ) or 'พัวร์' in q:
-        return (
-            "วิธีชง pour-over: อุ่นตัวกรวยและกระดาษกรองด้วยน้ำร้อนก่อน ใส่กาแฟบดขนาดกลาง-หยาบ (อัตราส่วนน้ำต่อกาแฟประมาณ 15:1) เทน้ำรอบแรกเล็กน้อยให้กาแฟบลูม 30-45 วินาที แล้วค่อยๆ เทน้ำเป็นวงกลมจนได้ปริมาณที่ต้องการ ระดับอุณหภูมิน้ำประมาณ 92-96°C จะได้รสชาติที่ชัดเจนและสมดุล"
-        )
-    if 'arabica' in q_norm or 'robusta' in q_norm or 'อาราบิก้า' in q or 'โรบัสต้า' in q:
-        return (
-            "ความแตกต่าง: Arabica ให้กลิ่นหอมซับซ้อนและรสชาติหวาน-เปรี้ยวเล็กน้อย มีกรดผลไม้ ส่วน Robusta มักให้คาเฟอีนมากกว่า รสเข้มและขม เหมาะสำหรับกาแฟที่ต้องการบอดี้หนาหรือผสมในเอสเพรสโซ่"
-        )
-    if 'สุขภาพ' in q or 'ผลกระทบ' in q or 'คนท้อง' in q or 'preg' in q_norm or 'pregnant' in q_norm:
-        return (
-            "ผลกระทบต่อสุขภาพ: การดื่มกาแฟในปริมาณปกติ (1-3 แก้ว/วัน) สำหรับผู้ใหญ่สุขภาพดีมักปลอดภัย คาเฟอีนอาจส่งผลต่อการนอนหรือหัวใจในบางคน ผู้ตั้งครรภ์ควรจำกัดปริมาณและปรึกษาแพทย์ หากมีภาวะสุขภาพควรปรึกษาแพทย์ก่อน"
-        )
-    if 'เก็บ' in q or 'storage' in q_norm:
-        return (
-            "วิธีเก็บเมล็ดกาแฟ: เก็บเมล็ดในภาชนะทึบแสงและปิดสนิท หลีกเลี่ยงความชื้นและความร้อน เก็บที่อุณหภูมิห้องและบดเมื่อจะชงใช้งานเพื่อรักษากลิ่นหอมและรสชาติ"
-        )
-    if 'สายพันธุ์' in q or 'variety' in q_norm or 'breed' in q_norm:
-        return (
-            "แนะนำสายพันธุ์กาแฟสำหรับเอสเพรสโซ: เลือกกาแฟคั่วเข้ม (dark roast) เช่น Brazilian Santos, Indonesian Sumatra หรอื Italian Roast ที่มีบอดี้หนาและรสขมหวม เหมาะสมำหรับการชงที่ต้องการ crema ที่สวยงาม"
-        )
-    if 'ลด' in q or 'reduce bitterness' in q_norm:
-        return (
-            "วิธีลดความขมของกาแฟ: ใช้น้ำอุณหภูมิไม่เกิน 96°C (ความร้อนจะทำให้ขม), ลดเวลาชง, หรือใช้กาแฟคั่วอ่อน แทน นอกจากนี้สามารถเพิ่มนม ครีม หรือน้ำตาลเพื่อลดความขมและรสชาติที่หนัก"
-        )
-    if 'ไม่ชอบ' in q or 'รสขม' in q or 'ไม่ชอบรสขม' in q or 'ไม่ชอบขม' in q:
-        return (
-            "เมนูแนะนำสำหรับคนไม่ชอบรสขม: ลองเมนูที่ใส่นมเยอะขึ้น เช่น Latte หรือ Flat White, หรือเลือกกาแฟคั่วอ่อน (light roast) ที่มีความเปรี้ยว-หวานแทนความขม และเพิ่มไซรัปรสหวานหรือคาราเมลตามชอบ"
-        )
+def generate_product_descriptions_batch(products) -> dict:
+    """สร้างรายละเอียดสินค้าหลายชิ้นใน prompt เดียว (ใช้โดย background job)
+
+    products: list ของ dict ที่มี 'id', 'name', 'price'
+    คืน dict {product_id: description} ถ้าเรียก API ไม่สำเร็จจะ raise เพื่อให้ job retry
+    ไม่มีข้อความ fallback: ผลของฟังก์ชันนี้ถูกเขียนทับ Product.description จึงต้องเป็นคำอธิบายจาก AI เท่านั้น
+    """
+    if not openai_client:
+        raise RuntimeError('OpenAI is not configured')
+
+    lines = "\n".join(
+        f"- id {p['id']}: {p['name']}" + (f" ราคา {p['price']} บาท" if p.get('price') else "")
+        for p in products
+    )
+    prompt = f"""สร้างคำอธิบายสินค้ากาแฟสั้นๆ (ไม่เกิน 100 คำต่อชิ้น) สำหรับสินค้าต่อไปนี้:
+{lines}
+
+ให้รายละเอียดเกี่ยวกับ:
+- คุณสมบัติของกาแฟ
+- ลักษณะรสชาติ
+- อันดับเหมาะสำหรับคนไหน
+
+ตอบเป็นภาษาไทยเท่านั้น ในรูปแบบ JSON object ที่ key คือ id ของสินค้า และ value คือคำอธิบาย"""
+
+    message = openai_chat(
+        'description_batch',
+        model="gpt-3.5-turbo",
+        messages=[
+            {"role": "system", "content": "You are a helpful coffee shop assistant that creates engaging product descriptions in Thai. Reply with a JSON object only."},
+            {"role": "user", "content": prompt}
+        ],
+        max_tokens=200 * len(products),
+        temperature=0.7
+    )
+    content = message.choices[0].message.content.strip()
+    # โมเดลบางครั้งครอบ JSON ด้วย ```json ... ``` จึงตัดเอาเฉพาะส่วน {...}
+    data = json.loads(content[content.find('{'):content.rfind('}') + 1])
+    return {int(k): str(v).strip() for k, v in data.items() if str(k).strip().isdigit() and v}
+
+# ข้อความตอบกลับเมื่อยังไม่ได้ตั้งค่า OpenAI และเมื่อเรียก API ไม่สำเร็จ
+AI_UNAVAILABLE_ANSWER = (
+    "ขณะนี้ระบบ AI ยังไม่พร้อมใช้งาน แต่ฉันช่วยได้ด้วยคำแนะนำทั่วไป: - ถามเกี่ยวกับประเภทกาแฟ (เช่น Arabica, Robusta) - ถามเกี่ยวกับวิธีการชง (เช่น Espresso, Pour-over) - ถามเกี่ยวกับผลกระทบต่อสุขภาพ ขออภัย ฉันยังไม่สามารถเชื่อมต่อกับบริการ AI ได้ขณะนี้ แต่สามารถให้คำแนะนำทั่วไปเกี่ยวกับกาแฟได้ โปรดลองถามโดยระบุหัวข้อ เช่น 'วิธีชง', 'ประเภทกาแฟ' หรือ 'ผลกระทบต่อสุขภาพ'"
+)
+AI_ERROR_ANSWER = "ขออภัย ไม่สามารถประมวลผลคำถามได้ กรุณาลองใหม่"
+
+def canned_ai_answer(question: str):
+    """คืนคำตอบที่ไม่ต้องเรียก OpenAI (คำถามสำเร็จรูป หรือข้อความเมื่อ AI ยังไม่พร้อม) หรือ None"""
+    # คำถามสำเร็จรูป: จับคู่ keyword ทั้งหมด (ไทย/อังกฤษ) ในการสแกนรอบเดียว
+    # ลำดับความสำคัญตามไฟล์ faq_rules.json (French/Espresso ก่อน แล้วจึง preset อื่นๆ)
+    canned = faq_engine.answer(question)
+    if canned:
+        return canned
 
     # If OpenAI client is not configured, return the generic guidance message
     if not openai_client:
-        return (
-            "ขณะนี้ระบบ AI ยังไม่พร้อมใช้งาน แต่ฉันช่วยได้ด้วยคำแนะนำทั่วไป: - ถามเกี่ยวกับประเภทกาแฟ (เช่น Arabica, Robusta) - ถามเกี่ยวกับวิธีการชง (เช่น Espresso, Pour-over) - ถามเกี่ยวกับผลกระทบต่อสุขภาพ ขออภัย ฉันยังไม่สามารถเชื่อมต่อกับบริการ AI ได้ขณะนี้ แต่สามารถให้คำแนะนำทั่วไปเกี่ยวกับกาแฟได้ โปรดลองถามโดยระบุหัวข้อ เช่น 'วิธีชง', 'ประเภทกาแฟ' หรือ 'ผลกระทบต่อสุขภาพ'"
-        )
-    
-    try:
-        prompt = f"""คุณเป็นผู้เชี่ยวชาญด้านกาแฟและยังเป็นเจ้าหน้าที่ของร้านกาแฟ Deluxe Cafe 
+        return AI_UNAVAILABLE_ANSWER
+    return None
+
+def ask_ai_messages(question: str) -> list:
+    """สร้าง messages สำหรับ chat completion ของคำถามลูกค้า"""
+    prompt = f"""คุณเป็นผู้เชี่ยวชาญด้านกาแฟและยังเป็นเจ้าหน้าที่ของร้านกาแฟ Deluxe Cafe 
 กรุณาตอบคำถามต่อไปนี้เกี่ยวกับกาแฟ ประเภทกาแฟ วิธีการดื่ม สุขภาพ และสินค้าของเรา
 ตอบอย่างเป็นมิตร สั้นกระชับ และมีประโยชน์ (ไม่เกิน 150 คำ)
 
 คำถาม: {question}
 
 ตอบเป็นภาษาไทยเท่านั้น"""
-        
-        message = openai_client.chat.completions.create(
+    return [
+        {"role": "system", "content": "You are a friendly and knowledgeable coffee expert and barista at Deluxe Cafe coffee shop. You help customers with coffee knowledge, product information, and brewing advice in Thai."},
+        {"role": "user", "content": prompt}
+    ]
+
+def ask_ai_question(question: str) -> str:
+    """ตอบคำถามเกี่ยวกับกาแฟด้วย OpenAI API"""
+    # First, handle preset (canned) questions with deterministic answers
+    q = (question or '').strip()
+    canned = canned_ai_answer(q)
+    if canned:
+        return canned
+    
+    try:
+        def _call_openai():
+            message = openai_chat(
+                'ask',
+                model="gpt-3.5-turbo",
+                messages=ask_ai_messages(question),
+                max_tokens=200,
+                temperature=0.7
+            )
+            return message.choices[0].message.content.strip()
+
+        # คำถามซ้ำ (เช่นกดปุ่ม preset เดียวกัน) ใช้คำตอบจาก cache และเรียก OpenAI ครั้งเดียว
+        return answer_cache.get_or_compute(AnswerCache.make_key('ask', q), _call_openai)
+    except Exception as e:
+        print(f"Error answering question: {str(e)}")
+        return AI_ERROR_ANSWER
+
+def stream_ai_answer(question: str, answer: str = None):
+    """Generator ของ Server-Sent Events สำหรับคำตอบ AI แบบทยอยส่ง
+
+    answer: คำตอบสำเร็จรูปหรือคำตอบใน cache จาก ready_ai_answer() ส่งเป็น event เดียวทันที
+    ส่วนคำถามใหม่จะส่ง token ตามที่โมเดลสร้าง (stream=True) แล้วปิดท้ายด้วย event `done`
+    ซึ่งรายงาน time-to-first-byte (ttfb_ms) คู่กับเวลารวม (total_ms)
+    """
+    started = time.perf_counter()
+    ttfb = None
+
+    def sse(event, payload):
+        return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+    def elapsed_ms():
+        return round((time.perf_counter() - started) * 1000, 1)
+
+    if answer:
+        ttfb = elapsed_ms()
+        yield sse('delta', {'text': answer})
+        yield sse('done', {'ttfb_ms': ttfb, 'total_ms': elapsed_ms(), 'streamed': False})
+        return
+
+    cache_key = AnswerCache.make_key('ask', (question or '').strip())
+    answer_cache.record_miss()
+    parts = []
+    try:
+        stream = openai_client.chat.completions.create(
             model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a friendly and knowledgeable coffee expert and barista at Deluxe Cafe coffee shop. You help customers with coffee knowledge, product information, and brewing advice in Thai."},
-                {"role": "user", "content": prompt}
-            ],
+            messages=ask_ai_messages(question),
             max_tokens=200,
-            temperature=0.7
+            temperature=0.7,
+            stream=True
         )
-        return message.choices[0].message.content.strip()
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            text = chunk.choices[0].delta.content
+            if not text:
+                continue
+            if ttfb is None:
+                ttfb = elapsed_ms()
+            parts.append(text)
+            yield sse('delta', {'text': text})
     except Exception as e:
-        print(f"Error answering question: {str(e)}")
-        return f"ขออภัย ไม่สามารถประมวลผลคำถามได้ กรุณาลองใหม่"
+        print(f"Error streaming answer: {str(e)}")
+        metrics.observe_ai('ask_stream', time.perf_counter() - started, ok=False)
+        if not parts:
+            ttfb = elapsed_ms()
+            yield sse('delta', {'text': AI_ERROR_ANSWER})
+        yield sse('done', {'ttfb_ms': ttfb, 'total_ms': elapsed_ms(), 'streamed': bool(parts), 'error': True})
+        return
+
+    # stream ไม่มี usage ใน response จึงบันทึกเฉพาะเวลา
+    metrics.observe_ai('ask_stream', time.perf_counter() - started)
+    answer = ''.join(parts).strip()
+    if answer:
+        answer_cache.set(cache_key, answer)
+    yield sse('done', {'ttfb_ms': ttfb, 'total_ms': elapsed_ms(), 'streamed': True})
 
 # ==================== Models ====================
 class Product(db.Model):
@@ -152,8 +406,13 @@ class Product(db.Model):
     price = db.Column(db.Float, nullable=False)
     image_url = db.Column(db.String(255), nullable=True)
     description = db.Column(db.String(500), nullable=True)
-    is_favorite = db.Column(db.Boolean, default=False)
+    # จำนวนลูกค้าที่กดหัวใจสินค้านี้ (ลำดับของหน้าแรก) อัปเดตเป็นชุดโดย popularity_counter
+    # คอลัมน์ is_favorite เดิมยังอยู่ในตารางแต่ไม่ได้ใช้แล้ว (สินค้าโปรดเป็นของลูกค้าแต่ละคนในตาราง favorite)
+    popularity = db.Column(db.Integer, nullable=False, default=0)
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+
+    # index สำหรับการเรียงของหน้าแรก (popularity DESC, id) สร้างโดย migration 7 ใน storage.py
+    __table_args__ = (db.Index('ix_product_popularity_id', popularity.desc(), id),)
     
     def __repr__(self):
         return f'<Product {self.name}>'
@@ -166,18 +425,873 @@ class Product(db.Model):
             'price': self.price,
             'image_url': self.image_url,
             'description': self.description,
-            'is_favorite': self.is_favorite
+            'popularity': self.popularity
         }
 
+class Favorite(db.Model):
+    """สินค้าโปรดของลูกค้าแต่ละคน (owner = visitor_id ใน session cookie) สร้างโดย migration 7"""
+    __tablename__ = 'favorite'
+
+    owner = db.Column(db.String(64), primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), primary_key=True, index=True)
+    created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+
+class Review(db.Model):
+    """Model สำหรับตาราง Review (รีวิวสินค้าจากลูกค้า)"""
+    __tablename__ = 'review'
+
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False, index=True)
+    rating = db.Column(db.Integer, nullable=False)
+    comment = db.Column(db.String(500), nullable=True)
+    author = db.Column(db.String(100), nullable=True)
+    created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+
+    def to_dict(self):
+        """แปลง Review object เป็น Dictionary"""
+        return {
+            'id': self.id,
+            'product_id': self.product_id,
+            'rating': self.rating,
+            'comment': self.comment,
+            'author': self.author,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+class ReviewStats(db.Model):
+    """สรุปรีวิวต่อสินค้า (จำนวน, ผลรวมคะแนน, รีวิวล่าสุด) อัปเดตทุกครั้งที่มีรีวิวใหม่
+
+    หน้าแรกและ dashboard อ่านตารางนี้ query เดียว แทนการ GROUP BY ตาราง review ตอนอ่าน
+    """
+    __tablename__ = 'review_stats'
+
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), primary_key=True)
+    review_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+    latest_comment = db.Column(db.String(500), nullable=True)
+
+    @property
+    def average(self) -> float:
+        return round(self.rating_sum / self.review_count, 2) if self.review_count else 0.0
+
+    def to_dict(self):
+        return {'product_id': self.product_id, 'count': self.review_count, 'average': self.average}
+
+class CatalogVersion(db.Model):
+    """เลขเวอร์ชันของแคตตาล็อกสินค้า (มีแถวเดียว) เพิ่มขึ้นทุกครั้งที่สินค้าถูกแก้ไข
+
+    ใช้ทำ ETag ของ /api/products โดยไม่ต้อง hash ข้อมูลทั้งหมด
+    """
+    __tablename__ = 'catalog_version'
+
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    # tombstone ของ product_change ที่เวอร์ชัน <= ค่านี้ถูก compact ทิ้งแล้ว (ดู compact_product_changes)
+    changes_horizon = db.Column(db.Integer, nullable=False, default=0)
+
+class ProductChange(db.Model):
+    """การเปลี่ยนแปลงล่าสุดของสินค้าแต่ละชิ้น (change feed ของ /api/products/changes) สร้างโดย migration 8
+
+    version คือเวอร์ชันแคตตาล็อกของ transaction ที่แก้สินค้า (bump_catalog_version) แต่ละสินค้ามีแถวเดียว
+    แก้ซ้ำก็แค่ย้ายแถวไปเวอร์ชันใหม่ ตารางจึงไม่โตเกินจำนวนสินค้า + tombstone (deleted=True) ที่ยังไม่หมดอายุ
+    """
+    __tablename__ = 'product_change'
+
+    product_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    version = db.Column(db.Integer, nullable=False)
+    deleted = db.Column(db.Boolean, nullable=False, default=False)
+    changed_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (db.Index('ix_product_change_version_id', version, product_id),)
+
+class AIJob(db.Model):
+    """สถานะ job สร้างคำอธิบายสินค้า (ai_jobs.py) ในฐานข้อมูล ทุก worker process จึง poll job เดียวกันได้ สร้างโดย migration 9"""
+    __tablename__ = 'ai_job'
+
+    id = db.Column(db.String(32), primary_key=True)
+    status = db.Column(db.String(10), nullable=False, default='queued')
+    total = db.Column(db.Integer, nullable=False)
+    completed = db.Column(db.Integer, nullable=False, default=0)
+    failed = db.Column(db.Integer, nullable=False, default=0)
+    pending_chunks = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.Float, nullable=False, index=True)  # epoch seconds (เหมือน time.time())
+    finished_at = db.Column(db.Float, nullable=True)
+
+class AIJobItem(db.Model):
+    """ผลของสินค้าแต่ละชิ้นใน job: description เมื่อสำเร็จ หรือ error เมื่อ retry ครบแล้วยังไม่ได้"""
+    __tablename__ = 'ai_job_item'
+
+    job_id = db.Column(db.String(32), db.ForeignKey('ai_job.id'), primary_key=True)
+    product_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    description = db.Column(db.String(500), nullable=True)
+    error = db.Column(db.String(500), nullable=True)
+
+class Order(db.Model):
+    """Model สำหรับตาราง orders (คำสั่งซื้อ) idempotency_key กันการสร้างซ้ำเมื่อกดยืนยันสองครั้ง"""
+    __tablename__ = 'orders'
+
+    id = db.Column(db.Integer, primary_key=True)
+    idempotency_key = db.Column(db.String(64), nullable=False, unique=True)
+    payment_method = db.Column(db.String(20), nullable=False)
+    payment_details = db.Column(db.Text, nullable=True)  # JSON เฉพาะข้อมูลที่ไม่ลับ (ไม่มีเลขบัตร/CVV)
+    subtotal = db.Column(db.Float, nullable=False)
+    shipping = db.Column(db.Float, nullable=False)
+    tax = db.Column(db.Float, nullable=False)
+    total = db.Column(db.Float, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+
+    @property
+    def order_number(self):
+        return f'ORD-{self.id:06d}'
+
+class OrderItem(db.Model):
+    """Model สำหรับตาราง order_items (สินค้าในคำสั่งซื้อ)"""
+    __tablename__ = 'order_items'
+
+    id = db.Column(db.Integer, primary_key=True)
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False, index=True)
+    product_id = db.Column(db.Integer, nullable=True)
+    name = db.Column(db.String(100), nullable=False)
+    unit_price = db.Column(db.Float, nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    options = db.Column(db.Text, nullable=True)  # JSON: size, roast, addons, notes
+
+# ฟิลด์ที่ client ขอผ่าน ?fields= ได้ (ตรงกับ Product.to_dict)
+PRODUCT_FIELDS = ('id', 'name', 'price', 'image_url', 'description', 'popularity')
+
+# change feed (/api/products/changes): เก็บ tombstone ของสินค้าที่ถูกลบกี่วัน และ compact ทุกกี่เวอร์ชันแคตตาล็อก
+CHANGE_FEED_TOMBSTONE_DAYS = float(os.getenv('CHANGE_FEED_TOMBSTONE_DAYS', '30'))
+CHANGE_FEED_COMPACT_EVERY = max(1, int(os.getenv('CHANGE_FEED_COMPACT_EVERY', '1000')))
+
+def bump_catalog_version(changed=(), deleted=(), reindex=True):
+    """เพิ่มเวอร์ชันแคตตาล็อก ต้องเรียกก่อน db.session.commit() ใน transaction เดียวกับการแก้ไขสินค้า
+
+    changed/deleted คือ id ของสินค้าที่เพิ่มหรือแก้/ลบใน transaction นี้ ถูกบันทึกลง product_change
+    ด้วยเวอร์ชันใหม่ (สินค้าที่เพิ่งสร้างต้อง db.session.flush() ก่อนเพื่อให้มี id) และซิงก์ลง product_fts
+    reindex=False สำหรับการแก้ที่ไม่เปลี่ยนชื่อหรือรายละเอียด (เช่น popularity, รูป) ไม่ต้องเขียน index ใหม่
+    UPDATE ของแถวเวอร์ชันถือ write lock จนถึง commit เวอร์ชันจึง commit เรียงกันเสมอ
+    client ที่ขอ ?since=v จึงไม่พลาดการเปลี่ยนแปลงที่ได้เวอร์ชันน้อยกว่าแต่ commit ทีหลัง
+    """
+    updated = db.session.execute(
+        db.update(CatalogVersion)
+        .where(CatalogVersion.id == 1)
+        .values(version=CatalogVersion.version + 1)
+    ).rowcount
+    if not updated:
+        db.session.add(CatalogVersion(id=1, version=1))
+    version = db.session.query(CatalogVersion.version).filter_by(id=1).scalar()
+    # ตรวจก่อน return: เวอร์ชันที่หารลงตัวอาจมาจาก bump ที่ไม่มีสินค้าเหลือให้บันทึก (เช่น popularity ของสินค้าที่ถูกลบ)
+    if version % CHANGE_FEED_COMPACT_EVERY == 0:
+        compact_product_changes()
+    if changed:
+        # สินค้าที่ถูกลบไปแล้ว (เช่น delta ของ popularity ที่ flush หลังการลบ) ต้องคงเป็น tombstone ไม่ถูกเขียนทับ
+        changed = existing_product_ids(changed)
+    if not changed and not deleted:
+        return
+    sync_search_index(changed if reindex else (), deleted)
+    now = datetime.utcnow()
+    rows = [{'product_id': pid, 'version': version, 'deleted': False, 'changed_at': now} for pid in changed]
+    rows += [{'product_id': pid, 'version': version, 'deleted': True, 'changed_at': now} for pid in deleted]
+    db.session.execute(
+        insert_or_update(ProductChange.__table__, db.engine.dialect.name, 'product_id',
+                         ('version', 'deleted', 'changed_at')),
+        rows
+    )
+
+def existing_product_ids(ids) -> list:
+    """id ใน ids ที่ยังมีแถวในตาราง product (query ละไม่เกิน 500 id)"""
+    ids = list(ids)
+    found = []
+    for start in range(0, len(ids), 500):
+        found += [pid for pid, in db.session.query(Product.id).filter(Product.id.in_(ids[start:start + 500]))]
+    return found
+
+def compact_product_changes() -> int:
+    """ลบ tombstone ที่เก่ากว่า CHANGE_FEED_TOMBSTONE_DAYS วัน และเลื่อน changes_horizon ไปที่เวอร์ชันสูงสุดที่ลบ
+    คืนจำนวนแถวที่ลบ (อยู่ใน transaction ของผู้เรียก ผู้เรียกต้อง commit)
+
+    แถวของสินค้าที่ยังอยู่ไม่ต้อง compact (มีแถวเดียวต่อสินค้าอยู่แล้ว) bump_catalog_version เรียกทุก
+    CHANGE_FEED_COMPACT_EVERY เวอร์ชัน
+    """
+    expired = db.and_(ProductChange.deleted.is_(True),
+                      ProductChange.changed_at < datetime.utcnow() - timedelta(days=CHANGE_FEED_TOMBSTONE_DAYS))
+    horizon = db.session.query(db.func.max(ProductChange.version)).filter(expired).scalar()
+    if horizon is None:
+        return 0
+    removed = db.session.execute(db.delete(ProductChange).where(expired)).rowcount
+    db.session.execute(
+        db.update(CatalogVersion)
+        .where(CatalogVersion.id == 1, CatalogVersion.changes_horizon < horizon)
+        .values(changes_horizon=horizon)
+    )
+    return removed
+
+def requested_fields():
+    """อ่าน ?fields= ของ request คืน (fields, None) หรือ (None, error response 400)"""
+    if not request.args.get('fields'):
+        return PRODUCT_FIELDS, None
+    fields = tuple(dict.fromkeys(f.strip() for f in request.args['fields'].split(',') if f.strip()))
+    unknown = [f for f in fields if f not in PRODUCT_FIELDS]
+    if unknown or not fields:
+        return None, (jsonify({'error': f'Unknown fields: {", ".join(unknown)}', 'allowed': list(PRODUCT_FIELDS)}), 400)
+    return fields, None
+
+def int_arg(name: str, default=None):
+    """อ่าน query param ที่เป็นจำนวนเต็ม raise ValueError ถ้าส่งมาแต่ไม่ใช่ตัวเลข (type=int ของ Flask คืน default เงียบๆ)"""
+    value = request.args.get(name)
+    if value is None or value == '':
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f'{name} must be an integer')
+
+def get_catalog_version() -> int:
+    """อ่านเวอร์ชันแคตตาล็อกปัจจุบัน (query เดียวบน primary key)"""
+    return db.session.query(CatalogVersion.version).filter_by(id=1).scalar() or 0
+
+def not_modified(etag: str):
+    """คืน response 304 ถ้า If-None-Match ของ client ตรงกับ etag มิฉะนั้นคืน None"""
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    return None
+
+def add_review(product_id: int, rating: int, comment: str = None, author: str = None) -> Review:
+    """เพิ่มรีวิวและอัปเดต ReviewStats ใน transaction เดียวกัน (ผู้เรียกต้อง commit)"""
+    review = Review(product_id=product_id, rating=rating, comment=comment, author=author)
+    db.session.add(review)
+    values = {
+        'review_count': ReviewStats.review_count + 1,
+        'rating_sum': ReviewStats.rating_sum + rating
+    }
+    if comment:
+        values['latest_comment'] = comment
+    updated = db.session.execute(
+        db.update(ReviewStats).where(ReviewStats.product_id == product_id).values(**values)
+    ).rowcount
+    if not updated:
+        db.session.add(ReviewStats(product_id=product_id, review_count=1, rating_sum=rating, latest_comment=comment))
+    return review
+
+def delete_product_reviews(product_id: int):
+    """ลบรีวิวและสรุปรีวิวของสินค้า (เรียกก่อนลบสินค้า)"""
+    Review.query.filter_by(product_id=product_id).delete()
+    ReviewStats.query.filter_by(product_id=product_id).delete()
+
+def get_review_version() -> int:
+    """เวอร์ชันของรีวิว = id ล่าสุดของตาราง review (เพิ่มขึ้นทุกครั้งที่มีรีวิวใหม่)"""
+    return db.session.query(db.func.max(Review.id)).scalar() or 0
+
+def review_stats_map() -> dict:
+    """{product_id: ReviewStats} ของทุกสินค้า ด้วย query เดียว"""
+    return {stats.product_id: stats for stats in ReviewStats.query.all()}
+
+# รีวิวส่งได้โดยไม่ต้อง login และทุกรีวิวทำให้ cache หน้าแรกหมดอายุ จึงจำกัดจำนวนต่อลูกค้าและต่อ IP
+# ด้วย token bucket ในไฟล์ SQLite เดียวกับ rate limit ของ AI (ทุก worker ใช้ร่วมกัน)
+review_rate_limits = TokenBucketStore(os.getenv('AI_RATE_LIMIT_DB', ai_cache_path))
+REVIEW_RATE_PER_HOUR = float(os.getenv('REVIEW_RATE_LIMIT_PER_HOUR', '10'))
+REVIEW_RATE_BURST = float(os.getenv('REVIEW_RATE_LIMIT_BURST', '3'))
+
+def review_rate_buckets(visitor, ip) -> list:
+    """bucket ที่รีวิวหนึ่งรายการต้องหัก token: ต่อลูกค้า (หรือ IP ถ้าไม่มี session) และรวมต่อ IP"""
+    rate = REVIEW_RATE_PER_HOUR / 3600
+    return [
+        (f'review:{visitor}' if visitor else f'review-ip:{ip}', rate, REVIEW_RATE_BURST),
+        (f'review-ip-all:{ip}', rate * AI_RATE_IP_FACTOR, REVIEW_RATE_BURST * AI_RATE_IP_FACTOR),
+    ]
+
+# ==================== Catalog Cache ====================
+def _load_catalog_records():
+    """โหลดสินค้าทั้งหมดเป็น ProductRecord (ใช้โดย catalog_cache เมื่อเวอร์ชันเปลี่ยน)"""
+    rows = db.session.query(
+        Product.id, Product.name, Product.price, Product.image_url, Product.description, Product.popularity
+    ).all()
+    return [ProductRecord(*row[:5], row[5] or 0) for row in rows]
+
+# cache แคตตาล็อกในหน่วยความจำ เช็คเวอร์ชันจากฐานข้อมูลทุก request จึงถูกต้องแม้มีหลาย worker process
+catalog_cache = CatalogCache(
+    get_catalog_version,
+    _load_catalog_records,
+    enabled=os.getenv('CATALOG_CACHE', '1') != '0'
+)
+
+# cache หน้า HTML ที่ render แล้ว (key = เวอร์ชันแคตตาล็อก + เวอร์ชันรีวิว)
+page_cache = PageCache(enabled=os.getenv('PAGE_CACHE', '1') != '0')
+
+def storefront_products():
+    """สินค้าทั้งหมดเรียงสินค้ายอดนิยม (มีคนกดหัวใจมาก) ก่อน (ลำดับของหน้าแรก)"""
+    if catalog_cache.enabled:
+        return catalog_cache.get().products
+    return Product.query.order_by(Product.popularity.desc(), Product.id).all()
+
+def admin_products():
+    """สินค้าทั้งหมดเรียงตาม id (ลำดับของหน้า dashboard)"""
+    if catalog_cache.enabled:
+        return catalog_cache.get().products_by_id()
+    return Product.query.all()
+
+def visitor_id(create: bool = False):
+    """id ของลูกค้าที่ไม่ต้อง login (เก็บใน session cookie) ใช้กับสินค้าโปรดและ rate limit ของ AI
+    สร้างใหม่เมื่อ create=True
+    """
+    visitor = session.get('visitor_id')
+    if visitor is None and create:
+        session.permanent = True
+        visitor = session['visitor_id'] = uuid.uuid4().hex
+    return visitor
+
+# ==================== Favorites ====================
+# สินค้าโปรดเป็นของลูกค้าแต่ละคน (ตาราง favorite) ส่วนลำดับหน้าแรกมาจาก product.popularity
+# ซึ่งรวม +1/-1 ของทุกคลิกไว้ในหน่วยความจำแล้วเขียนเป็นชุด (counters.py) ไม่ใช่ commit ทุกคลิก
+
+def set_favorite(owner: str, product_id: int, favorite: bool = None) -> tuple:
+    """เพิ่ม/ลบสินค้าโปรดของ owner คืน (is_favorite, delta ของ popularity) ผู้เรียกต้อง commit
+
+    favorite=True/False ตั้งสถานะด้วยคำสั่งเดียว (INSERT ... ON CONFLICT DO NOTHING / DELETE) ส่งซ้ำได้
+    favorite=None สลับสถานะ: DELETE ก่อน ถ้าไม่มีแถวให้ลบจึง INSERT ทั้งสองคำสั่งอยู่ใน transaction เดียว
+    และ DELETE ถือ write lock ตั้งแต่คำสั่งแรก การสลับพร้อมกันจึงเรียงกันโดยไม่มีการอ่านก่อนเขียน
+    delta คือจำนวนแถวที่เปลี่ยนจริง (0 เมื่อสถานะเดิมตรงกับที่ขออยู่แล้ว)
+    """
+    if favorite is not True:
+        removed = db.session.execute(
+            db.delete(Favorite).where(Favorite.owner == owner, Favorite.product_id == product_id)
+        ).rowcount
+        if removed or favorite is False:
+            return False, -removed
+    added = db.session.execute(
+        insert_ignore(Favorite, db.engine.dialect.name).values(owner=owner, product_id=product_id)
+    ).rowcount
+    return True, added
+
+def delete_product_favorites(product_id: int):
+    """ลบสินค้าออกจากรายการโปรดของทุกคน (เรียกก่อนลบสินค้า)"""
+    Favorite.query.filter_by(product_id=product_id).delete()
+
+def _flush_popularity(deltas: dict):
+    """บวก delta ของ popularity หลายสินค้าใน transaction เดียว (เรียกจาก thread ของ popularity_counter)
+
+    เปลี่ยนเวอร์ชันแคตตาล็อกครั้งเดียวต่อชุด cache ของหน้าแรกจึงถูกล้างไม่เกินหนึ่งครั้งต่อ interval
+    """
+    product = Product.__table__
+    rows = [{'pid': pid, 'delta': delta} for pid, delta in deltas.items()]
+    with app.app_context():
+        try:
+            db.session.execute(
+                db.update(product)
+                .where(product.c.id == db.bindparam('pid'))
+                .values(popularity=product.c.popularity + db.bindparam('delta')),
+                rows
+            )
+            bump_catalog_version(changed=list(deltas), reindex=False)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+popularity_counter = CoalescingCounter(
+    _flush_popularity,
+    interval=float(os.getenv('POPULARITY_FLUSH_INTERVAL', '1')),
+    max_pending=int(os.getenv('POPULARITY_MAX_PENDING', '1000'))
+)
+# delta ที่ค้างอยู่ถูกเขียนก่อน process จบแบบปกติ (เช่น gunicorn หยุด worker)
+atexit.register(popularity_counter.flush)
+
+def recount_popularity() -> int:
+    """คำนวณ popularity ใหม่จากตาราง favorite (หลัง process ตายพร้อม delta ที่ยังไม่ flush) คืนจำนวนสินค้าที่ค่าเปลี่ยน"""
+    popularity_counter.flush()
+    count = db.select(db.func.count()).where(Favorite.product_id == Product.id).scalar_subquery()
+    drifted = Product.popularity != count
+    changed = [pid for pid, in db.session.query(Product.id).filter(drifted)]
+    db.session.execute(db.update(Product.__table__).where(drifted).values(popularity=count))
+    bump_catalog_version(changed=changed, reindex=False)
+    db.session.commit()
+    return len(changed)
+
+# ==================== Recommendations ====================
+# ตาราง "สินค้าที่คล้ายกัน" ในหน่วยความจำของแต่ละ worker ซิงก์กับเวอร์ชันแคตตาล็อกแบบ incremental (recommend.py)
+similar_index = SimilarityIndex(
+    dims=int(os.getenv('RECOMMEND_DIMS', '256')),
+    k=int(os.getenv('RECOMMEND_TOP_K', '10')),
+    price_weight=float(os.getenv('RECOMMEND_PRICE_WEIGHT', '0.5')),
+    popularity_weight=float(os.getenv('RECOMMEND_POPULARITY_WEIGHT', '0.2')),
+    background_threshold=int(os.getenv('RECOMMEND_BACKGROUND_BUILD', '20000'))
+) if NUMPY_AVAILABLE else None
+
+def sync_similar_index() -> bool:
+    """ซิงก์ similar_index กับแคตตาล็อกเวอร์ชันปัจจุบัน คืน False ถ้ายัง build ครั้งแรกไม่เสร็จ"""
+    if catalog_cache.enabled:
+        catalog = catalog_cache.get()
+        return similar_index.sync(catalog.version, lambda: catalog.products)
+    return similar_index.sync(get_catalog_version(), _load_catalog_records)
+
+# ==================== AI Description Jobs ====================
+def _save_generated_descriptions(results: dict):
+    """บันทึกคำอธิบายที่ AI สร้างลง Product.description (เรียกจาก worker thread)"""
+    with app.app_context():
+        try:
+            for product_id, description in results.items():
+                Product.query.filter_by(id=product_id).update({'description': description[:500]})
+            bump_catalog_version(changed=list(results))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+class DescriptionJobStore:
+    """ที่เก็บสถานะ job ในตาราง ai_job/ai_job_item (แทน MemoryJobStore ของ ai_jobs.py)
+
+    job ทำงานใน thread ของ worker ที่รับ request แต่ /api/jobs/<id> ไปตก worker ไหนก็อ่านสถานะเดียวกันได้
+    ทุกเมธอดเป็น transaction ของตัวเอง (เรียกจาก worker thread ของ job)
+    """
+
+    def __init__(self, max_jobs: int = 100):
+        self.max_jobs = max_jobs
+
+    def _write(self, fn):
+        with app.app_context():
+            try:
+                fn()
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+
+    def create(self, job_id: str, total: int, chunks: int):
+        def write():
+            db.session.add(AIJob(id=job_id, status='queued', total=total, completed=0, failed=0,
+                                 pending_chunks=chunks, created_at=time.time()))
+            # เก็บ job ที่จบแล้วไว้ไม่เกิน max_jobs รายการล่าสุด
+            old = [job_id for job_id, in db.session.query(AIJob.id)
+                   .filter(AIJob.finished_at.isnot(None))
+                   .order_by(AIJob.created_at.desc()).offset(self.max_jobs)]
+            if old:
+                db.session.execute(db.delete(AIJobItem).where(AIJobItem.job_id.in_(old)))
+                db.session.execute(db.delete(AIJob).where(AIJob.id.in_(old)))
+        self._write(write)
+
+    def start(self, job_id: str):
+        self._write(lambda: db.session.execute(
+            db.update(AIJob).where(AIJob.id == job_id, AIJob.status == 'queued').values(status='running')
+        ))
+
+    def record(self, job_id: str, results: dict = None, errors: dict = None):
+        results, errors = results or {}, errors or {}
+
+        def write():
+            rows = [{'job_id': job_id, 'product_id': pid, 'description': text[:500], 'error': None}
+                    for pid, text in results.items()]
+            rows += [{'job_id': job_id, 'product_id': pid, 'description': None, 'error': str(error)[:500]}
+                     for pid, error in errors.items()]
+            db.session.execute(db.insert(AIJobItem), rows)
+            db.session.execute(db.update(AIJob).where(AIJob.id == job_id).values(
+                completed=AIJob.completed + len(results), failed=AIJob.failed + len(errors)
+            ))
+        if results or errors:
+            self._write(write)
+
+    def chunk_done(self, job_id: str):
+        def write():
+            # UPDATE ถือ write lock จนถึง commit กลุ่มที่เสร็จพร้อมกันจึงเห็นค่า pending_chunks ทีละตัว
+            db.session.execute(db.update(AIJob).where(AIJob.id == job_id, AIJob.pending_chunks > 0)
+                               .values(pending_chunks=AIJob.pending_chunks - 1))
+            job = db.session.get(AIJob, job_id)
+            if job.pending_chunks == 0 and job.finished_at is None:
+                job.status = final_status(job.completed, job.failed)
+                job.finished_at = time.time()
+        self._write(write)
+
+    def get(self, job_id: str):
+        job = db.session.get(AIJob, job_id)
+        if job is None:
+            return None
+        items = AIJobItem.query.filter_by(job_id=job_id).all()
+        return {
+            'id': job.id, 'status': job.status, 'total': job.total,
+            'completed': job.completed, 'failed': job.failed,
+            'results': {item.product_id: item.description for item in items if item.error is None},
+            'errors': {item.product_id: item.error for item in items if item.error is not None},
+            'created_at': job.created_at, 'finished_at': job.finished_at,
+        }
+
+# worker จำนวนจำกัด เพื่อไม่ให้ยิง OpenAI พร้อมกันมากเกินไป
+description_jobs = DescriptionJobQueue(
+    generate_product_descriptions_batch,
+    _save_generated_descriptions,
+    max_workers=int(os.getenv('AI_JOB_WORKERS', '2')),
+    batch_size=int(os.getenv('AI_JOB_BATCH_SIZE', '5')),
+    store=DescriptionJobStore()
+)
+
+# ==================== Bulk Import/Export ====================
+IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', '500'))
+IMPORT_MAX_ERRORS = 1000  # จำนวน error สูงสุดที่ใส่ในรายงาน (นับ failed ครบทุกแถวเสมอ)
+
+def _upsert_product_batch(rows: list):
+    """upsert สินค้าหนึ่งชุดตาม name ใน transaction เดียว (executemany) คืน (inserted, updated)"""
+    # ชื่อซ้ำในชุดเดียวกัน: แถวหลังทับแถวก่อน
+    by_name = {}
+    for values in rows:
+        by_name[values['name']] = {**by_name.get(values['name'], {}), **values}
+
+    existing = dict(db.session.query(Product.name, Product.id).filter(Product.name.in_(list(by_name))).all())
+    new_rows = [values for name, values in by_name.items() if name not in existing]
+    updates = [
+        {'id': existing[name], **{k: v for k, v in values.items() if k != 'name'}}
+        for name, values in by_name.items() if name in existing
+    ]
+    changed = [values['id'] for values in updates]
+    if new_rows:
+        db.session.execute(db.insert(Product), new_rows)
+        names = [values['name'] for values in new_rows]
+        changed += [pid for pid, in db.session.query(Product.id).filter(Product.name.in_(names))]
+    if updates:
+        db.session.execute(db.update(Product), updates)
+    bump_catalog_version(changed=changed)
+    db.session.commit()
+    return len(new_rows), len(updates)
+
+def import_products(stream, fmt: str) -> dict:
+    """อ่านไฟล์สินค้าแบบ stream, validate ทีละแถว และ upsert เป็นชุดละ IMPORT_BATCH_SIZE แถว"""
+    report = {'success': True, 'inserted': 0, 'updated': 0, 'failed': 0, 'errors': []}
+
+    def fail(line_no, message):
+        report['failed'] += 1
+        if len(report['errors']) < IMPORT_MAX_ERRORS:
+            report['errors'].append({'line': line_no, 'error': message})
+
+    def valid_rows():
+        for line_no, row in catalog_io.read_rows(stream, fmt):
+            try:
+                if isinstance(row, catalog_io.RowError):
+                    raise row
+                yield line_no, catalog_io.validate_row(row)
+            except catalog_io.RowError as e:
+                fail(line_no, str(e))
+
+    try:
+        for batch in catalog_io.batched(valid_rows(), IMPORT_BATCH_SIZE):
+            try:
+                inserted, updated = _upsert_product_batch([values for _, values in batch])
+                report['inserted'] += inserted
+                report['updated'] += updated
+            except Exception as e:
+                # ชุดนี้ไม่ถูกบันทึกเลย แต่ชุดก่อนหน้าที่ commit แล้วยังอยู่
+                db.session.rollback()
+                print(f"❌ Error importing products: {e}")
+                for line_no, _ in batch:
+                    fail(line_no, f'batch not saved: {e.__class__.__name__}')
+    except (UnicodeDecodeError, csv.Error) as e:
+        # ไฟล์เสียจนอ่านต่อไม่ได้: หยุดตรงนี้ ชุดที่ commit ไปแล้วยังอยู่
+        report['success'] = False
+        report['error'] = 'File must be UTF-8 encoded' if isinstance(e, UnicodeDecodeError) else f'Malformed CSV: {e}'
+    report['truncated_errors'] = report['failed'] > len(report['errors'])
+    return report
+
+def export_products(fmt: str):
+    """คืน generator ของบรรทัด CSV/NDJSON ของสินค้าทั้งหมดเรียงตาม id
+
+    ใช้ connection แยกกับ stream_results (server-side cursor) ดึงทีละ IMPORT_BATCH_SIZE แถว
+    หน่วยความจำจึงคงที่ไม่ว่าแคตตาล็อกจะใหญ่แค่ไหน
+    """
+    # อ่าน engine ตอนนี้ (ยังอยู่ใน app context) เพราะ generator จะทำงานหลัง view คืน response ไปแล้ว
+    engine = db.engine
+    query = db.select(*[getattr(Product, c) for c in catalog_io.EXPORT_COLUMNS]).order_by(Product.id)
+
+    def generate():
+        with engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=IMPORT_BATCH_SIZE).execute(query)
+            yield from catalog_io.export_lines(result, fmt)
+    return generate()
+
+# ==================== Search ====================
+SEARCH_MAX_LIMIT = 100
+_fts_ready = False
+
+def fts_ready() -> bool:
+    """มีตาราง product_fts แล้วหรือยัง (migration 6 ข้ามไปถ้า SQLite ไม่มี FTS5 หรือใช้ฐานข้อมูลอื่น)"""
+    global _fts_ready
+    if not _fts_ready and db.engine.dialect.name == 'sqlite':
+        _fts_ready = db.session.execute(
+            db.text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': search.FTS_TABLE}
+        ).first() is not None
+    return _fts_ready
+
+def sync_search_index(changed=(), deleted=()):
+    """เขียนชื่อ/รายละเอียดของสินค้า changed ลง product_fts และลบ deleted ออก (ใน transaction ของผู้เรียก)"""
+    if not fts_ready() or not (changed or deleted):
+        return
+    rows = db.session.query(Product.id, Product.name, Product.description) \
+        .filter(Product.id.in_(list(changed))).all() if changed else []
+    search.reindex(db.session, rows, removed=deleted)
+
+def rebuild_search_index() -> int:
+    """สร้าง product_fts ใหม่ทั้งหมดจากตาราง product (ผู้เรียกต้อง commit) คืนจำนวนสินค้า"""
+    return search.rebuild(db.session) if fts_ready() else 0
+
+def search_product_ids(q: str, limit: int) -> list:
+    """id ของสินค้าที่ตรงกับคำค้น เรียงตาม BM25 (ชื่อสินค้ามีน้ำหนักมากกว่ารายละเอียด 10 เท่า)
+
+    SQLite คิดคะแนน bm25() ของทุกแถวที่ตรงคำค้นแล้วคืนเฉพาะ limit อันดับแรก
+    """
+    if fts_ready():
+        match = search.match_query(q)
+        if not match:
+            return []
+        return [pid for pid, in db.session.execute(db.text(search.ranked_query()), {'q': match, 'limit': limit})]
+
+    # ไม่มี FTS: ค้นด้วย LIKE (ช้ากว่าแต่ผลถูกต้อง)
+    pattern = '%' + q.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+    query = db.session.query(Product.id).filter(db.or_(
+        Product.name.ilike(pattern, escape='\\'), Product.description.ilike(pattern, escape='\\')
+    ))
+    return [pid for pid, in query.order_by(Product.popularity.desc(), Product.id).limit(limit)]
+
+# ==================== Product Images ====================
+# รูปสินค้าเก็บในเครื่อง (ชื่อไฟล์จาก hash ของเนื้อไฟล์) แทนการ hot-link ไปยังเว็บภายนอก ดู images.py
+image_store = ImageStore(
+    os.getenv('IMAGE_DIR', os.path.join(basedir, 'media')),
+    max_bytes=int(os.getenv('IMAGE_MAX_BYTES', str(10 * 1024 * 1024))),
+    fetch_timeout=float(os.getenv('IMAGE_FETCH_TIMEOUT', '10')),
+    allow_networks=tuple(n.strip() for n in os.getenv('IMAGE_FETCH_ALLOW_NETWORKS', '').split(',') if n.strip())
+)
+IMAGE_FETCH_REMOTE = os.getenv('IMAGE_FETCH_REMOTE', '1') != '0'
+IMAGE_MAX_AGE = 365 * 24 * 3600
+app.jinja_env.globals.update(image_src=image_store.src, image_srcset=image_store.srcset)
+
+def ingest_image(upload=None, url=None) -> str:
+    """เก็บรูปจากไฟล์อัปโหลดหรือ URL ภายนอก คืน URL ในเครื่อง (/images/<digest>.<ext>)
+
+    URL ที่เป็นรูปในเครื่องอยู่แล้วคืนค่าเดิม raise images.ImageError ถ้าไม่ใช่รูปที่รองรับ
+    """
+    if upload is not None and upload.filename:
+        name = image_store.save(upload.read(image_store.max_bytes + 1))
+    elif images.is_local(url):
+        return url
+    else:
+        name = image_store.fetch(url)
+    return images.URL_PREFIX + name
+
+def product_image_url(url, fetch_remote: bool = False):
+    """URL รูปที่จะบันทึกลงสินค้า: ดึงรูปภายนอกมาเก็บในเครื่องครั้งเดียว (ถ้าไม่สำเร็จเก็บ URL เดิมไว้)
+
+    ดึงเฉพาะเมื่อ fetch_remote=True (ผู้เรียกต้องเป็น path ของ admin ที่ login แล้ว) ผู้ใช้ทั่วไปจึงสั่งให้
+    server ไปเรียก URL ใดๆ ไม่ได้
+    """
+    if not fetch_remote or not url or images.is_local(url) or not IMAGE_FETCH_REMOTE \
+            or not url.lower().startswith(('http://', 'https://')):
+        return url
+    try:
+        return ingest_image(url=url)
+    except images.ImageError as e:
+        print(f"⚠️ Could not fetch product image {url}: {e}")
+        return url
+
+def localize_product_images() -> dict:
+    """ดึงรูปภายนอกของสินค้าที่มีอยู่มาเก็บในเครื่อง คืนจำนวนที่ย้ายสำเร็จ/ไม่สำเร็จ"""
+    moved, failed = [], []
+    for product in Product.query.filter(Product.image_url.ilike('http%')).all():
+        local_url = product_image_url(product.image_url, fetch_remote=True)
+        if images.is_local(local_url):
+            product.image_url = local_url
+            moved.append(product.id)
+        else:
+            failed.append(product.id)
+    if moved:
+        bump_catalog_version(changed=moved, reindex=False)
+    db.session.commit()
+    return {'moved': len(moved), 'failed': failed}
+
+# ==================== Static Assets ====================
+# CSS/JS ของแต่ละหน้าถูก minify และบีบอัด (gzip/brotli) ไว้ล่วงหน้าเป็นไฟล์ที่มี hash ในชื่อ ดู assets.py
+asset_manifest = AssetManifest(
+    os.path.join(basedir, 'static'),
+    auto_build=os.getenv('ASSETS_AUTO_BUILD', '1') != '0'
+)
+ASSET_MAX_AGE = 365 * 24 * 3600
+app.jinja_env.globals.update(asset_url=asset_manifest.url)
+
+# ==================== Orders ====================
+ORDER_SHIPPING = 50       # ค่าส่ง (เท่ากับที่ cart.html แสดง)
+ORDER_TAX_RATE = 0.07
+ORDER_WRITE_TIMEOUT = float(os.getenv('ORDER_WRITE_TIMEOUT', '10'))
+# ข้อมูลการชำระเงินที่เก็บลงคำสั่งซื้อได้ (เลขบัตรและ CVV ไม่ถูกเก็บ)
+ORDER_PAYMENT_FIELDS = ('bank_name', 'bank_account', 'card_name')
+CART_MAX_LINES = 500
+
+def order_totals(subtotal: float) -> dict:
+    """ค่าส่ง ภาษี และยอดรวม (สูตรเดียวกับหน้า cart)"""
+    shipping = ORDER_SHIPPING if subtotal > 0 else 0
+    tax = round(subtotal * ORDER_TAX_RATE)
+    return {'subtotal': subtotal, 'shipping': shipping, 'tax': tax, 'total': subtotal + shipping + tax}
+
+def price_cart(lines: list) -> dict:
+    """คิดราคาตะกร้าทั้งใบจากราคาปัจจุบันของสินค้า (แหล่งราคาที่เชื่อถือได้)
+
+    lines: list ของ (product_id, qty, client_price หรือ None)
+    อ่านราคาจาก catalog cache ถ้าเปิดอยู่ มิฉะนั้นใช้ query เดียว (WHERE id IN (...))
+    คืนรายการพร้อม line_total, ธง stale (ราคาที่ client จำไว้ไม่ตรง) และ id ของสินค้าที่ถูกลบไปแล้ว
+    """
+    ids = {product_id for product_id, _, _ in lines if product_id is not None}
+    if catalog_cache.enabled:
+        products = catalog_cache.get().by_id
+    else:
+        products = {p.id: p for p in db.session.query(Product.id, Product.name, Product.price)
+                    .filter(Product.id.in_(ids)).all()} if ids else {}
+
+    items, removed = [], []
+    subtotal = 0
+    for product_id, qty, client_price in lines:
+        product = products.get(product_id)
+        if product is None:
+            removed.append(product_id)
+            continue
+        line_total = product.price * qty
+        subtotal += line_total
+        items.append({
+            'id': product_id,
+            'name': product.name,
+            'qty': qty,
+            'unit_price': product.price,
+            'line_total': line_total,
+            'stale': client_price is not None and client_price != product.price
+        })
+    return {'items': items, 'removed': removed, **order_totals(subtotal)}
+
+def parse_cart_lines(data) -> list:
+    """ตรวจ list ของ {id, qty, price?} จาก client คืน list ของ (id, qty, price) raise ValueError ถ้าไม่ถูกต้อง"""
+    if not isinstance(data, list):
+        raise ValueError('items must be a list')
+    if len(data) > CART_MAX_LINES:
+        raise ValueError(f'Too many items (max {CART_MAX_LINES})')
+    lines = []
+    for entry in data:
+        if not isinstance(entry, dict):
+            raise ValueError('each item must be an object')
+        qty = int(entry.get('qty', entry.get('quantity', 1)))
+        if not 1 <= qty <= 999:
+            raise ValueError('qty must be between 1 and 999')
+        price = entry.get('price')
+        lines.append((int(entry['id']), qty, float(price) if price is not None else None))
+    return lines
+
+def parse_order_items(raw: str) -> list:
+    """แปลง JSON ของสินค้าในตะกร้า (จาก checkout form) เป็นรายการสินค้า raise ValueError ถ้าไม่ถูกต้อง"""
+    data = json.loads(raw) if raw else []
+    if not isinstance(data, list) or len(data) > 100:
+        raise ValueError('order_items must be a list of at most 100 items')
+    items = []
+    for entry in data:
+        if not isinstance(entry, dict):
+            raise ValueError('order item must be an object')
+        quantity = int(entry.get('quantity') or 1)
+        unit_price = float(entry.get('price') or 0)
+        if not 1 <= quantity <= 999 or unit_price < 0:
+            raise ValueError('invalid quantity or price')
+        addons = entry.get('addons') or []
+        items.append({
+            'product_id': int(entry['id']) if entry.get('id') not in (None, '') else None,
+            'name': str(entry.get('name') or '').strip()[:100] or 'สินค้า',
+            'unit_price': unit_price,
+            'quantity': quantity,
+            'options': json.dumps({
+                'size': entry.get('size'),
+                'roast': entry.get('roast'),
+                'addons': [str(a) for a in addons] if isinstance(addons, list) else [],
+                'notes': str(entry.get('notes') or '')[:500],
+            }, ensure_ascii=False),
+        })
+    return items
+
+def _write_orders(pending: list) -> list:
+    """บันทึกคำสั่งซื้อหลายรายการใน transaction เดียว (เรียกจาก writer thread ของ order_writer)
+
+    คืน order id ตามลำดับของ pending คำสั่งซื้อที่ idempotency_key ซ้ำ (ทั้งที่มีอยู่แล้วและซ้ำกันในชุด)
+    จะได้ id ของคำสั่งซื้อเดิม
+    """
+    keys = [p['idempotency_key'] for p in pending]
+    with app.app_context():
+        for attempt in range(2):
+            try:
+                ids = dict(db.session.query(Order.idempotency_key, Order.id)
+                           .filter(Order.idempotency_key.in_(set(keys))).all())
+                created = {}
+                for p in pending:
+                    key = p['idempotency_key']
+                    if key in ids or key in created:
+                        continue
+                    order = Order(**{k: v for k, v in p.items() if k != 'items'})
+                    db.session.add(order)
+                    created[key] = (order, p['items'])
+                db.session.flush()
+                rows = [dict(item, order_id=order.id) for order, items in created.values() for item in items]
+                if rows:
+                    db.session.execute(db.insert(OrderItem), rows)
+                db.session.commit()
+                ids.update({key: order.id for key, (order, _) in created.items()})
+                return [ids[key] for key in keys]
+            except IntegrityError:
+                # process อื่นเพิ่งบันทึก key เดียวกัน: รอบที่สองจะเจอ key นั้นใน ids
+                db.session.rollback()
+                if attempt:
+                    raise
+            except Exception:
+                db.session.rollback()
+                raise
+
+# checkout ที่เข้ามาพร้อมกันถูกรวมเป็น transaction เดียว (ดู order_queue.py)
+order_writer = WriteBehindQueue(
+    _write_orders,
+    max_batch=int(os.getenv('ORDER_BATCH_SIZE', '100')),
+    max_delay=float(os.getenv('ORDER_BATCH_DELAY_MS', '2')) / 1000
+)
+
+def order_receipt(order: Order) -> dict:
+    """ข้อมูลคำสั่งซื้อในรูปแบบเดียวกับ orderData ที่ receipt.html ใช้"""
+    items = []
+    for item in OrderItem.query.filter_by(order_id=order.id).order_by(OrderItem.id):
+        options = json.loads(item.options or '{}')
+        items.append({
+            'id': item.product_id, 'name': item.name, 'price': item.unit_price, 'quantity': item.quantity,
+            'size': options.get('size'), 'roast': options.get('roast'), 'addons': options.get('addons') or []
+        })
+    return {
+        'orderNumber': order.order_number,
+        'orderDate': order.created_at.strftime('%d/%m/%Y %H:%M:%S') if order.created_at else '',
+        'paymentMethod': order.payment_method,
+        'items': items,
+        'subtotal': order.subtotal,
+        'shipping': order.shipping,
+        'tax': order.tax,
+        'total': order.total
+    }
+
 # ==================== Routes ====================
 
 @app.route('/')
 def index():
-    """หน้าแรก - แสดงสินค้า เรียงลำดับโปรดด้านบน"""
-    products = Product.query.order_by(Product.is_favorite.desc(), Product.id).all()
-    # สร้างจำนวนรีวิวปลอม (1-20) สำหรับแต่ละสินค้า
-    review_counts = {p.id: random.randint(1, 20) for p in products}
-    return render_template('index.html', products=products, review_counts=review_counts)
+    """หน้าแรก - แสดงสินค้า เรียงลำดับโปรดด้านบน
+
+    หน้านี้ขึ้นกับแคตตาล็อกและรีวิวเท่านั้น จึง cache HTML ไว้ตามเวอร์ชันของทั้งสองอย่าง
+    ETag รวม hash ของ asset manifest ด้วย: deploy ที่เปลี่ยน CSS/JS ทำให้ browser โหลด HTML ที่อ้าง bundle ใหม่
+    """
+    catalog_version = catalog_cache.get().version if catalog_cache.enabled else get_catalog_version()
+    review_version = get_review_version()
+    etag = f'index-v{catalog_version}-r{review_version}-a{asset_manifest.version}'
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    html = page_cache.get_or_render(
+        'index',
+        (catalog_version, review_version),
+        lambda: render_template('index.html', products=storefront_products(), review_stats=review_stats_map())
+    )
+    response = make_response(html)
+    response.set_etag(etag)
+    return response
 
 @app.route('/cart')
 def cart():
@@ -186,23 +1300,195 @@ def cart():
 
 @app.route('/toggle-favorite/<int:product_id>', methods=['POST'])
 def toggle_favorite(product_id):
-    """Toggle favorite status ของสินค้า"""
+    """สลับสินค้าโปรดของลูกค้าคนนี้ หรือตั้งสถานะด้วย JSON {"favorite": true/false} (ส่งซ้ำได้ผลเดิม)
+
+    เขียนเฉพาะแถวของลูกค้าในตาราง favorite ด้วยคำสั่งที่ atomic (ดู set_favorite)
+    popularity ของสินค้าถูกรวมเป็นชุดโดย popularity_counter จึงไม่แตะแถว product และเวอร์ชันแคตตาล็อกทุกคลิก
+    """
+    data = request.get_json(silent=True) or {}
+    favorite = data.get('favorite')
+    if favorite is not None and not isinstance(favorite, bool):
+        return jsonify({'success': False, 'error': 'favorite must be true or false'}), 400
+    if not db.session.query(Product.id).filter_by(id=product_id).scalar():
+        return jsonify({'success': False, 'error': 'Product not found'}), 404
+
     try:
-        product = Product.query.get(product_id)
-        if product:
-            product.is_favorite = not product.is_favorite
-            db.session.commit()
-            return jsonify({'success': True, 'is_favorite': product.is_favorite})
-        return jsonify({'success': False}), 404
+        is_favorite, delta = set_favorite(visitor_id(create=True), product_id, favorite)
+        db.session.commit()
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 400
+    popularity_counter.add(product_id, delta)
+    return jsonify({'success': True, 'is_favorite': is_favorite})
+
+@app.route('/api/favorites', methods=['GET'])
+def get_favorites():
+    """API รายการ id ของสินค้าโปรดของลูกค้าคนนี้ (หน้าแรกใช้ระบายสีปุ่มหัวใจ หน้า HTML จึง cache ร่วมกันได้)"""
+    owner = visitor_id()
+    ids = [pid for pid, in db.session.query(Favorite.product_id).filter_by(owner=owner)] if owner else []
+    response = jsonify({'success': True, 'product_ids': ids})
+    response.headers['Cache-Control'] = 'private, no-store'
+    return response
 
 @app.route('/api/products', methods=['GET'])
 def get_products():
-    """API เพื่อดึงข้อมูลสินค้าทั้งหมด"""
-    products = Product.query.all()
-    return jsonify([product.to_dict() for product in products])
+    """API เพื่อดึงข้อมูลสินค้า เรียงสินค้ายอดนิยมก่อน (เหมือนหน้าแรก)
+
+    Query params (ไม่ใส่ = ได้สินค้าทั้งหมดเหมือนเดิม):
+    - fields: เลือกเฉพาะคอลัมน์ เช่น ?fields=id,name,price
+    - limit, after_id: แบ่งหน้าแบบ keyset (cursor) ลิงก์หน้าถัดไปอยู่ใน header `Link`
+    - after_popularity: popularity ของ after_id (ถ้าไม่ส่ง ระบบจะค้นจาก after_id เอง)
+    รองรับ If-None-Match -> 304 ด้วย ETag ที่คำนวณจากเวอร์ชันแคตตาล็อก
+    """
+    fields, error = requested_fields()
+    if error:
+        return error
+
+    try:
+        limit = int_arg('limit')
+        after_id = int_arg('after_id')
+        after_popularity = int_arg('after_popularity')
+        if limit is not None and not 1 <= limit <= 500:
+            raise ValueError('limit must be between 1 and 500')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    catalog = catalog_cache.get() if catalog_cache.enabled else None
+    version = catalog.version if catalog else get_catalog_version()
+
+    # ETag ขึ้นกับเวอร์ชันแคตตาล็อกและ query string (คนละ representation ต้องได้คนละ ETag)
+    query_key = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+    etag = f'products-v{version}-{zlib.crc32(query_key.encode()):08x}'
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    if catalog:
+        if not request.args:
+            # รายการเต็มถูก serialize ไว้แล้วหนึ่งครั้งต่อเวอร์ชัน
+            response = app.response_class(catalog.full_json(lambda data: jsonify(data).get_data()), mimetype='application/json')
+            response.set_etag(etag)
+            return response
+        records, has_more = catalog.page(after_id, after_popularity, limit)
+        rows = [r.to_dict() for r in records]
+    else:
+        rows, has_more = _query_products_page(fields, after_id, after_popularity, limit)
+
+    response = jsonify([{f: row[f] for f in fields} for row in rows])
+    response.set_etag(etag)
+    if has_more:
+        last = rows[-1]
+        next_args = request.args.to_dict()
+        next_args.update(after_id=last['id'], after_popularity=last['popularity'])
+        response.headers['Link'] = f'<{url_for("get_products", **next_args)}>; rel="next"'
+    return response
+
+def _query_products_page(fields, after_id, after_popularity, limit):
+    """ดึงสินค้าหนึ่งหน้าจาก SQL โดยตรง (ใช้เมื่อปิด catalog cache) คืน (rows, has_more)"""
+    # เลือกเฉพาะคอลัมน์ที่ขอใน SQL (+ id/popularity ที่ใช้ทำ cursor)
+    columns = list(dict.fromkeys(fields + ('id', 'popularity')))
+    query = db.session.query(*[getattr(Product, c) for c in columns])
+    if after_id is not None:
+        if after_popularity is None:
+            after_popularity = db.session.query(Product.popularity).filter_by(id=after_id).scalar() or 0
+        # keyset ของการเรียง (popularity DESC, id ASC)
+        query = query.filter(db.or_(
+            Product.popularity < after_popularity,
+            db.and_(Product.popularity == after_popularity, Product.id > after_id)
+        ))
+    query = query.order_by(Product.popularity.desc(), Product.id)
+    if limit is not None:
+        query = query.limit(limit + 1)
+
+    rows = [dict(zip(columns, row)) for row in query.all()]
+    has_more = limit is not None and len(rows) > limit
+    if has_more:
+        rows = rows[:limit]
+    return rows, has_more
+
+@app.route('/api/products/changes', methods=['GET'])
+def get_product_changes():
+    """API change feed ของแคตตาล็อก: สินค้าที่เพิ่ม/แก้ (upserts) และ id ที่ถูกลบ (deleted) หลังเวอร์ชัน since
+
+    client เก็บ version ของคำตอบไว้แล้วส่งกลับมาเป็น ?since= ครั้งถัดไป จึงได้เฉพาะสินค้าที่เปลี่ยน
+    แทนการโหลด /api/products ใหม่ทั้งหมด
+    Query params:
+    - since: version จากคำตอบครั้งก่อน (ไม่ส่ง = ยังไม่มีข้อมูลในเครื่อง)
+    - fields: เลือกคอลัมน์ของ upserts เหมือน /api/products
+    - limit: แบ่งหน้า ลิงก์หน้าถัดไป (since + after_id) อยู่ใน header `Link` เก็บ version หลังได้หน้าสุดท้ายแล้วเท่านั้น
+    reset=true เมื่อไม่ส่ง since, since เก่ากว่า tombstone ที่ถูก compact ไปแล้ว หรือมาจากฐานข้อมูลอื่น
+    (มากกว่าเวอร์ชันปัจจุบัน): upserts คือสินค้าทั้งหมด (ไม่แบ่งหน้า) client ต้องแทนที่ข้อมูลเดิมทั้งหมด
+    รองรับ If-None-Match -> 304
+    """
+    fields, error = requested_fields()
+    if error:
+        return error
+
+    try:
+        since = int_arg('since', 0)
+        after_id = int_arg('after_id')
+        limit = int_arg('limit')
+        if limit is not None and not 1 <= limit <= 5000:
+            raise ValueError('limit must be between 1 and 5000')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # อ่านเวอร์ชันก่อนแล้วจำกัดการเปลี่ยนแปลงไม่เกินเวอร์ชันนั้น: สิ่งที่ commit ระหว่างนี้ได้เวอร์ชันสูงกว่า
+    # และจะมาในการ sync ครั้งถัดไป (สินค้าที่ถูกแก้ซ้ำจะย้ายไปเวอร์ชันใหม่ ไม่หายไประหว่างทาง)
+    version, horizon = db.session.query(
+        CatalogVersion.version, CatalogVersion.changes_horizon
+    ).filter_by(id=1).first() or (0, 0)
+
+    query_key = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+    etag = f'changes-v{version}-{zlib.crc32(query_key.encode()):08x}'
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    if since <= 0 or since < horizon or since > version:
+        if catalog_cache.enabled:
+            catalog = catalog_cache.get()
+            version, rows = catalog.version, [r.to_dict() for r in catalog.products]
+        else:
+            rows, _ = _query_products_page(fields, None, None, None)
+        response = jsonify({'version': version, 'reset': True,
+                            'upserts': [{f: row[f] for f in fields} for row in rows], 'deleted': []})
+        response.set_etag(etag)
+        return response
+
+    query = db.session.query(
+        ProductChange.version, ProductChange.product_id, ProductChange.deleted, Product.id,
+        *[getattr(Product, f) for f in fields]
+    ).outerjoin(Product, Product.id == ProductChange.product_id).filter(ProductChange.version <= version)
+    if after_id is None:
+        query = query.filter(ProductChange.version > since)
+    else:
+        # cursor ของหน้าถัดไป: (version, product_id) ของแถวสุดท้ายในหน้าก่อน
+        query = query.filter(db.or_(
+            ProductChange.version > since,
+            db.and_(ProductChange.version == since, ProductChange.product_id > after_id)
+        ))
+    query = query.order_by(ProductChange.version, ProductChange.product_id)
+    if limit is not None:
+        query = query.limit(limit + 1)
+    rows = query.all()
+    has_more = limit is not None and len(rows) > limit
+    if has_more:
+        rows = rows[:limit]
+
+    upserts, deleted = [], []
+    for row in rows:
+        if row.deleted or row[3] is None:
+            deleted.append(row.product_id)
+        else:
+            upserts.append(dict(zip(fields, row[4:])))
+    response = jsonify({'version': version, 'reset': False, 'upserts': upserts, 'deleted': deleted})
+    response.set_etag(etag)
+    if has_more:
+        next_args = request.args.to_dict()
+        next_args.update(since=rows[-1].version, after_id=rows[-1].product_id)
+        response.headers['Link'] = f'<{url_for("get_product_changes", **next_args)}>; rel="next"'
+    return response
 
 @app.route('/api/generate-description', methods=['POST'])
 def generate_description():
@@ -223,6 +1509,50 @@ def generate_description():
     except Exception as e:
         return jsonify({'error': str(e), 'success': False}), 400
 
+@app.route('/api/generate-description/batch', methods=['POST'])
+def generate_description_batch():
+    """API เพื่อสร้างรายละเอียดสินค้าหลายชิ้นแบบ background job
+
+    รับ {"product_ids": [1, 2, ...]} คืน job_id ทันที แล้วให้ client poll ที่ /api/jobs/<job_id>
+    """
+    if not session.get('logged_in'):
+        return jsonify({'error': 'Unauthorized'}), 401
+    if not openai_client:
+        return jsonify({'error': 'AI is not configured (set OPENAI_API_KEY)', 'success': False}), 503
+
+    data = request.get_json(silent=True) or {}
+    product_ids = data.get('product_ids')
+    if not isinstance(product_ids, list) or not product_ids:
+        return jsonify({'error': 'product_ids is required', 'success': False}), 400
+    if len(product_ids) > 1000:
+        return jsonify({'error': 'Too many products (max 1000)', 'success': False}), 400
+    try:
+        product_ids = list(dict.fromkeys(int(pid) for pid in product_ids))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'product_ids must be integers', 'success': False}), 400
+
+    products = Product.query.filter(Product.id.in_(product_ids)).all()
+    found = {p.id for p in products}
+    job_id = description_jobs.submit([{'id': p.id, 'name': p.name, 'price': p.price} for p in products])
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'total': len(products),
+        'not_found': [pid for pid in product_ids if pid not in found],
+        'status_url': url_for('get_job_status', job_id=job_id)
+    }), 202
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    """API เพื่อดูสถานะ job สร้างรายละเอียดสินค้า"""
+    if not session.get('logged_in'):
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    job = description_jobs.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
+
 @app.route('/api/ask-ai', methods=['POST'])
 def api_ask_ai():
     """API เพื่อถามคำถามเกี่ยวกับกาแฟ"""
@@ -236,18 +1566,329 @@ def api_ask_ai():
         # จำกัดความยาวของคำถาม
         if len(question) > 500:
             return jsonify({'error': 'Question is too long (max 500 characters)', 'success': False}), 400
-        
-        answer = ask_ai_question(question)
+
+        answer = ready_ai_answer(question)
+        if answer:
+            return jsonify({'answer': answer, 'success': True})
+        throttled = admit_ai_request(visitor_id(), request.remote_addr)
+        if throttled:
+            return throttled
+        try:
+            answer = ask_ai_question(question)
+        finally:
+            ai_gate.release()
         return jsonify({'answer': answer, 'success': True})
     except Exception as e:
         return jsonify({'error': str(e), 'success': False}), 400
 
+@app.route('/api/ask-ai/stream', methods=['POST'])
+def api_ask_ai_stream():
+    """API ถามคำถามเกี่ยวกับกาแฟแบบ streaming (Server-Sent Events)"""
+    data = request.get_json(silent=True) or {}
+    question = (data.get('question') or '').strip()
+
+    if not question:
+        return jsonify({'error': 'Question is required', 'success': False}), 400
+
+    # จำกัดความยาวของคำถาม
+    if len(question) > 500:
+        return jsonify({'error': 'Question is too long (max 500 characters)', 'success': False}), 400
+
+    answer = ready_ai_answer(question)
+    admitted = not answer
+    if admitted:
+        throttled = admit_ai_request(visitor_id(), request.remote_addr)
+        if throttled:
+            return throttled
+    response = Response(
+        stream_ai_answer(question, answer),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    if admitted:
+        # ถือ slot ไว้จน stream จบหรือ client ตัดการเชื่อมต่อ
+        response.call_on_close(ai_gate.release)
+    return response
+
+@app.route('/api/ai-cache/stats', methods=['GET'])
+def ai_cache_stats():
+    """API เพื่อดูสถิติ cache คำตอบ AI (hit / miss / eviction)"""
+    return jsonify(answer_cache.stats())
+
+@app.route('/api/ai-status', methods=['GET'])
+def ai_status():
+    """API เพื่อดูสถานะ circuit breaker และ latency histogram ของการเรียก OpenAI"""
+    if not openai_client:
+        return jsonify({'configured': False})
+    status = openai_client.snapshot() if hasattr(openai_client, 'snapshot') else {}
+    status['configured'] = True
+    if async_openai_client:
+        status['async'] = async_openai_client.snapshot()
+    status['admission'] = {
+        'gate': ai_gate.snapshot(),
+        'async_gate': ai_async_gate.snapshot(),
+        'rate_limit': dict(ai_rate_limits.stats(), per_minute=AI_RATE_PER_MINUTE, burst=AI_RATE_BURST),
+    }
+    return jsonify(status)
+
+# ==================== Async AI routes (ASGI) ====================
+# เมื่อรันผ่าน asgi.py route ด้านล่างแทนที่ /api/ask-ai, /api/ask-ai/stream และ /api/generate-description
+# ของ Flask (ผลลัพธ์เหมือนกัน) แต่รอ OpenAI ใน event loop จึงไม่กิน worker thread ของหน้าเว็บ
+
+ai_flights = SingleFlight()
+
+async def openai_chat_async(operation: str, **kwargs):
+    """openai_chat ฉบับ async (ผ่าน async_openai_client)"""
+    started = time.perf_counter()
+    try:
+        message = await async_openai_client.chat.completions.create(**kwargs)
+    except Exception:
+        metrics.observe_ai(operation, time.perf_counter() - started, ok=False)
+        raise
+    metrics.observe_ai(operation, time.perf_counter() - started, getattr(message, 'usage', None))
+    return message
+
+async def cached_ai_answer(cache_key: str, compute):
+    """คำตอบจาก answer_cache หรือ await compute() ครั้งเดียวต่อคำถามที่เข้ามาพร้อมกัน แล้วเก็บลง cache
+
+    answer_cache และ ai_rate_limits อ่าน/เขียน SQLite แบบ blocking จึงเรียกผ่าน asyncio.to_thread
+    ไม่ให้ event loop หยุดรอ disk หรือ lock ของฐานข้อมูล
+    """
+    answer = await asyncio.to_thread(answer_cache.get, cache_key)
+    if answer is not None:
+        return answer
+
+    async def compute_and_store():
+        answer_cache.record_miss()
+        value = await compute()
+        await asyncio.to_thread(answer_cache.set, cache_key, value)
+        return value
+
+    return await ai_flights.do(cache_key, compute_and_store)
+
+async def ask_ai_question_async(question: str) -> str:
+    """ask_ai_question ฉบับ async"""
+    q = (question or '').strip()
+    canned = canned_ai_answer(q)
+    if canned:
+        return canned
+
+    async def _call_openai():
+        message = await openai_chat_async(
+            'ask',
+            model="gpt-3.5-turbo",
+            messages=ask_ai_messages(question),
+            max_tokens=200,
+            temperature=0.7
+        )
+        return message.choices[0].message.content.strip()
+
+    try:
+        return await cached_ai_answer(AnswerCache.make_key('ask', q), _call_openai)
+    except Exception as e:
+        print(f"Error answering question: {str(e)}")
+        return AI_ERROR_ANSWER
+
+async def generate_product_description_async(product_name: str, product_price: float = None) -> str:
+    """generate_product_description ฉบับ async"""
+    if not async_openai_client:
+        return f"กาแฟพรีเมียม: {product_name}"
+
+    async def _call_openai():
+        message = await openai_chat_async(
+            'description',
+            model="gpt-3.5-turbo",
+            messages=description_messages(product_name, product_price),
+            max_tokens=150,
+            temperature=0.7
+        )
+        return message.choices[0].message.content.strip()
+
+    try:
+        return await cached_ai_answer(AnswerCache.make_key('desc', product_name, product_price or ''), _call_openai)
+    except Exception as e:
+        print(f"Error generating description: {str(e)}")
+        return f"กาแฟพรีเมียม: {product_name} - คุณภาพดี ลิ้มสดชื่น"
+
+async def stream_ai_answer_async(question: str, answer: str = None):
+    """stream_ai_answer ฉบับ async (event และรูปแบบข้อมูลเหมือนกัน)"""
+    started = time.perf_counter()
+    ttfb = None
+
+    def sse(event, payload):
+        return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+    def elapsed_ms():
+        return round((time.perf_counter() - started) * 1000, 1)
+
+    if answer:
+        ttfb = elapsed_ms()
+        yield sse('delta', {'text': answer})
+        yield sse('done', {'ttfb_ms': ttfb, 'total_ms': elapsed_ms(), 'streamed': False})
+        return
+
+    cache_key = AnswerCache.make_key('ask', (question or '').strip())
+    answer_cache.record_miss()
+    parts = []
+    try:
+        stream = await async_openai_client.chat.completions.create(
+            model="gpt-3.5-turbo",
+            messages=ask_ai_messages(question),
+            max_tokens=200,
+            temperature=0.7,
+            stream=True
+        )
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            text = chunk.choices[0].delta.content
+            if not text:
+                continue
+            if ttfb is None:
+                ttfb = elapsed_ms()
+            parts.append(text)
+            yield sse('delta', {'text': text})
+    except Exception as e:
+        print(f"Error streaming answer: {str(e)}")
+        metrics.observe_ai('ask_stream', time.perf_counter() - started, ok=False)
+        if not parts:
+            ttfb = elapsed_ms()
+            yield sse('delta', {'text': AI_ERROR_ANSWER})
+        yield sse('done', {'ttfb_ms': ttfb, 'total_ms': elapsed_ms(), 'streamed': bool(parts), 'error': True})
+        return
+
+    metrics.observe_ai('ask_stream', time.perf_counter() - started)
+    answer = ''.join(parts).strip()
+    if answer:
+        await asyncio.to_thread(answer_cache.set, cache_key, answer)
+    yield sse('done', {'ttfb_ms': ttfb, 'total_ms': elapsed_ms(), 'streamed': True})
+
+def session_from_cookies(cookies: dict) -> dict:
+    """อ่าน session ของ Flask จาก cookie สำหรับ route async ที่ไม่ได้ผ่าน Flask ({} ถ้าไม่มีหรือลายเซ็นไม่ถูกต้อง)"""
+    value = cookies.get(app.config['SESSION_COOKIE_NAME'])
+    serializer = app.session_interface.get_signing_serializer(app)
+    if not value or serializer is None:
+        return {}
+    try:
+        return serializer.loads(value, max_age=int(app.permanent_session_lifetime.total_seconds()))
+    except BadSignature:
+        return {}
+
+def _ai_question(req):
+    """(question, error response) จาก body ของ request async ตามกติกาเดียวกับ route ของ Flask"""
+    data = req.get_json()
+    question = (data.get('question') or '').strip() if isinstance(data, dict) else ''
+    if not question:
+        return None, JSONResponse({'error': 'Question is required', 'success': False}, 400)
+    # จำกัดความยาวของคำถาม
+    if len(question) > 500:
+        return None, JSONResponse({'error': 'Question is too long (max 500 characters)', 'success': False}, 400)
+    return question, None
+
+async def admit_ai_request_async(req):
+    """admit_ai_request ฉบับ async (ใช้ ai_async_gate) คืน None เมื่อผ่าน หรือ JSONResponse 429"""
+    visitor = session_from_cookies(req.cookies).get('visitor_id')
+    wait = await asyncio.to_thread(ai_rate_limits.take, ai_rate_buckets(visitor, req.client))
+    if wait:
+        payload, headers = ai_throttled('rate', wait)
+    elif not await ai_async_gate.acquire_async():
+        payload, headers = ai_throttled('busy', ai_async_gate.retry_after)
+    else:
+        return None
+    return JSONResponse(payload, 429, headers=headers)
+
+async def api_ask_ai_async(req):
+    question, error = _ai_question(req)
+    if error:
+        return error
+    answer = await asyncio.to_thread(ready_ai_answer, question)
+    if answer:
+        return JSONResponse({'answer': answer, 'success': True})
+    throttled = await admit_ai_request_async(req)
+    if throttled:
+        return throttled
+    try:
+        answer = await ask_ai_question_async(question)
+    finally:
+        ai_async_gate.release()
+    return JSONResponse({'answer': answer, 'success': True})
+
+async def api_ask_ai_stream_async(req):
+    question, error = _ai_question(req)
+    if error:
+        return error
+    answer = await asyncio.to_thread(ready_ai_answer, question)
+    admitted = not answer
+    if admitted:
+        throttled = await admit_ai_request_async(req)
+        if throttled:
+            return throttled
+    return StreamingResponse(
+        stream_ai_answer_async(question, answer),
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+        on_close=ai_async_gate.release if admitted else None
+    )
+
+async def generate_description_async(req):
+    if not session_from_cookies(req.cookies).get('logged_in'):
+        return JSONResponse({'error': 'Unauthorized'}, 401)
+    data = req.get_json()
+    if not isinstance(data, dict):
+        return JSONResponse({'error': 'Invalid JSON body', 'success': False}, 400)
+    if not data.get('name'):
+        return JSONResponse({'error': 'Product name is required'}, 400)
+    description = await generate_product_description_async(data['name'], data.get('price'))
+    return JSONResponse({'description': description, 'success': True})
+
+ASYNC_AI_ROUTES = {
+    ('POST', '/api/ask-ai'): api_ask_ai_async,
+    ('POST', '/api/ask-ai/stream'): api_ask_ai_stream_async,
+    ('POST', '/api/generate-description'): generate_description_async,
+}
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus metrics (ถ้าตั้ง METRICS_TOKEN ต้องส่ง Authorization: Bearer <token>)"""
+    token = os.getenv('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return jsonify({'error': 'Unauthorized', 'success': False}), 401
+
+    cache = answer_cache.stats()
+    gauges = {
+        'ai_cache_entries': ('Answers held in the in-memory AI cache', cache['size']),
+        'ai_cache_hit_ratio': ('AI answer cache hit ratio since start', cache['hit_ratio']),
+        'order_queue_depth': ('Orders waiting for the checkout writer', order_writer.stats()['queued']),
+    }
+    gates = (ai_gate.snapshot(), ai_async_gate.snapshot())
+    gauges['ai_admission_in_flight'] = ('AI questions admitted and not finished', sum(g['in_flight'] for g in gates))
+    gauges['ai_admission_waiting'] = ('AI questions waiting for an admission slot', sum(g['waiting'] for g in gates))
+    if openai_client and hasattr(openai_client, 'snapshot'):
+        status = openai_client.snapshot()
+        gauges['ai_in_flight'] = ('OpenAI calls in flight', status['in_flight'])
+        gauges['ai_circuit_open'] = ('1 when the OpenAI circuit breaker is not closed',
+                                     int(status['breaker']['state'] != 'closed'))
+    return Response(metrics.render(gauges), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/products/<int:product_id>', methods=['GET'])
 def get_product(product_id):
-    """API เพื่อดึงข้อมูลสินค้าจากรหัส"""
-    product = Product.query.get(product_id)
+    """API เพื่อดึงข้อมูลสินค้าจากรหัส (รองรับ If-None-Match -> 304)"""
+    if catalog_cache.enabled:
+        catalog = catalog_cache.get()
+        version, product = catalog.version, catalog.by_id.get(product_id)
+    else:
+        version, product = get_catalog_version(), None
+
+    etag = f'product-{product_id}-v{version}'
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    if not catalog_cache.enabled:
+        product = Product.query.get(product_id)
     if product:
-        return jsonify(product.to_dict())
+        response = jsonify(product.to_dict())
+        response.set_etag(etag)
+        return response
     return jsonify({'error': 'Product not found'}), 404
 
 @app.route('/api/products', methods=['POST'])
@@ -259,10 +1900,12 @@ def add_product():
         new_product = Product(
             name=data['name'],
             price=data['price'],
-            image_url=data.get('image_url'),
+            image_url=product_image_url(data.get('image_url'), fetch_remote=bool(session.get('logged_in'))),
             description=data.get('description')
         )
         db.session.add(new_product)
+        db.session.flush()
+        bump_catalog_version(changed=[new_product.id])
         db.session.commit()
         return jsonify({'message': 'Product added successfully', 'product': new_product.to_dict()}), 201
     except Exception as e:
@@ -283,10 +1926,12 @@ def update_product(product_id):
         if 'price' in data:
             product.price = data['price']
         if 'image_url' in data:
-            product.image_url = data['image_url']
+            product.image_url = product_image_url(data['image_url'], fetch_remote=bool(session.get('logged_in')))
         if 'description' in data:
             product.description = data['description']
         
+        bump_catalog_version(changed=[product.id])
+        
         db.session.commit()
         return jsonify({'success': True, 'message': 'Product updated successfully', 'product': product.to_dict()})
     except Exception as e:
@@ -301,13 +1946,242 @@ def delete_product(product_id):
         return jsonify({'error': 'Product not found'}), 404
     
     try:
+        delete_product_reviews(product.id)
+        delete_product_favorites(product.id)
         db.session.delete(product)
+        bump_catalog_version(deleted=[product.id])
         db.session.commit()
         return jsonify({'message': 'Product deleted successfully'})
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 400
 
+@app.route('/api/products/import', methods=['POST'])
+def import_products_api():
+    """API นำเข้าสินค้าจำนวนมากจาก CSV หรือ NDJSON (upsert ตามชื่อสินค้า)
+
+    ส่งไฟล์เป็น body ตรงๆ พร้อม Content-Type: text/csv หรือ application/x-ndjson (หรือ ?format=csv|ndjson)
+    คอลัมน์: name, price (จำเป็น), image_url, description
+    คอลัมน์ id และ popularity จากไฟล์ export ถูกละไว้ (popularity นับจากสินค้าโปรดของลูกค้า)
+    คืนจำนวนที่เพิ่ม/อัปเดต และรายงาน error รายแถว (เลขบรรทัดในไฟล์)
+    """
+    if not session.get('logged_in'):
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    fmt = catalog_io.detect_format(request.args.get('format'), request.content_type)
+    if not fmt:
+        return jsonify({'error': 'Unsupported format (use text/csv or application/x-ndjson)', 'success': False}), 415
+    try:
+        report = import_products(request.stream, fmt)
+        return jsonify(report), 200 if report['success'] else 400
+    except Exception as e:
+        print(f"❌ Error importing products: {e}")
+        return jsonify({'error': str(e), 'success': False}), 400
+
+@app.route('/api/products/export', methods=['GET'])
+def export_products_api():
+    """API ส่งออกสินค้าทั้งหมดแบบ streaming (?format=csv ค่าเริ่มต้น หรือ ndjson)"""
+    fmt = catalog_io.detect_format(request.args.get('format', 'csv'))
+    if not fmt:
+        return jsonify({'error': 'Unsupported format (use csv or ndjson)', 'success': False}), 400
+    response = Response(export_products(fmt), content_type=catalog_io.CONTENT_TYPES[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename=products.{fmt}'
+    return response
+
+@app.route('/api/products/search', methods=['GET'])
+def search_products():
+    """API ค้นหาสินค้าจากชื่อและรายละเอียด (ไทย/อังกฤษ) เรียงตามความเกี่ยวข้อง
+
+    Query params: q (คำค้น, ค้นแบบ prefix จึงใช้ทำ type-ahead ได้), limit (ค่าเริ่มต้น 20, สูงสุด 100), fields
+    """
+    q = (request.args.get('q') or '').strip()
+    limit = request.args.get('limit', 20, type=int)
+    if not q:
+        return jsonify({'error': 'q is required', 'success': False}), 400
+    if not 1 <= limit <= SEARCH_MAX_LIMIT:
+        return jsonify({'error': f'limit must be between 1 and {SEARCH_MAX_LIMIT}', 'success': False}), 400
+    fields, error = requested_fields()
+    if error:
+        return error
+
+    ids = search_product_ids(q[:200], limit)
+    if catalog_cache.enabled:
+        by_id = catalog_cache.get().by_id
+    else:
+        by_id = {p.id: p for p in Product.query.filter(Product.id.in_(ids)).all()} if ids else {}
+    results = [by_id[pid].to_dict() for pid in ids if pid in by_id]
+    return jsonify({
+        'success': True,
+        'query': q,
+        'results': [{f: row[f] for f in fields} for row in results]
+    })
+
+@app.route('/images/<name>')
+def product_image(name):
+    """รูปสินค้าในเครื่อง: ต้นฉบับ /images/<digest>.<ext> หรือ thumbnail /images/<digest>-<width>w.<webp|jpg>
+
+    ชื่อไฟล์มาจาก hash ของเนื้อรูป เนื้อหาของ URL เดิมจึงไม่เปลี่ยน ส่งพร้อม cache 1 ปีแบบ immutable
+    """
+    path = image_store.original_path(name) or image_store.thumbnail_path(name)
+    if not path:
+        return jsonify({'error': 'Image not found'}), 404
+    mimetype = images.ORIGINAL_TYPES[name.rsplit('.', 1)[1]]
+    response = send_file(path, mimetype=mimetype, max_age=IMAGE_MAX_AGE, conditional=True)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+@app.route('/assets/<filename>')
+def static_asset(filename):
+    """ไฟล์ CSS/JS ที่ build แล้ว เลือก brotli/gzip/ไม่บีบอัด ตาม Accept-Encoding ของ browser
+
+    ชื่อไฟล์มี hash ของเนื้อหา จึง cache ได้ 1 ปีแบบ immutable
+    """
+    path, encoding = asset_manifest.variant(filename, request.accept_encodings)
+    if not path:
+        return jsonify({'error': 'Asset not found'}), 404
+    mimetype = assets.CONTENT_TYPES[filename.rsplit('.', 1)[1]]
+    response = send_file(path, mimetype=mimetype, max_age=ASSET_MAX_AGE, conditional=True)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+@app.route('/api/images', methods=['POST'])
+def upload_image_api():
+    """API อัปโหลดรูปสินค้า (multipart field "file") หรือดึงจาก URL ครั้งเดียว ({"url": "https://..."})
+
+    คืน URL ในเครื่องสำหรับใส่ใน image_url ของสินค้า และ srcset ของ thumbnail แต่ละขนาด
+    """
+    if not session.get('logged_in'):
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    upload = request.files.get('file')
+    url = request.form.get('url') or (request.get_json(silent=True) or {}).get('url')
+    if not (upload and upload.filename) and not url:
+        return jsonify({'error': 'file or url is required', 'success': False}), 400
+    try:
+        local_url = ingest_image(upload=upload, url=url)
+    except images.ImageError as e:
+        return jsonify({'error': str(e), 'success': False}), 400
+    return jsonify({
+        'success': True,
+        'url': local_url,
+        'srcset': {fmt: image_store.srcset(local_url, fmt) for fmt in images.THUMBNAIL_FORMATS}
+    }), 201
+
+@app.route('/api/images/localize', methods=['POST'])
+def localize_images_api():
+    """API ดึงรูปภายนอก (hot-link) ของสินค้าที่มีอยู่มาเก็บในเครื่อง"""
+    if not session.get('logged_in'):
+        return jsonify({'error': 'Unauthorized'}), 401
+    try:
+        return jsonify({'success': True, **localize_product_images()})
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error localizing images: {e}")
+        return jsonify({'error': str(e), 'success': False}), 500
+
+@app.route('/api/cart/price', methods=['POST'])
+def api_cart_price():
+    """API คิดราคาตะกร้าทั้งใบในครั้งเดียว
+
+    รับ {"items": [{"id": 1, "qty": 2, "price": 350}, ...]} (price = ราคาที่ browser จำไว้ ไม่บังคับ)
+    คืนราคาต่อบรรทัด, ยอดรวม, ธง stale ของราคาที่เปลี่ยน และ removed ของสินค้าที่ไม่มีแล้ว
+    """
+    data = request.get_json(silent=True)
+    try:
+        lines = parse_cart_lines(data.get('items') if isinstance(data, dict) else data)
+    except (TypeError, ValueError, KeyError) as e:
+        return jsonify({'error': f'Invalid cart: {e}', 'success': False}), 400
+    return jsonify({'success': True, **price_cart(lines)})
+
+@app.route('/api/products/<int:product_id>/similar', methods=['GET'])
+def get_similar_products(product_id):
+    """API สินค้าที่คล้ายกัน ("คุณอาจชอบ") เรียงจากคล้ายมากไปน้อย พร้อม score (cosine similarity)
+
+    Query params: limit (1 ถึง RECOMMEND_TOP_K ค่าเริ่มต้น 4)
+    ready=false เมื่อแคตตาล็อกใหญ่และ index ยัง build ครั้งแรกใน background ไม่เสร็จ (products เป็นรายการว่าง)
+    รองรับ If-None-Match -> 304 ด้วย ETag ที่คำนวณจากเวอร์ชันแคตตาล็อก
+    """
+    if not similar_index:
+        return jsonify({'error': 'Recommendations require numpy (pip install numpy)', 'success': False}), 503
+    limit = request.args.get('limit', 4, type=int)
+    if not 1 <= limit <= similar_index.k:
+        return jsonify({'error': f'limit must be between 1 and {similar_index.k}', 'success': False}), 400
+
+    ready = sync_similar_index()
+    if not ready:
+        if not db.session.query(Product.id).filter_by(id=product_id).scalar():
+            return jsonify({'error': 'Product not found', 'success': False}), 404
+        return jsonify({'success': True, 'ready': False, 'products': []})
+
+    etag = f'similar-{product_id}-v{similar_index.version}-{limit}'
+    cached = not_modified(etag)
+    if cached:
+        return cached
+    similar = similar_index.similar(product_id, limit)
+    if similar is None:
+        return jsonify({'error': 'Product not found', 'success': False}), 404
+
+    ids = [pid for pid, _ in similar]
+    if catalog_cache.enabled:
+        by_id = catalog_cache.get().by_id
+    else:
+        by_id = {p.id: p for p in Product.query.filter(Product.id.in_(ids)).all()}
+    products = [{**by_id[pid].to_dict(), 'score': round(score, 4)} for pid, score in similar if pid in by_id]
+    response = jsonify({'success': True, 'ready': True, 'products': products})
+    response.set_etag(etag)
+    return response
+
+@app.route('/api/products/<int:product_id>/reviews', methods=['GET'])
+def get_reviews(product_id):
+    """API เพื่อดึงรีวิวล่าสุดของสินค้า พร้อมสรุปจำนวนและคะแนนเฉลี่ย"""
+    if not db.session.query(Product.id).filter_by(id=product_id).scalar():
+        return jsonify({'error': 'Product not found'}), 404
+
+    limit = min(request.args.get('limit', 20, type=int), 100)
+    reviews = Review.query.filter_by(product_id=product_id).order_by(Review.id.desc()).limit(limit).all()
+    stats = db.session.get(ReviewStats, product_id)
+    return jsonify({
+        'count': stats.review_count if stats else 0,
+        'average': stats.average if stats else 0.0,
+        'reviews': [review.to_dict() for review in reviews]
+    })
+
+@app.route('/api/products/<int:product_id>/reviews', methods=['POST'])
+def submit_review(product_id):
+    """API เพื่อส่งรีวิวสินค้า (rating 1-5 และ comment ไม่เกิน 500 ตัวอักษร)"""
+    if not db.session.query(Product.id).filter_by(id=product_id).scalar():
+        return jsonify({'error': 'Product not found'}), 404
+
+    data = request.get_json(silent=True) or {}
+    rating = data.get('rating')
+    comment = (data.get('comment') or '').strip() or None
+    author = (data.get('author') or '').strip()[:100] or None
+
+    if not isinstance(rating, int) or isinstance(rating, bool) or not 1 <= rating <= 5:
+        return jsonify({'error': 'rating must be an integer from 1 to 5', 'success': False}), 400
+    if comment and len(comment) > 500:
+        return jsonify({'error': 'Comment is too long (max 500 characters)', 'success': False}), 400
+
+    wait = review_rate_limits.take(review_rate_buckets(visitor_id(), request.remote_addr))
+    if wait:
+        seconds = max(1, math.ceil(wait))
+        return jsonify({'error': 'Too many reviews, please try again later', 'success': False,
+                        'retry_after': seconds}), 429, {'Retry-After': str(seconds)}
+
+    try:
+        review = add_review(product_id, rating, comment, author)
+        db.session.commit()
+        stats = db.session.get(ReviewStats, product_id)
+        return jsonify({'success': True, 'review': review.to_dict(), 'stats': stats.to_dict()}), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e), 'success': False}), 400
+
 # ==================== Admin Routes ====================
 
 @app.route('/login', methods=['GET', 'POST'])
@@ -340,21 +2214,9 @@ def dashboard():
     if not session.get('logged_in'):
         return redirect(url_for('login'))
     
-    products = Product.query.all()
-    # สร้างรีวิวตัวอย่าง (fake reviews) สำหรับแต่ละสินค้า
-    sample_reviews = [
-        "รสชาติดีมาก! หอมเข้มข้นและไม่ขมเกินไป เหมาะสำหรับคนรักกาแฟจริงๆ",
-        "กาแฟนุ่ม ละมุนดีครับ บริการดีด้วย",
-        "ออกเปรี้ยวนิดๆ หวานบางๆ รู้สึกสดชื่น",
-        "เข้มข้นมีบอดี้ดีสุด ราคาเหมาะสม",
-        "สั่งเป็นประจำ ทุกแก้วไม่เคยน้อยหน้าเลยครับ",
-        "กลิ่นกาแฟหอมสดชื่นมากๆ รสชาติกลมกล่อม",
-        "ดีงามมากค่ะ มีความหอมของถั่วและช็อกโกแลต",
-        "หวานน้อยขมกำลังดี ถูกใจจริงๆ",
-        "กาแฟดี แต่ราคาแรงไปหน่อย",
-        "เป็นกาแฟที่ดีที่สุดที่เคยลองในร้านนี้"
-    ]
-    reviews = {p.id: sample_reviews[p.id % len(sample_reviews)] for p in products}
+    products = admin_products()
+    # รีวิวล่าสุดของแต่ละสินค้า (จาก review_stats query เดียว)
+    reviews = {pid: stats.latest_comment for pid, stats in review_stats_map().items() if stats.latest_comment}
     return render_template('admin.html', products=products, username=session.get('username'), reviews=reviews)
 
 @app.route('/add-product', methods=['GET', 'POST'])
@@ -371,6 +2233,8 @@ def add_product_admin():
         description = request.form.get('description')
         
         try:
+            upload = request.files.get('image_file')
+            image_url = ingest_image(upload=upload) if upload and upload.filename else product_image_url(image_url, fetch_remote=True)
             new_product = Product(
                 name=name,
                 price=float(price),
@@ -378,13 +2242,15 @@ def add_product_admin():
                 description=description
             )
             db.session.add(new_product)
+            db.session.flush()
+            bump_catalog_version(changed=[new_product.id])
             db.session.commit()
             return redirect(url_for('dashboard'))
         except Exception as e:
             db.session.rollback()
             return render_template('admin.html', error=f'❌ เพิ่มสินค้าไม่สำเร็จ: {str(e)}')
     
-    return render_template('admin.html', products=Product.query.all())
+    return render_template('admin.html', products=admin_products())
 
 @app.route('/delete-product/<int:product_id>', methods=['POST'])
 def delete_product_admin(product_id):
@@ -396,7 +2262,10 @@ def delete_product_admin(product_id):
     try:
         product = Product.query.get(product_id)
         if product:
+            delete_product_reviews(product.id)
+            delete_product_favorites(product.id)
             db.session.delete(product)
+            bump_catalog_version(deleted=[product.id])
             db.session.commit()
             return redirect(url_for('dashboard'))
         else:
@@ -419,12 +2288,20 @@ def checkout():
     """Checkout page: แสดงฟอร์มช่องทางชำระเงิน (GET) และรับข้อมูลเมื่อ POST
 
     - GET: รับ optional query param `total` เพื่อแสดงยอดรวม
-    - POST: ตรวจสอบ validation เบื้องต้นตามช่องทางการชำระเงิน และบันทึก `last_order` ใน session
+    - POST: ตรวจสอบ validation เบื้องต้นตามช่องทางการชำระเงิน แล้วบันทึกคำสั่งซื้อลงตาราง orders
+      ผ่าน order_writer (รวมหลาย checkout เป็น transaction เดียว) session เก็บเพียง `order_id`
+      ฟอร์มส่ง `idempotency_key` มาด้วย การกดยืนยันซ้ำจึงได้คำสั่งซื้อเดิม ไม่สร้างใหม่
+      ต้องมีสินค้าใน order_items อย่างน้อยหนึ่งรายการ ยอดเงินคิดจากแคตตาล็อกด้วย price_cart() เสมอ
+      (`amount` ในฟอร์มใช้แสดงผลตอนมี error เท่านั้น)
     """
     if request.method == 'POST':
         data = request.form
         payment_method = data.get('payment_method')
-        amount = data.get('amount') or 0
+        try:
+            amount = float(data.get('amount') or 0)
+        except ValueError:
+            amount = None
+        idempotency_key = (data.get('idempotency_key') or request.headers.get('Idempotency-Key') or '').strip()
 
         errors = []
         # Basic validation
@@ -439,17 +2316,54 @@ def checkout():
         if payment_method == 'cod' and not data.get('cod_confirm'):
             errors.append('กรุณายอมรับเงื่อนไข COD')
 
+        try:
+            items = parse_order_items(data.get('order_items'))
+        except (TypeError, ValueError, KeyError):
+            items = None
+            errors.append('ข้อมูลคำสั่งซื้อไม่ถูกต้อง')
+        if items == []:
+            errors.append('ไม่มีสินค้าในคำสั่งซื้อ กรุณาเพิ่มสินค้าลงตะกร้าก่อน')
+
+        if len(idempotency_key) > 64:
+            errors.append('ข้อมูลคำสั่งซื้อไม่ถูกต้อง')
+
+        if not errors:
+            # ราคาและชื่อสินค้ามาจากแคตตาล็อก ไม่ใช้ราคาที่ browser จำไว้
+            priced = price_cart([(item['product_id'], item['quantity'], None) for item in items])
+            if priced['removed']:
+                errors.append('สินค้าบางรายการไม่มีจำหน่ายแล้ว กรุณากลับไปตรวจสอบตะกร้า')
+            else:
+                for item, line in zip(items, priced['items']):
+                    item.update(name=line['name'], unit_price=line['unit_price'])
+                totals = {k: priced[k] for k in ('subtotal', 'shipping', 'tax', 'total')}
+
         if errors:
             # ส่งกลับหน้า checkout พร้อมข้อความ error และค่าที่กรอกไว้
-            return render_template('checkout.html', errors=errors, total=amount)
+            return render_template('checkout.html', errors=errors, total=amount,
+                                   idempotency_key=idempotency_key or uuid.uuid4().hex)
 
-        # จำลองการสร้างคำสั่งซื้อ: บันทึกข้อมูลสำคัญลง session แล้วไปหน้า receipt
-        session['last_order'] = {
-            'payment_method': payment_method,
-            'amount': amount,
-            'details': {k: v for k, v in data.items()}
-        }
+        details = {k: data[k] for k in ORDER_PAYMENT_FIELDS if data.get(k)}
+        if payment_method == 'card':
+            details['card_last4'] = card_number[-4:]
+
+        # หน้า 503 ต้องส่ง key ที่ใช้จริงกลับไป: ถ้าคำสั่งซื้อบันทึกแล้วแต่รอผลไม่ทัน การกดลองใหม่จะได้คำสั่งซื้อเดิม
+        idempotency_key = idempotency_key or uuid.uuid4().hex
+        try:
+            order_id = order_writer.submit({
+                'idempotency_key': idempotency_key,
+                'payment_method': payment_method[:20],
+                'payment_details': json.dumps(details, ensure_ascii=False),
+                **totals,
+                'status': 'pending',
+                'items': items
+            }).result(timeout=ORDER_WRITE_TIMEOUT)
+        except Exception as e:
+            print(f"❌ Error saving order: {e}")
+            return render_template('checkout.html', errors=['บันทึกคำสั่งซื้อไม่สำเร็จ กรุณาลองใหม่'],
+                                   total=amount, idempotency_key=idempotency_key), 503
 
+        session.pop('last_order', None)
+        session['order_id'] = order_id
         return redirect(url_for('receipt'))
 
     # GET
@@ -458,7 +2372,7 @@ def checkout():
         total = float(total) if total else None
     except Exception:
         total = None
-    return render_template('checkout.html', total=total)
+    return render_template('checkout.html', total=total, idempotency_key=uuid.uuid4().hex)
 
 @app.route('/payment-notify', methods=['POST'])
 def payment_notify():
@@ -472,10 +2386,14 @@ def payment_notify():
 
 @app.route('/receipt')
 def receipt():
-    """หน้าแสดงใบเสร็จ (client-side จะเก็บ order data ใน sessionStorage)
-    การเรียกผ่าน GET (redirect จากหน้า cart.js)
+    """หน้าแสดงใบเสร็จของคำสั่งซื้อล่าสุด (order_id ใน session)
+
+    ถ้ายังไม่มีคำสั่งซื้อ หน้า receipt จะใช้ข้อมูลจาก sessionStorage ที่ cart.html เก็บไว้เหมือนเดิม
     """
-    return render_template('receipt.html')
+    order = None
+    if session.get('order_id'):
+        order = db.session.get(Order, session['order_id'])
+    return render_template('receipt.html', order=order_receipt(order) if order else None)
 
 
 
@@ -543,6 +2461,7 @@ def seed_products():
         ]
         
         try:
+            new_products = []
             for product_data in sample_products:
                 new_product = Product(
                     name=product_data['name'],
@@ -551,8 +2470,12 @@ def seed_products():
                     description=product_data['description']
                 )
                 db.session.add(new_product)
+                new_products.append(new_product)
                 print(f"  ✓ Added: {product_data['name']} - ฿{product_data['price']}")
             
+            db.session.flush()
+            bump_catalog_version(changed=[product.id for product in new_products])
+            
             db.session.commit()
             print(f"\n✅ Successfully added 8 sample products!")
         except Exception as e:
@@ -561,28 +2484,141 @@ def seed_products():
     else:
         print(f"📊 {product_count} products already exist in database. Skipping seed.")
 
+def seed_reviews():
+    """เพิ่มรีวิวตัวอย่างหนึ่งรายการต่อสินค้า ถ้ายังไม่มีรีวิวในระบบ"""
+    if db.session.query(db.func.count(Review.id)).scalar():
+        return
+
+    sample_reviews = [
+        "รสชาติดีมาก! หอมเข้มข้นและไม่ขมเกินไป เหมาะสำหรับคนรักกาแฟจริงๆ",
+        "กาแฟนุ่ม ละมุนดีครับ บริการดีด้วย",
+        "ออกเปรี้ยวนิดๆ หวานบางๆ รู้สึกสดชื่น",
+        "เข้มข้นมีบอดี้ดีสุด ราคาเหมาะสม",
+        "สั่งเป็นประจำ ทุกแก้วไม่เคยน้อยหน้าเลยครับ",
+        "กลิ่นกาแฟหอมสดชื่นมากๆ รสชาติกลมกล่อม",
+        "ดีงามมากค่ะ มีความหอมของถั่วและช็อกโกแลต",
+        "หวานน้อยขมกำลังดี ถูกใจจริงๆ",
+        "กาแฟดี แต่ราคาแรงไปหน่อย",
+        "เป็นกาแฟที่ดีที่สุดที่เคยลองในร้านนี้"
+    ]
+    try:
+        for product_id, in db.session.query(Product.id).order_by(Product.id).all():
+            comment = sample_reviews[product_id % len(sample_reviews)]
+            add_review(product_id, 4 if product_id % 3 else 5, comment, 'Deluxe Cafe')
+        db.session.commit()
+        print("✅ Seeded sample reviews")
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error seeding reviews: {e}")
+
 def init_db():
     """สร้าง Database และ Tables"""
     with app.app_context():
-        # สร้างทุกตาราง
-        db.create_all()
-        print("✅ Database created successfully!")
-        print(f"📁 Database file: {os.path.join(basedir, 'shop.db')}")
+        # สร้าง/อัปเดตตารางด้วย migration ที่ยังไม่เคยรัน (ดู storage.py)
+        applied = run_migrations(db.engine)
+        print(f"✅ Database ready! (migrations applied: {applied or 'none'})")
+        print(f"📁 Database: {db.engine.url.render_as_string(hide_password=True)}")
         
         # เพิ่มข้อมูลตัวอย่างถ้ายังไม่มี
         seed_products()
+        seed_reviews()
         
         # ตรวจสอบจำนวนสินค้าทั้งหมด
         product_count = db.session.query(db.func.count(Product.id)).scalar()
         print(f"📊 Total products in database: {product_count}")
 
-# สร้าง Database เมื่อเริ่มต้นแอป
+@app.cli.command('init-db')
+def init_db_command():
+    """สร้าง/อัปเดต schema และข้อมูลตัวอย่าง (ขั้นตอน deploy: flask --app app init-db)"""
+    init_db()
+
+@app.cli.command('recount-popularity')
+def recount_popularity_command():
+    """นับ popularity ของทุกสินค้าใหม่จากตาราง favorite (flask --app app recount-popularity)"""
+    print(f"✅ Recounted popularity ({recount_popularity()} products changed)")
+
+@app.cli.command('rebuild-search')
+def rebuild_search_command():
+    """สร้าง index ค้นหา (product_fts) ใหม่ หลังแก้ตาราง product จากภายนอกแอป (flask --app app rebuild-search)
+
+    เพิ่มเวอร์ชันแคตตาล็อกด้วย ให้ catalog cache และ page cache ของทุก worker โหลดข้อมูลใหม่
+    """
+    count = rebuild_search_index()
+    bump_catalog_version()
+    db.session.commit()
+    print(f"✅ Reindexed {count} products for search")
+
+@app.cli.command('compact-changes')
+def compact_changes_command():
+    """ลบ tombstone ที่หมดอายุของ change feed ทันที (flask --app app compact-changes)"""
+    removed = compact_product_changes()
+    db.session.commit()
+    print(f"✅ Removed {removed} expired tombstones from product_change")
+
+# ==================== Production entry point ====================
+# wsgi.py เรียก create_app() ครั้งเดียวต่อ process; gunicorn.conf.py ใช้ preload_app จึงเรียกครั้งเดียว
+# ใน process แม่ แล้ว worker ทุกตัวได้ schema, แคตตาล็อก และ template ที่ compile แล้วไปผ่าน fork
+WARM_TEMPLATES = ('index.html', 'cart.html', 'checkout.html', 'login.html', 'admin.html', 'receipt.html')
+
+def warm_up():
+    """รัน view ของหน้าแรกและ /api/products หนึ่งครั้ง (โหลดแคตตาล็อก, compile SQL และ template, เติม page cache)
+    ให้ request แรกของ worker ไม่ต้องจ่ายเวลานี้
+    """
+    with app.test_request_context('/'):
+        index()
+        get_products()
+        fts_ready()
+        # build ตาราง top-k ก่อน fork ถ้าแคตตาล็อกเล็กพอ (ใหญ่กว่านี้ build ใน background ของแต่ละ worker)
+        if similar_index and db.session.query(db.func.count(Product.id)).scalar() <= similar_index.background_threshold:
+            sync_similar_index()
+    for name in WARM_TEMPLATES:
+        app.jinja_env.get_template(name)
+
+def create_app():
+    """คืน app ที่พร้อมรับ request สำหรับ WSGI server
+
+    รัน migration/seed ก่อน (ปิดด้วย INIT_DB_ON_START=0 เมื่อรัน `flask --app app init-db` เป็นขั้นตอน deploy แยก
+    เช่นเมื่อ worker หลายตัวเริ่มพร้อมกันโดยไม่ preload) แล้ว warm_up()
+    """
+    if os.getenv('INIT_DB_ON_START', '1') != '0':
+        init_db()
+    warm_up()
+    return app
+
+def create_asgi_app():
+    """ASGI app สำหรับ asgi.py: route AI แบบ async และ Flask app (create_app) สำหรับ route อื่นทั้งหมด"""
+    async def close_clients():
+        if async_openai_client:
+            await async_openai_client.aclose()
+
+    return ASGIApp(create_app(), ASYNC_AI_ROUTES, wsgi_threads=int(os.getenv('WEB_THREADS', '8')),
+                   on_request=metrics.observe_request, on_shutdown=close_clients)
+
+def after_fork():
+    """เรียกใน worker หลัง fork จาก process แม่ (post_fork ใน gunicorn.conf.py)
+
+    connection ของ SQLite/pool ที่สืบทอดมาใช้ร่วมกันข้าม process ไม่ได้ จึงทิ้ง pool (ไม่ปิด connection ของแม่)
+    และเปิด connection ของ AI cache และ rate limit ใหม่
+    """
+    with app.app_context():
+        db.engine.dispose(close=False)
+    answer_cache.after_fork()
+    ai_rate_limits.after_fork()
+    review_rate_limits.after_fork()
+
+def lan_ip() -> str:
+    """IP ของเครื่องในวง LAN สำหรับแสดง URL ที่เปิดจากโทรศัพท์ (127.0.0.1 ถ้าหาไม่ได้)"""
+    try:
+        return socket.gethostbyname(socket.gethostname())
+    except OSError:
+        return '127.0.0.1'
+
+# Development server (production ใช้ wsgi.py ดู gunicorn.conf.py)
 if __name__ == '__main__':
     init_db()
     
     # ได้ IP Address ของเครื่อง
-    hostname = socket.gethostname()
-    local_ip = socket.gethostbyname(hostname)
+    local_ip = lan_ip()
     
     print("\n" + "="*60)
     print("🚀 Starting Deluxe Cafe Flask App")
@@ -0,0 +1,10 @@
+"""ASGI entry point: route AI แบบ async (ดู ai_async.py) และ route อื่นของ Flask app ใน process เดียวกัน
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+    gunicorn asgi:app -k uvicorn.workers.UvicornWorker     (ค่าอื่นตาม gunicorn.conf.py)
+
+migration/seed และ warm-up ทำตอน import module นี้เหมือน wsgi.py
+"""
+from app import create_asgi_app
+
+app = create_asgi_app()
@@ -0,0 +1,280 @@
+"""สร้าง bundle ของ CSS/JS หน้าเว็บ: minify, ใส่ fingerprint ในชื่อไฟล์ และบีบอัด gzip/brotli ไว้ล่วงหน้า
+
+ไฟล์ต้นฉบับอยู่ใน static/css และ static/js (แก้ที่นี่) ผลลัพธ์อยู่ใน static/dist:
+- <name>.<hash>.<ext> พร้อม .gz และ .br (brotli เป็น optional ถ้าไม่ได้ติดตั้งแพ็กเกจ Brotli จะมีแค่ gzip)
+- manifest.json แมปชื่อ bundle (เช่น index.css) -> ชื่อไฟล์ที่มี hash
+
+ชื่อไฟล์เปลี่ยนทุกครั้งที่เนื้อหาเปลี่ยน จึงให้ browser cache ได้ 1 ปีแบบ immutable
+template เรียก `asset_url('index.css')` ส่วนการเลือก encoding ตาม Accept-Encoding อยู่ที่ route /assets ใน app.py
+
+build ด้วยมือ:  python assets.py
+(app สร้างให้อัตโนมัติตอนเริ่มถ้ายังไม่มี manifest หรือไฟล์ต้นฉบับใหม่กว่า)
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# bundle -> ไฟล์ต้นฉบับ (path ใต้ static/) ต่อกันตามลำดับ
+BUNDLES = {
+    'index.css': ['css/index.css'],
+    'index.js': ['js/index.js'],
+    'cart.css': ['css/cart.css'],
+    'cart.js': ['js/cart.js'],
+    'checkout.css': ['css/checkout.css'],
+    'checkout.js': ['js/checkout.js'],
+    'admin.css': ['css/admin.css'],
+    'admin.js': ['js/admin.js'],
+    'login.css': ['css/login.css'],
+    'receipt.css': ['css/receipt.css'],
+    'receipt.js': ['js/receipt.js'],
+}
+CONTENT_TYPES = {'css': 'text/css', 'js': 'text/javascript'}
+# ลำดับความชอบของ encoding ที่บีบอัดไว้แล้ว (นามสกุลไฟล์)
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+MANIFEST = 'manifest.json'
+
+
+# ==================== Minify ====================
+# minify แบบระมัดระวัง: ตัด comment และช่องว่างที่ไม่มีผล โดยไม่แตะข้อความใน string/regex/template literal
+# (ไม่ rename ตัวแปรและยังคงขึ้นบรรทัดใหม่ใน JS เพื่อไม่ให้ automatic semicolon insertion เปลี่ยนความหมาย)
+
+_CSS_TOKENS = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')|/\*.*?\*/', re.S)
+_CSS_PUNCT = re.compile(r'\s*([{};,>])\s*')
+
+
+def _compact_css(code: str) -> str:
+    return _CSS_PUNCT.sub(r'\1', re.sub(r'\s+', ' ', code)).replace(';}', '}')
+
+
+def minify_css(text: str) -> str:
+    out, code, pos = [], [], 0
+    for match in _CSS_TOKENS.finditer(text):
+        code.append(text[pos:match.start()])
+        if match.group(1):
+            out.append(_compact_css(''.join(code)))
+            out.append(match.group(1))
+            code = []
+        else:
+            code.append(' ')
+        pos = match.end()
+    code.append(text[pos:])
+    out.append(_compact_css(''.join(code)))
+    return ''.join(out).strip()
+
+
+# ตัวอักษรก่อน "/" ที่บอกว่า "/" เป็นจุดเริ่ม regex ไม่ใช่การหาร
+_REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+_REGEX_KEYWORDS = ('return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'void', 'yield', 'await')
+
+
+def _regex_allowed(before: str) -> bool:
+    """เครื่องหมาย / ที่ตามหลังข้อความ before เป็นจุดเริ่ม regex literal หรือไม่"""
+    if not before:
+        return True
+    if before[-1] in _REGEX_PRECEDERS:
+        return True
+    word = re.search(r'[A-Za-z_$]+$', before)
+    return bool(word) and word.group(0) in _REGEX_KEYWORDS
+
+
+def _skip_regex(text: str, i: int) -> int:
+    """index ถัดจาก regex literal (รวม flags) ที่เริ่มที่ตำแหน่ง i"""
+    j, in_class = i + 1, False
+    while j < len(text):
+        c = text[j]
+        if c == '\\':
+            j += 2
+            continue
+        if c == '\n':
+            raise ValueError('unterminated regex literal')
+        if c == '[':
+            in_class = True
+        elif c == ']':
+            in_class = False
+        elif c == '/' and not in_class:
+            break
+        j += 1
+    j += 1
+    while j < len(text) and text[j].isalnum():
+        j += 1
+    return j
+
+
+def _read_template(text: str, start: int) -> tuple:
+    """อ่าน template literal จาก start (หลัง ` หรือ } ของ ${}) ถึง ` ปิดหรือ ${ ถัดไป
+
+    คืน (ข้อความ, index ถัดไป, เปิด ${ ค้างไว้หรือไม่)
+    """
+    j = start
+    while j < len(text):
+        ch = text[j]
+        if ch == '\\':
+            j += 2
+            continue
+        if ch == '`':
+            return text[start:j + 1], j + 1, False
+        if text.startswith('${', j):
+            return text[start:j + 2], j + 2, True
+        j += 1
+    raise ValueError('unterminated template literal')
+
+
+def minify_js(text: str) -> str:
+    lines, line = [], []
+    template_depth = []   # จำนวน { ที่เปิดค้างใน ${...} ของ template literal แต่ละชั้น
+    i, n = 0, len(text)
+    while i < n:
+        ch = text[i]
+        if ch in '\'"':
+            j = i + 1
+            while j < n and text[j] != ch:
+                if text[j] == '\n':
+                    raise ValueError('unterminated string literal')
+                j += 2 if text[j] == '\\' else 1
+            line.append(text[i:j + 1])
+            i = j + 1
+        elif ch == '`' or (ch == '}' and template_depth and template_depth[-1] == 0):
+            if ch == '}':
+                template_depth.pop()
+            chunk, i, opened = _read_template(text, i + 1)
+            line.append(ch + chunk)
+            if opened:
+                template_depth.append(0)
+        elif ch in '{}' and template_depth:
+            template_depth[-1] += 1 if ch == '{' else -1
+            line.append(ch)
+            i += 1
+        elif text.startswith('//', i):
+            while i < n and text[i] != '\n':
+                i += 1
+        elif text.startswith('/*', i):
+            end = text.find('*/', i + 2)
+            if end < 0:
+                raise ValueError('unterminated comment')
+            line.append(' ')
+            i = end + 2
+        elif ch == '/' and _regex_allowed(''.join(line).rstrip() or (lines[-1].rstrip() if lines else '')):
+            j = _skip_regex(text, i)
+            line.append(text[i:j])
+            i = j
+        elif ch == '\n':
+            stripped = ''.join(line).strip()
+            if stripped:
+                lines.append(stripped + '\n')
+            line = []
+            i += 1
+        elif ch in ' \t\r':
+            while i < n and text[i] in ' \t\r':
+                i += 1
+            line.append(' ')
+        else:
+            line.append(ch)
+            i += 1
+    stripped = ''.join(line).strip()
+    if stripped:
+        lines.append(stripped + '\n')
+    return ''.join(lines)
+
+
+MINIFIERS = {'css': minify_css, 'js': minify_js}
+
+
+# ==================== Build ====================
+
+def source_paths(static_dir: str) -> list:
+    return [os.path.join(static_dir, path) for paths in BUNDLES.values() for path in paths]
+
+
+def _write_atomic(path: str, data: bytes):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def build(static_dir: str) -> dict:
+    """สร้าง bundle ทั้งหมดลง static/dist คืน manifest {bundle: ชื่อไฟล์}"""
+    dist_dir = os.path.join(static_dir, 'dist')
+    os.makedirs(dist_dir, exist_ok=True)
+    manifest = {}
+    for name, paths in BUNDLES.items():
+        stem, ext = name.rsplit('.', 1)
+        source = '\n'.join(open(os.path.join(static_dir, path), encoding='utf-8').read() for path in paths)
+        data = MINIFIERS[ext](source).encode('utf-8')
+        filename = f'{stem}.{hashlib.sha256(data).hexdigest()[:12]}.{ext}'
+        path = os.path.join(dist_dir, filename)
+        if not os.path.exists(path):
+            # mtime=0 ให้ไฟล์ .gz เหมือนเดิมทุกครั้งที่ build
+            _write_atomic(path + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+            if BROTLI_AVAILABLE:
+                _write_atomic(path + '.br', brotli.compress(data, quality=11))
+            _write_atomic(path, data)
+        manifest[name] = filename
+
+    # ไม่ลบ bundle เวอร์ชันเก่า: หน้า HTML ที่ browser/process อื่นยังถืออยู่อาจยังอ้างถึง
+    _write_atomic(os.path.join(dist_dir, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return manifest
+
+
+class AssetManifest:
+    """ชื่อไฟล์ bundle ที่ build แล้ว สำหรับ template (asset_url) และ route ที่ส่งไฟล์"""
+
+    def __init__(self, static_dir: str, url_prefix: str = '/assets/', auto_build: bool = True):
+        self.static_dir = static_dir
+        self.dist_dir = os.path.join(static_dir, 'dist')
+        self.url_prefix = url_prefix
+        manifest_path = os.path.join(self.dist_dir, MANIFEST)
+        if auto_build and self._stale(manifest_path):
+            self.files = build(static_dir)
+        else:
+            with open(manifest_path, encoding='utf-8') as f:
+                self.files = json.load(f)
+        self._served = set(self.files.values())
+        # เปลี่ยนทุกครั้งที่ bundle ใดเปลี่ยน ใช้ประกอบ ETag ของหน้า HTML ที่อ้างชื่อไฟล์เหล่านี้
+        self.version = hashlib.sha256(json.dumps(self.files, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+    def _stale(self, manifest_path: str) -> bool:
+        if not os.path.exists(manifest_path):
+            return True
+        built = os.path.getmtime(manifest_path)
+        return any(os.path.getmtime(path) > built for path in source_paths(self.static_dir)) \
+            or os.path.getmtime(__file__) > built
+
+    def url(self, name: str) -> str:
+        return self.url_prefix + self.files[name]
+
+    def variant(self, filename: str, accept_encoding) -> tuple:
+        """เลือกไฟล์ที่จะส่งตาม Accept-Encoding คืน (path, encoding หรือ None) หรือ (None, None) ถ้าไม่มีไฟล์นี้
+
+        accept_encoding เป็น request.accept_encodings ของ werkzeug (ค่า q=0 หมายถึงไม่รับ)
+        """
+        if filename not in self._served:
+            return None, None
+        path = os.path.join(self.dist_dir, filename)
+        for encoding, suffix in ENCODINGS:
+            if accept_encoding[encoding] > 0 and os.path.exists(path + suffix):
+                return path + suffix, encoding
+        return path, None
+
+
+if __name__ == '__main__':
+    static = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'static')
+    files = build(static)
+    dist = os.path.join(static, 'dist')
+    for name, filename in files.items():
+        sizes = [os.path.getsize(os.path.join(dist, filename + suffix))
+                 for suffix in ('', '.gz', '.br') if os.path.exists(os.path.join(dist, filename + suffix))]
+        source = sum(os.path.getsize(os.path.join(static, path)) for path in BUNDLES[name])
+        print(f'{filename:<32} source {source:>7} -> ' + ' / '.join(f'{size:>6}' for size in sizes) + ' bytes')
+    if not BROTLI_AVAILABLE:
+        print('Brotli not installed: only gzip variants were written', file=sys.stderr)
@@ -0,0 +1,120 @@
+"""Load test: latency ของหน้าร้านระหว่างที่ /api/ask-ai ถูกยิงรัว เทียบเปิด/ปิด admission control
+
+server คือ gunicorn wsgi:app (1 worker, gthread 8 threads) ที่ต่อกับ stub OpenAI ซึ่งหน่วงทุกคำตอบ --delay วินาที
+สคริปต์ยิงคำถามใหม่ (ไม่ซ้ำ ไม่อยู่ใน cache) จาก --flood connection พร้อมกันตลอด --seconds วินาที
+ระหว่างนั้น probe ขอ GET /api/products?limit=20 ทีละครั้ง วัด p50/p95/max ของ probe และผลของคำถาม AI
+
+scenario:
+- baseline       ไม่มีการยิง AI (latency ปกติของหน้าร้าน)
+- no admission   ขีดจำกัดสูงมากจนเท่ากับปิด
+- rate limit     ค่าตั้งต้น: สคริปต์จาก IP เดียวโดน token bucket เกือบทันที
+- gate only      ปิด rate limit (เหมือนมีลูกค้าต่างกันจำนวนมาก) เหลือแค่ in-flight cap + คิว
+- ... + backoff  client รอตาม Retry-After ก่อนยิงใหม่ (สามแบบแรกยิงต่อทันที ซึ่งเป็นกรณีแย่ที่สุด:
+                 คำตอบ 429 ราคาถูกแต่ปริมาณ request ล้วนๆ ยังแย่ CPU กับหน้าร้าน)
+
+    python benchmarks/bench_admission.py --flood 64 --seconds 8 --delay 1
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+import httpx
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_async_ai import _pct, start_server  # noqa: E402
+from benchmarks.stub_openai_server import start_stub_server  # noqa: E402
+
+UNLIMITED = {
+    'AI_RATE_LIMIT_PER_MINUTE': '1000000', 'AI_RATE_LIMIT_BURST': '1000000',
+    'AI_ADMISSION_MAX_IN_FLIGHT': '1000', 'AI_ADMISSION_QUEUE': '1000',
+}
+GATE_ONLY = {'AI_RATE_LIMIT_PER_MINUTE': '1000000', 'AI_RATE_LIMIT_BURST': '1000000'}
+# (ชื่อ, env, ยิง AI หรือไม่, รอตาม Retry-After หรือไม่)
+SCENARIOS = (
+    ('baseline', {}, False, False),
+    ('no admission', UNLIMITED, True, False),
+    ('rate limit', {}, True, False),
+    ('gate only', GATE_ONLY, True, False),
+    ('rate limit + backoff', {}, True, True),
+    ('gate only + backoff', GATE_ONLY, True, True),
+)
+
+
+async def run(base_url, flood, seconds, backoff):
+    probe_ms, outcomes = [], {'answered': 0, 'fallback': 0, 'throttled': 0, 'error': 0}
+    deadline = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=flood + 10, max_keepalive_connections=flood + 10)
+
+    async def attacker(client):
+        while time.perf_counter() < deadline:
+            try:
+                response = await client.post('/api/ask-ai', json={'question': f'กาแฟแนะนำ #{uuid.uuid4().hex}'})
+            except httpx.HTTPError:
+                outcomes['error'] += 1
+                continue
+            if response.status_code == 429:
+                outcomes['throttled'] += 1
+                if backoff:
+                    await asyncio.sleep(min(float(response.headers['Retry-After']), deadline - time.perf_counter()))
+            elif response.status_code == 200 and response.json().get('answer', '').startswith('คำตอบจาก stub'):
+                outcomes['answered'] += 1
+            else:
+                outcomes['fallback'] += 1
+
+    async def probe():
+        async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                await client.get('/api/products?limit=20')
+                probe_ms.append((time.perf_counter() - started) * 1000)
+                await asyncio.sleep(0.05)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        await asyncio.gather(probe(), *(attacker(client) for _ in range(flood)))
+    return probe_ms, outcomes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--flood', type=int, default=64, help='จำนวน connection ที่ยิงคำถามพร้อมกัน')
+    parser.add_argument('--seconds', type=float, default=8.0)
+    parser.add_argument('--delay', type=float, default=1.0, help='เวลาตอบของ stub OpenAI (วินาที)')
+    args = parser.parse_args()
+    if not shutil.which('gunicorn'):
+        sys.exit('gunicorn is required (pip install gunicorn)')
+
+    server, state, openai_url = start_stub_server()
+    state.delay = args.delay
+    tmp = tempfile.mkdtemp()
+    base_env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+                    OPENAI_API_KEY='stub', OPENAI_BASE_URL=openai_url, WEB_THREADS='8', WEB_CONCURRENCY='1')
+
+    print(f'gunicorn gthread 1x8 threads, stub OpenAI delay {args.delay}s, '
+          f'{args.flood} flooding connections for {args.seconds:g}s')
+    print(f"{'scenario':<22} {'probe p50':>10} {'probe p95':>10} {'probe max':>10} {'probes':>7} "
+          f"{'answered':>9} {'fallback':>9} {'429':>7}")
+    for name, overrides, flooding, backoff in SCENARIOS:
+        # AI cache และ bucket ใหม่ทุก scenario
+        env = dict(base_env, AI_CACHE_DB=os.path.join(tmp, f'ai_cache_{uuid.uuid4().hex}.db'), **overrides)
+        proc, base_url = start_server('threaded', env)
+        try:
+            probe_ms, outcomes = asyncio.run(run(base_url, args.flood if flooding else 0, args.seconds, backoff))
+        finally:
+            proc.terminate()
+            proc.wait()
+        print(f'{name:<22} {statistics.median(probe_ms):>8.1f}ms {_pct(probe_ms, 95):>8.1f}ms '
+              f'{max(probe_ms):>8.1f}ms {len(probe_ms):>7} {outcomes["answered"]:>9} '
+              f'{outcomes["fallback"] + outcomes["error"]:>9} {outcomes["throttled"]:>7}')
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Benchmark: สร้างคำอธิบายสินค้า N ชิ้น แบบเรียกทีละชิ้น vs background job แบบ batch
+
+ใช้ FakeOpenAI (หน่วงเวลาเหมือน round trip จริง) จึงรันได้แบบ offline
+
+    python benchmarks/bench_ai_jobs.py --products 100 --delay 0.2
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--products', type=int, default=100)
+    parser.add_argument('--delay', type=float, default=0.2, help='fake OpenAI latency (s)')
+    parser.add_argument('--fail-rate', type=float, default=0.1)
+    args = parser.parse_args()
+
+    os.environ['AI_CACHE_DB'] = os.path.join(tempfile.mkdtemp(), 'ai_cache.db')
+    import app as shop
+    from ai_jobs import DescriptionJobQueue
+    from benchmarks.fake_openai import FakeOpenAI
+
+    products = [{'id': i, 'name': f'Bench Coffee {i}', 'price': 100 + i} for i in range(1, args.products + 1)]
+    saved = {}
+
+    # 1) เรียกทีละชิ้นแบบเดิม (เหมือนกดปุ่ม AI ทีละสินค้า)
+    shop.openai_client = FakeOpenAI(delay=args.delay)
+    shop.answer_cache.clear()
+    start = time.perf_counter()
+    for p in products:
+        shop.generate_product_description(p['name'], p['price'])
+    inline_time = time.perf_counter() - start
+    inline_calls = shop.openai_client.calls
+
+    # 2) background job: 5 ชิ้นต่อ prompt, 2 workers, มี upstream error บางส่วนให้ retry
+    shop.openai_client = FakeOpenAI(delay=args.delay, fail_rate=args.fail_rate)
+    jobs = DescriptionJobQueue(shop.generate_product_descriptions_batch, saved.update,
+                               max_workers=2, batch_size=5, backoff=0.05)
+    start = time.perf_counter()
+    job_id = jobs.submit(products)
+    while jobs.get(job_id)['status'] in ('queued', 'running'):
+        time.sleep(0.01)
+    job_time = time.perf_counter() - start
+    job = jobs.get(job_id)
+    jobs.shutdown()
+
+    print(f'products:            {args.products}')
+    print(f'inline:              {inline_time:.2f}s  ({inline_calls} upstream calls)')
+    print(f'batch job:           {job_time:.2f}s  ({shop.openai_client.calls} upstream calls, '
+          f'status={job["status"]}, completed={job["completed"]}, failed={job["failed"]})')
+    print(f'descriptions saved:  {len(saved)}')
+
+
+if __name__ == '__main__':
+    main()
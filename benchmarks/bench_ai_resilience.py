@@ -0,0 +1,90 @@
+"""Benchmark: พฤติกรรมของ /api/ask-ai เมื่อ upstream ปกติ, ช้า และล่ม
+
+ใช้ OpenAI client จริงชี้ไปที่ stub server ในเครื่อง (benchmarks/stub_openai_server.py)
+และวัดเวลาตอบของ /api/ask-ai และหน้า / ระหว่างที่ upstream มีปัญหา
+
+    python benchmarks/bench_ai_resilience.py
+"""
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from benchmarks.stub_openai_server import start_stub_server  # noqa: E402
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def _ms(samples):
+    samples = sorted(samples)
+    return f'p50={statistics.median(samples):7.1f}ms  max={samples[-1]:7.1f}ms  n={len(samples)}'
+
+
+def main():
+    server, state, base_url = start_stub_server()
+    os.environ.update({
+        'OPENAI_API_KEY': 'stub-key',
+        'OPENAI_BASE_URL': base_url,
+        'AI_TIMEOUT': '1.0',
+        'AI_MAX_CONCURRENCY': '4',
+        'AI_BREAKER_FAILURES': '3',
+        'AI_BREAKER_RESET': '2',
+        'AI_CACHE_DB': os.path.join(tempfile.mkdtemp(), 'ai_cache.db'),
+    })
+    import app as shop
+
+    client = shop.app.test_client()
+    counter = iter(range(10 ** 9))
+
+    def ask():
+        # คำถามไม่ซ้ำกัน เพื่อไม่ให้ answer cache ช่วย
+        client.post('/api/ask-ai', json={'question': f'latte recipe #{next(counter)}'})
+
+    print('1) upstream healthy')
+    print('   ask-ai  ', _ms([_timed(ask) for _ in range(10)]))
+
+    print('2) upstream slow (5 s) with 16 concurrent chat users')
+    state.delay = 5.0
+    storefront = []
+    stop = threading.Event()
+
+    def storefront_probe():
+        while not stop.is_set():
+            storefront.append(_timed(lambda: client.get('/')))
+            time.sleep(0.05)
+
+    probe = threading.Thread(target=storefront_probe)
+    probe.start()
+    with ThreadPoolExecutor(16) as pool:
+        slow = list(pool.map(lambda _: _timed(ask), range(32)))
+    stop.set()
+    probe.join()
+    print('   ask-ai  ', _ms(slow))
+    print('   /       ', _ms(storefront))
+    print('   breaker ', shop.openai_client.snapshot()['breaker'])
+
+    print('3) circuit open: callers get the fallback immediately')
+    print('   ask-ai  ', _ms([_timed(ask) for _ in range(20)]))
+
+    print('4) upstream recovers; half-open probe closes the circuit')
+    state.delay = 0.0
+    time.sleep(2.1)
+    print('   ask-ai  ', _ms([_timed(ask) for _ in range(10)]))
+    snapshot = shop.openai_client.snapshot()
+    print('   breaker ', snapshot['breaker'])
+    print('   counters', snapshot['counters'])
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
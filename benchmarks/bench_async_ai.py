@@ -0,0 +1,177 @@
+"""Benchmark: คำถาม AI พร้อมกันหลายร้อยข้อ เทียบ route แบบ thread (gunicorn wsgi:app, gthread)
+กับ route แบบ async (uvicorn asgi:app) ใน process เดียว
+
+upstream คือ stub OpenAI ในเครื่องที่หน่วงทุกคำตอบ --delay วินาที ระหว่างที่ยิงคำถาม (ไม่ซ้ำกัน) พร้อมกัน
+จะมี probe ขอ GET /api/products/1 ทีละครั้งเพื่อดูว่าหน้าเว็บยังเร็วอยู่หรือไม่ วัด:
+- เวลาจนตอบครบ, p50/p95 ของคำถาม, จำนวนคำตอบ fallback (ไม่ได้คำตอบจาก AI)
+- p50/p95 ของ probe, RSS สูงสุดและจำนวน thread ของ server ระหว่างวัด
+
+    python benchmarks/bench_async_ai.py --questions 50 200 --delay 0.5
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+import httpx
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from benchmarks.stub_openai_server import start_stub_server  # noqa: E402
+
+THREADS = 8
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _process_tree(pid):
+    pids = [pid]
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            for child in f.read().split():
+                pids += _process_tree(int(child))
+    except OSError:
+        pass
+    return pids
+
+
+def _status(pid, field):
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+class Sampler(threading.Thread):
+    """เก็บ RSS รวม (KiB) และจำนวน thread สูงสุดของ process tree ของ server ทุก 50 ms"""
+
+    def __init__(self, pid):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.peak_rss = 0
+        self.peak_threads = 0
+        self.running = True
+
+    def run(self):
+        while self.running:
+            pids = _process_tree(self.pid)
+            self.peak_rss = max(self.peak_rss, sum(_status(p, 'VmRSS') for p in pids))
+            self.peak_threads = max(self.peak_threads, sum(_status(p, 'Threads') for p in pids))
+            time.sleep(0.05)
+
+
+def start_server(kind, env):
+    port = _free_port()
+    if kind == 'threaded':
+        cmd = [shutil.which('gunicorn'), 'wsgi:app', '--workers', '1', '--threads', str(THREADS),
+               '--bind', f'127.0.0.1:{port}']
+    else:
+        cmd = [sys.executable, '-m', 'uvicorn', 'asgi:app', '--port', str(port), '--log-level', 'warning']
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if httpx.get(base_url + '/api/products/1', timeout=2).status_code == 200:
+                return proc, base_url
+        except httpx.TransportError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError(f'{kind} server did not start')
+
+
+async def flood(base_url, questions, timeout):
+    probe_ms, done = [], asyncio.Event()
+    limits = httpx.Limits(max_connections=questions + 10, max_keepalive_connections=questions + 10)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        async def ask():
+            started = time.perf_counter()
+            try:
+                response = await client.post('/api/ask-ai', json={'question': f'กาแฟแนะนำ #{uuid.uuid4().hex}'})
+                answer = response.json().get('answer', '')
+                ok = response.status_code == 200 and answer.startswith('คำตอบจาก stub')
+            except httpx.HTTPError:
+                ok = False
+            return (time.perf_counter() - started) * 1000, ok
+
+        async def probe():
+            async with httpx.AsyncClient(base_url=base_url, timeout=timeout) as probe_client:
+                while not done.is_set():
+                    started = time.perf_counter()
+                    await probe_client.get('/api/products/1')
+                    probe_ms.append((time.perf_counter() - started) * 1000)
+                    await asyncio.sleep(0.05)
+
+        probe_task = asyncio.create_task(probe())
+        started = time.perf_counter()
+        results = await asyncio.gather(*(ask() for _ in range(questions)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await probe_task
+    return elapsed, results, probe_ms
+
+
+def _pct(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(q / 100 * len(samples)))] if samples else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--questions', type=int, nargs='+', default=[50, 200])
+    parser.add_argument('--delay', type=float, default=0.5, help='เวลาตอบของ stub OpenAI (วินาที)')
+    args = parser.parse_args()
+
+    server, state, openai_url = start_stub_server()
+    state.delay = args.delay
+    tmp = tempfile.mkdtemp()
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+               AI_CACHE_DB=os.path.join(tmp, 'ai_cache.db'), OPENAI_API_KEY='stub', OPENAI_BASE_URL=openai_url,
+               AI_MAX_CONCURRENCY='1000', AI_ASYNC_MAX_CONCURRENCY='1000', AI_TIMEOUT='60',
+               WEB_THREADS=str(THREADS), WEB_CONCURRENCY='1')
+
+    kinds = ['threaded', 'async'] if shutil.which('gunicorn') else ['async']
+    print(f'stub OpenAI delay {args.delay}s, server threads for WSGI routes: {THREADS}')
+    print(f"{'server':<9} {'questions':>9} {'total s':>8} {'ask p50':>9} {'ask p95':>9} {'fallback':>8} "
+          f"{'probe p50':>10} {'probe p95':>10} {'peak RSS':>9} {'threads':>7}")
+    for kind in kinds:
+        proc, base_url = start_server(kind, env)
+        try:
+            for questions in args.questions:
+                sampler = Sampler(proc.pid)
+                sampler.start()
+                elapsed, results, probe_ms = asyncio.run(flood(base_url, questions, timeout=120))
+                sampler.running = False
+                sampler.join()
+                latencies = [ms for ms, _ in results]
+                fallback = sum(1 for _, ok in results if not ok)
+                print(f'{kind:<9} {questions:>9} {elapsed:>8.2f} {statistics.median(latencies):>7.0f}ms '
+                      f'{_pct(latencies, 95):>7.0f}ms {fallback:>8} {statistics.median(probe_ms):>8.1f}ms '
+                      f'{_pct(probe_ms, 95):>8.1f}ms {sampler.peak_rss / 1024:>7.1f}MB {sampler.peak_threads:>7}')
+        finally:
+            proc.terminate()
+            proc.wait()
+    if 'threaded' not in kinds:
+        print('gunicorn not installed: skipped the threaded comparison')
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
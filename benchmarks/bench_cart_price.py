@@ -0,0 +1,72 @@
+"""Benchmark: คิดราคาตะกร้า 1-500 บรรทัด
+เทียบการดึงราคาทีละสินค้า (GET /api/products/<id> ต่อบรรทัด) กับ POST /api/cart/price ครั้งเดียว
+ทั้งแบบ query เดียว (CATALOG_CACHE=0) และแบบอ่านจาก catalog cache
+
+    python benchmarks/bench_cart_price.py --repeat 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+CART_SIZES = (1, 10, 50, 100, 500)
+
+
+def timed_ms(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--products', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    os.environ['AI_CACHE_DB'] = os.path.join(tmp, 'ai_cache.db')
+    import app as shop
+    from storage import run_migrations
+
+    with shop.app.app_context():
+        run_migrations(shop.db.engine)
+        shop.db.session.add_all(
+            shop.Product(name=f'Bench Coffee {i}', price=100 + i % 400) for i in range(args.products)
+        )
+        shop.bump_catalog_version()
+        shop.db.session.commit()
+    client = shop.app.test_client()
+
+    print(f'{args.products} products, mean of {args.repeat} runs (ms per cart)')
+    print(f"{'lines':>6} {'per-item GETs':>14} {'cart/price SQL':>15} {'cart/price cache':>17}")
+    for size in CART_SIZES:
+        cart = [{'id': 1 + (i * 7) % args.products, 'qty': 1 + i % 3, 'price': 100} for i in range(size)]
+
+        def per_item():
+            total = 0
+            for line in cart:
+                total += client.get(f"/api/products/{line['id']}").get_json()['price'] * line['qty']
+            return total
+
+        def batched():
+            response = client.post('/api/cart/price', json={'items': cart})
+            assert response.status_code == 200
+            return response.get_json()['total']
+
+        shop.catalog_cache.enabled = False
+        naive = timed_ms(per_item, args.repeat)
+        sql = timed_ms(batched, args.repeat)
+        shop.catalog_cache.enabled = True
+        cached = timed_ms(batched, args.repeat)
+        print(f'{size:>6} {naive:>12.2f}ms {sql:>13.2f}ms {cached:>15.2f}ms')
+
+
+if __name__ == '__main__':
+    main()
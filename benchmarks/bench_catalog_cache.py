@@ -0,0 +1,61 @@
+"""Benchmark: requests/sec ของ / และ /api/products เมื่อเปิด/ปิด catalog cache และ page cache
+
+สร้างฐานข้อมูลชั่วคราวพร้อมสินค้าสังเคราะห์ แล้วยิง request ผ่าน Flask test client
+
+    python benchmarks/bench_catalog_cache.py --products 1000 --seconds 3
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+
+def requests_per_second(client, url, seconds):
+    done = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        assert client.get(url).status_code == 200
+        done += 1
+    return done / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--products', type=int, default=1000)
+    parser.add_argument('--seconds', type=float, default=3.0)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    os.environ['AI_CACHE_DB'] = os.path.join(tmp, 'ai_cache.db')
+    import app as shop
+    from storage import run_migrations
+
+    with shop.app.app_context():
+        run_migrations(shop.db.engine)
+        shop.db.session.add_all(
+            shop.Product(name=f'Bench Coffee {i}', price=100 + i % 400, popularity=i % 10 and i % 37,
+                         image_url=f'https://example.com/{i}.jpg', description='กาแฟคั่วกลาง หอม นุ่ม ' * 5)
+            for i in range(args.products)
+        )
+        shop.bump_catalog_version()
+        shop.db.session.commit()
+        shop.seed_reviews()
+
+    client = shop.app.test_client()
+    print(f'{args.products} products, {args.seconds:g}s per measurement')
+    print(f"{'route':<32} {'no cache':>10} {'cache':>10} {'speedup':>8}")
+    for url in ('/', '/api/products', '/api/products?limit=50', '/api/products/42'):
+        shop.catalog_cache.enabled = shop.page_cache.enabled = False
+        off = requests_per_second(client, url, args.seconds)
+        shop.catalog_cache.enabled = shop.page_cache.enabled = True
+        on = requests_per_second(client, url, args.seconds)
+        print(f'{url:<32} {off:>8.0f}/s {on:>8.0f}/s {on / off:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Benchmark: นำเข้าสินค้าทีละ request (POST /api/products) เทียบกับ /api/products/import
+และหน่วยความจำสูงสุดของ /api/products/export เมื่อแคตตาล็อกใหญ่ขึ้น
+
+    python benchmarks/bench_catalog_io.py --rows 20000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+
+def csv_body(rows, offset=0):
+    lines = ['name,price,image_url,description']
+    lines += [f'Import Coffee {offset + i},{100 + i % 400},https://example.com/{i}.jpg,กาแฟคั่วกลาง หอม นุ่ม'
+              for i in range(rows)]
+    return ('\n'.join(lines) + '\n').encode()
+
+
+def export_peak(client, fmt):
+    tracemalloc.start()
+    size = 0
+    response = client.get(f'/api/products/export?format={fmt}', buffered=False)
+    for chunk in response.response:
+        size += len(chunk)
+    response.close()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return size, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--single', type=int, default=500, help='rows to time with one POST per product')
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    os.environ['AI_CACHE_DB'] = os.path.join(tmp, 'ai_cache.db')
+    import app as shop
+    from storage import run_migrations
+
+    with shop.app.app_context():
+        run_migrations(shop.db.engine)
+    client = shop.app.test_client()
+    with client.session_transaction() as sess:
+        sess['logged_in'] = True
+
+    start = time.perf_counter()
+    for i in range(args.single):
+        client.post('/api/products', json={'name': f'Single Coffee {i}', 'price': 100 + i})
+    single = args.single / (time.perf_counter() - start)
+
+    body = csv_body(args.rows)
+    start = time.perf_counter()
+    report = client.post('/api/products/import', data=body, content_type='text/csv').get_json()
+    bulk = args.rows / (time.perf_counter() - start)
+    assert report['inserted'] == args.rows, report
+
+    start = time.perf_counter()
+    report = client.post('/api/products/import', data=body, content_type='text/csv').get_json()
+    upsert = args.rows / (time.perf_counter() - start)
+    assert report['updated'] == args.rows, report
+
+    print(f'POST /api/products (one row each)   {single:>9.0f} rows/s')
+    print(f'/api/products/import (insert)        {bulk:>9.0f} rows/s  ({bulk / single:.0f}x)')
+    print(f'/api/products/import (update)        {upsert:>9.0f} rows/s')
+
+    print('\nexport peak Python memory')
+    for extra in (0, args.rows * 2):
+        if extra:
+            client.post('/api/products/import', data=csv_body(extra, offset=args.rows), content_type='text/csv')
+        with shop.app.app_context():
+            total = shop.db.session.query(shop.db.func.count(shop.Product.id)).scalar()
+        for fmt in ('csv', 'ndjson'):
+            size, peak = export_peak(client, fmt)
+            print(f'  {fmt:<7} {total:>7} products  {size / 1e6:7.1f} MB body  peak {peak / 1e6:6.2f} MB')
+
+
+if __name__ == '__main__':
+    main()
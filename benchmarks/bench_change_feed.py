@@ -0,0 +1,107 @@
+"""Benchmark: sync แคตตาล็อกหลังมีการแก้ไข ระหว่างโหลด /api/products ใหม่ทั้งหมด กับ /api/products/changes?since=
+
+สร้างแคตตาล็อกสังเคราะห์ --products ชิ้น client ถือข้อมูลชุดเต็มกับ version ไว้แล้ว จากนั้นแต่ละรอบ:
+แก้สินค้าหนึ่งชิ้น (PUT) / ลบหนึ่งชิ้น / กดหัวใจ --favorites ชิ้น (popularity flush หนึ่งชุด)
+แล้ว sync สองแบบ วัด bytes ของ response และเวลา (request ผ่าน Flask test client + json.loads ฝั่ง client)
+- full refetch (first)  request แรกหลังแก้: catalog cache ต้องโหลดและ serialize ใหม่
+- full refetch (warm)   request ถัดไปที่ได้ JSON ที่ serialize ไว้แล้ว (กรณีดีที่สุดของการโหลดทั้งหมด)
+- delta                 ?since=<version ครั้งก่อน>
+
+    python benchmarks/bench_change_feed.py --products 50000 --rounds 10
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+
+def timed_get(client, url):
+    """(ms, bytes, ข้อมูลที่ parse แล้ว) ของ GET หนึ่งครั้ง"""
+    started = time.perf_counter()
+    response = client.get(url)
+    body = response.get_data()
+    data = json.loads(body)
+    assert response.status_code == 200, response.status_code
+    return (time.perf_counter() - started) * 1000, len(body), data
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--products', type=int, default=50000)
+    parser.add_argument('--rounds', type=int, default=10, help='จำนวนรอบต่อชนิดการแก้ไข')
+    parser.add_argument('--favorites', type=int, default=100, help='จำนวนสินค้าที่ถูกกดหัวใจในหนึ่ง flush')
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    os.environ['AI_CACHE_DB'] = os.path.join(tmp, 'ai_cache.db')
+    os.environ.setdefault('SLOW_QUERY_MS', '100000')
+    import app as shop
+    from storage import run_migrations
+
+    db = shop.db
+    with shop.app.app_context():
+        run_migrations(db.engine)
+        db.session.execute(db.insert(shop.Product), [
+            {'name': f'Bench Coffee {i}', 'price': 100 + i % 400, 'popularity': i % 37,
+             'image_url': f'/images/{i:064x}.jpg', 'description': 'กาแฟคั่วกลาง หอม นุ่ม ' * 4}
+            for i in range(args.products)
+        ])
+        shop.bump_catalog_version()
+        db.session.commit()
+
+    client = shop.app.test_client()
+    with client.session_transaction() as sess:
+        sess['logged_in'] = True
+    rng = random.Random(42)
+    live = list(range(1, args.products + 1))
+
+    def edit_one():
+        client.put(f'/api/products/{rng.choice(live)}', json={'price': rng.randint(100, 500)})
+
+    def delete_one():
+        client.delete(f'/api/products/{live.pop(rng.randrange(len(live)))}')
+
+    def favorite_many():
+        for pid in rng.sample(live, args.favorites):
+            client.post(f'/toggle-favorite/{pid}')
+        shop.popularity_counter.flush()
+
+    # client เริ่มจากข้อมูลชุดเต็ม (reset) แล้วเก็บ version ไว้
+    _, _, data = timed_get(client, '/api/products/changes')
+    version = data['version']
+
+    print(f'{args.products} products, {args.rounds} rounds per change (median)')
+    print(f"{'change':<22} {'sync':<22} {'bytes':>12} {'ms':>9} {'upserts':>8} {'deleted':>8}")
+    for label, change in (('edit 1 product', edit_one), ('delete 1 product', delete_one),
+                          (f'favorite {args.favorites}', favorite_many)):
+        results = {'full refetch (first)': [], 'full refetch (warm)': [], 'delta': []}
+        counts = []
+        for _ in range(args.rounds):
+            change()
+            results['full refetch (first)'].append(timed_get(client, '/api/products')[:2])
+            results['full refetch (warm)'].append(timed_get(client, '/api/products')[:2])
+            ms, size, data = timed_get(client, f'/api/products/changes?since={version}')
+            assert not data['reset']
+            results['delta'].append((ms, size))
+            counts.append((len(data['upserts']), len(data['deleted'])))
+            version = data['version']
+        for sync, samples in results.items():
+            upserts, deleted = (statistics.median(c[i] for c in counts) for i in (0, 1)) if sync == 'delta' else ('-', '-')
+            print(f"{label:<22} {sync:<22} {statistics.median(s[1] for s in samples):>12,.0f} "
+                  f"{statistics.median(s[0] for s in samples):>9.2f} {upserts:>8} {deleted:>8}")
+
+    with shop.app.app_context():
+        rows = db.session.query(db.func.count(shop.ProductChange.product_id)).scalar()
+    print(f'product_change rows: {rows} (one per changed product, plus tombstones)')
+
+
+if __name__ == '__main__':
+    main()
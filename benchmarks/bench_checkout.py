@@ -0,0 +1,99 @@
+"""Load test: checkout ต่อวินาทีเมื่อเขียนทีละ transaction เทียบกับ write-behind ที่รวมเป็นชุด
+และขนาด cookie ของ session แบบเดิม (ทั้งฟอร์มใน last_order) เทียบกับแบบใหม่ (order_id)
+
+    python benchmarks/bench_checkout.py --threads 16 --seconds 5
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+ITEMS = [
+    {'id': 1, 'name': 'Arabica Premium', 'price': 350, 'quantity': 2, 'size': 'large', 'roast': 'dark',
+     'addons': ['extra_shot', 'vanilla'], 'notes': 'ไม่หวาน'},
+    {'id': 4, 'name': 'Espresso Blend', 'price': 320, 'quantity': 1, 'size': 'medium', 'roast': 'medium',
+     'addons': [], 'notes': ''},
+]
+
+
+def checkout_form():
+    return {
+        'payment_method': 'card', 'card_name': 'Somchai Jaidee', 'card_number': '4111 1111 1111 1111',
+        'card_expiry': '12/29', 'card_cvv': '123', 'amount': '1129', 'idempotency_key': uuid.uuid4().hex,
+        'order_items': json.dumps(ITEMS, ensure_ascii=False),
+    }
+
+
+def run_load(shop, threads, seconds, double_submit):
+    counts = [0] * threads
+    deadline = time.perf_counter() + seconds
+
+    def worker(index):
+        client = shop.app.test_client()
+        while time.perf_counter() < deadline:
+            form = checkout_form()
+            response = client.post('/checkout', data=form)
+            assert response.status_code == 302, response.status_code
+            if double_submit:
+                assert client.post('/checkout', data=form).status_code == 302
+            counts[index] += 1
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return sum(counts) / seconds, sum(counts)
+
+
+def cookie_size(shop, data):
+    return len(shop.app.session_interface.get_signing_serializer(shop.app).dumps(data))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    os.environ['AI_CACHE_DB'] = os.path.join(tmp, 'ai_cache.db')
+    import app as shop
+    from storage import run_migrations
+
+    with shop.app.app_context():
+        run_migrations(shop.db.engine)
+        shop.seed_products()
+
+    form = checkout_form()
+    old = {'last_order': {'payment_method': form['payment_method'], 'amount': form['amount'], 'details': form}}
+    print(f"session cookie: last_order (before) {cookie_size(shop, old)} bytes, "
+          f"order_id (after) {cookie_size(shop, {'order_id': 123456})} bytes\n")
+
+    print(f'{args.threads} threads, {args.seconds:g}s per run')
+    for label, max_batch in (('one transaction per checkout', 1), ('write-behind batches', 100)):
+        shop.order_writer.max_batch = max_batch
+        before = shop.order_writer.stats()
+        rate, total = run_load(shop, args.threads, args.seconds, double_submit=False)
+        after = shop.order_writer.stats()
+        batches = after['batches'] - before['batches']
+        print(f'  {label:<30} {rate:>8.0f} checkouts/s  avg batch {(after["items"] - before["items"]) / batches:5.1f}')
+
+    with shop.app.app_context():
+        orders_before = shop.Order.query.count()
+    rate, total = run_load(shop, args.threads, 1.0, double_submit=True)
+    with shop.app.app_context():
+        created = shop.Order.query.count() - orders_before
+    print(f'\ndouble submit: {total} checkouts posted twice -> {created} orders created')
+
+
+if __name__ == '__main__':
+    main()
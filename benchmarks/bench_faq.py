@@ -0,0 +1,59 @@
+"""Micro-benchmark: ต้นทุนการจับคู่ FAQ เมื่อจำนวนกฎเพิ่มจาก 10 ถึง 10,000
+
+เทียบ Aho-Corasick (faq.FAQMatcher) กับการไล่ `keyword in question` แบบ if-chain เดิม
+
+    python benchmarks/bench_faq.py
+"""
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from faq import FAQMatcher  # noqa: E402
+
+THAI = 'กขคงจฉชซดตถทนบปผพฟมยรลวสหอ'
+QUESTIONS = [
+    'อยากรู้วิธีชง pour over ให้อร่อย',
+    'What is the difference between arabica and robusta?',
+    'ดื่มกาแฟทุกวันมีผลกระทบต่อสุขภาพไหม',
+    'แนะนำเมนูสำหรับคนที่ไม่ชอบรสขมหน่อยค่ะ',
+    'do you have oat milk latte today?',
+]
+
+
+def make_rules(n, seed=42):
+    rng = random.Random(seed)
+    rules = []
+    for i in range(n):
+        en = ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(5, 10)))
+        th = ''.join(rng.choice(THAI) for _ in range(rng.randint(4, 8)))
+        rules.append({'keywords': [f'{en}{i}', f'{th}{i}'], 'answer': f'answer {i}'})
+    return rules
+
+
+def linear_answer(rules, question):
+    q = question.lower()
+    for rule in rules:
+        if any(k in q for k in rule['keywords']):
+            return rule['answer']
+    return None
+
+
+def main():
+    loops = 2000
+    print(f"{'rules':>8} {'aho-corasick (us)':>18} {'linear scan (us)':>18}")
+    for n in (10, 100, 1000, 10000):
+        rules = make_rules(n)
+        matcher = FAQMatcher(rules)
+        ac = timeit.timeit(lambda: [matcher.answer(q) for q in QUESTIONS], number=loops)
+        lin_loops = max(1, loops // max(1, n // 10))
+        lin = timeit.timeit(lambda: [linear_answer(rules, q) for q in QUESTIONS], number=lin_loops)
+        per_ac = ac / (loops * len(QUESTIONS)) * 1e6
+        per_lin = lin / (lin_loops * len(QUESTIONS)) * 1e6
+        print(f'{n:>8} {per_ac:>18.2f} {per_lin:>18.2f}')
+
+
+if __name__ == '__main__':
+    main()
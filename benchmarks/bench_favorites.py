@@ -0,0 +1,177 @@
+"""Benchmark: กดหัวใจพร้อมกันหลายร้อยครั้ง เทียบ toggle แบบเดิมกับสินค้าโปรดต่อลูกค้า + popularity แบบรวมชุด
+
+แบบเดิม: อ่าน product.is_favorite แล้วเขียนค่าตรงข้ามกลับ และเปลี่ยนเวอร์ชันแคตตาล็อกทุกคลิก
+(จำลองด้วย route ชั่วคราวบนคอลัมน์ is_favorite เดิมซึ่งยังอยู่ในตาราง)
+แบบใหม่: POST /toggle-favorite/<id> (set_favorite + popularity_counter)
+
+ทุก thread มี test client ของตัวเอง ทุกคนกดสินค้า "ยอดนิยม" ชิ้นเดียวกันสลับกับสินค้าสุ่ม วัด:
+- toggles/s และจำนวนครั้งที่เวอร์ชันแคตตาล็อกเปลี่ยน (แต่ละครั้งล้าง cache ของหน้าแรก)
+- storefront: request/s ของ GET /api/products?limit=20 จากอีก thread ระหว่างที่กด (cache ถูกล้างบ่อยแค่ไหน)
+- lost updates: ถ้าการสลับเรียงกันจริง ผลที่ตอบกลับของสินค้าเดียวกันต้องสลับ เปิด/ปิด
+  (จำนวน "เปิด" - "ปิด" เท่ากับสถานะสุดท้าย) ส่วนแบบใหม่ popularity หลัง flush ต้องเท่ากับจำนวนแถวในตาราง favorite
+- same user: ทุก thread ใช้ลูกค้าคนเดียวกัน (เช่นดับเบิลคลิกจากหลายแท็บ)
+
+    python benchmarks/bench_favorites.py --threads 16 --toggles 25
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+HOT_PRODUCT = 1
+
+
+def run_clients(shop, url_for, owners, toggles, products):
+    """ยิง toggle จากหลาย thread พร้อมกัน คืน (วินาที, [(owner, product_id, is_favorite)], จำนวน error, storefront req/s)"""
+    results, errors, lock = [], [], threading.Lock()
+    barrier = threading.Barrier(len(owners) + 1)
+    done = threading.Event()
+    reads = []
+
+    def reader():
+        client = shop.app.test_client()
+        barrier.wait()
+        started = time.perf_counter()
+        while not done.is_set():
+            assert client.get('/api/products?limit=20').status_code == 200
+            reads.append(1)
+        reads.append(time.perf_counter() - started)
+
+    def worker(owner, seed):
+        rng = random.Random(seed)
+        client = shop.app.test_client()
+        with client.session_transaction() as sess:
+            sess['visitor_id'] = owner
+        mine = []
+        barrier.wait()
+        for i in range(toggles):
+            pid = HOT_PRODUCT if i % 2 == 0 else rng.randint(1, products)
+            response = client.post(url_for(pid))
+            if response.status_code == 200:
+                mine.append((owner, pid, response.get_json()['is_favorite']))
+            else:
+                with lock:
+                    errors.append(response.get_json().get('error'))
+        with lock:
+            results.extend(mine)
+
+    threads = [threading.Thread(target=worker, args=(owner, n)) for n, owner in enumerate(owners)]
+    probe = threading.Thread(target=reader)
+    probe.start()
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    done.set()
+    probe.join()
+    return elapsed, results, len(errors), (len(reads) - 1) / reads[-1]
+
+
+def lost_toggles(results, final_state):
+    """จำนวนการสลับที่ชนกันของ HOT_PRODUCT ต่อเจ้าของสถานะ: |(#เปิด - #ปิด) - สถานะสุดท้าย| (เรียงกันจริง = 0)
+
+    final_state(owner) -> สถานะสุดท้ายในฐานข้อมูล (owner=None สำหรับธงเดิมที่ทั้งร้านใช้ร่วมกัน)
+    """
+    net = {}
+    for owner, pid, state in results:
+        if pid == HOT_PRODUCT:
+            net[owner] = net.get(owner, 0) + (1 if state else -1)
+    return sum(abs(value - final_state(owner)) for owner, value in net.items())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--toggles', type=int, default=25, help='จำนวนคลิกต่อ thread')
+    parser.add_argument('--products', type=int, default=2000)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    os.environ['AI_CACHE_DB'] = os.path.join(tmp, 'ai_cache.db')
+    import app as shop
+    from storage import run_migrations
+
+    db, text = shop.db, shop.db.text
+
+    def legacy_toggle(product_id):
+        flag = db.session.execute(text('SELECT is_favorite FROM product WHERE id = :id'), {'id': product_id}).scalar()
+        db.session.execute(text('UPDATE product SET is_favorite = :flag WHERE id = :id'),
+                           {'flag': not flag, 'id': product_id})
+        shop.bump_catalog_version()
+        db.session.commit()
+        return shop.jsonify({'success': True, 'is_favorite': not flag})
+
+    shop.app.add_url_rule('/bench/legacy-toggle/<int:product_id>', 'bench_legacy_toggle',
+                          legacy_toggle, methods=['POST'])
+
+    with shop.app.app_context():
+        run_migrations(db.engine)
+        db.session.execute(db.insert(shop.Product), [
+            {'name': f'Bench Coffee {i}', 'price': 100 + i % 400, 'description': 'กาแฟคั่วกลาง หอม นุ่ม'}
+            for i in range(args.products)
+        ])
+        db.session.execute(text('UPDATE product SET is_favorite = 0'))
+        shop.bump_catalog_version()
+        db.session.commit()
+
+    def version():
+        with shop.app.app_context():
+            return shop.get_catalog_version()
+
+    total = args.threads * args.toggles
+    print(f'{args.threads} threads x {args.toggles} toggles = {total} clicks, {args.products} products, '
+          f'popularity flush every {shop.popularity_counter.interval:g}s')
+    print(f"{'path':<28} {'toggles/s':>10} {'errors':>7} {'version bumps':>14} {'lost':>6} {'popularity ok':>14} "
+          f"{'storefront':>11}")
+
+    # แบบเดิม: ธงเดียวของทั้งร้าน
+    before = version()
+    seconds, results, errors, reads = run_clients(
+        shop, lambda pid: f'/bench/legacy-toggle/{pid}', [uuid.uuid4().hex for _ in range(args.threads)],
+        args.toggles, args.products)
+    with shop.app.app_context():
+        final = int(bool(db.session.execute(text('SELECT is_favorite FROM product WHERE id = :id'),
+                                            {'id': HOT_PRODUCT}).scalar()))
+    lost = lost_toggles([(None, pid, state) for _, pid, state in results], lambda owner: final)
+    print(f"{'legacy flag toggle':<28} {len(results) / seconds:>10.0f} {errors:>7} {version() - before:>14} "
+          f"{lost:>6} {'-':>14} {reads:>9.0f}/s")
+
+    for label, owners in (
+        ('per-customer, many users', [uuid.uuid4().hex for _ in range(args.threads)]),
+        ('per-customer, same user', [uuid.uuid4().hex] * args.threads),
+    ):
+        with shop.app.app_context():
+            db.session.execute(db.delete(shop.Favorite))
+            db.session.execute(db.update(shop.Product.__table__).values(popularity=0))
+            db.session.commit()
+        shop.popularity_counter.flush()
+        before = version()
+        seconds, results, errors, reads = run_clients(
+            shop, lambda pid: f'/toggle-favorite/{pid}', owners, args.toggles, args.products)
+        shop.popularity_counter.flush()
+        bumps = version() - before
+
+        with shop.app.app_context():
+            counts = dict(db.session.query(shop.Favorite.product_id, db.func.count())
+                          .group_by(shop.Favorite.product_id).all())
+            popularity = dict(db.session.query(shop.Product.id, shop.Product.popularity)
+                              .filter(shop.Product.popularity != 0).all())
+            hot_owners = {owner for owner, in db.session.query(shop.Favorite.owner).filter_by(product_id=HOT_PRODUCT)}
+        lost = lost_toggles(results, lambda owner: int(owner in hot_owners))
+        print(f'{label:<28} {len(results) / seconds:>10.0f} {errors:>7} {bumps:>14} {lost:>6} '
+              f'{str(counts == popularity):>14} {reads:>9.0f}/s')
+    print(f'counter: {shop.popularity_counter.stats()}')
+
+
+if __name__ == '__main__':
+    main()
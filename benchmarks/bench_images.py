@@ -0,0 +1,63 @@
+"""Benchmark: thumbnail ของรูปสินค้า (สร้างครั้งแรก vs อ่านจาก cache บนดิสก์) และขนาดไฟล์ที่ browser ต้องโหลด
+
+ใช้รูป fixture ที่สร้างในเครื่องด้วย Pillow เท่านั้น (ไม่เรียกเว็บภายนอก)
+
+    python benchmarks/bench_images.py --images 20
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+
+def fixture_image(rng, width=1600, height=1067) -> bytes:
+    """รูป JPEG ที่มีรายละเอียดพอให้การบีบอัดสมจริง (gradient + noise)"""
+    from PIL import Image
+    image = Image.linear_gradient('L').resize((width, height)).convert('RGB')
+    noise = Image.effect_noise((width, height), 40).convert('RGB')
+    image = Image.blend(image, noise, 0.3)
+    tint = Image.new('RGB', (width, height), tuple(rng.randrange(256) for _ in range(3)))
+    out = io.BytesIO()
+    Image.blend(image, tint, 0.4).save(out, 'JPEG', quality=90)
+    return out.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--images', type=int, default=20)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    os.environ['AI_CACHE_DB'] = os.path.join(tmp, 'ai_cache.db')
+    os.environ['IMAGE_DIR'] = os.path.join(tmp, 'media')
+    import app as shop
+
+    rng = random.Random(42)
+    urls = [shop.images.URL_PREFIX + shop.image_store.save(fixture_image(rng)) for _ in range(args.images)]
+    client = shop.app.test_client()
+    original_bytes = sum(len(client.get(url).data) for url in urls)
+    print(f'{args.images} originals, mean {original_bytes / args.images / 1024:.0f} KiB')
+
+    print(f"{'thumbnail':<10} {'first (resize)':>15} {'cached':>9} {'mean size':>10}")
+    for fmt in shop.images.THUMBNAIL_FORMATS:
+        for size in shop.image_store.sizes:
+            names = [shop.image_store.src(url, size, fmt) for url in urls]
+            start = time.perf_counter()
+            total = sum(len(client.get(name).data) for name in names)
+            cold = (time.perf_counter() - start) / len(names) * 1000
+            start = time.perf_counter()
+            for name in names:
+                client.get(name)
+            warm = (time.perf_counter() - start) / len(names) * 1000
+            print(f'{size:>4}w.{fmt:<5} {cold:>13.2f}ms {warm:>7.2f}ms {total / len(names) / 1024:>7.1f} KiB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Benchmark: ต้นทุนของ instrumentation ต่อ request (เป้าหมาย < 50 µs)
+
+- hooks: start_request + SQL hook (before/after) ต่อ query + finish_request (+ Server-Timing)
+  วัดตรงที่ตัว Metrics โดยไม่มี Flask/SQL จริง จึงเป็นต้นทุนที่ instrumentation เพิ่มเข้าไปล้วนๆ
+- end-to-end: GET /api/products/<id> ผ่าน test client (ตัวเลขอ้างอิง เทียบกับต้นทุนของ hook)
+- ตรวจว่า N+1 ถูก flag และ token ของ OpenAI ถูกนับ แล้ววัดเวลา render ของ /metrics
+
+    python benchmarks/bench_metrics.py
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from metrics import Metrics  # noqa: E402
+
+
+class _Conn:
+    def __init__(self):
+        self.info = {}
+
+
+def _per_call_us(fn, number):
+    fn()
+    start = time.perf_counter()
+    for _ in range(number):
+        fn()
+    return (time.perf_counter() - start) / number * 1e6
+
+
+def bench_hooks(queries: int, number: int = 20000):
+    m = Metrics(server_timing=True)
+    conn = _Conn()
+    statements = [f'SELECT * FROM product WHERE id = ? /* {i} */' for i in range(queries)]
+
+    def one_request():
+        m.start_request('GET', '/api/products/<int:product_id>')
+        for sql in statements:
+            m._before_cursor_execute(conn, None, sql, (), None, False)
+            m._after_cursor_execute(conn, None, sql, (), None, False)
+        stats = m.finish_request(200)
+        m.server_timing_header(stats)
+
+    return _per_call_us(one_request, number)
+
+
+def main():
+    print('instrumentation overhead per request (no Flask, no SQL):')
+    for queries in (0, 1, 5, 20):
+        print(f'  {queries:>2} queries: {bench_hooks(queries):6.1f} µs')
+
+    tmp = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    os.environ['AI_CACHE_DB'] = os.path.join(tmp, 'ai_cache.db')
+    import app as shop
+    from benchmarks.fake_openai import FakeOpenAI
+
+    # N+1: โหลดรีวิวทีละสินค้าใน request เดียว
+    @shop.app.route('/bench/n-plus-one')
+    def n_plus_one():
+        for product_id in range(1, 21):
+            shop.Review.query.filter_by(product_id=product_id).all()
+        return 'ok'
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        shop.init_db()
+    client = shop.app.test_client()
+    print(f"\nend-to-end GET /api/products/1: {_per_call_us(lambda: client.get('/api/products/1'), 2000):6.1f} µs")
+
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        client.get('/bench/n-plus-one')
+        shop.openai_client = FakeOpenAI()
+        shop.ask_ai_question('กาแฟตัวไหนเหมาะกับคนชอบรสผลไม้')
+    print(f"N+1 flagged: {shop.metrics.db_n_plus_one.value(('/bench/n-plus-one',))}  ({output.getvalue().strip()[:80]}...)")
+    print(f"ask tokens: prompt={shop.metrics.ai_tokens.value(('ask', 'prompt'))} "
+          f"completion={shop.metrics.ai_tokens.value(('ask', 'completion'))}")
+
+    body = client.get('/metrics').data
+    print(f"/metrics: {len(body)} bytes, {_per_call_us(lambda: client.get('/metrics'), 200):.0f} µs per scrape")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""Benchmark: จำนวน byte ที่ browser โหลดจากเซิร์ฟเวอร์นี้ต่อการเปิดหน้า (HTML + CSS/JS ในเครื่อง)
+
+- first view: HTML + ไฟล์ /assets และ /static ทุกไฟล์ที่หน้าอ้างถึง (ส่ง Accept-Encoding: br, gzip)
+- repeat view: HTML อย่างเดียว (asset มีชื่อแบบ fingerprint และ Cache-Control: immutable จึงไม่ถูกโหลดซ้ำ)
+ไม่นับ CDN ภายนอก (Bootstrap, Font Awesome, Google Fonts) และรูปสินค้า
+
+    python benchmarks/bench_page_weight.py
+"""
+import os
+import re
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+PAGES = ['/', '/cart', '/checkout', '/login', '/dashboard']
+LOCAL_ASSET = re.compile(r'''(?:href|src)=["'](/(?:assets|static)/[^"']+)["']''')
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    os.environ['AI_CACHE_DB'] = os.path.join(tmp, 'ai_cache.db')
+    import app as shop
+
+    shop.init_db()
+    client = shop.app.test_client()
+    with client.session_transaction() as session:
+        session['logged_in'] = True
+    headers = {'Accept-Encoding': 'br, gzip'}
+
+    print(f"{'page':<11} {'HTML':>8} {'assets':>8} {'first view':>11} {'repeat view':>12}")
+    totals = [0, 0]
+    for page in PAGES:
+        response = client.get(page, headers=headers)
+        assert response.status_code == 200, page
+        html = response.get_data(as_text=True)
+        asset_bytes = sum(len(client.get(url, headers=headers).data) for url in set(LOCAL_ASSET.findall(html)))
+        html_bytes = len(response.data)
+        totals[0] += html_bytes + asset_bytes
+        totals[1] += html_bytes
+        print(f'{page:<11} {html_bytes:>8} {asset_bytes:>8} {html_bytes + asset_bytes:>11} {html_bytes:>12}')
+    print(f"{'total':<11} {'':>8} {'':>8} {totals[0]:>11} {totals[1]:>12}")
+
+
+if __name__ == '__main__':
+    main()
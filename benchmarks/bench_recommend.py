@@ -0,0 +1,119 @@
+"""Benchmark: ตาราง "สินค้าที่คล้ายกัน" (recommend.py) บนแคตตาล็อกสังเคราะห์ 10k และ 100k สินค้า
+
+วัดที่ SimilarityIndex โดยตรง (ไม่มี Flask/SQL):
+- build ครั้งแรก (feature + top-k ของทุกสินค้า) และขนาดหน่วยความจำของตาราง
+- การซิงก์หลังเพิ่ม/แก้/ลบสินค้าหนึ่งชิ้น (incremental) เทียบกับการ build ใหม่ทั้งหมดแบบเดิม
+- latency ของการอ่าน top-k ต่อสินค้า (สิ่งที่ /api/products/<id>/similar ทำต่อ request)
+- ความถูกต้อง: top-k หลังแก้แบบ incremental ตรงกับการคำนวณแบบ brute force
+
+    python benchmarks/bench_recommend.py --products 10000 100000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+
+from benchmarks.bench_search import ORIGINS, STYLES, THAI_WORDS  # noqa: E402
+from catalog_cache import ProductRecord  # noqa: E402
+from recommend import SimilarityIndex  # noqa: E402
+
+
+def make_record(rng, product_id):
+    words = rng.sample(THAI_WORDS, 6)
+    return ProductRecord(
+        product_id,
+        f'{rng.choice(ORIGINS)} {rng.choice(STYLES)}',
+        float(rng.randrange(80, 1500)),
+        None,
+        ' '.join(words[:3]) + words[3] + words[4] + ' ' + words[5],
+        product_id % 50 and product_id % 13,
+    )
+
+
+def timed_sync(index, version, records):
+    started = time.perf_counter()
+    assert index.sync(version, lambda: records)
+    return (time.perf_counter() - started) * 1000
+
+
+def check_exact(index, product_ids, k):
+    """เทียบ top-k ของสินค้าที่สุ่มมากับ brute force บนเวกเตอร์ปัจจุบัน (คะแนนต้องเท่ากันตามลำดับ)"""
+    table = index.table
+    vectors = table.vectors[:table.size]
+    for pid in product_ids:
+        row = index.rows[pid]
+        sims = vectors @ vectors[row]
+        sims[~table.active[:table.size]] = -np.inf
+        sims[row] = -np.inf
+        expected = np.sort(sims)[::-1][:k]
+        got = np.array([score for _, score in index.similar(pid, k)], np.float32)
+        if not np.allclose(got, expected[:len(got)], atol=1e-5):
+            return False
+    return True
+
+
+def bench(count, ops):
+    rng = random.Random(42)
+    records = [make_record(rng, i) for i in range(1, count + 1)]
+    index = SimilarityIndex(background_threshold=count + 1)
+
+    build_ms = timed_sync(index, 1, records)
+    table = index.table
+    memory = sum(a.nbytes for a in (table.vectors, table.active, table.top_rows, table.top_sims)) / 1e6
+    print(f'\n{count:,} products: build {build_ms / 1000:.2f} s, table {memory:.0f} MB')
+
+    version = 1
+    samples = {'add': [], 'update': [], 'delete': []}
+    next_id = count + 1
+    for _ in range(ops):
+        version += 1
+        records.append(make_record(rng, next_id))
+        next_id += 1
+        samples['add'].append(timed_sync(index, version, records))
+
+        version += 1
+        pos = rng.randrange(len(records))
+        old = records[pos]
+        records[pos] = old._replace(price=old.price * 1.1, description=(old.description or '') + ' ' + rng.choice(THAI_WORDS))
+        samples['update'].append(timed_sync(index, version, records))
+
+        version += 1
+        records.pop(rng.randrange(len(records)))
+        samples['delete'].append(timed_sync(index, version, records))
+
+    # ต้นทุนของการเทียบ fingerprint อย่างเดียว (ทุกครั้งที่เวอร์ชันเปลี่ยน แม้สินค้าที่เปลี่ยนไม่มีผลต่อ index)
+    version += 1
+    diff_ms = timed_sync(index, version, records)
+
+    for name, values in samples.items():
+        print(f'  {name:<7} p50 {statistics.median(values):7.1f} ms   max {max(values):7.1f} ms   '
+              f'(full rebuild {build_ms:,.0f} ms -> {build_ms / statistics.median(values):,.0f}x)')
+    print(f'  diff of {len(records):,} fingerprints with no changes: {diff_ms:.1f} ms')
+
+    ids = [r.id for r in rng.sample(records, 2000)]
+    started = time.perf_counter()
+    for pid in ids:
+        index.similar(pid, 4)
+    print(f'  similar(id, 4): {(time.perf_counter() - started) / len(ids) * 1e6:.1f} µs per lookup')
+    print(f'  rows recomputed after deletes/updates: {index.table.rows_recomputed}')
+    print(f'  incremental top-k matches brute force: {check_exact(index, rng.sample(ids, 50), index.k)}')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--products', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--ops', type=int, default=20, help='จำนวนรอบของ เพิ่ม/แก้/ลบ ที่วัด')
+    args = parser.parse_args()
+    for count in args.products:
+        bench(count, args.ops)
+
+
+if __name__ == '__main__':
+    main()
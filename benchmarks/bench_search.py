@@ -0,0 +1,98 @@
+"""Benchmark: เวลาตอบของ /api/products/search บนแคตตาล็อกสังเคราะห์ 100k สินค้า
+
+สร้างสินค้าจากคำศัพท์ไทย/อังกฤษแบบสุ่ม แล้ววัดคำค้นหลายแบบ (คำเต็ม, prefix ระหว่างพิมพ์, หลายคำ)
+เทียบ FTS5 กับ LIKE เดิม (LIKE วัดเพียงรอบเดียว: คำที่พบบ่อยเจอครบ limit เร็ว แต่คำที่หายากต้องสแกนทั้งตาราง)
+
+    python benchmarks/bench_search.py --products 100000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from unittest import mock
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+ORIGINS = ['Ethiopia', 'Colombia', 'Kenya', 'Brazil', 'Vietnam', 'Guatemala', 'Sumatra', 'Yemen', 'Panama',
+           'Rwanda', 'Honduras', 'Peru', 'Chiang Rai', 'Nan', 'Doi Chang', 'Costa Rica', 'Burundi', 'Java']
+STYLES = ['Espresso', 'Filter', 'Cold Brew', 'Drip', 'Moka', 'Decaf', 'Signature', 'Reserve', 'Natural',
+          'Washed', 'Honey', 'Anaerobic', 'Geisha', 'Bourbon', 'Typica', 'Catuai', 'Pacamara', 'SL28']
+THAI_WORDS = ['กาแฟ', 'หอม', 'นุ่ม', 'เข้มข้น', 'คั่วกลาง', 'คั่วเข้ม', 'คั่วอ่อน', 'ผลไม้', 'ช็อกโกแลต',
+              'ถั่ว', 'คาราเมล', 'เปรี้ยว', 'หวาน', 'บอดี้', 'ดอกไม้', 'เบอร์รี่', 'ส้ม', 'น้ำผึ้ง',
+              'เชียงราย', 'น่าน', 'ดอยช้าง', 'เอธิโอเปีย', 'โคลัมเบีย', 'เคนยา', 'ละมุน', 'สดชื่น',
+              'กลมกล่อม', 'ชาเขียว', 'มะลิ', 'ไวน์', 'เครื่องเทศ', 'อบเชย', 'วานิลลา', 'ลูกพีช']
+
+QUERIES = {
+    'thai word': ['ช็อกโกแลต', 'เชียงราย', 'ดอยช้าง', 'น้ำผึ้ง', 'อบเชย'],
+    'thai prefix': ['ช็อ', 'เชียง', 'ดอยช', 'น้ำผ', 'วานิ'],
+    'latin prefix': ['esp', 'geis', 'colo', 'pacam', 'sl2'],
+    'multi term': ['geisha ช็อกโกแลต', 'kenya เบอร์รี่', 'espresso คั่วเข้ม', 'นุ่ม ละมุน'],
+    'very common': ['กาแฟ', 'หอม'],
+    'rare/no match': ['12345', 'robusta', 'มัทฉะ'],
+}
+
+
+def build_catalog(shop, count):
+    rng = random.Random(42)
+    rows = []
+    for i in range(count):
+        words = rng.sample(THAI_WORDS, 6)
+        rows.append({
+            'name': f'{rng.choice(ORIGINS)} {rng.choice(STYLES)} #{i}',
+            'price': 100 + i % 400,
+            'description': ' '.join(words[:3]) + words[3] + words[4] + ' ' + words[5],
+            'popularity': i % 50 and i % 13,
+        })
+    for start in range(0, count, 10000):
+        shop.db.session.execute(shop.db.insert(shop.Product), rows[start:start + 10000])
+    shop.bump_catalog_version()
+    shop.rebuild_search_index()
+    shop.db.session.commit()
+
+
+def latencies(client, queries, repeat):
+    samples = []
+    for _ in range(repeat):
+        for q in queries:
+            start = time.perf_counter()
+            response = client.get('/api/products/search', query_string={'q': q, 'limit': 20})
+            samples.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--products', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    os.environ['AI_CACHE_DB'] = os.path.join(tmp, 'ai_cache.db')
+    import app as shop
+    from storage import run_migrations
+
+    with shop.app.app_context():
+        run_migrations(shop.db.engine)
+        start = time.perf_counter()
+        build_catalog(shop, args.products)
+        print(f'{args.products} products indexed in {time.perf_counter() - start:.1f}s (insert + FTS rebuild)')
+    client = shop.app.test_client()
+    client.get('/api/products/search?q=warmup')
+
+    print(f"{'query type':<14} {'FTS5 p50':>9} {'FTS5 p95':>9} {'LIKE p50':>9}")
+    for label, queries in QUERIES.items():
+        p50, p95 = latencies(client, queries, args.repeat)
+        with mock.patch.object(shop, 'fts_ready', lambda: False):
+            like_p50, _ = latencies(client, queries, 1)
+        print(f'{label:<14} {p50:>7.2f}ms {p95:>7.2f}ms {like_p50:>7.1f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""Benchmark: เวลา cold start ของ process และ latency ของ request แรกในแต่ละ worker
+
+- cold start: process ใหม่ import app / เรียก create_app() (migration, seed, warm-up) วัดหลายรอบเอาค่ากลาง
+  พร้อมเวลาที่ import openai จะเพิ่มถ้ายัง import ตอนเริ่ม (ตอนนี้ import ตอนเรียก AI ครั้งแรก)
+- preload: create_app() ครั้งเดียวแล้ว fork worker (แบบ gunicorn preload_app) แต่ละ worker วัด after_fork()
+  และ request แรกของ /, /api/products, /cart
+- gunicorn (ถ้าติดตั้ง): เวลาตั้งแต่สั่ง `gunicorn wsgi:app` จนได้ response แรก
+
+    python benchmarks/bench_startup.py
+"""
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+COLD_START = r'''
+import contextlib, io, json, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    app.create_app()
+t2 = time.perf_counter()
+print(json.dumps({'import_ms': (t1 - t0) * 1000, 'create_app_ms': (t2 - t1) * 1000}))
+'''
+
+IMPORT_OPENAI = r'''
+import time
+t0 = time.perf_counter()
+import openai
+print((time.perf_counter() - t0) * 1000)
+'''
+
+PRELOAD = r'''
+import contextlib, io, json, os, sys, time
+import app
+with contextlib.redirect_stdout(io.StringIO()):
+    app.create_app()
+results = []
+for worker in range(int(sys.argv[1])):
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        t0 = time.perf_counter()
+        app.after_fork()
+        data = {'worker': worker, 'after_fork_ms': (time.perf_counter() - t0) * 1000}
+        client = app.app.test_client()
+        for path in ('/', '/api/products', '/cart'):
+            t0 = time.perf_counter()
+            assert client.get(path).status_code == 200, path
+            data[path] = (time.perf_counter() - t0) * 1000
+        os.write(write_fd, json.dumps(data).encode())
+        os._exit(0)
+    os.close(write_fd)
+    os.waitpid(pid, 0)
+    with os.fdopen(read_fd) as f:
+        results.append(json.loads(f.read()))
+print(json.dumps(results))
+'''
+
+
+def _env(tmp):
+    env = dict(os.environ)
+    env.update({
+        'DATABASE_URL': f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+        'AI_CACHE_DB': os.path.join(tmp, 'ai_cache.db'),
+        'PYTHONPATH': ROOT,
+        'PYTHONDONTWRITEBYTECODE': '0',
+    })
+    return env
+
+
+def _run(code, env, *args):
+    out = subprocess.run([sys.executable, '-c', code, *args], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def bench_gunicorn(env, workers):
+    import httpx
+
+    port = _free_port()
+    env = dict(env, WEB_CONCURRENCY=str(workers), BIND=f'127.0.0.1:{port}')
+    started = time.perf_counter()
+    proc = subprocess.Popen([shutil.which('gunicorn'), 'wsgi:app'], cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            try:
+                response = httpx.get(f'http://127.0.0.1:{port}/', timeout=5)
+                if response.status_code == 200:
+                    return (time.perf_counter() - started) * 1000
+            except httpx.TransportError:
+                pass
+            if proc.poll() is not None or time.perf_counter() - started > 60:
+                raise RuntimeError('gunicorn did not start')
+            time.sleep(0.02)
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main(runs: int = 5, workers: int = 4):
+    tmp = tempfile.mkdtemp()
+    env = _env(tmp)
+    _run(COLD_START, env)   # สร้างฐานข้อมูลและ .pyc ครั้งแรก ไม่นับ
+
+    samples = [_run(COLD_START, env) for _ in range(runs)]
+    openai_ms = statistics.median(_run(IMPORT_OPENAI, env) for _ in range(runs))
+    print(f'cold start (median of {runs} processes):')
+    print(f"  import app        {statistics.median(s['import_ms'] for s in samples):7.1f} ms")
+    print(f"  create_app()      {statistics.median(s['create_app_ms'] for s in samples):7.1f} ms")
+    print(f'  deferred: import openai would add {openai_ms:.1f} ms (now paid on the first AI call)')
+
+    print(f'\npreload + fork, {workers} workers (ms):')
+    print(f"  {'worker':<7} {'after_fork':>10} {'GET /':>8} {'/api/products':>14} {'/cart':>7}")
+    for row in _run(PRELOAD, env, str(workers)):
+        print(f"  {row['worker']:<7} {row['after_fork_ms']:>10.2f} {row['/']:>8.1f} "
+              f"{row['/api/products']:>14.1f} {row['/cart']:>7.1f}")
+
+    if shutil.which('gunicorn'):
+        print(f'\ngunicorn wsgi:app ({workers} workers, preload): first 200 after {bench_gunicorn(env, workers):.0f} ms')
+    else:
+        print('\ngunicorn not installed: skipped the real-server start measurement')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""Benchmark: อ่าน/เขียน SQLite พร้อมกันหลาย process ระหว่างค่าเดิม กับ storage profile ใน storage.py
+
+ค่าเดิม = rollback journal (DELETE) ไม่มี index (is_favorite, id) และ timeout ปกติของ sqlite3 (5 วินาที)
+tuned   = WAL + synchronous=NORMAL + busy_timeout + mmap และ index ของ migration 4
+
+    python benchmarks/bench_storage.py --writers 4 --readers 8 --seconds 5
+"""
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from storage import apply_sqlite_pragmas  # noqa: E402
+
+STOREFRONT_QUERY = 'SELECT id, name, price, image_url, description, is_favorite FROM product ORDER BY is_favorite DESC, id'
+
+
+def connect(path, tuned):
+    conn = sqlite3.connect(path)
+    if tuned:
+        apply_sqlite_pragmas(conn)
+    return conn
+
+
+def setup(path, tuned, products):
+    conn = connect(path, tuned)
+    conn.execute('CREATE TABLE product (id INTEGER PRIMARY KEY, name VARCHAR(100) NOT NULL UNIQUE, '
+                 'price FLOAT NOT NULL, image_url VARCHAR(255), description VARCHAR(500), '
+                 'is_favorite BOOLEAN, created_at DATETIME)')
+    conn.execute('CREATE TABLE review (id INTEGER PRIMARY KEY, product_id INTEGER NOT NULL, '
+                 'rating INTEGER NOT NULL, comment VARCHAR(500))')
+    if tuned:
+        conn.execute('CREATE INDEX ix_product_favorite_id ON product (is_favorite DESC, id)')
+    conn.executemany(
+        'INSERT INTO product (name, price, image_url, description, is_favorite) VALUES (?, ?, ?, ?, ?)',
+        [(f'Coffee {i}', 100 + i % 300, f'https://example.com/{i}.jpg', 'กาแฟคั่วกลาง หอม นุ่ม', i % 10 == 0)
+         for i in range(products)],
+    )
+    conn.commit()
+    conn.close()
+
+
+def writer(path, tuned, seconds, products, result):
+    conn = connect(path, tuned)
+    ops = errors = 0
+    deadline = time.time() + seconds
+    i = 0
+    while time.time() < deadline:
+        i += 1
+        try:
+            conn.execute('UPDATE product SET price = price + 1 WHERE id = ?', (i % products + 1,))
+            conn.execute('INSERT INTO review (product_id, rating, comment) VALUES (?, 5, ?)', (i % products + 1, 'ดีมาก'))
+            conn.commit()
+            ops += 1
+        except sqlite3.OperationalError:
+            conn.rollback()
+            errors += 1
+    result.put(('write', ops, errors))
+
+
+def reader(path, tuned, seconds, result):
+    conn = connect(path, tuned)
+    ops = errors = 0
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        try:
+            conn.execute(STOREFRONT_QUERY).fetchall()
+            ops += 1
+        except sqlite3.OperationalError:
+            errors += 1
+    result.put(('read', ops, errors))
+
+
+def run(tuned, args):
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    setup(path, tuned, args.products)
+    result = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=writer, args=(path, tuned, args.seconds, args.products, result))
+             for _ in range(args.writers)]
+    procs += [multiprocessing.Process(target=reader, args=(path, tuned, args.seconds, result))
+              for _ in range(args.readers)]
+    for p in procs:
+        p.start()
+    totals = {'write': [0, 0], 'read': [0, 0]}
+    for _ in procs:
+        kind, ops, errors = result.get()
+        totals[kind][0] += ops
+        totals[kind][1] += errors
+    for p in procs:
+        p.join()
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f'{args.writers} writer + {args.readers} reader processes, {args.products} products, {args.seconds:g}s')
+    print(f"{'profile':<10} {'writes/s':>10} {'write errors':>13} {'reads/s':>10} {'read errors':>12}")
+    for name, tuned in (('default', False), ('tuned', True)):
+        totals = run(tuned, args)
+        print(f"{name:<10} {totals['write'][0] / args.seconds:>10.0f} {totals['write'][1]:>13} "
+              f"{totals['read'][0] / args.seconds:>10.0f} {totals['read'][1]:>12}")
+
+
+if __name__ == '__main__':
+    main()
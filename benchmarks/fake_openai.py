@@ -0,0 +1,69 @@
+"""OpenAI client ปลอมสำหรับรัน benchmark แบบ offline
+
+เลียนแบบ `client.chat.completions.create(...)` ของ openai>=1.0 พอให้โค้ดใน app.py ทำงานได้:
+หน่วงเวลาได้ (`delay` ก่อนตอบ และ `token_delay` ต่อ chunk เมื่อ stream=True),
+ทำให้ล้มเหลวเป็นบางครั้งได้ (`fail_rate`) และนับจำนวนครั้งที่ถูกเรียก
+
+    from benchmarks.fake_openai import FakeOpenAI
+    app.openai_client = FakeOpenAI(delay=0.5)
+"""
+import json
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+
+class FakeCompletions:
+    def __init__(self, delay: float = 0.0, fail_rate: float = 0.0, seed: int = 0, token_delay: float = 0.0):
+        self.delay = delay
+        self.token_delay = token_delay
+        self.fail_rate = fail_rate
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _reply(self, messages):
+        prompt = messages[-1]['content']
+        system = messages[0]['content'] if messages else ''
+        if 'JSON' in system:
+            # batch description prompt: "- id 12: Name ..." -> {"12": "..."}
+            ids = re.findall(r'^- id (\d+): (.+)$', prompt, flags=re.MULTILINE)
+            return json.dumps({pid: f"กาแฟพรีเมียม {name.strip()} หอม กลมกล่อม" for pid, name in ids},
+                              ensure_ascii=False)
+        return f"คำตอบจาก AI สำหรับ: {prompt[-60:]}"
+
+    def _stream(self, content):
+        """แบ่งคำตอบเป็น chunk ละไม่กี่ตัวอักษร เหมือน token ที่ทยอยมาจากโมเดล"""
+        for i in range(0, len(content), 4):
+            if self.token_delay:
+                time.sleep(self.token_delay)
+            delta = SimpleNamespace(content=content[i:i + 4], role=None)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta, finish_reason=None, index=0)])
+
+    def create(self, model=None, messages=None, max_tokens=None, temperature=None, stream=False, **kwargs):
+        with self._lock:
+            self.calls += 1
+            fail = self._rng.random() < self.fail_rate
+        if self.delay:
+            time.sleep(self.delay)
+        if fail:
+            raise RuntimeError('fake upstream error')
+        content = self._reply(messages or [])
+        if stream:
+            return self._stream(content)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason='stop')],
+            usage=SimpleNamespace(prompt_tokens=len(str(messages)) // 4, completion_tokens=len(content) // 4,
+                                  total_tokens=(len(str(messages)) + len(content)) // 4),
+        )
+
+
+class FakeOpenAI:
+    def __init__(self, delay: float = 0.0, fail_rate: float = 0.0, seed: int = 0, token_delay: float = 0.0):
+        self.chat = SimpleNamespace(completions=FakeCompletions(delay, fail_rate, seed, token_delay))
+
+    @property
+    def calls(self) -> int:
+        return self.chat.completions.calls
@@ -0,0 +1,135 @@
+"""HTTP server ปลอมที่พูด OpenAI Chat Completions API สำหรับทดสอบแบบ offline
+
+ชี้ client จริงมาที่ server นี้ด้วย `OPENAI_BASE_URL=http://127.0.0.1:<port>/v1`
+ปรับให้ช้าหรือล้มเหลวได้ทันทีผ่าน `POST /control` เช่น {"delay": 5, "fail": true}
+
+    python benchmarks/stub_openai_server.py --port 8765
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubState:
+    def __init__(self):
+        self.delay = 0.0
+        self.token_delay = 0.0
+        self.fail = False
+        self.calls = 0
+        self.lock = threading.Lock()
+
+
+def _completion(content, model):
+    return {
+        'id': 'chatcmpl-stub',
+        'object': 'chat.completion',
+        'created': int(time.time()),
+        'model': model,
+        'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+        'usage': {'prompt_tokens': 50, 'completion_tokens': len(content) // 4, 'total_tokens': 50 + len(content) // 4},
+    }
+
+
+def _chunk(text, model, finish=None):
+    delta = {'content': text} if text else {}
+    return {
+        'id': 'chatcmpl-stub',
+        'object': 'chat.completion.chunk',
+        'created': int(time.time()),
+        'model': model,
+        'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish}],
+    }
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            payload = json.loads(self.rfile.read(length) or b'{}')
+
+            if self.path == '/control':
+                with state.lock:
+                    for key in ('delay', 'token_delay', 'fail'):
+                        if key in payload:
+                            setattr(state, key, payload[key])
+                    self._send_json(200, {'delay': state.delay, 'token_delay': state.token_delay,
+                                          'fail': state.fail, 'calls': state.calls})
+                return
+
+            if not self.path.endswith('/chat/completions'):
+                self._send_json(404, {'error': {'message': 'not found'}})
+                return
+
+            with state.lock:
+                state.calls += 1
+                delay, token_delay, fail = state.delay, state.token_delay, state.fail
+            if delay:
+                time.sleep(delay)
+            if fail:
+                self._send_json(500, {'error': {'message': 'stub failure', 'type': 'server_error'}})
+                return
+
+            model = payload.get('model', 'stub')
+            question = payload.get('messages', [{}])[-1].get('content', '')
+            content = f"คำตอบจาก stub สำหรับ: {question[-40:]}"
+            if not payload.get('stream'):
+                self._send_json(200, _completion(content, model))
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            try:
+                for i in range(0, len(content), 4):
+                    if token_delay:
+                        time.sleep(token_delay)
+                    self.wfile.write(f"data: {json.dumps(_chunk(content[i:i + 4], model))}\n\n".encode('utf-8'))
+                    self.wfile.flush()
+                self.wfile.write(f"data: {json.dumps(_chunk(None, model, 'stop'))}\n\ndata: [DONE]\n\n".encode('utf-8'))
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            self.close_connection = True
+
+    return Handler
+
+
+class StubHTTPServer(ThreadingHTTPServer):
+    # backlog ค่าเริ่มต้น (5) ทำให้การเชื่อมต่อพร้อมกันหลายร้อยครั้งถูกปฏิเสธ
+    request_queue_size = 1024
+
+
+def start_stub_server(port: int = 0):
+    """เริ่ม server ใน background thread คืน (server, state, base_url)"""
+    state = StubState()
+    server = StubHTTPServer(('127.0.0.1', port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, f'http://127.0.0.1:{server.server_address[1]}/v1'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+    server, _, base_url = start_stub_server(args.port)
+    print(f'Stub OpenAI server on {base_url} (POST /control to change delay/fail)')
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,14 @@
+"""ชุด benchmark และ load test ของทั้งแอป พร้อมตรวจ regression เทียบกับ baseline
+
+- micro: ask_ai_question (จับคู่ FAQ / cache), Product.to_dict, ProductRecord.to_dict และการ render template
+- load: ยิง request พร้อมกันไปที่แอปจริง (werkzeug threaded server ใน process แยก) ทุก route หลัก
+  ส่วน OpenAI ชี้ไปที่ stub server ในเครื่อง (benchmarks/stub_openai_server.py) จึงไม่ต้องใช้ network
+- แคตตาล็อกสังเคราะห์ขนาดตาม --products สร้างผ่าน init_db() (migration + seed_products/seed_reviews)
+- ผลลัพธ์ (p50/p95/p99 และ throughput) เขียนเป็น JSON และถ้าให้ --baseline จะ exit 1 เมื่อช้าลงเกิน --threshold
+- load แต่ละ scenario รัน --repeat ครั้งแล้วเก็บครั้งที่ดีที่สุด และปรับ baseline ตาม calibration_us
+  (ความเร็วเครื่อง) ก่อนเทียบ แต่ baseline ยังผูกกับเครื่องที่บันทึก ควร --save-baseline ใหม่เมื่อย้ายเครื่อง
+
+    python -m benchmarks.suite --products 1000 --output bench-report.json
+    python -m benchmarks.suite --baseline benchmarks/suite/baseline.json
+    python -m benchmarks.suite --save-baseline          # บันทึกผลครั้งนี้เป็น baseline ใหม่
+"""
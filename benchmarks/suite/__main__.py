@@ -0,0 +1,104 @@
+"""CLI ของชุด benchmark (ดูคำอธิบายใน benchmarks/suite/__init__.py)"""
+import argparse
+import contextlib
+import io
+import os
+import platform
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, ROOT)
+
+from benchmarks.stub_openai_server import start_stub_server  # noqa: E402
+from benchmarks.suite import env, load, micro  # noqa: E402
+from benchmarks.suite.report import best_run, compare, read_json, write_json  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.suite')
+    parser.add_argument('--products', type=int, default=1000, help='ขนาดแคตตาล็อกสังเคราะห์')
+    parser.add_argument('--concurrency', type=int, default=8, help='จำนวน client พร้อมกันต่อ scenario')
+    parser.add_argument('--duration', type=float, default=2.0, help='วินาทีต่อ scenario')
+    parser.add_argument('--repeat', type=int, default=3, help='รันแต่ละ scenario กี่ครั้ง (รายงานครั้งที่ดีที่สุด)')
+    parser.add_argument('--rounds', type=int, default=20, help='จำนวนรอบของ micro-benchmark')
+    parser.add_argument('--ai-delay', type=float, default=0.05, help='เวลาตอบของ stub OpenAI (วินาที)')
+    parser.add_argument('--only', help='รันเฉพาะ benchmark ที่ชื่อมีข้อความนี้')
+    parser.add_argument('--skip-load', action='store_true')
+    parser.add_argument('--skip-micro', action='store_true')
+    parser.add_argument('--output', default='bench-report.json', help='ไฟล์ JSON ของผลลัพธ์')
+    parser.add_argument('--baseline', help=f'เทียบกับ baseline (เช่น {os.path.relpath(DEFAULT_BASELINE, ROOT)})')
+    parser.add_argument('--threshold', type=float, default=0.5,
+                        help='ช้าลงเกินสัดส่วนนี้นับเป็น regression (เครื่องที่ว่างและมีหลาย core ใช้ค่าต่ำกว่านี้ได้)')
+    parser.add_argument('--save-baseline', nargs='?', const=DEFAULT_BASELINE, help='บันทึกผลเป็น baseline')
+    args = parser.parse_args()
+
+    stub, stub_state, stub_url = start_stub_server()
+    stub_state.delay = args.ai_delay
+    tmp = tempfile.mkdtemp()
+    env.configure(tmp, stub_url)
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app as shop
+    product_ids = env.seed_catalog(shop, args.products)
+    print(f'catalog: {len(product_ids)} products, stub OpenAI delay {args.ai_delay * 1000:.0f} ms')
+
+    report = {
+        'meta': {
+            'products': len(product_ids), 'concurrency': args.concurrency, 'duration': args.duration,
+            'repeat': args.repeat, 'calibration_us': micro.calibrate(args.rounds),
+            'python': platform.python_version(), 'machine': platform.machine(), 'cpus': os.cpu_count(),
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'micro': {},
+        'load': {},
+    }
+
+    if not args.skip_micro:
+        print(f"\n{'micro-benchmark':<36} {'p50':>10} {'p95':>10} {'p99':>10}")
+        for name, stats in micro.run(shop, args.rounds).items():
+            if args.only and args.only not in name:
+                continue
+            report['micro'][name] = stats
+            print(f"{name:<36} {stats['p50_us']:>8.1f}us {stats['p95_us']:>8.1f}us {stats['p99_us']:>8.1f}us")
+
+    if not args.skip_load:
+        proc, base_url = load.start_server(dict(os.environ))
+        try:
+            cookies = load.admin_cookies(base_url)
+            asset_path = shop.asset_manifest.url('index.css')
+            print(f"\n{'route (x' + str(args.concurrency) + ' concurrent)':<36} {'p50':>9} {'p95':>9} {'p99':>9} "
+                  f"{'req/s':>8} {'errors':>6}")
+            for scenario in load.scenarios(product_ids, asset_path):
+                if args.only and args.only not in scenario.name:
+                    continue
+                stats = best_run([load.run_scenario(base_url, scenario, args.concurrency, args.duration, cookies)
+                                  for _ in range(args.repeat)])
+                report['load'][scenario.name] = stats
+                print(f"{scenario.name:<36} {stats['p50_ms']:>7.2f}ms {stats['p95_ms']:>7.2f}ms "
+                      f"{stats['p99_ms']:>7.2f}ms {stats['rps']:>8.1f} {stats['errors']:>6}")
+        finally:
+            proc.terminate()
+            proc.wait()
+    stub.shutdown()
+
+    write_json(args.output, report)
+    print(f'\nreport written to {args.output}')
+    if args.save_baseline:
+        write_json(args.save_baseline, report)
+        print(f'baseline saved to {args.save_baseline}')
+
+    if args.baseline:
+        regressions = compare(report, read_json(args.baseline), args.threshold)
+        if regressions:
+            print(f'\n{len(regressions)} regression(s) beyond {args.threshold:.0%} vs {args.baseline}:')
+            for line in regressions:
+                print(f'  - {line}')
+            sys.exit(1)
+        print(f'\nno regressions beyond {args.threshold:.0%} vs {args.baseline}')
+
+
+if __name__ == '__main__':
+    main()
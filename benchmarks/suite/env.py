@@ -0,0 +1,50 @@
+"""เตรียม environment ของแอปสำหรับ benchmark: ฐานข้อมูลชั่วคราว, stub OpenAI และแคตตาล็อกสังเคราะห์"""
+import contextlib
+import io
+import os
+import random
+
+ORIGINS = ['Ethiopia', 'Colombia', 'Kenya', 'Brazil', 'Guatemala', 'Sumatra', 'Chiang Rai', 'Doi Chang', 'Nan']
+STYLES = ['Espresso', 'Filter', 'Cold Brew', 'Drip', 'Decaf', 'Signature', 'Reserve', 'Geisha', 'Honey']
+NOTES = ['หอม', 'นุ่ม', 'เข้มข้น', 'ช็อกโกแลต', 'คาราเมล', 'ผลไม้', 'ดอกไม้', 'ถั่ว', 'น้ำผึ้ง', 'ละมุน']
+
+
+def configure(tmp_dir: str, openai_base_url: str = None):
+    """ตั้ง env ก่อน import app (process ลูกที่ใช้ env เดียวกันจะเห็นฐานข้อมูลเดียวกัน)"""
+    os.environ.update({
+        'DATABASE_URL': f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}",
+        'AI_CACHE_DB': os.path.join(tmp_dir, 'ai_cache.db'),
+        'IMAGE_DIR': os.path.join(tmp_dir, 'media'),
+        'IMAGE_FETCH_REMOTE': '0',
+        # client ทุกตัวของ load test มาจาก IP เดียว rate limit ของ AI และรีวิวต้องไม่ทำให้ scenario ได้ 429
+        'AI_RATE_LIMIT_PER_MINUTE': '1000000',
+        'AI_RATE_LIMIT_BURST': '1000000',
+        # คำถามที่เกิน in-flight ของ ai_gate รอคิวแทนการได้ 429 busy (stub ตอบเร็ว จึงไม่เกินเวลารอ)
+        'AI_ADMISSION_QUEUE': '64',
+        'REVIEW_RATE_LIMIT_PER_HOUR': '1000000',
+        'REVIEW_RATE_LIMIT_BURST': '1000000',
+    })
+    if openai_base_url:
+        os.environ.update({'OPENAI_API_KEY': 'bench-key', 'OPENAI_BASE_URL': openai_base_url})
+
+
+def seed_catalog(shop, products: int, seed: int = 42) -> list:
+    """init_db() (สินค้าตัวอย่าง + รีวิว) แล้วเติมสินค้าสังเคราะห์จนครบ products ชิ้น คืน id ทั้งหมด"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        shop.init_db()
+    rng = random.Random(seed)
+    with shop.app.app_context():
+        existing = shop.db.session.query(shop.db.func.count(shop.Product.id)).scalar()
+        rows = [{
+            'name': f'{rng.choice(ORIGINS)} {rng.choice(STYLES)} #{i}',
+            'price': float(rng.randrange(120, 900, 10)),
+            'description': ' '.join(rng.sample(NOTES, 4)),
+            'popularity': int(rng.paretovariate(1.5)) - 1,
+        } for i in range(existing, products)]
+        for start in range(0, len(rows), 1000):
+            shop.db.session.execute(shop.db.insert(shop.Product), rows[start:start + 1000])
+        shop.bump_catalog_version()
+        # insert แบบ bulk ไม่ผ่าน bump_catalog_version(changed=...) จึงต้องสร้าง index ค้นหาใหม่เอง
+        shop.rebuild_search_index()
+        shop.db.session.commit()
+        return [pid for pid, in shop.db.session.query(shop.Product.id).order_by(shop.Product.id)]
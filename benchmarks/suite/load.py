@@ -0,0 +1,136 @@
+"""Load test: ยิง request พร้อมกันไปที่แอปที่รันใน process แยก (benchmarks/suite/serve.py)
+
+แต่ละ scenario รันตามลำดับ ใช้ worker thread ละหนึ่ง httpx.Client (keep-alive) ยิงซ้ำจนหมดเวลา
+นับ response ที่ status >= 400 หรือ error ของการเชื่อมต่อเป็น errors
+scenario ที่เขียนข้อมูล (checkout, รีวิว, แก้สินค้า) อยู่ท้ายรายการเพื่อไม่ให้ cache ของ scenario อ่านถูกล้างระหว่างวัด
+"""
+import itertools
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from typing import Callable, NamedTuple, Optional, Union
+
+import httpx
+
+from benchmarks.suite.report import summarize_latencies
+
+CHECKOUT_ITEMS = [{'id': 1, 'name': 'Arabica Premium', 'price': 350, 'quantity': 2, 'size': 'medium',
+                   'roast': 'medium', 'addons': [], 'notes': ''}]
+
+
+class Scenario(NamedTuple):
+    name: str
+    method: str
+    path: Union[str, Callable[[int], str]]
+    json: Optional[Callable[[int], dict]] = None
+    form: Optional[Callable[[int], dict]] = None
+    admin: bool = False
+
+
+def scenarios(product_ids: list, asset_path: str) -> list:
+    """ทุก route ที่ลูกค้าและแอดมินใช้ประจำ (i = ลำดับ request สำหรับทำให้ข้อมูลไม่ซ้ำกัน)
+
+    ไม่รวม route ที่ทำครั้งเดียวหรือทำลายข้อมูล: DELETE สินค้า, import/export จำนวนมาก, อัปโหลดรูป
+    และ background job สร้างคำอธิบาย
+    """
+    def pid(i):
+        return product_ids[i % len(product_ids)]
+
+    cart = [{'id': product_ids[i * 7 % len(product_ids)], 'qty': 1 + i % 3} for i in range(10)]
+    return [
+        Scenario('GET /', 'GET', '/'),
+        Scenario('GET /cart', 'GET', '/cart'),
+        Scenario('GET /checkout', 'GET', '/checkout?total=750'),
+        Scenario('GET /login', 'GET', '/login'),
+        Scenario('GET /receipt', 'GET', '/receipt'),
+        Scenario('GET /api/products', 'GET', '/api/products'),
+        Scenario('GET /api/products?limit=20', 'GET', '/api/products?limit=20'),
+        Scenario('GET /api/products/<id>', 'GET', lambda i: f'/api/products/{pid(i)}'),
+        Scenario('GET /api/products/<id>/reviews', 'GET', lambda i: f'/api/products/{pid(i)}/reviews'),
+        Scenario('GET /api/products/search', 'GET',
+                 lambda i: '/api/products/search?q=' + ('espresso', 'ช็อกโกแลต', 'kenya', 'หอม')[i % 4]),
+        Scenario('GET /api/ai-status', 'GET', '/api/ai-status'),
+        Scenario('GET /api/ai-cache/stats', 'GET', '/api/ai-cache/stats'),
+        Scenario('GET /assets/<bundle>', 'GET', asset_path),
+        Scenario('POST /api/cart/price', 'POST', '/api/cart/price', json=lambda i: {'items': cart}),
+        Scenario('POST /api/ask-ai faq', 'POST', '/api/ask-ai',
+                 json=lambda i: {'question': 'วิธีชง french press'}),
+        Scenario('POST /api/ask-ai openai', 'POST', '/api/ask-ai',
+                 json=lambda i: {'question': f'แนะนำกาแฟสำหรับคนชอบรสผลไม้ #{uuid.uuid4().hex[:8]}'}),
+        Scenario('POST /api/ask-ai/stream', 'POST', '/api/ask-ai/stream',
+                 json=lambda i: {'question': f'latte art ทำอย่างไร #{uuid.uuid4().hex[:8]}'}),
+        Scenario('GET /dashboard', 'GET', '/dashboard', admin=True),
+        Scenario('POST /api/generate-description', 'POST', '/api/generate-description', admin=True,
+                 json=lambda i: {'name': f'Bench Blend {uuid.uuid4().hex[:8]}', 'price': 300}),
+        Scenario('POST /checkout', 'POST', '/checkout', form=lambda i: {
+            'payment_method': 'cod', 'cod_confirm': 'on', 'amount': '799',
+            'idempotency_key': uuid.uuid4().hex, 'order_items': json.dumps(CHECKOUT_ITEMS),
+        }),
+        Scenario('POST /api/products/<id>/reviews', 'POST', lambda i: f'/api/products/{pid(i)}/reviews',
+                 json=lambda i: {'rating': 1 + i % 5, 'comment': 'อร่อยมาก', 'author': 'bench'}),
+        Scenario('POST /toggle-favorite/<id>', 'POST', lambda i: f'/toggle-favorite/{pid(i)}'),
+        Scenario('POST /api/products', 'POST', '/api/products', admin=True,
+                 json=lambda i: {'name': f'Bench Product {uuid.uuid4().hex}', 'price': 250}),
+        Scenario('PUT /api/products/<id>', 'PUT', lambda i: f'/api/products/{pid(i)}', admin=True,
+                 json=lambda i: {'price': 200 + i % 300}),
+    ]
+
+
+def start_server(env: dict) -> tuple:
+    """รันแอปใน process แยก (คนละ GIL กับตัวยิง load) คืน (process, base_url)"""
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+    proc = subprocess.Popen([sys.executable, '-m', 'benchmarks.suite.serve'], cwd=root, env=env,
+                            stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline()
+    if not line.startswith('PORT '):
+        proc.kill()
+        raise RuntimeError(f'benchmark server failed to start: {line!r}')
+    return proc, f'http://127.0.0.1:{int(line.split()[1])}'
+
+
+def admin_cookies(base_url: str) -> httpx.Cookies:
+    with httpx.Client(base_url=base_url) as client:
+        client.post('/login', data={'username': 'admin', 'password': '1234'})
+        return client.cookies
+
+
+def run_scenario(base_url: str, scenario: Scenario, concurrency: int, duration: float, cookies=None) -> dict:
+    counter = itertools.count()
+    samples, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        local, failed = [], 0
+        with httpx.Client(base_url=base_url, cookies=cookies if scenario.admin else None, timeout=30) as client:
+            while time.perf_counter() < deadline:
+                i = next(counter)
+                path = scenario.path(i) if callable(scenario.path) else scenario.path
+                start = time.perf_counter()
+                try:
+                    response = client.request(
+                        scenario.method, path,
+                        json=scenario.json(i) if scenario.json else None,
+                        data=scenario.form(i) if scenario.form else None,
+                    )
+                    response.read()
+                    ok = response.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                local.append((time.perf_counter() - start) * 1000)
+                failed += not ok
+        with lock:
+            samples.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize_latencies(samples, errors[0], time.perf_counter() - started)
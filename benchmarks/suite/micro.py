@@ -0,0 +1,61 @@
+"""Micro-benchmark ของโค้ดที่อยู่บนเส้นทางของ request บ่อยที่สุด (วัดใน process เดียวกับแอป ไม่ผ่าน HTTP)"""
+import json
+import time
+
+from benchmarks.suite.report import summarize_micro
+
+FAQ_QUESTION = 'วิธีชง french press ให้อร่อย'
+MISS_QUESTION = 'ร้านเปิดกี่โมงและมีที่จอดรถไหม'
+
+
+def measure(fn, rounds: int = 20, min_time: float = 0.02) -> dict:
+    """เวลาต่อการเรียก fn (µs) หลายรอบ แต่ละรอบเรียกซ้ำจนนานอย่างน้อย min_time วินาที"""
+    fn()
+    number, start = 1, time.perf_counter()
+    fn()
+    single = time.perf_counter() - start
+    if single < min_time:
+        number = max(1, int(min_time / max(single, 1e-7)))
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number * 1e6)
+    return summarize_micro(samples)
+
+
+def calibrate(rounds: int = 20) -> float:
+    """เวลา (µs) ของงาน Python ล้วนที่คงที่ ใช้ปรับผลตามความเร็วเครื่องเมื่อเทียบกับ baseline"""
+    payload = [{'id': i, 'name': f'coffee {i}', 'price': i * 1.5} for i in range(200)]
+    return measure(lambda: sorted(json.dumps(row) for row in payload), rounds)['p50_us']
+
+
+def run(shop, rounds: int = 20) -> dict:
+    """คืน {ชื่อ benchmark: สถิติ} ต้องเรียกหลัง seed แคตตาล็อกแล้ว"""
+    from flask import render_template
+
+    results = {}
+    with shop.app.app_context():
+        products = shop.Product.query.all()
+        records = shop.catalog_cache.get().products
+        count = len(products)
+        # คำถามที่ cache ไว้แล้ว: เรียกครั้งแรกผ่าน stub OpenAI แล้ววัดครั้งต่อๆ ไป
+        shop.ask_ai_question(MISS_QUESTION)
+
+        results['ask_ai_question faq match'] = measure(lambda: shop.ask_ai_question(FAQ_QUESTION), rounds)
+        results['ask_ai_question cache hit'] = measure(lambda: shop.ask_ai_question(MISS_QUESTION), rounds)
+        results['canned_ai_answer miss'] = measure(lambda: shop.canned_ai_answer(MISS_QUESTION), rounds)
+        results[f'Product.to_dict x{count}'] = measure(lambda: [p.to_dict() for p in products], rounds)
+        results[f'ProductRecord.to_dict x{count}'] = measure(lambda: [r.to_dict() for r in records], rounds)
+
+    with shop.app.test_request_context('/'):
+        storefront = shop.storefront_products()
+        stats = shop.review_stats_map()
+        results['render index.html'] = measure(
+            lambda: render_template('index.html', products=storefront, review_stats=stats), rounds)
+        results['render cart.html'] = measure(lambda: render_template('cart.html'), rounds)
+        admin_rows = shop.admin_products()
+        results['render admin.html'] = measure(
+            lambda: render_template('admin.html', products=admin_rows, username='admin', reviews={}), rounds)
+    return results
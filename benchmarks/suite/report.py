@@ -0,0 +1,89 @@
+"""สถิติของผลวัด (percentile, throughput) และการเทียบกับ baseline"""
+import json
+import math
+
+
+def percentile(sorted_samples: list, q: float) -> float:
+    """percentile แบบ nearest-rank (q ระหว่าง 0-100) จาก list ที่เรียงแล้ว"""
+    if not sorted_samples:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_samples)))
+    return sorted_samples[rank - 1]
+
+
+def summarize_latencies(samples_ms: list, errors: int, elapsed: float) -> dict:
+    samples = sorted(samples_ms)
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'p50_ms': round(percentile(samples, 50), 3),
+        'p95_ms': round(percentile(samples, 95), 3),
+        'p99_ms': round(percentile(samples, 99), 3),
+        'rps': round(len(samples) / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def summarize_micro(samples_us: list) -> dict:
+    samples = sorted(samples_us)
+    return {
+        'rounds': len(samples),
+        'p50_us': round(percentile(samples, 50), 3),
+        'p95_us': round(percentile(samples, 95), 3),
+        'p99_us': round(percentile(samples, 99), 3),
+    }
+
+
+# metric -> (ทิศทางที่แย่ลง, ค่าต่างขั้นต่ำที่นับเป็น regression เพื่อกันสัญญาณรบกวนของตัวเลขที่เล็กมาก)
+CHECKS = {
+    'load': (('p95_ms', 'higher', 1.0), ('rps', 'lower', 0.0)),
+    'micro': (('p50_us', 'higher', 5.0),),
+}
+
+
+def best_run(runs: list) -> dict:
+    """ผลที่ดีที่สุดจากการรันซ้ำ (p50 ต่ำสุด) ลดผลของ process อื่นที่แย่ง CPU ระหว่างวัด"""
+    return min(runs, key=lambda stats: stats['p50_ms'])
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> list:
+    """รายการ regression (ข้อความ) เมื่อผลครั้งนี้แย่กว่า baseline เกิน threshold (0.25 = 25%)
+
+    เทียบเฉพาะ benchmark ที่มีทั้งสองฝั่ง และนับ error ที่เพิ่มขึ้นใน load test เป็น regression เสมอ
+    ถ้ามี calibration_us ทั้งสองฝั่ง ค่าของ baseline จะถูกปรับตามความเร็วของเครื่องที่รันครั้งนี้ก่อนเทียบ
+    """
+    speed = 1.0
+    base_cal = baseline.get('meta', {}).get('calibration_us')
+    current_cal = report.get('meta', {}).get('calibration_us')
+    if base_cal and current_cal:
+        speed = current_cal / base_cal
+
+    regressions = []
+    for section, checks in CHECKS.items():
+        for name, base in baseline.get(section, {}).items():
+            current = report.get(section, {}).get(name)
+            if current is None:
+                continue
+            for metric, worse, min_delta in checks:
+                old, new = base.get(metric), current.get(metric)
+                if not old or new is None:
+                    continue
+                old = round(old * speed if worse == 'higher' else old / speed, 3)
+                change = (new - old) / old
+                if worse == 'higher' and change > threshold and new - old > min_delta:
+                    regressions.append(f'{section} {name}: {metric} {old} -> {new} (+{change:.0%})')
+                elif worse == 'lower' and -change > threshold:
+                    regressions.append(f'{section} {name}: {metric} {old} -> {new} ({change:.0%})')
+            if section == 'load' and current.get('errors', 0) > base.get('errors', 0):
+                regressions.append(f"load {name}: errors {base.get('errors', 0)} -> {current['errors']}")
+    return regressions
+
+
+def write_json(path: str, payload: dict):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def read_json(path: str) -> dict:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
@@ -0,0 +1,26 @@
+"""process ลูกที่รันแอปด้วย werkzeug threaded server สำหรับ load test
+
+อ่านฐานข้อมูลและ OpenAI stub จาก env ที่ process แม่ตั้งไว้ แล้วพิมพ์ "PORT <n>" เมื่อพร้อม
+"""
+import contextlib
+import io
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+
+def main():
+    from werkzeug.serving import make_server
+    # access log ของทุก request ทำให้ช้าและรกผลลัพธ์
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app as shop
+    server = make_server('127.0.0.1', 0, shop.app, threaded=True)
+    print(f'PORT {server.server_port}', flush=True)
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
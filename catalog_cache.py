@@ -0,0 +1,122 @@
+"""Cache แคตตาล็อกสินค้าในหน่วยความจำ (read-through) ผูกกับเวอร์ชันแคตตาล็อกในฐานข้อมูล
+
+ทุกครั้งที่อ่าน จะเช็คเลขเวอร์ชันจากแถว catalog_version (query เดียวบน primary key)
+ถ้าเวอร์ชันเปลี่ยน (มีการแก้สินค้าจาก process ไหนก็ตาม) จึงโหลดสินค้าทั้งหมดใหม่
+สินค้าถูกเก็บเป็น record แบบ immutable เรียงตาม (popularity desc, id) ไว้แล้ว และค้นจาก id ได้ O(1)
+`PageCache` เก็บหน้า HTML ที่ render แล้วโดยผูกกับเวอร์ชันของข้อมูลเช่นกัน
+"""
+import bisect
+import json
+import threading
+from typing import NamedTuple, Optional
+
+
+class ProductRecord(NamedTuple):
+    """สินค้าหนึ่งชิ้นแบบอ่านอย่างเดียว ใช้ใน template ได้เหมือน Product (product.name, product.price, ...)"""
+    id: int
+    name: str
+    price: float
+    image_url: Optional[str]
+    description: Optional[str]
+    popularity: int
+
+    def to_dict(self):
+        return self._asdict()
+
+
+def sort_key(popularity, product_id):
+    """key ของการเรียงแบบหน้าแรก: สินค้าที่มีคนกดหัวใจมากก่อน แล้วเรียงตาม id"""
+    return (-(popularity or 0), product_id)
+
+
+class Catalog:
+    """snapshot ของแคตตาล็อกที่เวอร์ชันหนึ่ง (ห้ามแก้ไขหลังสร้าง)"""
+
+    def __init__(self, version: int, records):
+        self.version = version
+        self.products = tuple(sorted(records, key=lambda r: sort_key(r.popularity, r.id)))
+        self.by_id = {r.id: r for r in self.products}
+        self._keys = [sort_key(r.popularity, r.id) for r in self.products]
+        self._json = None
+
+    def products_by_id(self):
+        """สินค้าเรียงตาม id (ลำดับเดียวกับ Product.query.all())"""
+        return sorted(self.products, key=lambda r: r.id)
+
+    def page(self, after_id=None, after_popularity=None, limit=None):
+        """แบ่งหน้าแบบ keyset บนลำดับ (popularity desc, id) คืน (records, has_more)"""
+        start = 0
+        if after_id is not None:
+            if after_popularity is None:
+                after = self.by_id.get(after_id)
+                after_popularity = after.popularity if after else 0
+            start = bisect.bisect_right(self._keys, sort_key(after_popularity, after_id))
+        if limit is None:
+            return self.products[start:], False
+        end = start + limit
+        return self.products[start:end], end < len(self.products)
+
+    def full_json(self, dumps=json.dumps):
+        """JSON ของสินค้าทั้งหมด (serialize ครั้งเดียวต่อเวอร์ชัน)"""
+        if self._json is None:
+            self._json = dumps([r.to_dict() for r in self.products])
+        return self._json
+
+
+class CatalogCache:
+    """Read-through cache ของแคตตาล็อก
+
+    version_getter() -> int      อ่านเลขเวอร์ชันปัจจุบันจากฐานข้อมูล
+    loader() -> list[ProductRecord]  โหลดสินค้าทั้งหมด
+    enabled: ถ้าปิด (CATALOG_CACHE=0) app.py จะ query ฐานข้อมูลตรงเหมือนเดิม
+    """
+
+    def __init__(self, version_getter, loader, enabled: bool = True):
+        self.version_getter = version_getter
+        self.loader = loader
+        self.enabled = enabled
+        self._catalog = None
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def get(self) -> Catalog:
+        version = self.version_getter()
+        catalog = self._catalog
+        if catalog is not None and catalog.version == version:
+            return catalog
+        with self._lock:
+            catalog = self._catalog
+            if catalog is None or catalog.version != version:
+                # อ่านเวอร์ชันก่อนโหลดข้อมูล: ถ้ามีการแก้ไขแทรกระหว่างนี้ เวอร์ชันรอบหน้าจะต่างและโหลดใหม่เอง
+                catalog = Catalog(version, self.loader())
+                self._catalog = catalog
+                self.loads += 1
+            return catalog
+
+    def invalidate(self):
+        with self._lock:
+            self._catalog = None
+
+
+class PageCache:
+    """cache HTML ที่ render แล้ว โดย key คือเวอร์ชันของข้อมูลทั้งหมดที่หน้านั้นใช้
+
+    เก็บเฉพาะ key ล่าสุดต่อหน้า เมื่อเวอร์ชันเปลี่ยน หน้าเดิมจะถูก render ใหม่และแทนที่ทันที
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._pages = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_render(self, name: str, key, render):
+        entry = self._pages.get(name)
+        if self.enabled and entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        html = render()
+        if self.enabled:
+            self._pages[name] = (key, html)
+        return html
@@ -0,0 +1,135 @@
+"""นำเข้า/ส่งออกแคตตาล็อกสินค้าแบบ streaming (CSV หรือ NDJSON)
+
+- อ่าน body ทีละบรรทัดและ validate ทีละแถว ไม่ต้องโหลดไฟล์ทั้งไฟล์เข้าหน่วยความจำ
+- `batched()` แบ่งแถวที่ผ่านการตรวจเป็นชุด ให้ app.py upsert ทีละชุดใน transaction เดียว
+- `export_lines()` แปลงแถวจากฐานข้อมูลเป็นบรรทัด CSV/NDJSON ทีละแถวสำหรับ streaming response
+"""
+import csv
+import io
+import json
+from itertools import islice
+
+FORMATS = ('csv', 'ndjson')
+EXPORT_COLUMNS = ('id', 'name', 'price', 'image_url', 'description', 'popularity')
+CONTENT_TYPES = {'csv': 'text/csv; charset=utf-8', 'ndjson': 'application/x-ndjson'}
+
+# ความยาวสูงสุดตามคอลัมน์ของตาราง product
+# image_url ไม่จำกัด: สินค้าเดิมบางชิ้นเก็บรูปเป็น data: URL ซึ่งยาวกว่า 255 ตัวอักษร (export แล้ว import กลับต้องได้)
+MAX_LENGTHS = {'name': 100, 'image_url': None, 'description': 500}
+
+
+class RowError(ValueError):
+    """แถวข้อมูลไม่ถูกต้อง (ข้อความจะอยู่ในรายงาน error ของแถวนั้น)"""
+
+
+def detect_format(fmt: str = None, content_type: str = None) -> str:
+    """เลือกรูปแบบจาก ?format= หรือ Content-Type คืน None ถ้าไม่รู้จัก"""
+    if fmt:
+        fmt = fmt.lower()
+        return fmt if fmt in FORMATS else None
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    if content_type in ('text/csv', 'application/csv'):
+        return 'csv'
+    if content_type in ('application/x-ndjson', 'application/ndjson', 'application/jsonl', 'application/json-lines'):
+        return 'ndjson'
+    return None
+
+
+def read_rows(stream, fmt: str):
+    """อ่าน body แบบ stream คืน generator ของ (line_no, raw_row หรือ RowError)"""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            line_no = reader.line_num
+            if None in row:
+                yield line_no, RowError('too many columns')
+            else:
+                yield line_no, row
+        return
+
+    for line_no, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_no, RowError(f'invalid JSON: {e}')
+            continue
+        if not isinstance(row, dict):
+            yield line_no, RowError('each line must be a JSON object')
+            continue
+        yield line_no, row
+
+
+def _optional_text(row: dict, field: str):
+    value = row.get(field)
+    if value is None:
+        return None
+    value = str(value).strip()
+    if MAX_LENGTHS[field] and len(value) > MAX_LENGTHS[field]:
+        raise RowError(f'{field} is longer than {MAX_LENGTHS[field]} characters')
+    return value or None
+
+
+def validate_row(row: dict) -> dict:
+    """ตรวจและแปลงแถวดิบเป็นค่าของคอลัมน์ product
+
+    คืนเฉพาะคอลัมน์ที่แถวนั้นส่งมา (คอลัมน์ที่ไม่ส่งจะไม่ถูกเขียนทับตอน update)
+    คอลัมน์ id (เช่นจากไฟล์ export) ถูกละไว้ เพราะการ upsert ใช้ name เป็น key
+    popularity ก็ถูกละไว้เช่นกัน เพราะนับจากสินค้าโปรดของลูกค้า (ตาราง favorite) ไม่ได้ตั้งจากไฟล์
+    """
+    name = str(row.get('name') or '').strip()
+    if not name:
+        raise RowError('name is required')
+    if len(name) > MAX_LENGTHS['name']:
+        raise RowError(f"name is longer than {MAX_LENGTHS['name']} characters")
+
+    price = row.get('price')
+    if price is None or price == '' or isinstance(price, bool):
+        raise RowError('price is required')
+    try:
+        price = float(price)
+    except (TypeError, ValueError):
+        raise RowError(f'price is not a number: {price!r}')
+    if not 0 <= price < float('inf'):
+        raise RowError('price must be zero or more')
+
+    values = {'name': name, 'price': price}
+    for field in ('image_url', 'description'):
+        if field in row:
+            values[field] = _optional_text(row, field)
+    return values
+
+
+def batched(iterable, size: int):
+    """แบ่ง iterable เป็น list ชุดละ size รายการ"""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def export_lines(rows, fmt: str):
+    """แปลง rows (tuple ตามลำดับ EXPORT_COLUMNS) เป็นบรรทัดข้อความทีละบรรทัด"""
+    if fmt == 'ndjson':
+        for row in rows:
+            yield json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False) + '\n'
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        line = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return line
+
+    writer.writerow(EXPORT_COLUMNS)
+    yield flush()
+    for row in rows:
+        writer.writerow(row)
+        yield flush()
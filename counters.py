@@ -0,0 +1,107 @@
+"""ตัวนับแบบรวม delta ในหน่วยความจำแล้วเขียนลงฐานข้อมูลเป็นชุด (write coalescing)
+
+ใช้กับ popularity ของสินค้า: ทุกคลิกหัวใจเป็น +1/-1 ของสินค้าหนึ่งชิ้น ถ้าเขียนแถว product และ
+เปลี่ยนเวอร์ชันแคตตาล็อกทุกคลิก cache ของแคตตาล็อก/หน้าแรกจะถูกล้างทุกครั้งที่มีคนกด
+`CoalescingCounter` รวม delta ต่อ key ไว้ (คลิกไป-กลับของสินค้าเดียวกันหักล้างกันเอง)
+แล้ว thread เดียวเรียก `flush({key: delta})` ทุก interval วินาที หรือทันทีเมื่อ key ที่ค้างเกิน max_pending
+
+flush ต้องเขียนแบบบวกเพิ่ม (popularity = popularity + delta) worker หลาย process จึงนับรวมกันได้ถูกต้อง
+delta ที่ยังไม่ flush จะหายถ้า process ตายกะทันหัน (มากสุดราว interval วินาที) นับใหม่ได้จากตาราง favorite
+"""
+import threading
+import time
+
+
+class CoalescingCounter:
+    """รวม delta ของตัวนับหลายตัวแล้ว flush เป็นชุด
+
+    flush(deltas: dict) -> None   เขียน delta ทั้งชุดใน transaction เดียว ถ้า raise delta จะถูกเก็บไว้ flush รอบหน้า
+    interval                      เวลา (วินาที) ระหว่างการ flush
+    max_pending                   จำนวน key ที่ค้างสูงสุดก่อนปลุก thread ให้ flush ทันที
+    """
+
+    def __init__(self, flush, interval: float = 1.0, max_pending: int = 1000):
+        self.flush_fn = flush
+        self.interval = interval
+        self.max_pending = max(1, max_pending)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self.increments = 0
+        self.flushes = 0
+        self.rows_written = 0
+
+    def add(self, key, delta: int = 1):
+        if not delta:
+            return
+        self._ensure_started()
+        with self._lock:
+            value = self._pending.get(key, 0) + delta
+            if value:
+                self._pending[key] = value
+            else:
+                self._pending.pop(key, None)
+            self.increments += 1
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self._wake.set()
+
+    def pending(self, key) -> int:
+        """delta ที่ยังไม่ได้ flush ของ key"""
+        with self._lock:
+            return self._pending.get(key, 0)
+
+    def flush(self) -> int:
+        """เขียน delta ที่ค้างอยู่ทั้งหมดทันที คืนจำนวน key ที่เขียน"""
+        with self._flush_lock:
+            with self._lock:
+                deltas, self._pending = self._pending, {}
+            if not deltas:
+                return 0
+            try:
+                self.flush_fn(deltas)
+            except Exception:
+                # คืน delta กลับเข้าไปรวมกับที่เข้ามาระหว่างนี้ ไม่ให้นับหาย
+                with self._lock:
+                    for key, delta in deltas.items():
+                        value = self._pending.get(key, 0) + delta
+                        if value:
+                            self._pending[key] = value
+                        else:
+                            self._pending.pop(key, None)
+                raise
+            self.flushes += 1
+            self.rows_written += len(deltas)
+            return len(deltas)
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            'increments': self.increments,
+            'flushes': self.flushes,
+            'rows_written': self.rows_written,
+            'pending_keys': pending,
+            'interval': self.interval,
+        }
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='counter-flusher', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error flushing counters: {e}")
+                time.sleep(self.interval)
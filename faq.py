@@ -0,0 +1,130 @@
+"""FAQ engine สำหรับคำถามสำเร็จรูป (canned answers) ของ AI Chat
+
+โหลดกฎ keyword -> answer จากไฟล์ JSON แล้วคอมไพล์เป็น Aho-Corasick automaton
+ครั้งเดียว ทำให้จับคู่ keyword ภาษาไทยและอังกฤษทั้งหมดได้ในการสแกนคำถามรอบเดียว
+ลำดับของกฎในไฟล์คือลำดับความสำคัญ (กฎที่อยู่ก่อนชนะ) เหมือน if-chain เดิม
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+
+
+class FAQMatcher:
+    """Aho-Corasick automaton ที่คอมไพล์จากรายการกฎ
+
+    rules: list ของ dict ที่มี 'keywords' (list[str]) และ 'answer' (str)
+    """
+
+    def __init__(self, rules):
+        self.answers = [rule['answer'] for rule in rules]
+        # goto[state] = {char: next_state}, out[state] = priority ต่ำสุดที่จบที่ state นี้
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [None]
+        for priority, rule in enumerate(rules):
+            for keyword in rule.get('keywords', []):
+                self._add(keyword.lower(), priority)
+        self._build()
+
+    def _add(self, keyword, priority):
+        if not keyword:
+            return
+        state = 0
+        for ch in keyword:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(None)
+                self._goto[state][ch] = nxt
+            state = nxt
+        if self._out[state] is None or priority < self._out[state]:
+            self._out[state] = priority
+
+    def _build(self):
+        """สร้าง failure links แบบ BFS และรวม output ของ suffix เข้ามา"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                inherited = self._out[self._fail[nxt]]
+                if inherited is not None and (self._out[nxt] is None or inherited < self._out[nxt]):
+                    self._out[nxt] = inherited
+
+    def match(self, text: str):
+        """คืน index ของกฎที่มีความสำคัญสูงสุดที่ keyword ปรากฏใน text (หรือ None)"""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        best = None
+        for ch in text.lower():
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            hit = out[state]
+            if hit is not None and (best is None or hit < best):
+                best = hit
+                if best == 0:
+                    break
+        return best
+
+    def answer(self, text: str):
+        """คืนคำตอบสำเร็จรูปของคำถาม หรือ None ถ้าไม่ตรงกฎใด"""
+        idx = self.match(text)
+        return None if idx is None else self.answers[idx]
+
+
+class FAQEngine:
+    """โหลดกฎจากไฟล์และ hot-reload อัตโนมัติเมื่อไฟล์ถูกแก้ไข
+
+    ตรวจ mtime ของไฟล์ไม่เกินทุก `check_interval` วินาที เพื่อไม่ให้ stat ทุก request
+    """
+
+    def __init__(self, path: str, check_interval: float = 2.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._matcher = FAQMatcher([])
+        self._mtime = None
+        self._checked_at = 0.0
+        self.reload()
+
+    def reload(self):
+        """อ่านไฟล์กฎใหม่และคอมไพล์ automaton (ถ้าไฟล์เสียจะใช้กฎชุดเดิมต่อ)"""
+        with self._lock:
+            self._checked_at = time.monotonic()
+            try:
+                mtime = os.path.getmtime(self.path)
+                with open(self.path, encoding='utf-8') as f:
+                    rules = json.load(f)
+                self._matcher = FAQMatcher(rules)
+                self._mtime = mtime
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                print(f"Error loading FAQ rules: {str(e)}")
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime != self._mtime:
+            self.reload()
+
+    def answer(self, question: str):
+        self._maybe_reload()
+        return self._matcher.answer(question or '')
+
+    @property
+    def rule_count(self) -> int:
+        return len(self._matcher.answers)
@@ -0,0 +1,18 @@
+"""ค่าตั้งต้นของ gunicorn (pip install gunicorn) ใช้กับ `gunicorn wsgi:app`
+
+preload_app: import wsgi (migration, seed, warm-up) ครั้งเดียวใน process แม่ก่อน fork worker
+worker ทุกตัวจึงเริ่มเร็วและไม่รัน migration ซ้ำ ส่วน post_fork เปิด connection ของฐานข้อมูลใหม่ในแต่ละ worker
+"""
+import os
+
+bind = os.getenv('BIND', '0.0.0.0:5000')
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+worker_class = 'gthread'
+threads = int(os.getenv('WEB_THREADS', '8'))
+preload_app = True
+timeout = 60
+
+
+def post_fork(server, worker):
+    import app
+    app.after_fork()
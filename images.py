@@ -0,0 +1,286 @@
+"""เก็บรูปสินค้าไว้ในเครื่องและสร้าง thumbnail แบบ lazy พร้อม cache บนดิสก์
+
+- รูปต้นฉบับ (อัปโหลดหรือดึงจาก URL ครั้งเดียว) ถูกเก็บด้วยชื่อจาก SHA-256 ของเนื้อไฟล์
+  เช่น originals/3fa9...c1.jpg รูปเดียวกันอัปโหลดซ้ำได้ไฟล์เดิม และเนื้อหาของ URL ไม่มีวันเปลี่ยน
+  จึงส่งด้วย Cache-Control: immutable ได้
+- thumbnail (กว้าง IMAGE_SIZES px, WebP หรือ JPEG) สร้างตอนถูกขอครั้งแรกแล้วเก็บใน cache/
+  ชื่อ URL: /images/<digest>-<width>w.<webp|jpg>
+- การย่อรูปใช้ Pillow (optional) ถ้าไม่ได้ติดตั้ง thumbnail จะไม่ถูกสร้างและหน้าเว็บใช้รูปต้นฉบับแทน
+- การดึงรูปจาก URL (ฝั่ง server) ยอมเฉพาะ http/https ไปยัง IP สาธารณะ ตรวจทุก redirect ทีละ hop
+  กันการใช้ server ยิงเข้า service ภายใน (loopback, private, link-local เช่น metadata ของ cloud)
+  socket ต่อไปยัง IP ที่ตรวจแล้วเท่านั้น (กัน DNS rebinding ระหว่างตรวจกับต่อจริง)
+"""
+import hashlib
+import io
+import ipaddress
+import os
+import re
+import socket
+import tempfile
+from typing import Optional
+from urllib.parse import urljoin, urlsplit
+
+try:
+    from PIL import Image, ImageOps
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+URL_PREFIX = '/images/'
+IMAGE_SIZES = (160, 320, 640)
+THUMBNAIL_FORMATS = {'webp': ('WEBP', 'image/webp'), 'jpg': ('JPEG', 'image/jpeg')}
+ORIGINAL_TYPES = {'jpg': 'image/jpeg', 'png': 'image/png', 'gif': 'image/gif', 'webp': 'image/webp'}
+MAX_PIXELS = 40_000_000  # กัน decompression bomb
+MAX_REDIRECTS = 5
+
+_ORIGINAL_NAME = re.compile(r'^([0-9a-f]{64})\.(jpg|png|gif|webp)$')
+_THUMBNAIL_NAME = re.compile(r'^([0-9a-f]{64})-(\d+)w\.(webp|jpg)$')
+
+
+class ImageError(ValueError):
+    """ไฟล์/URL ที่ไม่ใช่รูปที่รองรับ หรือใหญ่เกินกำหนด"""
+
+
+def sniff_type(data: bytes) -> Optional[str]:
+    """นามสกุลของรูปจาก magic bytes (ไม่เชื่อชื่อไฟล์หรือ Content-Type ที่ผู้ใช้ส่งมา)"""
+    if data.startswith(b'\xff\xd8\xff'):
+        return 'jpg'
+    if data.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if data[:6] in (b'GIF87a', b'GIF89a'):
+        return 'gif'
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+def is_local(url) -> bool:
+    return bool(url) and url.startswith(URL_PREFIX)
+
+
+def is_public_address(address) -> bool:
+    """IP ที่อยู่บนอินเทอร์เน็ตจริง (ไม่ใช่ loopback, private, link-local, reserved, multicast)"""
+    ip = ipaddress.ip_address(address)
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+def resolve_host(host: str, port: int) -> list:
+    """IP ทั้งหมดของ host (DNS) raise ImageError ถ้า resolve ไม่ได้"""
+    try:
+        infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except (socket.gaierror, UnicodeError) as e:
+        raise ImageError(f'cannot resolve {host}: {e}')
+    return [info[4][0].split('%', 1)[0] for info in infos]
+
+
+class ImageStore:
+    """ที่เก็บรูปต้นฉบับ (content-addressed) และ thumbnail ที่ย่อแล้วใต้โฟลเดอร์ root"""
+
+    def __init__(self, root: str, max_bytes: int = 10 * 1024 * 1024, fetch_timeout: float = 10.0,
+                 sizes: tuple = IMAGE_SIZES, quality: int = 80, allow_networks: tuple = ()):
+        self.root = root
+        self.originals_dir = os.path.join(root, 'originals')
+        self.cache_dir = os.path.join(root, 'cache')
+        self.max_bytes = max_bytes
+        self.fetch_timeout = fetch_timeout
+        self.sizes = tuple(sorted(sizes))
+        self.quality = quality
+        # เครือข่ายภายในที่ยอมให้ดึงรูปได้ (เช่น CDN ในวง LAN) ค่าเริ่มต้นคือไม่มี
+        self.allow_networks = tuple(ipaddress.ip_network(n, strict=False) for n in allow_networks)
+        os.makedirs(self.originals_dir, exist_ok=True)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @property
+    def can_resize(self) -> bool:
+        return PIL_AVAILABLE
+
+    # ---------- ingest ----------
+
+    def save(self, data: bytes) -> str:
+        """ตรวจว่าเป็นรูปจริงแล้วเก็บเป็นต้นฉบับ คืนชื่อไฟล์ <sha256>.<ext>"""
+        if not data:
+            raise ImageError('empty file')
+        if len(data) > self.max_bytes:
+            raise ImageError(f'image larger than {self.max_bytes} bytes')
+        ext = sniff_type(data)
+        if not ext:
+            raise ImageError('unsupported image type (use JPEG, PNG, GIF or WebP)')
+        if PIL_AVAILABLE:
+            try:
+                with Image.open(io.BytesIO(data)) as image:
+                    if image.width * image.height > MAX_PIXELS:
+                        raise ImageError('image dimensions too large')
+                    image.verify()
+            except ImageError:
+                raise
+            except Exception as e:
+                raise ImageError(f'corrupt image: {e}')
+
+        name = f'{hashlib.sha256(data).hexdigest()}.{ext}'
+        path = os.path.join(self.originals_dir, name)
+        if not os.path.exists(path):
+            _write_atomic(path, data)
+        return name
+
+    def check_url(self, url: str):
+        """raise ImageError ถ้า URL ไม่ใช่ http/https หรือ host resolve ไปยัง IP ที่ไม่ใช่สาธารณะ (ทุก IP ของ host)"""
+        parts = urlsplit(url)
+        if parts.scheme.lower() not in ('http', 'https') or not parts.hostname:
+            raise ImageError('only http(s) URLs can be fetched')
+        try:
+            port = parts.port or (443 if parts.scheme.lower() == 'https' else 80)
+        except ValueError:
+            raise ImageError('invalid port in URL')
+        self.checked_address(parts.hostname, port)
+
+    def checked_address(self, host: str, port: int) -> str:
+        """resolve host แล้วคืน IP ที่จะต่อ raise ImageError ถ้ามี IP ใดของ host ไม่ใช่สาธารณะ (และไม่อยู่ใน allow_networks)"""
+        addresses = resolve_host(host, port)
+        for address in addresses:
+            ip = ipaddress.ip_address(address)
+            if not is_public_address(ip) and not any(ip in network for network in self.allow_networks):
+                raise ImageError(f'refusing to fetch from non-public address {address}')
+        return addresses[0]
+
+    def fetch(self, url: str) -> str:
+        """ดาวน์โหลดรูปจาก URL (http/https) ครั้งเดียวแล้วเก็บเป็นต้นฉบับ คืนชื่อไฟล์
+
+        ไม่ให้ httpx ตาม redirect เอง: ตรวจ URL ปลายทางของทุก hop ด้วย check_url (สูงสุด MAX_REDIRECTS ครั้ง)
+        และตอนเปิด socket จะ resolve + ตรวจ IP อีกรอบแล้วต่อไปยัง IP ที่ตรวจแล้วนั้นตรง ๆ
+        (DNS rebinding: host ที่ตอบ IP สาธารณะตอนตรวจแล้วเปลี่ยนเป็น 127.0.0.1 ตอนต่อจะไม่หลุด)
+        Host header และ SNI ยังเป็นชื่อ host เดิมจาก URL
+        """
+        import httpx  # import เมื่อใช้ครั้งแรก (ไม่เพิ่มเวลา start ของ worker)
+
+        try:
+            # trust_env=False: ไม่ผ่าน proxy จาก env (proxy จะเป็นคน resolve host แทนเรา)
+            with httpx.Client(transport=_checked_transport(self), timeout=self.fetch_timeout,
+                              follow_redirects=False, trust_env=False) as client:
+                for _ in range(MAX_REDIRECTS + 1):
+                    self.check_url(url)
+                    with client.stream('GET', url) as response:
+                        if response.is_redirect:
+                            url = urljoin(url, response.headers['Location'])
+                            continue
+                        response.raise_for_status()
+                        chunks, size = [], 0
+                        for chunk in response.iter_bytes():
+                            size += len(chunk)
+                            if size > self.max_bytes:
+                                raise ImageError(f'image larger than {self.max_bytes} bytes')
+                            chunks.append(chunk)
+                        return self.save(b''.join(chunks))
+        except httpx.HTTPError as e:
+            raise ImageError(f'fetch failed: {e}')
+        raise ImageError('too many redirects')
+
+    # ---------- lookup ----------
+
+    def original_path(self, name: str) -> Optional[str]:
+        """path ของรูปต้นฉบับจากชื่อไฟล์ (None ถ้าชื่อไม่ถูกรูปแบบหรือไม่มีไฟล์)"""
+        if not _ORIGINAL_NAME.match(name):
+            return None
+        path = os.path.join(self.originals_dir, name)
+        return path if os.path.exists(path) else None
+
+    def _find_original(self, digest: str) -> Optional[str]:
+        for ext in ORIGINAL_TYPES:
+            path = os.path.join(self.originals_dir, f'{digest}.{ext}')
+            if os.path.exists(path):
+                return path
+        return None
+
+    def thumbnail_path(self, name: str) -> Optional[str]:
+        """path ของ thumbnail จากชื่อ <digest>-<width>w.<fmt> สร้างและเก็บ cache ถ้ายังไม่มี
+
+        คืน None ถ้าชื่อ/ขนาดไม่ถูกต้อง, ไม่มีรูปต้นฉบับ หรือไม่มี Pillow
+        """
+        match = _THUMBNAIL_NAME.match(name)
+        if not match or int(match.group(2)) not in self.sizes:
+            return None
+        path = os.path.join(self.cache_dir, name)
+        if os.path.exists(path):
+            return path
+        if not PIL_AVAILABLE:
+            return None
+        source = self._find_original(match.group(1))
+        if not source:
+            return None
+        _write_atomic(path, self._resize(source, int(match.group(2)), match.group(3)))
+        return path
+
+    def _resize(self, source: str, width: int, fmt: str) -> bytes:
+        pil_format = THUMBNAIL_FORMATS[fmt][0]
+        with Image.open(source) as image:
+            # JPEG: ให้ decoder ย่อระหว่าง decode (DCT scaling) เร็วกว่าการ decode เต็มขนาดมาก
+            image.draft('RGB', (width, width))
+            image = ImageOps.exif_transpose(image)
+            if image.width > width:
+                height = max(1, round(image.height * width / image.width))
+                image = image.resize((width, height), Image.LANCZOS)
+            if pil_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+                # JPEG ไม่มี alpha: วางบนพื้นขาว
+                background = Image.new('RGB', image.size, 'white')
+                rgba = image.convert('RGBA')
+                background.paste(rgba, mask=rgba.getchannel('A'))
+                image = background
+            elif pil_format == 'WEBP' and image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA')
+            out = io.BytesIO()
+            image.save(out, pil_format, quality=self.quality, optimize=pil_format == 'JPEG')
+            return out.getvalue()
+
+    # ---------- URLs สำหรับ template ----------
+
+    def digest_of(self, url) -> Optional[str]:
+        """digest ของรูปในเครื่องจาก URL /images/<digest>.<ext> (None สำหรับรูปภายนอก)"""
+        if not is_local(url):
+            return None
+        match = _ORIGINAL_NAME.match(url[len(URL_PREFIX):])
+        return match.group(1) if match else None
+
+    def src(self, url, width: int, fmt: str = 'jpg'):
+        """URL ของรูปขนาดกว้าง width (รูปภายนอก หรือไม่มี Pillow: คืน URL เดิม)"""
+        digest = self.digest_of(url)
+        if not digest or not self.can_resize:
+            return url
+        size = min((s for s in self.sizes if s >= width), default=self.sizes[-1])
+        return f'{URL_PREFIX}{digest}-{size}w.{fmt}'
+
+    def srcset(self, url, fmt: str = 'jpg') -> str:
+        """ค่า srcset ทุกขนาด เช่น "/images/..-160w.webp 160w, ..." (ว่างถ้าย่อรูปนี้ไม่ได้)"""
+        digest = self.digest_of(url)
+        if not digest or not self.can_resize:
+            return ''
+        return ', '.join(f'{URL_PREFIX}{digest}-{size}w.{fmt} {size}w' for size in self.sizes)
+
+
+def _checked_transport(store: ImageStore):
+    """httpx transport ที่ทุก connection ใหม่ต่อไปยัง IP จาก store.checked_address (resolve ครั้งเดียวตอนต่อ)"""
+    import httpcore
+    import httpx
+
+    class CheckedBackend(httpcore.SyncBackend):
+        def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+            address = store.checked_address(host, port)
+            return super().connect_tcp(address, port, timeout, local_address, socket_options)
+
+    transport = httpx.HTTPTransport(trust_env=False)
+    transport._pool = httpcore.ConnectionPool(ssl_context=httpx.create_ssl_context(trust_env=False),
+                                              network_backend=CheckedBackend())
+    return transport
+
+
+def _write_atomic(path: str, data: bytes):
+    """เขียนไฟล์ชั่วคราวแล้ว rename ผู้อ่านพร้อมกันจึงไม่เห็นไฟล์ที่เขียนไม่ครบ"""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
@@ -0,0 +1,239 @@
+"""วัดผลการทำงานของแอปและส่งออกเป็น Prometheus text format ที่ /metrics
+
+- http: histogram เวลาตอบแยกตาม route (rule เช่น /api/products/<int:product_id>), method และ status
+- db: จำนวน query และเวลาใน SQL ต่อ request (hook ของ SQLAlchemy engine) พร้อมตรวจ
+  * slow query: query เดียวนานเกิน slow_query_ms
+  * N+1: SQL เดียวกันถูกรันซ้ำตั้งแต่ n_plus_one_threshold ครั้งใน request เดียว
+- ai: เวลาและจำนวน token ของการเรียก OpenAI แต่ละครั้ง แยกตาม operation (ask, description, ...)
+- Server-Timing (optional): ใส่ app/db/ai ของ request นั้นใน header ให้ดูใน DevTools ได้ทันที
+
+สถานะต่อ request เก็บใน threading.local (ไม่ใช้ flask.g) เพื่อให้ hook ของ SQL ทำงานเร็วที่สุด
+query ที่รันนอก request (background job, order writer) นับในตัวเลขรวมแต่ไม่ผูกกับ route ใด
+"""
+import bisect
+import threading
+import time
+
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+AI_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _label_text(names: tuple, values: tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    """counter ที่มี label (ค่า label ส่งเป็น tuple ตามลำดับของ labels)"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_values: tuple = (), amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, label_values: tuple = ()) -> float:
+        with self._lock:
+            return self._values.get(label_values, 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            yield f'{self.name}{_label_text(self.labels, label_values)} {value}'
+
+
+class Histogram:
+    """histogram แบบ bucket คงที่ที่มี label (cumulative ตอน render ตามรูปแบบของ Prometheus)"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = HTTP_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._series = {}   # label values -> [counts ต่อ bucket (+Inf ท้ายสุด), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, label_values: tuple = ()):
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][idx] += 1
+            series[1] += value
+
+    def count(self, label_values: tuple = ()) -> int:
+        with self._lock:
+            series = self._series.get(label_values)
+            return sum(series[0]) if series else 0
+
+    def samples(self):
+        with self._lock:
+            items = sorted((labels, (list(s[0]), s[1])) for labels, s in self._series.items())
+        bounds = [str(b) for b in self.buckets] + ['+Inf']
+        for label_values, (counts, total) in items:
+            running = 0
+            for bound, n in zip(bounds, counts):
+                running += n
+                le = f'le="{bound}"'
+                yield f'{self.name}_bucket{_label_text(self.labels, label_values, le)} {running}'
+            yield f'{self.name}_sum{_label_text(self.labels, label_values)} {round(total, 6)}'
+            yield f'{self.name}_count{_label_text(self.labels, label_values)} {running}'
+
+
+class RequestStats:
+    """ตัวเลขของ request ที่กำลังทำงานอยู่ใน thread นี้"""
+
+    __slots__ = ('method', 'route', 'started', 'elapsed', 'queries', 'db_seconds', 'ai_seconds', 'statements')
+
+    def __init__(self, method: str, route: str):
+        self.method = method
+        self.route = route
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.ai_seconds = 0.0
+        self.statements = {}
+
+
+class Metrics:
+    """รวม metric ทั้งหมดของแอป: เรียก start_request/finish_request จาก hook ของ Flask
+    และ install_sql_hooks(engine) ครั้งเดียวตอนเริ่มแอป
+    """
+
+    def __init__(self, slow_query_ms: float = 100.0, n_plus_one_threshold: int = 10, server_timing: bool = False):
+        self.slow_query_seconds = slow_query_ms / 1000
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.server_timing = server_timing
+        self._local = threading.local()
+        self._flagged = set()   # (route, statement) ที่พิมพ์เตือน N+1 ไปแล้ว
+
+        self.http_duration = Histogram(
+            'http_request_duration_seconds', 'HTTP request latency by route', ('method', 'route', 'status'))
+        self.db_queries = Counter('db_queries_total', 'SQL statements executed', ('route',))
+        self.db_duration = Histogram(
+            'db_query_duration_seconds', 'SQL statement latency', buckets=QUERY_BUCKETS)
+        self.db_queries_per_request = Histogram(
+            'db_queries_per_request', 'SQL statements per HTTP request', ('route',), QUERY_COUNT_BUCKETS)
+        self.db_slow = Counter('db_slow_queries_total', 'SQL statements slower than the slow-query threshold',
+                               ('route',))
+        self.db_n_plus_one = Counter('db_n_plus_one_total',
+                                     'Requests that repeated one SQL statement past the N+1 threshold', ('route',))
+        self.ai_duration = Histogram(
+            'ai_call_duration_seconds', 'OpenAI call latency', ('operation', 'outcome'), AI_BUCKETS)
+        self.ai_tokens = Counter('ai_tokens_total', 'OpenAI tokens used', ('operation', 'kind'))
+        self.collectors = (self.http_duration, self.db_queries, self.db_duration, self.db_queries_per_request,
+                           self.db_slow, self.db_n_plus_one, self.ai_duration, self.ai_tokens)
+
+    # ---------- HTTP ----------
+
+    def start_request(self, method: str, route: str):
+        self._local.request = RequestStats(method, route)
+
+    def finish_request(self, status: int):
+        """บันทึก request ที่จบแล้ว คืน RequestStats (หรือ None ถ้าไม่ได้เรียก start_request)"""
+        stats = getattr(self._local, 'request', None)
+        if stats is None:
+            return None
+        self._local.request = None
+        stats.elapsed = time.perf_counter() - stats.started
+        method, route = stats.method, stats.route
+        self.observe_request(method, route, status, stats.elapsed)
+        self.db_queries_per_request.observe(stats.queries, (route,))
+        if stats.queries:
+            self.db_queries.inc((route,), stats.queries)
+            repeated = [(sql, n) for sql, n in stats.statements.items() if n >= self.n_plus_one_threshold]
+            if repeated:
+                self.db_n_plus_one.inc((route,))
+                for sql, n in repeated:
+                    if (route, sql) not in self._flagged:
+                        self._flagged.add((route, sql))
+                        print(f"Possible N+1 on {method} {route}: {n}x {sql[:200]}")
+        return stats
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float):
+        """บันทึกเวลาของ request หนึ่งครั้ง (ใช้ตรงๆ สำหรับ route ที่ไม่ได้ผ่าน hook ของ Flask เช่น ASGI)"""
+        self.http_duration.observe(seconds, (method, route, str(status)))
+
+    @staticmethod
+    def server_timing_header(stats: RequestStats) -> str:
+        """ค่า header Server-Timing ของ request (ต้องเรียกหลัง finish_request)"""
+        parts = [f'app;dur={stats.elapsed * 1000:.2f}',
+                 f'db;dur={stats.db_seconds * 1000:.2f};desc="{stats.queries} queries"']
+        if stats.ai_seconds:
+            parts.append(f'ai;dur={stats.ai_seconds * 1000:.2f}')
+        return ', '.join(parts)
+
+    # ---------- SQL ----------
+
+    def install_sql_hooks(self, engine):
+        from sqlalchemy import event
+
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_started'].pop()
+        self.db_duration.observe(elapsed)
+        stats = getattr(self._local, 'request', None)
+        if stats is None:
+            self.db_queries.inc(('',))
+        else:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+            stats.statements[statement] = stats.statements.get(statement, 0) + 1
+        if elapsed >= self.slow_query_seconds:
+            self.db_slow.inc(('' if stats is None else stats.route,))
+            print(f"Slow query ({elapsed * 1000:.0f} ms): {statement[:200]}")
+
+    # ---------- OpenAI ----------
+
+    def observe_ai(self, operation: str, seconds: float, usage=None, ok: bool = True):
+        """บันทึกการเรียก OpenAI หนึ่งครั้ง (usage คือ response.usage ถ้ามี)"""
+        self.ai_duration.observe(seconds, (operation, 'ok' if ok else 'error'))
+        stats = getattr(self._local, 'request', None)
+        if stats is not None:
+            stats.ai_seconds += seconds
+        if usage is not None:
+            self.ai_tokens.inc((operation, 'prompt'), getattr(usage, 'prompt_tokens', 0) or 0)
+            self.ai_tokens.inc((operation, 'completion'), getattr(usage, 'completion_tokens', 0) or 0)
+
+    # ---------- Export ----------
+
+    def render(self, gauges: dict = None) -> str:
+        """ข้อความ Prometheus text format (version 0.0.4)
+
+        gauges: {ชื่อ: (help, ค่า)} ของค่า ณ ขณะนั้นจากส่วนอื่นของแอป (เช่นสถานะ circuit breaker)
+        """
+        lines = []
+        for metric in self.collectors:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples())
+        for name, (help_text, value) in sorted((gauges or {}).items()):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} gauge')
+            lines.append(f'{name} {value}')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,110 @@
+"""คิวเขียนคำสั่งซื้อแบบ write-behind ที่รวมหลาย checkout เป็น transaction เดียว (group commit)
+
+request ของ checkout แต่ละตัวใส่คำสั่งซื้อลงคิวแล้วรอผล (Future) ส่วน writer thread ตัวเดียว
+ดึงทุกรายการที่รออยู่ (สูงสุด max_batch) แล้วเรียก `flush(batch)` ครั้งเดียว
+ช่วงที่มี checkout เข้ามาพร้อมกันจำนวนมาก จึงเหลือ commit (และ fsync) เพียงครั้งเดียวต่อชุด
+แทนที่จะแย่ง write lock ของฐานข้อมูลกันทีละ request
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class WriteBehindQueue:
+    """คิวเขียนแบบรวมชุด
+
+    flush(items) -> list   บันทึกทั้งชุดใน transaction เดียว คืนผลลัพธ์ตามลำดับเดียวกับ items
+                           ถ้า raise ต้อง rollback ทั้งชุดเอง แล้วคิวจะ flush ใหม่ทีละรายการ
+                           เฉพาะ Future ของรายการที่ยังล้มเหลวจึงได้ exception
+    max_batch              จำนวนรายการสูงสุดต่อ transaction
+    max_delay              เวลา (วินาที) ที่รอให้รายการอื่นมาร่วมชุด หลังจากได้รายการแรก
+    """
+
+    def __init__(self, flush, max_batch: int = 100, max_delay: float = 0.002):
+        self.flush = flush
+        self.max_batch = max(1, max_batch)
+        self.max_delay = max_delay
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+
+    def submit(self, item) -> Future:
+        """ใส่รายการลงคิว คืน Future ที่จะได้ผลของ flush สำหรับรายการนี้"""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                'batches': self.batches,
+                'items': self.items,
+                'avg_batch': round(self.items / self.batches, 2) if self.batches else 0,
+                'queued': self._queue.qsize(),
+            }
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='order-writer', daemon=True)
+                self._thread.start()
+
+    def _take_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            try:
+                # รายการที่เข้ามาระหว่าง flush รอบก่อนอยู่ในคิวแล้ว จึงไม่ต้องรอ
+                batch.append(self._queue.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            items = [item for item, _ in batch]
+            try:
+                results = self.flush(items)
+            except Exception as e:
+                print(f"Error writing batch of {len(items)}: {e}")
+                if len(batch) == 1:
+                    batch[0][1].set_exception(e)
+                    continue
+                # รายการเดียวที่ผิดไม่ควรทำให้ checkout อื่นในชุดล้มไปด้วย: เขียนใหม่ทีละรายการ
+                for item, future in batch:
+                    self._flush_one(item, future)
+                continue
+            self._count(len(items))
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def _flush_one(self, item, future):
+        try:
+            result = self.flush([item])[0]
+        except Exception as e:
+            print(f"Error writing item: {e}")
+            future.set_exception(e)
+            return
+        self._count(1)
+        future.set_result(result)
+
+    def _count(self, items: int):
+        with self._stats_lock:
+            self.batches += 1
+            self.items += items
@@ -0,0 +1,378 @@
+"""สินค้าที่คล้ายกัน ("คุณอาจชอบ") คำนวณด้วยเวกเตอร์ NumPy
+
+แต่ละสินค้าเป็นเวกเตอร์ความยาว dims + 3 ที่ normalize แล้ว (cosine similarity = dot product):
+- TF-IDF ของชื่อ (นับน้ำหนัก 2 เท่า) และคำอธิบาย ใช้ token เดียวกับการค้นหา (`search.segment`:
+  bigram ภาษาไทย + คำภาษาอังกฤษ) แบบ feature hashing: crc32 ของ token เลือกช่องและเครื่องหมาย +/-
+  จึงไม่ต้องเก็บ vocabulary และสินค้าใหม่ที่มีคำใหม่ไม่ทำให้จำนวนมิติเปลี่ยน
+- ราคา: log ของราคาเทียบกับ price_scale แปลงเป็นมุม 0-90° เก็บเป็น (cos, sin)
+  dot ของสองสินค้าเท่ากับ cos ของผลต่างมุม ราคาใกล้กันจึงคล้ายกัน (ไม่ใช่ "แพงทั้งคู่")
+- ความนิยม: 1 ช่องจากระดับ popularity (log2) สินค้ายอดนิยมด้วยกันได้คะแนนเพิ่มเล็กน้อย
+  ใช้ระดับแทนจำนวนจริง เวกเตอร์จึงเปลี่ยนเฉพาะเมื่อข้ามระดับ ไม่ใช่ทุกครั้งที่มีคนกดหัวใจ
+
+ตาราง top-k (`SimilarityTable`) สร้างครั้งแรกทีละ block (matmul + argpartition) หลังจากนั้น
+การเพิ่ม/แก้/ลบสินค้าหนึ่งชิ้นแก้เฉพาะส่วนที่เกี่ยวข้อง ไม่ build ใหม่ทั้งตาราง:
+- เพิ่ม: dot ของแถวใหม่กับทุกแถวครั้งเดียว ได้ top-k ของตัวเอง และแทรกตัวเองในแถวอื่นที่ชนะอันดับสุดท้าย
+- ลบ: คำนวณ top-k ใหม่เฉพาะแถวที่มีสินค้านั้นอยู่ในรายการ
+- แก้ไข: ลบแล้วเพิ่มกลับที่แถวเดิม
+จำนวนเอกสารต่อ token (IDF) ถูกปรับตอนเพิ่ม/ลบด้วย แต่เวกเตอร์ของสินค้าอื่นไม่ถูกคำนวณใหม่ (drift เล็กน้อย)
+เมื่อสินค้าที่เปลี่ยนเกิน rebuild_ratio ของแคตตาล็อก (เช่น import ครั้งใหญ่) จะ build ใหม่ทั้งหมด
+
+`SimilarityIndex.sync(version, loader)` เทียบสินค้ากับ fingerprint ที่เก็บไว้แล้วแก้เฉพาะชิ้นที่ต่าง
+เมื่อเวอร์ชันแคตตาล็อกเปลี่ยน จึงครอบคลุมทุกทางที่แก้สินค้า (API, admin, import, toggle favorite)
+และทุก worker process เหมือน catalog_cache
+"""
+import math
+import threading
+import time
+import zlib
+from collections import Counter
+
+from search import segment
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# ขนาดเมทริกซ์ similarity ชั่วคราวต่อ block ตอนคำนวณ top-k (16M float32 = 64 MB)
+BLOCK_ELEMENTS = 1 << 24
+
+
+def product_terms(name, description) -> Counter:
+    """จำนวนครั้งของแต่ละ token ในชื่อ (นับ 2 เท่า) และคำอธิบาย"""
+    name_tokens = segment(name).split()
+    return Counter(name_tokens + name_tokens + segment(description).split())
+
+
+# ระดับความนิยมสูงสุด (popularity ตั้งแต่ 2^POPULARITY_LEVELS - 1 นับเท่ากัน)
+POPULARITY_LEVELS = 10
+
+
+def popularity_level(popularity) -> int:
+    """ระดับความนิยม 0..POPULARITY_LEVELS: 0 = ไม่มีใครกดหัวใจ, 1 = 1 คน, 2 = 2-3 คน, 3 = 4-7 คน, ..."""
+    return min(POPULARITY_LEVELS, max(int(popularity or 0), 0).bit_length())
+
+
+def fingerprint(record) -> tuple:
+    """ค่าที่มีผลต่อเวกเตอร์ของสินค้า (เปลี่ยนเมื่อไรต้องคำนวณใหม่)"""
+    return (record.name, record.description, record.price, popularity_level(record.popularity))
+
+
+class SimilarityTable:
+    """เวกเตอร์ของสินค้าเรียงเป็นแถว พร้อมตาราง top-k ของแต่ละแถว
+
+    แถวของสินค้าที่ถูกลบถูกนำกลับมาใช้ใหม่ (free list) ความจุขยายทีละ 2 เท่า
+    top_rows[r] คือแถวที่คล้ายแถว r ที่สุด k แถวเรียงจากมากไปน้อย (-1 = ว่าง) และ top_sims คือคะแนน
+    """
+
+    def __init__(self, width: int, k: int, capacity: int = 16):
+        self.width = width
+        self.k = k
+        self.size = 0
+        self.free = []
+        self.vectors = np.zeros((capacity, width), np.float32)
+        self.active = np.zeros(capacity, bool)
+        self.top_rows = np.full((capacity, k), -1, np.int32)
+        self.top_sims = np.full((capacity, k), -np.inf, np.float32)
+        self.rows_recomputed = 0
+
+    def _grow(self):
+        capacity = max(16, 2 * len(self.active))
+
+        def grown(a, fill):
+            out = np.full((capacity,) + a.shape[1:], fill, a.dtype)
+            out[:len(a)] = a
+            return out
+
+        self.vectors = grown(self.vectors, 0)
+        self.active = grown(self.active, False)
+        self.top_rows = grown(self.top_rows, -1)
+        self.top_sims = grown(self.top_sims, -np.inf)
+
+    def build(self, vectors):
+        """ใส่เวกเตอร์ทั้งหมดแล้วคำนวณ top-k ของทุกแถว (ใช้ตอนสร้างครั้งแรก)"""
+        n = len(vectors)
+        self.vectors = np.zeros((max(16, n), self.width), np.float32)
+        self.vectors[:n] = vectors
+        self.active = np.zeros(len(self.vectors), bool)
+        self.active[:n] = True
+        self.top_rows = np.full((len(self.vectors), self.k), -1, np.int32)
+        self.top_sims = np.full((len(self.vectors), self.k), -np.inf, np.float32)
+        self.size, self.free = n, []
+        self._compute_top(np.arange(n))
+
+    def _compute_top(self, rows):
+        """คำนวณ top-k ของแถวที่ระบุจากทุกแถวที่ใช้งาน ทีละ block เพื่อจำกัดหน่วยความจำ"""
+        n = self.size
+        if not len(rows) or not n:
+            return
+        vectors = self.vectors[:n]
+        inactive = ~self.active[:n]
+        block = max(1, BLOCK_ELEMENTS // n)
+        for start in range(0, len(rows), block):
+            chunk = rows[start:start + block]
+            sims = self.vectors[chunk] @ vectors.T
+            sims[:, inactive] = -np.inf
+            sims[np.arange(len(chunk)), chunk] = -np.inf
+            self._store_top(chunk, sims)
+
+    def _store_top(self, chunk, sims):
+        k = self.k
+        if sims.shape[1] > k:
+            idx = np.argpartition(sims, -k, axis=1)[:, -k:]
+        else:
+            idx = np.broadcast_to(np.arange(sims.shape[1]), sims.shape)
+        top = np.take_along_axis(sims, idx, axis=1)
+        order = np.argsort(-top, axis=1, kind='stable')
+        idx = np.take_along_axis(idx, order, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        width = idx.shape[1]
+        self.top_rows[chunk] = -1
+        self.top_sims[chunk] = -np.inf
+        self.top_rows[chunk, :width] = np.where(np.isfinite(top), idx, -1)
+        self.top_sims[chunk, :width] = top
+
+    def add(self, vector) -> int:
+        """เพิ่มแถวใหม่ คืนเลขแถว"""
+        if self.free:
+            row = self.free.pop()
+        else:
+            if self.size == len(self.active):
+                self._grow()
+            row = self.size
+            self.size += 1
+        self._link(row, vector)
+        return row
+
+    def replace(self, row: int, vector):
+        """เปลี่ยนเวกเตอร์ของแถวเดิม (สินค้าถูกแก้ไข)"""
+        self._unlink(row)
+        self._link(row, vector)
+
+    def remove(self, row: int):
+        self._unlink(row)
+        self.vectors[row] = 0
+        self.free.append(row)
+
+    def _link(self, row, vector):
+        """ใส่เวกเตอร์ที่แถว row: คำนวณ top-k ของแถวนี้ และแทรกแถวนี้ในรายการของแถวอื่น"""
+        self.vectors[row] = vector
+        self.active[row] = True
+        n = self.size
+        sims = self.vectors[:n] @ self.vectors[row]
+        sims[~self.active[:n]] = -np.inf
+        sims[row] = -np.inf
+        self._store_top(np.array([row]), sims[None, :])
+
+        better = np.flatnonzero(sims > self.top_sims[:n, -1])
+        if len(better):
+            rows = np.concatenate([self.top_rows[better], np.full((len(better), 1), row, np.int32)], axis=1)
+            scores = np.concatenate([self.top_sims[better], sims[better, None]], axis=1)
+            order = np.argsort(-scores, axis=1, kind='stable')[:, :self.k]
+            self.top_rows[better] = np.take_along_axis(rows, order, axis=1)
+            self.top_sims[better] = np.take_along_axis(scores, order, axis=1)
+
+    def _unlink(self, row):
+        """เอาแถวออกจากการค้นหา แล้วคำนวณ top-k ใหม่เฉพาะแถวที่เคยอ้างถึงแถวนี้"""
+        self.active[row] = False
+        self.top_rows[row] = -1
+        self.top_sims[row] = -np.inf
+        n = self.size
+        affected = np.flatnonzero((self.top_rows[:n] == row).any(axis=1))
+        affected = affected[self.active[affected]]
+        self._compute_top(affected)
+        self.rows_recomputed += len(affected)
+
+    def neighbors(self, row: int, limit: int) -> list:
+        """[(แถว, คะแนน)] ที่คล้ายที่สุดไม่เกิน limit แถว"""
+        rows = self.top_rows[row, :limit]
+        sims = self.top_sims[row, :limit]
+        return [(int(r), float(s)) for r, s in zip(rows, sims) if r >= 0]
+
+
+class SimilarityIndex:
+    """สินค้าที่คล้ายกันของทั้งแคตตาล็อก ผูกกับเวอร์ชันแคตตาล็อก
+
+    dims: จำนวนช่องของ TF-IDF (feature hashing)
+    k: จำนวนสินค้าที่คล้ายที่สุดที่เก็บไว้ต่อสินค้า (limit ของ API ไม่เกินค่านี้)
+    price_weight, popularity_weight: น้ำหนักของราคาและความนิยมเทียบกับข้อความ (น้ำหนัก 1)
+    price_scale: ราคาที่ถือว่า "แพงสุด" ของสเกล log (ราคาสูงกว่านี้นับเท่ากัน)
+    rebuild_ratio: สัดส่วนสินค้าที่เปลี่ยนในครั้งเดียวที่คุ้มกว่าถ้า build ใหม่ทั้งหมด
+    background_threshold: แคตตาล็อกที่ใหญ่กว่านี้ build ใน background thread
+        ระหว่างนั้น `sync` คืน False และ API ตอบรายการว่าง (ไม่ให้ request แรกค้างหลายสิบวินาที)
+    """
+
+    def __init__(self, dims: int = 256, k: int = 10, price_weight: float = 0.5, popularity_weight: float = 0.2,
+                 price_scale: float = 5000.0, rebuild_ratio: float = 0.2, background_threshold: int = 20000):
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError('numpy is required for product recommendations (pip install numpy)')
+        self.dims = dims
+        self.k = k
+        self.price_weight = price_weight
+        self.popularity_weight = popularity_weight
+        self.price_scale = price_scale
+        self.rebuild_ratio = rebuild_ratio
+        self.background_threshold = background_threshold
+        self.version = None
+        self.building = False
+        self.stats = {'builds': 0, 'build_seconds': 0.0, 'added': 0, 'updated': 0, 'deleted': 0}
+        self._lock = threading.Lock()
+        self._hashes = {}
+        self._install(self._empty_state())
+
+    def _empty_state(self) -> dict:
+        return {
+            'table': SimilarityTable(self.dims + 3, self.k),
+            'rows': {},           # product id -> แถว
+            'row_ids': {},        # แถว -> product id
+            'fingerprints': {},   # product id -> fingerprint()
+            'terms': {},          # product id -> Counter ของ token (ใช้ลด df ตอนลบ/แก้)
+            'df': Counter(),      # token -> จำนวนสินค้าที่มี token นี้
+        }
+
+    def _install(self, state: dict):
+        self.table = state['table']
+        self.rows = state['rows']
+        self.row_ids = state['row_ids']
+        self.fingerprints = state['fingerprints']
+        self.terms = state['terms']
+        self.df = state['df']
+
+    # ---------- features ----------
+
+    def _hash(self, token: str):
+        cached = self._hashes.get(token)
+        if cached is None:
+            h = zlib.crc32(token.encode('utf-8'))
+            cached = self._hashes[token] = (h % self.dims, 1.0 if h & 0x80000000 else -1.0)
+        return cached
+
+    def vector(self, record, terms: Counter, df: Counter, n_docs: int):
+        """เวกเตอร์ที่ normalize แล้วของสินค้าหนึ่งชิ้น"""
+        vec = np.zeros(self.dims + 3, np.float32)
+        for token, count in terms.items():
+            bucket, sign = self._hash(token)
+            idf = math.log((1 + n_docs) / (1 + df[token])) + 1
+            vec[bucket] += sign * (1 + math.log(count)) * idf
+        norm = np.linalg.norm(vec[:self.dims])
+        if norm:
+            vec[:self.dims] /= norm
+        price = max(float(record.price or 0), 0.0)
+        angle = math.pi / 2 * min(1.0, math.log1p(price) / math.log1p(self.price_scale))
+        vec[self.dims] = self.price_weight * math.cos(angle)
+        vec[self.dims + 1] = self.price_weight * math.sin(angle)
+        vec[self.dims + 2] = self.popularity_weight * popularity_level(record.popularity) / POPULARITY_LEVELS
+        return vec / np.linalg.norm(vec)
+
+    # ---------- sync ----------
+
+    def sync(self, version: int, loader) -> bool:
+        """ทำให้ index ตรงกับแคตตาล็อกเวอร์ชัน version
+
+        loader() -> list[ProductRecord] ถูกเรียกเฉพาะเมื่อเวอร์ชันเปลี่ยน
+        คืน False ถ้า index ยังไม่พร้อม (กำลัง build ครั้งแรกใน background)
+        """
+        if self.version is not None and version <= self.version:
+            return True
+        with self._lock:
+            if self.building:
+                return False
+            if self.version is not None and version <= self.version:
+                return True
+            records = list(loader())
+            current = {r.id for r in records}
+            changed = [r for r in records if self.fingerprints.get(r.id) != fingerprint(r)]
+            removed = [pid for pid in self.rows if pid not in current]
+            if self.version is not None and len(changed) + len(removed) <= self.rebuild_ratio * max(len(records), 1):
+                for pid in removed:
+                    self._delete(pid)
+                for record in changed:
+                    self._upsert(record)
+                self.version = version
+                return True
+            if len(records) > self.background_threshold:
+                self.building = True
+                threading.Thread(target=self._build_in_background, args=(version, records),
+                                 name='similarity-build', daemon=True).start()
+                return False
+            self._install(self._build(records))
+            self.version = version
+            return True
+
+    def _build_in_background(self, version, records):
+        try:
+            state = self._build(records)
+            with self._lock:
+                self._install(state)
+                self.version = version
+        except Exception as e:
+            print(f"Error building similarity index: {str(e)}")
+        finally:
+            self.building = False
+
+    def _build(self, records) -> dict:
+        """สร้าง state ใหม่ทั้งหมดจาก records (ไม่แตะ state ปัจจุบัน จึงทำนอก lock ได้)"""
+        started = time.perf_counter()
+        state = self._empty_state()
+        terms, df = state['terms'], state['df']
+        for r in records:
+            terms[r.id] = product_terms(r.name, r.description)
+            df.update(terms[r.id].keys())
+        vectors = np.zeros((len(records), self.dims + 3), np.float32)
+        for row, r in enumerate(records):
+            vectors[row] = self.vector(r, terms[r.id], df, len(records))
+            state['rows'][r.id] = row
+            state['row_ids'][row] = r.id
+            state['fingerprints'][r.id] = fingerprint(r)
+        state['table'].build(vectors)
+        self.stats['builds'] += 1
+        self.stats['build_seconds'] = round(time.perf_counter() - started, 3)
+        return state
+
+    def _upsert(self, record):
+        old_terms = self.terms.get(record.id)
+        if old_terms is not None:
+            self.df.subtract(old_terms.keys())
+        terms = self.terms[record.id] = product_terms(record.name, record.description)
+        self.df.update(terms.keys())
+        vec = self.vector(record, terms, self.df, len(self.terms))
+        row = self.rows.get(record.id)
+        if row is None:
+            row = self.table.add(vec)
+            self.rows[record.id] = row
+            self.row_ids[row] = record.id
+            self.stats['added'] += 1
+        else:
+            self.table.replace(row, vec)
+            self.stats['updated'] += 1
+        self.fingerprints[record.id] = fingerprint(record)
+
+    def _delete(self, product_id):
+        row = self.rows.pop(product_id)
+        del self.row_ids[row]
+        self.table.remove(row)
+        self.df.subtract(self.terms.pop(product_id).keys())
+        self.fingerprints.pop(product_id, None)
+        self.stats['deleted'] += 1
+
+    # ---------- query ----------
+
+    def similar(self, product_id: int, limit: int = None):
+        """[(product id, คะแนน)] ที่คล้ายที่สุด หรือ None ถ้าไม่รู้จักสินค้านี้"""
+        with self._lock:
+            row = self.rows.get(product_id)
+            if row is None:
+                return None
+            return [(self.row_ids[r], score) for r, score in self.table.neighbors(row, limit or self.k)]
+
+    def snapshot(self) -> dict:
+        return {
+            'version': self.version,
+            'building': self.building,
+            'products': len(self.rows),
+            'dims': self.dims,
+            'k': self.k,
+            'rows_recomputed': self.table.rows_recomputed,
+            **self.stats,
+        }
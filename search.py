@@ -0,0 +1,122 @@
+"""ค้นหาสินค้าด้วย SQLite FTS5 ที่รองรับภาษาไทย
+
+ภาษาไทยไม่มีช่องว่างระหว่างคำ tokenizer ปกติของ FTS5 จึงตัดคำไม่ได้
+ข้อความถูกแปลงก่อนเก็บ (`segment`) ให้ช่วงตัวอักษรไทยกลายเป็น bigram ที่ซ้อนกัน
+เช่น "กาแฟ" -> "กา าแ แฟ" ส่วนภาษาอังกฤษ/ตัวเลขคงเดิม
+คำค้นถูกแปลงแบบเดียวกัน (`query_terms`): คำไทยกลายเป็น phrase ของ bigram (ต้องติดกันตามลำดับ)
+และคำภาษาอังกฤษใช้ prefix match เพื่อรองรับการค้นหาขณะพิมพ์ (type-ahead)
+
+การจัดอันดับใช้ bm25() ของ FTS5 ใน SQLite (`ORDER BY bm25(...)`) กับทุกแถวที่ตรงคำค้น
+ชื่อสินค้ามีน้ำหนักมากกว่ารายละเอียดตาม BM25_WEIGHTS
+
+ตาราง product_fts ถูกสร้างโดย migration 6 ใน storage.py และแอปเขียนข้อมูลลงตารางนี้เอง (`reindex`)
+ใน transaction เดียวกับการแก้ตาราง product (bump_catalog_version ใน app.py) ไม่ใช้ trigger
+เพราะ trigger ต้องเรียกฟังก์ชัน Python ซึ่ง connection อื่น (เช่น sqlite3 CLI) ไม่มี
+ถ้าแก้ตาราง product จากภายนอกให้สร้าง index ใหม่ด้วย `flask --app app rebuild-search`
+"""
+import re
+
+import sqlalchemy as sa
+
+FTS_TABLE = 'product_fts'
+BM25_WEIGHTS = (10.0, 1.0)  # name, description
+
+# สระ/วรรณยุกต์ไทย (Unicode Mn) ต้องนับเป็นส่วนของ token ไม่เช่นนั้น unicode61 จะตัดทิ้งเป็นตัวคั่น
+THAI_MARKS = ''.join(chr(c) for c in (0x0E31, *range(0x0E34, 0x0E3B), *range(0x0E47, 0x0E4F)))
+FTS_TOKENIZER = f"unicode61 remove_diacritics 2 tokenchars '{THAI_MARKS}'"
+
+_RUNS = re.compile(r'([ก-๎]+)|([^\W_ก-๎]+)')
+
+
+def _thai_bigrams(run: str) -> list:
+    if len(run) < 2:
+        return [run]
+    return [run[i:i + 2] for i in range(len(run) - 1)]
+
+
+def segment(text) -> str:
+    """แปลงข้อความเป็นรูปแบบที่เก็บใน FTS: ช่วงภาษาไทยเป็น bigram คั่นด้วยช่องว่าง"""
+    if not text:
+        return ''
+    tokens = []
+    for thai, other in _RUNS.findall(str(text).lower()):
+        if thai:
+            tokens.extend(_thai_bigrams(thai))
+        else:
+            tokens.append(other)
+    return ' '.join(tokens)
+
+
+def query_terms(q: str) -> list:
+    """แยกคำค้นเป็นรายการ (tokens, prefix)
+
+    คำภาษาอังกฤษ/ตัวเลขเป็น prefix ("esp" ตรงกับ espresso) เพื่อรองรับการค้นหาขณะพิมพ์
+    คำไทยเป็น phrase ของ bigram ที่ต้องติดกันตามลำดับ ไม่ต้องใช้ prefix เพราะ bigram ของคำที่พิมพ์ไม่ครบ
+    ก็อยู่ในคำเต็มอยู่แล้ว ตัวอักษรไทยตัวเดียวถูกข้าม (prefix ของตัวอักษรเดียวตรงกับแทบทุกสินค้า)
+    """
+    terms = []
+    for thai, other in _RUNS.findall((q or '').lower()):
+        if thai:
+            if len(thai) > 1:
+                terms.append((_thai_bigrams(thai), False))
+        else:
+            terms.append(([other], True))
+    return terms
+
+
+def term_expression(term) -> str:
+    tokens, prefix = term
+    # token ถูกสร้างจากตัวอักษร/ตัวเลขเท่านั้น จึงไม่มีเครื่องหมาย " ที่ต้อง escape
+    return '"' + ' '.join(tokens) + '"' + ('*' if prefix else '')
+
+
+def match_query(q: str):
+    """แปลงคำค้นของผู้ใช้เป็น FTS5 MATCH expression (ทุกคำต้องพบ) คืน None ถ้าไม่มีคำที่ค้นได้"""
+    return ' '.join(term_expression(term) for term in query_terms(q)) or None
+
+
+def ranked_query() -> str:
+    """SQL ที่คืน rowid ของสินค้าที่ตรงกับ :q เรียงตาม BM25 (คะแนนของ bm25() ยิ่งน้อยยิ่งเกี่ยวข้อง)"""
+    weights = ', '.join(str(w) for w in BM25_WEIGHTS)
+    return (f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :q '
+            f'ORDER BY bm25({FTS_TABLE}, {weights}), rowid LIMIT :limit')
+
+
+def fts5_available(conn) -> bool:
+    """SQLite ที่ใช้อยู่ compile มาพร้อม FTS5 หรือไม่ (conn เป็น SQLAlchemy connection)"""
+    options = {row[0] for row in conn.exec_driver_sql('PRAGMA compile_options')}
+    return 'ENABLE_FTS5' in options
+
+
+def create_fts_sql() -> str:
+    """DDL ของตาราง FTS (สำหรับ migration)"""
+    return f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(name, description, tokenize=\"{FTS_TOKENIZER}\")"
+
+
+def reindex(conn, rows, removed=()):
+    """เขียนสินค้าลง product_fts ใน transaction ของผู้เรียก
+
+    rows: (id, name, description) ของสินค้าที่เพิ่มหรือแก้ไข, removed: id ของสินค้าที่ถูกลบ
+    conn เป็น SQLAlchemy connection หรือ session
+    """
+    stale = [{'id': pid} for pid in removed] + [{'id': row[0]} for row in rows]
+    if stale:
+        conn.execute(sa.text(f'DELETE FROM {FTS_TABLE} WHERE rowid = :id'), stale)
+    if rows:
+        conn.execute(
+            sa.text(f'INSERT INTO {FTS_TABLE}(rowid, name, description) VALUES (:id, :name, :description)'),
+            [{'id': pid, 'name': segment(name), 'description': segment(description)} for pid, name, description in rows]
+        )
+
+
+def rebuild(conn, batch_size: int = 1000) -> int:
+    """สร้าง product_fts ใหม่ทั้งหมดจากตาราง product ทีละ batch_size แถว คืนจำนวนสินค้า"""
+    conn.execute(sa.text(f'DELETE FROM {FTS_TABLE}'))
+    page = sa.text('SELECT id, name, description FROM product WHERE id > :after ORDER BY id LIMIT :n')
+    after, count = 0, 0
+    while True:
+        rows = conn.execute(page, {'after': after, 'n': batch_size}).all()
+        if not rows:
+            return count
+        reindex(conn, rows)
+        after, count = rows[-1][0], count + len(rows)
@@ -0,0 +1,258 @@
+let deleteForm = null;
+// allow JS access to reviews passed from server
+
+
+// toast notification helper
+function showNotification(message, type='success', title=null) {
+    let container = document.getElementById('toast-container');
+    if (!container) {
+        container = document.createElement('div');
+        container.id = 'toast-container';
+        container.setAttribute('aria-live', 'polite');
+        container.setAttribute('aria-atomic', 'true');
+        document.body.appendChild(container);
+    }
+
+    const toast = document.createElement('div');
+    toast.className = 'site-toast ' + type;
+    const iconClass = type === 'error' ? 'fas fa-exclamation-circle' : 'fas fa-check';
+    const titleText = title || (type === 'error' ? 'ข้อผิดพลาด' : 'สำเร็จ');
+
+    toast.innerHTML = `
+            <div class="toast-left">
+                <div class="toast-icon"><i class="${iconClass}"></i></div>
+            </div>
+            <div class="toast-body">
+                <div class="toast-title">${titleText}</div>
+                <div class="toast-message">${String(message)}</div>
+            </div>
+            <button class="toast-close" aria-label="close">&times;</button>
+        `;
+
+    toast.querySelector('.toast-close').addEventListener('click', () => {
+        toast.classList.add('hide');
+        setTimeout(() => toast.remove(), 300);
+    });
+
+    container.appendChild(toast);
+    // trigger animation
+    setTimeout(() => toast.classList.add('show'), 10);
+    setTimeout(() => {
+        toast.classList.add('hide');
+        setTimeout(() => toast.remove(), 300);
+    }, 4000);
+}
+
+function showReview(id) {
+    const text = reviewsData[id] || '(ไม่มีรีวิว)';
+    document.getElementById('reviewText').textContent = text;
+    document.getElementById('reviewModal').classList.add('show');
+}
+function closeReviewModal() {
+    document.getElementById('reviewModal').classList.remove('show');
+}
+
+function confirmDelete(productName, form) {
+    deleteForm = form;
+    document.getElementById('productName').textContent = productName;
+    document.getElementById('deleteModal').classList.add('show');
+}
+
+function closeDeleteModal() {
+    document.getElementById('deleteModal').classList.remove('show');
+    deleteForm = null;
+}
+
+document.getElementById('confirmBtn').addEventListener('click', function() {
+    if (deleteForm) {
+        deleteForm.submit();
+    }
+});
+
+// Close modal when clicking outside
+document.getElementById('deleteModal').addEventListener('click', function(e) {
+    if (e.target === this) {
+        closeDeleteModal();
+    }
+});
+
+// Edit Product Functions
+function openEditModal(productId, name, price, imageUrl, description) {
+    document.getElementById('editProductId').value = productId;
+    document.getElementById('editName').value = name;
+    document.getElementById('editPrice').value = price;
+    document.getElementById('editImageUrl').value = imageUrl;
+    document.getElementById('editDescription').value = description;
+    updateImagePreview();
+    document.getElementById('editModal').classList.add('show');
+}
+
+function closeEditModal() {
+    document.getElementById('editModal').classList.remove('show');
+}
+
+function updateImagePreview() {
+    const imageUrl = document.getElementById('editImageUrl').value;
+    const previewDiv = document.getElementById('imagePreview');
+
+    if (imageUrl.trim()) {
+        previewDiv.innerHTML = '<img src="' + imageUrl + '" alt="Preview" onerror="this.parentElement.innerHTML=\'<i class=\"fas fa-exclamation-circle\" style=\"color: #999; font-size: 2rem;\"></i>\';">';
+    } else {
+        previewDiv.innerHTML = '<i class="fas fa-image" style="color: #999; font-size: 2rem;"></i>';
+    }
+}
+
+function saveEditProduct() {
+    const productId = document.getElementById('editProductId').value;
+    const name = document.getElementById('editName').value;
+    const price = document.getElementById('editPrice').value;
+    const imageUrl = document.getElementById('editImageUrl').value;
+    const description = document.getElementById('editDescription').value;
+
+    if (!name || !price) {
+        showNotification('กรุณากรอกชื่อสินค้าและราคา', 'error');
+        return;
+    }
+
+    // Send data to server
+    fetch('/api/products/' + productId, {
+        method: 'PUT',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+            name: name,
+            price: parseFloat(price),
+            image_url: imageUrl,
+            description: description
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success || data.message) {
+            showNotification('บันทึกการแก้ไขสำเร็จ', 'success');
+            closeEditModal();
+            location.reload(); // Reload page to show updated data
+        } else {
+            showNotification('เกิดข้อผิดพลาด: ' + (data.error || 'Unknown error'), 'error');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        showNotification('เกิดข้อผิดพลาดในการบันทึก', 'error');
+    });
+}
+
+// Close edit modal when clicking outside
+document.getElementById('editModal').addEventListener('click', function(e) {
+    if (e.target === this) {
+        closeEditModal();
+    }
+});
+
+// ==================== AI Description Generator ====================
+document.getElementById('ai-generate-btn').addEventListener('click', async function(e) {
+    e.preventDefault();
+
+    const nameInput = document.getElementById('name');
+    const priceInput = document.getElementById('price');
+    const descriptionInput = document.getElementById('description');
+    const button = this;
+
+    if (!nameInput.value.trim()) {
+        showNotification('กรุณากรอกชื่อสินค้าก่อน', 'error');
+        nameInput.focus();
+        return;
+    }
+
+    // Show loading state
+    button.disabled = true;
+    button.classList.add('loading');
+    const originalText = button.innerHTML;
+    button.innerHTML = '<i class="fas fa-spinner fa-spin"></i> กำลังสร้าง...';
+
+    try {
+        const response = await fetch('/api/generate-description', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                name: nameInput.value.trim(),
+                price: priceInput.value ? parseFloat(priceInput.value) : null
+            })
+        });
+
+        const data = await response.json();
+
+        if (data.success && data.description) {
+            // Insert or replace the description
+            descriptionInput.value = data.description;
+            descriptionInput.style.borderColor = '#28A745';
+            setTimeout(() => {
+                descriptionInput.style.borderColor = '';
+            }, 2000);
+        } else {
+            showNotification(data.error ? data.error : 'ไม่สามารถสร้างรายละเอียด', 'error');
+        }
+    } catch (error) {
+        console.error('Error:', error);
+        showNotification('เกิดข้อผิดพลาด: ' + error.message, 'error');
+    } finally {
+        // Restore button state
+        button.disabled = false;
+        button.classList.remove('loading');
+        button.innerHTML = originalText;
+    }
+});
+
+// ==================== AI Batch Description Job ====================
+const batchBtn = document.getElementById('ai-batch-btn');
+if (batchBtn) {
+    batchBtn.addEventListener('click', async function() {
+        const button = this;
+        const productIds = JSON.parse(button.dataset.productIds || '[]');
+        if (!productIds.length) return;
+
+        button.disabled = true;
+        button.classList.add('loading');
+        const originalText = button.innerHTML;
+        button.innerHTML = '<i class="fas fa-spinner fa-spin"></i> กำลังส่งงาน...';
+
+        try {
+            const response = await fetch('/api/generate-description/batch', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({ product_ids: productIds })
+            });
+            const data = await response.json();
+            if (!data.success) {
+                throw new Error(data.error || 'ไม่สามารถสร้างงานได้');
+            }
+
+            // poll สถานะ job จนกว่าจะเสร็จ
+            let job = null;
+            do {
+                await new Promise(resolve => setTimeout(resolve, 1500));
+                job = await (await fetch(data.status_url)).json();
+                button.innerHTML = `<i class="fas fa-spinner fa-spin"></i> ${job.completed + job.failed}/${job.total}`;
+            } while (job.status === 'queued' || job.status === 'running');
+
+            if (job.failed) {
+                showNotification(`สร้างสำเร็จ ${job.completed} ชิ้น ไม่สำเร็จ ${job.failed} ชิ้น`, 'error');
+            } else {
+                showNotification(`สร้างคำอธิบายสำเร็จ ${job.completed} ชิ้น`, 'success');
+            }
+            setTimeout(() => location.reload(), 1500);
+        } catch (error) {
+            console.error('Error:', error);
+            showNotification('เกิดข้อผิดพลาด: ' + error.message, 'error');
+        } finally {
+            button.disabled = false;
+            button.classList.remove('loading');
+            button.innerHTML = originalText;
+        }
+    });
+}
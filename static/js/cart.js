@@ -0,0 +1,373 @@
+// Cart Management System
+const CartManager = {
+    STORAGE_KEY: 'coffeeShopCart',
+
+    getCart() {
+        const cart = localStorage.getItem(this.STORAGE_KEY);
+        return cart ? JSON.parse(cart) : [];
+    },
+
+    saveCart(cart) {
+        localStorage.setItem(this.STORAGE_KEY, JSON.stringify(cart));
+        updateCartBadge();
+    },
+
+    removeFromCart(productId) {
+        // ignore invalid id
+        if (isNaN(productId)) {
+            // purge any entries with bad ids as well
+            const cart = this.getCart().filter(item => !isNaN(Number(item.id)));
+            this.saveCart(cart);
+            this.renderCart();
+            updateCartSummary();
+            showNotification('ลบสินค้าที่ไม่ระบุรหัสแล้ว', 'success');
+            return;
+        }
+
+        const cart = this.getCart();
+        const updatedCart = cart.filter(item => Number(item.id) !== productId);
+        this.saveCart(updatedCart);
+        this.renderCart();
+        updateCartSummary();
+        showNotification('ลบสินค้าออกจากรถเข็นแล้ว', 'success');
+    },
+
+    updateQuantity(productId, quantity) {
+        const cart = this.getCart();
+        const item = cart.find(item => item.id === productId);
+        if (item) {
+            if (quantity <= 0) {
+                this.removeFromCart(productId);
+            } else {
+                item.quantity = quantity;
+                this.saveCart(cart);
+                this.renderCart();
+                updateCartSummary();
+            }
+        }
+    },
+
+    renderCart() {
+        const cart = this.getCart();
+        const container = document.getElementById('cartItemsContainer');
+        const emptyMessage = document.getElementById('emptyCartMessage');
+
+        if (cart.length === 0) {
+            emptyMessage.style.display = 'block';
+            container.innerHTML = '<h2 class="cart-title"><i class="fas fa-coffee"></i>Cart Items</h2>' + emptyMessage.outerHTML;
+            document.querySelector('.checkout-btn').disabled = true;
+            return;
+        }
+
+        emptyMessage.style.display = 'none';
+        document.querySelector('.checkout-btn').disabled = false;
+
+        let html = '<h2 class="cart-title"><i class="fas fa-coffee"></i>Cart Items</h2>';
+
+        cart.forEach((item, index) => {
+            // coerce id to valid number; handle legacy NaN/null
+            let itemId = Number(item.id);
+            if (isNaN(itemId)) {
+                // if id is invalid, generate a unique fallback so we can still remove it
+                itemId = Date.now() + index;
+            }
+
+            // determine image HTML
+            let imgHtml = '';
+            if (item.image && (item.image.startsWith('http') || item.image.startsWith('data:'))) {
+                imgHtml = `<img src="${item.image}" alt="${item.name}" onerror="this.style.display='none'; this.parentElement.innerHTML='<i class=\"fas fa-mug-hot\"></i>';">`;
+            } else {
+                imgHtml = `<i class="${item.image || 'fas fa-mug-hot'}"></i>`;
+            }
+            html += `
+            <div class="cart-item" data-product-id="${itemId}">
+                <div class="item-image">
+                    ${imgHtml}
+                </div>
+                <div class="item-details">
+                    <div class="item-name">${item.name}</div>
+                    <div class="item-price">฿${item.price.toLocaleString('th-TH')}</div>
+                    <div class="item-controls">
+                        <div class="quantity-control">
+                            <button onclick="CartManager.updateQuantity(${itemId}, ${item.quantity - 1})">−</button>
+                            <input type="number" value="${item.quantity}" readonly>
+                            <button onclick="CartManager.updateQuantity(${itemId}, ${item.quantity + 1})">+</button>
+                        </div>
+                        <button class="customize-btn" onclick="toggleCustomize(this)">
+                            <i class="fas fa-edit"></i> Customize
+                        </button>
+                        <button class="remove-btn" onclick="CartManager.removeFromCart(${itemId})" data-product-id="${itemId}">
+                            <i class="fas fa-trash"></i> Remove
+                        </button>
+                    </div>
+
+                    <div class="customize-section">
+                        <h5><i class="fas fa-cog"></i> Customize Your Order</h5>
+
+                        <div class="customize-group">
+                            <label>Choose Size:</label>
+                            <div class="customize-options">
+                                <input type="radio" name="size_${index}" id="size_small_${index}" value="small">
+                                <label for="size_small_${index}" class="customize-option-label">Small (250ml)</label>
+
+                                <input type="radio" name="size_${index}" id="size_medium_${index}" value="medium" checked>
+                                <label for="size_medium_${index}" class="customize-option-label">Medium (350ml)</label>
+
+                                <input type="radio" name="size_${index}" id="size_large_${index}" value="large">
+                                <label for="size_large_${index}" class="customize-option-label">Large (450ml)</label>
+                            </div>
+                        </div>
+
+                        <div class="customize-group">
+                            <label>Roast Level:</label>
+                            <div class="customize-options">
+                                <input type="radio" name="roast_${index}" id="roast_light_${index}" value="light">
+                                <label for="roast_light_${index}" class="customize-option-label">Light</label>
+
+                                <input type="radio" name="roast_${index}" id="roast_medium_${index}" value="medium" checked>
+                                <label for="roast_medium_${index}" class="customize-option-label">Medium</label>
+
+                                <input type="radio" name="roast_${index}" id="roast_dark_${index}" value="dark">
+                                <label for="roast_dark_${index}" class="customize-option-label">Dark</label>
+                            </div>
+                        </div>
+
+                        <div class="customize-group">
+                            <label>Add-ons:</label>
+                            <div class="customize-options">
+                                <input type="checkbox" id="addon_shot_${index}" value="extra_shot">
+                                <label for="addon_shot_${index}" class="customize-option-label">Extra Shot (+฿20)</label>
+
+                                <input type="checkbox" id="addon_vanilla_${index}" value="vanilla">
+                                <label for="addon_vanilla_${index}" class="customize-option-label">Vanilla (+฿15)</label>
+
+                                <input type="checkbox" id="addon_chocolate_${index}" value="chocolate">
+                                <label for="addon_chocolate_${index}" class="customize-option-label">Chocolate (+฿15)</label>
+
+                                <input type="checkbox" id="addon_caramel_${index}" value="caramel">
+                                <label for="addon_caramel_${index}" class="customize-option-label">Caramel (+฿15)</label>
+                            </div>
+                        </div>
+
+                        <div class="customize-group">
+                            <label for="notes_${index}">Special Notes:</label>
+                            <textarea id="notes_${index}" placeholder="e.g., Extra hot, less sugar..." class="customize-textarea" rows="2"></textarea>
+                        </div>
+
+                        <button class="customize-done-btn" onclick="toggleCustomize(this)">
+                            <i class="fas fa-check"></i> Done
+                        </button>
+                    </div>
+                </div>
+            </div>
+            `;
+        });
+
+        container.innerHTML = html;
+    }
+};
+
+// toast helper (same style as index/admin pages)
+function showNotification(message, type='success', title=null) {
+    let container = document.getElementById('toast-container');
+    if (!container) {
+        container = document.createElement('div');
+        container.id = 'toast-container';
+        container.setAttribute('aria-live', 'polite');
+        container.setAttribute('aria-atomic', 'true');
+        document.body.appendChild(container);
+    }
+    const toast = document.createElement('div');
+    toast.className = 'site-toast ' + type;
+    const iconClass = type === 'error' ? 'fas fa-exclamation-circle' : 'fas fa-check';
+    const titleText = title || (type === 'error' ? 'ข้อผิดพลาด' : 'สำเร็จ');
+    toast.innerHTML = `
+            <div class="toast-left">
+                <div class="toast-icon"><i class="${iconClass}"></i></div>
+            </div>
+            <div class="toast-body">
+                <div class="toast-title">${titleText}</div>
+                <div class="toast-message">${String(message)}</div>
+            </div>
+            <button class="toast-close" aria-label="close">&times;</button>
+        `;
+    toast.querySelector('.toast-close').addEventListener('click', () => {
+        toast.classList.add('hide');
+        setTimeout(() => toast.remove(), 300);
+    });
+    container.appendChild(toast);
+    setTimeout(() => toast.classList.add('show'), 10);
+    setTimeout(() => {
+        toast.classList.add('hide');
+        setTimeout(() => toast.remove(), 300);
+    }, 4000);
+}
+
+// Toggle customize section
+function toggleCustomize(btn) {
+    const cartItem = btn.closest('.cart-item');
+    const customizeSection = cartItem.querySelector('.customize-section');
+    customizeSection.classList.toggle('active');
+}
+
+// Update cart badge (used across header)
+function updateCartBadge() {
+    const cart = CartManager.getCart();
+    const totalItems = cart.reduce((sum, item) => sum + item.quantity, 0);
+    const badge = document.querySelector('.cart-badge');
+    if (badge) {
+        badge.textContent = totalItems || '0';
+        badge.style.display = totalItems > 0 ? 'flex' : 'none';
+    }
+}
+
+// Update cart summary
+function updateCartSummary() {
+    const cart = CartManager.getCart();
+    let subtotal = 0;
+
+    cart.forEach(item => {
+        subtotal += item.price * item.quantity;
+    });
+
+    const shipping = 50;
+    const tax = Math.round(subtotal * 0.07);
+    const total = subtotal + shipping + tax;
+
+    document.querySelector('.summary-row .value') ? 
+        document.querySelectorAll('.summary-row .value')[0].textContent = '฿' + subtotal.toLocaleString('th-TH') : null;
+
+    if (document.querySelectorAll('.summary-row .value')[1]) {
+        document.querySelectorAll('.summary-row .value')[1].textContent = '฿' + shipping;
+    }
+    if (document.querySelectorAll('.summary-row .value')[2]) {
+        document.querySelectorAll('.summary-row .value')[2].textContent = '฿' + tax;
+    }
+    if (document.querySelector('.summary-row.total .value')) {
+        document.querySelector('.summary-row.total .value').textContent = '฿' + total.toLocaleString('th-TH');
+    }
+}
+
+// Reprice the whole cart on the server in one request (/api/cart/price)
+// and sync changed prices / removed products back into localStorage.
+// Returns the server pricing, or null if the server could not be reached.
+async function repriceCart() {
+    const cart = CartManager.getCart();
+    const lines = cart.filter(item => !isNaN(Number(item.id)));
+    if (lines.length === 0) return null;
+    let priced;
+    try {
+        const res = await fetch('/api/cart/price', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ items: lines.map(item => ({ id: Number(item.id), qty: Number(item.quantity), price: Number(item.price) })) })
+        });
+        if (!res.ok) return null;
+        priced = await res.json();
+    } catch (e) {
+        return null;
+    }
+
+    const byId = {};
+    priced.items.forEach(line => { byId[line.id] = line; });
+    const removed = new Set(priced.removed);
+    priced.changed = priced.removed.length > 0 || priced.items.some(line => line.stale);
+    if (priced.changed) {
+        const updated = cart
+            .filter(item => !removed.has(Number(item.id)))
+            .map(item => byId[Number(item.id)] ? { ...item, name: byId[Number(item.id)].name, price: byId[Number(item.id)].unit_price } : item);
+        CartManager.saveCart(updated);
+        CartManager.renderCart();
+        updateCartSummary();
+        if (removed.size) showNotification('สินค้าบางรายการไม่มีจำหน่ายแล้ว และถูกนำออกจากรถเข็น', 'error');
+        if (priced.items.some(line => line.stale)) showNotification('ราคาสินค้าบางรายการมีการเปลี่ยนแปลง กรุณาตรวจสอบอีกครั้ง', 'error');
+    }
+    return priced;
+}
+
+// Process checkout and go to receipt
+async function processCheckout() {
+    const cart = CartManager.getCart();
+    if (cart.length === 0) {
+        showNotification('กรุณาเพิ่มสินค้าในรถเข็นก่อน', 'error');
+        return;
+    }
+
+    // confirm prices with the server first; if anything changed let the customer review the cart
+    const priced = await repriceCart();
+    if (priced && priced.changed) return;
+
+    // Collect cart items data
+    const cartItems = [];
+    let subtotal = 0;
+
+    document.querySelectorAll('.cart-item').forEach((item, index) => {
+        const productId = parseInt(item.getAttribute('data-product-id'));
+        const name = item.querySelector('.item-name').textContent;
+        const price = parseFloat(item.querySelector('.item-price').textContent.replace('฿', '').replace(',', ''));
+        const qty = item.querySelector('.quantity-control input').value;
+
+        const size = item.querySelector('input[name="size_' + index + '"]:checked')?.value || 'medium';
+        const roast = item.querySelector('input[name="roast_' + index + '"]:checked')?.value || 'medium';
+        const addons = [];
+        item.querySelectorAll('input[type="checkbox"]:checked').forEach(addon => {
+            addons.push(addon.value);
+        });
+        const notes = item.querySelector('textarea')?.value || '';
+
+        subtotal += price * qty;
+
+        cartItems.push({
+            id: productId,
+            name: name,
+            price: price,
+            quantity: qty,
+            size: size,
+            roast: roast,
+            addons: addons,
+            notes: notes
+        });
+    });
+
+    const shipping = priced ? priced.shipping : 50;
+    const tax = priced ? priced.tax : Math.round(subtotal * 0.07);
+    const total = priced ? priced.total : subtotal + shipping + tax;
+
+    // Store order data in sessionStorage (used later by receipt page)
+    const orderData = {
+        items: cartItems,
+        subtotal: subtotal,
+        shipping: shipping,
+        tax: tax,
+        total: total,
+        orderDate: new Date().toLocaleString('th-TH'),
+        orderNumber: 'ORD-' + Date.now()
+    };
+    sessionStorage.setItem('orderData', JSON.stringify(orderData));
+
+    // Clear cart (we're moving to checkout) and redirect with total query param
+    CartManager.saveCart([]);
+    // pass the computed total so checkout page can display the amount
+    window.location.href = '/checkout?total=' + encodeURIComponent(total);
+}
+
+// Initialize on page load
+// global click handler for remove buttons (delegation)
+document.addEventListener('click', function(e) {
+    const btn = e.target.closest('.remove-btn');
+    if (!btn) return;
+    const itemDiv = btn.closest('.cart-item');
+    if (itemDiv && itemDiv.dataset.productId) {
+        CartManager.removeFromCart(parseInt(itemDiv.dataset.productId));
+    } else if (itemDiv) {
+        // fallback for static/example items
+        itemDiv.remove();
+    }
+});
+
+document.addEventListener('DOMContentLoaded', function() {
+    CartManager.renderCart();
+    updateCartSummary();
+    updateCartBadge();
+    repriceCart();
+});
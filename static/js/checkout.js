@@ -0,0 +1,129 @@
+// JavaScript: Toast helper (shared style with other pages)
+function showNotification(message, type='success', title=null) {
+    let container = document.getElementById('toast-container');
+    if (!container) {
+        container = document.createElement('div');
+        container.id = 'toast-container';
+        container.setAttribute('aria-live', 'polite');
+        container.setAttribute('aria-atomic', 'true');
+        document.body.appendChild(container);
+    }
+    const toast = document.createElement('div');
+    toast.className = 'site-toast ' + type;
+    const iconClass = type === 'error' ? 'fas fa-exclamation-circle' : 'fas fa-check';
+    const titleText = title || (type === 'error' ? 'ข้อผิดพลาด' : 'สำเร็จ');
+    toast.innerHTML = `
+            <div class="toast-left">
+                <div class="toast-icon"><i class="${iconClass}"></i></div>
+            </div>
+            <div class="toast-body">
+                <div class="toast-title">${titleText}</div>
+                <div class="toast-message">${String(message)}</div>
+            </div>
+            <button class="toast-close" aria-label="close">&times;</button>
+        `;
+    toast.querySelector('.toast-close').addEventListener('click', () => {
+        toast.classList.add('hide');
+        setTimeout(() => toast.remove(), 300);
+    });
+    container.appendChild(toast);
+    setTimeout(() => toast.classList.add('show'), 10);
+    setTimeout(() => {
+        toast.classList.add('hide');
+        setTimeout(() => toast.remove(), 300);
+    }, 4000);
+}
+
+// JavaScript: Toggle payment panels, simple validation, card input formatting
+(function(){
+    const options = document.querySelectorAll('.payment-option');
+    const panels = {
+        bank: document.getElementById('panel-bank'),
+        card: document.getElementById('panel-card'),
+        promptpay: document.getElementById('panel-promptpay'),
+        cod: document.getElementById('panel-cod')
+    };
+    let selected = null;
+
+    function clearActive(){ options.forEach(o=>o.classList.remove('active')); Object.values(panels).forEach(p=>p.classList.remove('active')) }
+
+    options.forEach(opt=>{
+        opt.addEventListener('click', ()=>{
+            clearActive();
+            opt.classList.add('active');
+            const method = opt.dataset.method;
+            selected = method;
+            // check the radio input inside and set checked
+            opt.querySelector('input[type=radio]').checked = true;
+            if(panels[method]) panels[method].classList.add('active');
+        });
+    });
+
+    // copy promptpay reference
+    document.getElementById('copy-promptpay').addEventListener('click', function(){
+        const text = '080XXX1234';
+        navigator.clipboard?.writeText(text).then(()=>{
+            showNotification('คัดลอกเรียบร้อย: '+text);
+        }).catch(()=>{ showNotification('ไม่สามารถคัดลอกได้', 'error'); });
+    });
+
+    // allow editing of the QR data and regenerate image
+    const updateBtn = document.getElementById('update-qr');
+    const dataInput = document.getElementById('promptpay-data');
+    const qrImg = document.getElementById('promptpay-qr-img');
+    if(updateBtn && dataInput && qrImg) {
+        updateBtn.addEventListener('click', function(){
+            const txt = dataInput.value.trim();
+            if(txt) {
+                qrImg.src = 'https://api.qrserver.com/v1/create-qr-code/?size=200x200&data=' + encodeURIComponent(txt);
+            }
+        });
+    }
+
+    // format card number (xxxx xxxx xxxx xxxx)
+    const cardNumberInput = document.getElementById('card-number');
+    if(cardNumberInput){
+        cardNumberInput.addEventListener('input', (e)=>{
+            let v = e.target.value.replace(/\D/g,'').slice(0,19);
+            v = v.match(/.{1,4}/g)?.join(' ') || v;
+            e.target.value = v;
+        });
+    }
+
+    // Form submit: client-side validation for required fields per method
+    document.getElementById('checkout-form').addEventListener('submit', function(e){
+        const form = e.target;
+        const method = form.payment_method.value;
+        const errors = [];
+        if(!method) errors.push('กรุณาเลือกช่องทางการชำระเงิน');
+        if(method === 'card'){
+            const num = form.card_number?.value?.replace(/\s/g,'') || '';
+            const name = (form.card_name?.value||'').trim();
+            const exp = (form.card_expiry?.value||'').trim();
+            const cvv = (form.card_cvv?.value||'').trim();
+            if(!name) errors.push('กรุณากรอกชื่อบนบัตร');
+            if(num.length < 13 || !/^[0-9]+$/.test(num)) errors.push('หมายเลขบัตรไม่ถูกต้อง');
+            if(!/^(0[1-9]|1[0-2])\/\d{2}$/.test(exp)) errors.push('วันหมดอายุไม่ถูกต้อง (MM/YY)');
+            if(!/^[0-9]{3,4}$/.test(cvv)) errors.push('รหัส CVV ไม่ถูกต้อง');
+        }
+        if(method === 'cod'){
+            if(!form.cod_confirm?.checked) errors.push('กรุณายืนยันการยอมรับเงื่อนไข COD');
+        }
+
+        if(errors.length){
+            e.preventDefault();
+            showNotification(errors.join('\n'), 'error');
+            return false;
+        }
+
+        // attach cart items (saved by cart.html) so the server can store the order
+        try {
+            const orderData = JSON.parse(sessionStorage.getItem('orderData') || 'null');
+            if (orderData && Array.isArray(orderData.items)) {
+                form.order_items.value = JSON.stringify(orderData.items);
+            }
+        } catch (err) { /* ignore malformed sessionStorage */ }
+
+        // Let form submit to server for further processing
+    });
+})();
@@ -0,0 +1,444 @@
+// Cart Management System
+const CartManager = {
+    STORAGE_KEY: 'coffeeShopCart',
+
+    // Get cart items from localStorage
+    getCart() {
+        const cart = localStorage.getItem(this.STORAGE_KEY);
+        return cart ? JSON.parse(cart) : [];
+    },
+
+    // Save cart to localStorage
+    saveCart(cart) {
+        localStorage.setItem(this.STORAGE_KEY, JSON.stringify(cart));
+        this.updateCartBadge();
+    },
+
+    // Add item to cart
+    addToCart(product) {
+        const cart = this.getCart();
+        const existingItem = cart.find(item => item.id === product.id);
+
+        if (existingItem) {
+            existingItem.quantity += 1;
+        } else {
+            product.quantity = 1;
+            cart.push(product);
+        }
+
+        this.saveCart(cart);
+        this.showNotification(product.name + ' ถูกเพิ่มในรถเข็น! ☕');
+    },
+
+    // Remove item from cart
+    removeFromCart(productId) {
+        const cart = this.getCart();
+        const updatedCart = cart.filter(item => item.id !== productId);
+        this.saveCart(updatedCart);
+    },
+
+    // Update quantity
+    updateQuantity(productId, quantity) {
+        const cart = this.getCart();
+        const item = cart.find(item => item.id === productId);
+        if (item) {
+            if (quantity <= 0) {
+                this.removeFromCart(productId);
+            } else {
+                item.quantity = quantity;
+                this.saveCart(cart);
+            }
+        }
+    },
+
+    // Update cart badge
+    updateCartBadge() {
+        const cart = this.getCart();
+        const totalItems = cart.reduce((sum, item) => sum + item.quantity, 0);
+        const badge = document.querySelector('.cart-badge');
+        if (badge) {
+            badge.textContent = totalItems || '0';
+            badge.style.display = totalItems > 0 ? 'flex' : 'none';
+        }
+    },
+
+    // Show notification (replaces alert with styled toast)
+    showNotification(message) {
+        // Ensure container exists
+        let container = document.getElementById('toast-container');
+        if (!container) {
+            container = document.createElement('div');
+            container.id = 'toast-container';
+            container.setAttribute('aria-live', 'polite');
+            container.setAttribute('aria-atomic', 'true');
+            document.body.appendChild(container);
+        }
+
+        // Create toast element
+        const toast = document.createElement('div');
+        toast.className = 'site-toast';
+        toast.innerHTML = `
+            <div class="toast-left">
+                <div class="toast-icon"><i class="fas fa-check"></i></div>
+            </div>
+            <div class="toast-body">
+                <div class="toast-title">เพิ่มลงรถเข็น</div>
+                <div class="toast-message">${String(message)}</div>
+            </div>
+            <button class="toast-close" aria-label="close">&times;</button>
+        `;
+
+        // Close handler
+        toast.querySelector('.toast-close').addEventListener('click', () => {
+            toast.classList.add('hide');
+            setTimeout(() => toast.remove(), 300);
+        });
+
+        // Auto remove
+        container.prepend(toast);
+        // trigger entrance
+        requestAnimationFrame(() => toast.classList.add('show'));
+        setTimeout(() => {
+            toast.classList.remove('show');
+            toast.classList.add('hide');
+            setTimeout(() => toast.remove(), 350);
+        }, 3500);
+    },
+
+    // Clear cart
+    clearCart() {
+        this.saveCart([]);
+    }
+};
+
+// Initialize event listeners for Add to Cart buttons
+function initializeCartButtons() {
+    document.querySelectorAll('.btn-product-add').forEach(btn => {
+        btn.addEventListener('click', function(e) {
+            e.preventDefault();
+            const productCard = this.closest('.product-card');
+            // use explicit data attribute instead of parsing from name (avoids injection issues)
+            let productId = parseInt(productCard.dataset.productId);
+            if (isNaN(productId)) {
+                // fallback: generate unique id as timestamp
+                productId = Date.now();
+            }
+
+            const product = {
+                id: productId,
+                name: productCard.querySelector('.product-name').textContent,
+                price: parseFloat(productCard.querySelector('.product-price').textContent.replace('฿', '').replace(',', '')),
+                // prefer real image if available, otherwise fall back to icon class
+                image: productCard.querySelector('.product-image img')?.src || productCard.querySelector('.product-image i')?.className || 'fas fa-coffee'
+            };
+
+            CartManager.addToCart(product);
+            SimilarProducts.show(productId, product.name);
+        });
+    });
+}
+
+// Initialize on page load
+document.addEventListener('DOMContentLoaded', function() {
+    CartManager.updateCartBadge();
+    initializeCartButtons();
+    loadFavorites();
+});
+
+function markFavorite(productId, isFavorite) {
+    const btn = document.querySelector(`.product-card[data-product-id="${productId}"] .btn-product-fav`);
+    if (!btn) return;
+    btn.classList.toggle('btn-product-fav-active', isFavorite);
+    btn.title = isFavorite ? 'Remove from favorites' : 'Add to favorites';
+}
+
+// สินค้าโปรดของลูกค้าคนนี้ (หน้า HTML เหมือนกันทุกคน)
+function loadFavorites() {
+    fetch('/api/favorites')
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                data.product_ids.forEach(id => markFavorite(id, true));
+            }
+        })
+        .catch(error => console.error('Error:', error));
+}
+
+// Toggle Favorite Function
+function toggleFavorite(productId, event) {
+    event.preventDefault();
+    event.stopPropagation();
+
+    fetch(`/toggle-favorite/${productId}`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        }
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            markFavorite(productId, data.is_favorite);
+        }
+    })
+    .catch(error => console.error('Error:', error));
+}
+
+// ==================== AI Chat Widget ====================
+const AIChatWidget = {
+    isOpen: false,
+    isLoading: false,
+
+    init() {
+        this.setupEventListeners();
+    },
+
+    setupEventListeners() {
+        const toggleBtn = document.getElementById('ai-chat-toggle');
+        const closeBtn = document.getElementById('ai-chat-close');
+
+        if (toggleBtn) toggleBtn.addEventListener('click', () => this.toggleChat());
+        if (closeBtn) closeBtn.addEventListener('click', () => this.toggleChat());
+    },
+
+    toggleChat() {
+        this.isOpen = !this.isOpen;
+        const chatBox = document.getElementById('ai-chat-box');
+        const chatWindow = document.getElementById('ai-chat-window');
+
+        if (this.isOpen) {
+            chatBox.classList.add('open');
+            chatWindow.style.display = 'flex';
+            const firstBtn = document.querySelector('.ai-preset-btn');
+            if (firstBtn) firstBtn.focus();
+        } else {
+            chatBox.classList.remove('open');
+            chatWindow.style.display = 'none';
+        }
+    },
+
+    // Send a preset question (called when user clicks a preset button)
+    // ใช้ /api/ask-ai/stream (Server-Sent Events) เพื่อแสดงคำตอบทีละส่วนทันทีที่ได้รับ
+    async sendPreset(question) {
+        const message = (question || '').trim();
+        if (!message || this.isLoading) return;
+
+        this.isLoading = true;
+        this.addMessageToChat(message, 'user');
+        const answerEl = this.addMessageToChat('...', 'ai');
+        const startedAt = performance.now();
+        let firstChunkAt = null;
+
+        try {
+            const response = await fetch('/api/ask-ai/stream', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'Accept': 'text/event-stream'
+                },
+                body: JSON.stringify({ question: message })
+            });
+            if (!response.ok || !response.body) {
+                throw new Error('HTTP ' + response.status);
+            }
+
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+
+                // SSE: แต่ละ event คั่นด้วยบรรทัดว่าง
+                let sep;
+                while ((sep = buffer.indexOf('\n\n')) !== -1) {
+                    const evt = this.parseEvent(buffer.slice(0, sep));
+                    buffer = buffer.slice(sep + 2);
+                    if (evt.event === 'delta') {
+                        if (firstChunkAt === null) {
+                            firstChunkAt = performance.now();
+                            answerEl.textContent = '';
+                        }
+                        answerEl.textContent += evt.data.text;
+                        this.scrollToBottom();
+                    } else if (evt.event === 'done') {
+                        console.debug('AI chat latency', {
+                            server_ttfb_ms: evt.data.ttfb_ms,
+                            server_total_ms: evt.data.total_ms,
+                            client_ttfb_ms: firstChunkAt === null ? null : Math.round(firstChunkAt - startedAt),
+                            client_total_ms: Math.round(performance.now() - startedAt)
+                        });
+                    }
+                }
+            }
+            if (firstChunkAt === null) {
+                answerEl.textContent = 'ขออภัย ไม่สามารถประมวลผลคำถามได้';
+            }
+        } catch (error) {
+            console.error('Error:', error);
+            if (firstChunkAt === null) {
+                answerEl.textContent = 'เกิดข้อผิดพลาด กรุณาลองใหม่';
+            }
+        } finally {
+            this.isLoading = false;
+        }
+    },
+
+    parseEvent(raw) {
+        const evt = { event: 'message', data: {} };
+        const dataLines = [];
+        raw.split('\n').forEach(line => {
+            if (line.startsWith('event:')) evt.event = line.slice(6).trim();
+            else if (line.startsWith('data:')) dataLines.push(line.slice(5).trim());
+        });
+        try {
+            evt.data = JSON.parse(dataLines.join('\n') || '{}');
+        } catch (e) {
+            evt.data = {};
+        }
+        return evt;
+    },
+
+    sendMessage() {
+        // kept for compatibility (no-op)
+    },
+
+    addMessageToChat(text, sender) {
+        const messagesContainer = document.getElementById('ai-messages');
+        const messageDiv = document.createElement('div');
+        messageDiv.className = `ai-message ai-message-${sender}`;
+
+        const messageContent = document.createElement('div');
+        messageContent.className = 'ai-message-content';
+        messageContent.textContent = text;
+
+        messageDiv.appendChild(messageContent);
+        messagesContainer.appendChild(messageDiv);
+        this.scrollToBottom();
+        return messageContent;
+    },
+
+    scrollToBottom() {
+        const messagesContainer = document.getElementById('ai-messages');
+        messagesContainer.scrollTop = messagesContainer.scrollHeight;
+    }
+};
+
+// Product Search: ซ่อนการ์ดที่ไม่ตรงกับคำค้น (ค้นฝั่ง server ผ่าน /api/products/search)
+const ProductSearch = {
+    timer: null,
+    requestId: 0,
+
+    init() {
+        const input = document.getElementById('product-search');
+        if (!input) return;
+        input.addEventListener('input', () => {
+            clearTimeout(this.timer);
+            this.timer = setTimeout(() => this.run(input.value.trim()), 200);
+        });
+    },
+
+    showOnly(ids) {
+        document.querySelectorAll('#product-grid .product-card').forEach(card => {
+            const visible = ids === null || ids.has(Number(card.dataset.productId));
+            card.parentElement.style.display = visible ? '' : 'none';
+        });
+    },
+
+    async run(q) {
+        const status = document.getElementById('product-search-status');
+        const requestId = ++this.requestId;
+        if (!q) {
+            this.showOnly(null);
+            status.textContent = '';
+            return;
+        }
+        try {
+            const params = new URLSearchParams({ q: q, limit: 100, fields: 'id' });
+            const response = await fetch('/api/products/search?' + params);
+            const data = await response.json();
+            // ผลของคำค้นเก่าที่ตอบกลับช้ากว่าไม่ต้องแสดง
+            if (requestId !== this.requestId || !data.success) return;
+            this.showOnly(new Set(data.results.map(item => item.id)));
+            status.textContent = data.results.length ? `พบ ${data.results.length} รายการ` : 'ไม่พบสินค้าที่ค้นหา';
+        } catch (error) {
+            console.error('Search error:', error);
+        }
+    }
+};
+
+// You may also like: แสดงสินค้าที่คล้ายกับชิ้นที่เพิ่งเพิ่มลงรถเข็น (/api/products/<id>/similar)
+const SimilarProducts = {
+    requestId: 0,
+
+    async show(productId, productName) {
+        const section = document.getElementById('similar-products');
+        if (!section) return;
+        const requestId = ++this.requestId;
+        try {
+            const response = await fetch(`/api/products/${productId}/similar?limit=4`);
+            if (!response.ok) return;
+            const data = await response.json();
+            if (requestId !== this.requestId || !data.products || !data.products.length) return;
+            document.getElementById('similar-source').textContent = `(คล้ายกับ ${productName})`;
+            this.render(data.products);
+            section.hidden = false;
+        } catch (error) {
+            console.error('Similar products error:', error);
+        }
+    },
+
+    render(products) {
+        const grid = document.getElementById('similar-grid');
+        grid.replaceChildren(...products.map(product => {
+            const col = document.createElement('div');
+            col.className = 'col-md-6 col-lg-3';
+            const card = document.createElement('div');
+            card.className = 'similar-card';
+            let thumb;
+            if (product.image_url) {
+                thumb = document.createElement('img');
+                thumb.src = product.image_url;
+                thumb.alt = product.name;
+                thumb.loading = 'lazy';
+            } else {
+                thumb = document.createElement('div');
+                thumb.className = 'similar-icon';
+                thumb.innerHTML = '<i class="fas fa-mug-hot"></i>';
+            }
+            const info = document.createElement('div');
+            const name = document.createElement('div');
+            name.className = 'similar-name';
+            name.textContent = product.name;
+            const price = document.createElement('div');
+            price.className = 'similar-price';
+            price.textContent = '฿' + Math.round(product.price);
+            info.append(name, price);
+            card.append(thumb, info);
+            // คลิกแล้วเลื่อนไปที่การ์ดของสินค้านั้นในรายการหลัก
+            card.addEventListener('click', () => {
+                const target = document.querySelector(`#product-grid .product-card[data-product-id="${product.id}"]`);
+                if (target) target.scrollIntoView({ behavior: 'smooth', block: 'center' });
+            });
+            col.appendChild(card);
+            return col;
+        }));
+    }
+};
+
+// Initialize AI Chat Widget
+document.addEventListener('DOMContentLoaded', function() {
+    ProductSearch.init();
+    AIChatWidget.init();
+    // Delegate clicks on preset buttons
+    const presetsContainer = document.getElementById('ai-presets-container');
+    if (presetsContainer) {
+        presetsContainer.addEventListener('click', function(e) {
+            const btn = e.target.closest('.ai-preset-btn');
+            if (btn) {
+                AIChatWidget.sendPreset(btn.dataset.question);
+            }
+        });
+    }
+});
@@ -0,0 +1,106 @@
+/* Small client-side renderer and interactions
+   - Renders the saved order from the server (falls back to orderData in sessionStorage)
+   - Animates total price highlight on render
+   - Print and copy handlers
+*/
+// toast helper
+function showNotification(message, type='success', title=null) {
+    let container = document.getElementById('toast-container');
+    if (!container) {
+        container = document.createElement('div');
+        container.id = 'toast-container';
+        container.setAttribute('aria-live', 'polite');
+        container.setAttribute('aria-atomic', 'true');
+        document.body.appendChild(container);
+    }
+    const toast = document.createElement('div');
+    toast.className = 'site-toast ' + type;
+    const iconClass = type === 'error' ? 'fas fa-exclamation-circle' : 'fas fa-check';
+    const titleText = title || (type === 'error' ? 'ข้อผิดพลาด' : 'สำเร็จ');
+    toast.innerHTML = `
+            <div class="toast-left">
+                <div class="toast-icon"><i class="${iconClass}"></i></div>
+            </div>
+            <div class="toast-body">
+                <div class="toast-title">${titleText}</div>
+                <div class="toast-message">${String(message)}</div>
+            </div>
+            <button class="toast-close" aria-label="close">&times;</button>
+        `;
+    toast.querySelector('.toast-close').addEventListener('click', () => {
+        toast.classList.add('hide');
+        setTimeout(() => toast.remove(), 300);
+    });
+    container.appendChild(toast);
+    setTimeout(() => toast.classList.add('show'), 10);
+    setTimeout(() => {
+        toast.classList.add('hide');
+        setTimeout(() => toast.remove(), 300);
+    }, 4000);
+}
+const formatMoney = n => Number(n).toLocaleString('th-TH');
+
+function animateTotal(el){
+    if(!el) return;
+    el.classList.add('total-highlight');
+    // remove after animation so future updates can retrigger
+    setTimeout(()=> el.classList.remove('total-highlight'), 1800);
+}
+
+// order saved on the server (null if no checkout yet)
+
+
+function renderOrder(){
+    const raw = serverOrder ? null : sessionStorage.getItem('orderData');
+    if(!serverOrder && !raw){ document.getElementById('noOrder').style.display='block'; return; }
+    const order = serverOrder || JSON.parse(raw);
+    document.getElementById('orderNumber').textContent = order.orderNumber;
+    document.getElementById('orderDate').textContent = order.orderDate;
+
+    let html = '';
+    html += '<div class="table-responsive">';
+    html += '<table class="table items-table mb-0">';
+    html += '<thead><tr><th>สินค้า & รายละเอียด</th><th class="text-end">ราคา</th><th class="text-center">จำนวน</th><th class="text-end">รวม</th></tr></thead>';
+    html += '<tbody>';
+    order.items.forEach(it =>{
+        const qty = Number(it.quantity);
+        const line = it.price * qty;
+        html += `<tr>`;
+        html += `<td><div class="item-name">${it.name}</div><div class="muted small">ขนาด: ${it.size || '-'} • ระดับคั่ว: ${it.roast || '-'} ${it.addons && it.addons.length? '• เพิ่ม: '+it.addons.join(', '): ''}</div></td>`;
+        html += `<td class="text-end">฿${formatMoney(it.price)}</td>`;
+        html += `<td class="text-center">${qty}</td>`;
+        html += `<td class="text-end">฿${formatMoney(line)}</td>`;
+        html += `</tr>`;
+    });
+    html += '</tbody></table></div>';
+
+    html += '<div class="d-flex justify-content-end mt-3">';
+    html += `<div style="min-width:260px">`;
+    html += `<div class="d-flex justify-content-between"><div class="muted">Subtotal</div><div>฿${formatMoney(order.subtotal)}</div></div>`;
+    html += `<div class="d-flex justify-content-between"><div class="muted">Shipping</div><div>฿${formatMoney(order.shipping)}</div></div>`;
+    html += `<div class="d-flex justify-content-between"><div class="muted">Tax (7%)</div><div>฿${formatMoney(order.tax)}</div></div>`;
+    html += `<hr>`;
+    html += `<div class="d-flex justify-content-between totals"><div>รวมทั้งสิ้น</div><div id="totalPrice"><strong>฿${formatMoney(order.total)}</strong></div></div>`;
+    html += `</div></div>`;
+
+    document.getElementById('receiptContent').innerHTML = html;
+    // animate total
+    animateTotal(document.getElementById('totalPrice'));
+}
+
+document.addEventListener('DOMContentLoaded', function(){
+    renderOrder();
+    // Ensure receipt card becomes visible (fade-in) even when no order
+    const card = document.querySelector('.receipt');
+    if(card) setTimeout(()=>card.classList.add('show'), 80);
+});
+
+document.addEventListener('click', function(e){
+    const target = e.target.closest && e.target.closest('button') ? e.target.closest('button') : e.target;
+    if(!target) return;
+    if(target.id === 'btnPrint') return window.print();
+    if(target.id === 'btnCopy'){
+        const txt = document.getElementById('receiptContent').innerText || '';
+        navigator.clipboard?.writeText(txt).then(()=>{ showNotification('คัดลอกใบเสร็จเรียบร้อย'); }).catch(()=>{ showNotification('ไม่สามารถคัดลอกได้', 'error'); });
+    }
+});
@@ -0,0 +1,315 @@
+"""ตั้งค่าฐานข้อมูลสำหรับ production: SQLite pragmas, connection pool และ schema migrations แบบมีเวอร์ชัน
+
+- ที่อยู่ฐานข้อมูลมาจาก DATABASE_URL (ค่าเริ่มต้นคือ shop.db) จึงย้ายไปใช้ server database ได้
+- ทุก connection ของ SQLite ได้ WAL, synchronous=NORMAL, busy_timeout และ mmap
+  ทำให้ผู้อ่านไม่ถูกบล็อกระหว่างมีการเขียน และลด error "database is locked"
+- schema ถูกสร้าง/แก้ด้วย migration ที่มีหมายเลขเวอร์ชัน (ตาราง schema_migrations) แทน db.create_all()
+"""
+import os
+import sqlite3
+from datetime import datetime
+
+import sqlalchemy as sa
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+
+import search
+
+
+def database_uri(default_path: str) -> str:
+    """คืน URI ของฐานข้อมูลจาก DATABASE_URL หรือไฟล์ SQLite ค่าเริ่มต้น"""
+    return os.getenv('DATABASE_URL', f'sqlite:///{default_path}')
+
+
+def engine_options(uri: str) -> dict:
+    """ค่า SQLALCHEMY_ENGINE_OPTIONS ที่เหมาะกับชนิดฐานข้อมูล"""
+    url = sa.engine.make_url(uri)
+    pool = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', '10')),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '20')),
+        'pool_timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+    }
+    if url.get_backend_name() == 'sqlite':
+        if url.database in (None, '', ':memory:'):
+            # in-memory SQLite ใช้ SingletonThreadPool ไม่รองรับการตั้งค่า pool
+            return {}
+        return pool
+    # server database: ตรวจ connection ที่หลุดก่อนใช้ และเปลี่ยน connection ที่เก่าเกินไป
+    pool.update(pool_pre_ping=True, pool_recycle=int(os.getenv('DB_POOL_RECYCLE', '1800')))
+    return pool
+
+
+def sqlite_pragmas() -> tuple:
+    return (
+        ('journal_mode', 'WAL'),
+        ('synchronous', 'NORMAL'),
+        ('busy_timeout', os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000')),
+        ('mmap_size', os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+    )
+
+
+def apply_sqlite_pragmas(dbapi_connection):
+    """ตั้ง pragma ให้ connection ของ sqlite3 หนึ่งตัว"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in sqlite_pragmas():
+            cursor.execute(f'PRAGMA {name}={value}')
+    finally:
+        cursor.close()
+
+
+@event.listens_for(Engine, 'connect')
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        apply_sqlite_pragmas(dbapi_connection)
+
+
+def insert_ignore(table, dialect_name: str):
+    """INSERT ที่ข้ามแถวซึ่งชน primary key/unique (คำสั่งเดียว atomic ไม่ต้องอ่านก่อนเขียน)"""
+    if dialect_name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect_name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        return sa.insert(table).prefix_with('IGNORE')
+    return insert(table).on_conflict_do_nothing()
+
+
+def insert_or_update(table, dialect_name: str, key: str, columns: tuple):
+    """INSERT ที่อัปเดตคอลัมน์ columns ของแถวเดิมเมื่อชน key (คำสั่งเดียว atomic ใช้กับ executemany ได้)"""
+    if dialect_name in ('sqlite', 'postgresql'):
+        if dialect_name == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        statement = insert(table)
+        return statement.on_conflict_do_update(
+            index_elements=[key], set_={c: statement.excluded[c] for c in columns}
+        )
+    from sqlalchemy.dialects.mysql import insert
+    statement = insert(table)
+    return statement.on_duplicate_key_update({c: statement.inserted[c] for c in columns})
+
+
+# ==================== Migrations ====================
+# แต่ละ migration นิยาม schema ของตัวเอง (ไม่อ้างอิง model ปัจจุบัน) เพื่อให้รันซ้ำบนฐานข้อมูลเก่าได้ถูกต้อง
+
+MIGRATIONS = []
+
+
+def migration(version: int, description: str):
+    def register(fn):
+        MIGRATIONS.append((version, description, fn))
+        return fn
+    return register
+
+
+@migration(1, 'create product table')
+def _create_product(conn):
+    sa.Table(
+        'product', sa.MetaData(),
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('name', sa.String(100), nullable=False, unique=True),
+        sa.Column('price', sa.Float, nullable=False),
+        sa.Column('image_url', sa.String(255)),
+        sa.Column('description', sa.String(500)),
+        sa.Column('is_favorite', sa.Boolean),
+        sa.Column('created_at', sa.DateTime),
+    ).create(conn, checkfirst=True)
+
+
+@migration(2, 'create catalog_version table')
+def _create_catalog_version(conn):
+    sa.Table(
+        'catalog_version', sa.MetaData(),
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('version', sa.Integer, nullable=False),
+    ).create(conn, checkfirst=True)
+
+
+@migration(3, 'create review and review_stats tables')
+def _create_reviews(conn):
+    metadata = sa.MetaData()
+    sa.Table('product', metadata, sa.Column('id', sa.Integer, primary_key=True))
+    review = sa.Table(
+        'review', metadata,
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('product_id', sa.Integer, sa.ForeignKey('product.id'), nullable=False),
+        sa.Column('rating', sa.Integer, nullable=False),
+        sa.Column('comment', sa.String(500)),
+        sa.Column('author', sa.String(100)),
+        sa.Column('created_at', sa.DateTime),
+    )
+    sa.Index('ix_review_product_id', review.c.product_id)
+    sa.Table(
+        'review_stats', metadata,
+        sa.Column('product_id', sa.Integer, sa.ForeignKey('product.id'), primary_key=True),
+        sa.Column('review_count', sa.Integer, nullable=False),
+        sa.Column('rating_sum', sa.Integer, nullable=False),
+        sa.Column('latest_comment', sa.String(500)),
+    )
+    metadata.create_all(conn, tables=[metadata.tables['review'], metadata.tables['review_stats']], checkfirst=True)
+
+
+@migration(4, 'index product (is_favorite desc, id) for the storefront sort')
+def _index_product_favorite(conn):
+    product = sa.Table(
+        'product', sa.MetaData(),
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('is_favorite', sa.Boolean),
+    )
+    sa.Index('ix_product_favorite_id', product.c.is_favorite.desc(), product.c.id).create(conn, checkfirst=True)
+
+
+@migration(5, 'create orders and order_items tables')
+def _create_orders(conn):
+    metadata = sa.MetaData()
+    sa.Table(
+        'orders', metadata,
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('idempotency_key', sa.String(64), nullable=False, unique=True),
+        sa.Column('payment_method', sa.String(20), nullable=False),
+        sa.Column('payment_details', sa.Text),
+        sa.Column('subtotal', sa.Float, nullable=False),
+        sa.Column('shipping', sa.Float, nullable=False),
+        sa.Column('tax', sa.Float, nullable=False),
+        sa.Column('total', sa.Float, nullable=False),
+        sa.Column('status', sa.String(20), nullable=False),
+        sa.Column('created_at', sa.DateTime),
+    )
+    items = sa.Table(
+        'order_items', metadata,
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('order_id', sa.Integer, sa.ForeignKey('orders.id'), nullable=False),
+        sa.Column('product_id', sa.Integer),
+        sa.Column('name', sa.String(100), nullable=False),
+        sa.Column('unit_price', sa.Float, nullable=False),
+        sa.Column('quantity', sa.Integer, nullable=False),
+        sa.Column('options', sa.Text),
+    )
+    sa.Index('ix_order_items_order_id', items.c.order_id)
+    metadata.create_all(conn, checkfirst=True)
+
+
+@migration(6, 'create product_fts full-text index (SQLite FTS5)')
+def _create_product_fts(conn):
+    # ฐานข้อมูลอื่นหรือ SQLite ที่ไม่มี FTS5: ข้ามไป /api/products/search จะใช้ LIKE แทน
+    if conn.dialect.name != 'sqlite' or not search.fts5_available(conn):
+        return
+    conn.exec_driver_sql(search.create_fts_sql())
+    search.rebuild(conn)
+
+
+@migration(7, 'per-customer favorite table and product.popularity for the storefront sort')
+def _create_favorites(conn):
+    metadata = sa.MetaData()
+    product = sa.Table(
+        'product', metadata,
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('is_favorite', sa.Boolean),
+        sa.Column('popularity', sa.Integer),
+    )
+    conn.execute(sa.text('ALTER TABLE product ADD COLUMN popularity INTEGER NOT NULL DEFAULT 0'))
+    # ธง is_favorite เดิมเป็นของทั้งร้าน (ไม่ใช้แล้ว) สินค้าที่เคยเป็นโปรดเริ่มที่ 1 เพื่อคงลำดับหน้าแรกเดิมไว้
+    conn.execute(product.update().where(product.c.is_favorite.is_(True)).values(popularity=1))
+    conn.execute(sa.text('DROP INDEX IF EXISTS ix_product_favorite_id'))
+    sa.Index('ix_product_popularity_id', product.c.popularity.desc(), product.c.id).create(conn, checkfirst=True)
+    favorite = sa.Table(
+        'favorite', metadata,
+        sa.Column('owner', sa.String(64), primary_key=True),
+        sa.Column('product_id', sa.Integer, sa.ForeignKey('product.id'), primary_key=True),
+        sa.Column('created_at', sa.DateTime),
+    )
+    sa.Index('ix_favorite_product_id', favorite.c.product_id)
+    metadata.create_all(conn, tables=[favorite], checkfirst=True)
+
+
+@migration(8, 'product_change feed (latest change per product + tombstones) and catalog_version.changes_horizon')
+def _create_product_change(conn):
+    metadata = sa.MetaData()
+    # เวอร์ชันแคตตาล็อกสูงสุดของ tombstone ที่ถูก compact ทิ้งไปแล้ว (client ที่ sync เก่ากว่านี้ต้องโหลดใหม่ทั้งหมด)
+    conn.execute(sa.text('ALTER TABLE catalog_version ADD COLUMN changes_horizon INTEGER NOT NULL DEFAULT 0'))
+    change = sa.Table(
+        'product_change', metadata,
+        sa.Column('product_id', sa.Integer, primary_key=True, autoincrement=False),
+        sa.Column('version', sa.Integer, nullable=False),
+        sa.Column('deleted', sa.Boolean, nullable=False),
+        sa.Column('changed_at', sa.DateTime, nullable=False),
+    )
+    sa.Index('ix_product_change_version_id', change.c.version, change.c.product_id)
+    metadata.create_all(conn, checkfirst=True)
+
+
+@migration(9, 'ai_job and ai_job_item tables (description job state shared by all worker processes)')
+def _create_ai_jobs(conn):
+    metadata = sa.MetaData()
+    job = sa.Table(
+        'ai_job', metadata,
+        sa.Column('id', sa.String(32), primary_key=True),
+        sa.Column('status', sa.String(10), nullable=False),
+        sa.Column('total', sa.Integer, nullable=False),
+        sa.Column('completed', sa.Integer, nullable=False),
+        sa.Column('failed', sa.Integer, nullable=False),
+        sa.Column('pending_chunks', sa.Integer, nullable=False),
+        sa.Column('created_at', sa.Float, nullable=False),
+        sa.Column('finished_at', sa.Float),
+    )
+    sa.Index('ix_ai_job_created_at', job.c.created_at)
+    sa.Table(
+        'ai_job_item', metadata,
+        sa.Column('job_id', sa.String(32), sa.ForeignKey('ai_job.id'), primary_key=True),
+        sa.Column('product_id', sa.Integer, primary_key=True, autoincrement=False),
+        sa.Column('description', sa.String(500)),
+        sa.Column('error', sa.String(500)),
+    )
+    metadata.create_all(conn, checkfirst=True)
+
+
+@migration(10, 'drop product_fts sync triggers (the app writes product_fts itself)')
+def _drop_product_fts_triggers(conn):
+    # trigger เดิมเรียก thai_segment() ที่มีเฉพาะใน connection ของแอป connection อื่นจึงเขียนตาราง product ไม่ได้
+    if conn.dialect.name != 'sqlite':
+        return
+    for name in ('product_fts_ai', 'product_fts_ad', 'product_fts_au'):
+        conn.exec_driver_sql(f'DROP TRIGGER IF EXISTS {name}')
+
+
+_schema_migrations = sa.Table(
+    'schema_migrations', sa.MetaData(),
+    sa.Column('version', sa.Integer, primary_key=True),
+    sa.Column('description', sa.String(200), nullable=False),
+    sa.Column('applied_at', sa.DateTime, nullable=False),
+)
+
+
+def run_migrations(engine) -> list:
+    """รัน migration ที่ยังไม่เคยรัน คืนรายการเวอร์ชันที่รันในครั้งนี้
+
+    แต่ละ migration จะ insert แถวใน schema_migrations ก่อน แล้วจึงแก้ schema ใน transaction เดียวกัน
+    ถ้ามีหลาย process รันพร้อมกัน process ที่ insert ไม่สำเร็จจะข้าม migration นั้นไป
+    """
+    with engine.begin() as conn:
+        _schema_migrations.create(conn, checkfirst=True)
+        applied = set(conn.execute(sa.select(_schema_migrations.c.version)).scalars())
+
+    ran = []
+    for version, description, fn in sorted(MIGRATIONS, key=lambda m: m[0]):
+        if version in applied:
+            continue
+        try:
+            with engine.begin() as conn:
+                conn.execute(_schema_migrations.insert().values(
+                    version=version, description=description, applied_at=datetime.utcnow()
+                ))
+                fn(conn)
+            ran.append(version)
+        except IntegrityError:
+            # process อื่นรัน migration นี้ไปแล้ว (ถ้าไม่ใช่ ให้ error เดิมทำงานต่อ)
+            with engine.connect() as conn:
+                done = conn.execute(
+                    sa.select(_schema_migrations.c.version).where(_schema_migrations.c.version == version)
+                ).first()
+            if not done:
+                raise
+    return ran
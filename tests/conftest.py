@@ -0,0 +1,95 @@
+"""ค่าตั้งต้นร่วมของ tests: ฐานข้อมูล, AI cache และโฟลเดอร์รูปอยู่ใน temp (ไม่แตะ shop.db) และไม่มี OpenAI key
+
+app.py อ่าน env ตอน import จึงตั้งค่าทั้งหมดที่นี่ก่อน import app
+
+    python -m pytest -q
+"""
+import http.server
+import os
+import sys
+import tempfile
+import threading
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+_TMP = tempfile.mkdtemp(prefix='shop-tests-')
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{os.path.join(_TMP, 'shop.db')}",
+    AI_CACHE_DB=os.path.join(_TMP, 'ai_cache.db'),
+    IMAGE_DIR=os.path.join(_TMP, 'media'),
+    SLOW_QUERY_MS='100000',
+    AI_RATE_LIMIT_PER_MINUTE='100000',
+    AI_RATE_LIMIT_BURST='100000',
+)
+os.environ.pop('OPENAI_API_KEY', None)
+os.environ.pop('IMAGE_FETCH_ALLOW_NETWORKS', None)
+
+
+@pytest.fixture(scope='session')
+def shop():
+    import app as shop
+    from storage import run_migrations
+
+    with shop.app.app_context():
+        run_migrations(shop.db.engine)
+    return shop
+
+
+@pytest.fixture
+def client(shop):
+    return shop.app.test_client()
+
+
+@pytest.fixture
+def admin_client(shop):
+    client = shop.app.test_client()
+    with client.session_transaction() as sess:
+        sess['logged_in'] = True
+    return client
+
+
+@pytest.fixture
+def make_product(shop):
+    """สร้างสินค้าใหม่ (ชื่อไม่ซ้ำ) คืน id"""
+    counter = iter(range(1, 1_000_000))
+
+    def make(**values):
+        with shop.app.app_context():
+            product = shop.Product(**{'name': f'Test Coffee {os.urandom(6).hex()}-{next(counter)}',
+                                      'price': 100.0, **values})
+            shop.db.session.add(product)
+            shop.db.session.flush()
+            shop.bump_catalog_version(changed=[product.id])
+            shop.db.session.commit()
+            return product.id
+    return make
+
+
+@pytest.fixture
+def http_server():
+    """HTTP server ใน thread: routes[path] = (status, headers, body) คืน (base_url, routes, hits)"""
+    routes, hits = {}, []
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(self.path)
+            status, headers, body = routes.get(self.path, (404, {}, b''))
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}', routes, hits
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,59 @@
+"""คำตอบ AI จาก cache (/api/ask-ai และ /api/ask-ai/stream): นับ hit/miss ครั้งเดียวต่อคำถาม และตอบจากผลที่ตรวจแล้ว"""
+import os
+
+import pytest
+
+from benchmarks.fake_openai import FakeOpenAI
+
+
+@pytest.fixture
+def fake_ai(shop, monkeypatch):
+    fake = FakeOpenAI()
+    monkeypatch.setattr(shop, 'openai_client', fake)
+    return fake
+
+
+def new_question():
+    return f'zqx question {os.urandom(4).hex()}'
+
+
+def counters(shop):
+    stats = shop.answer_cache.stats()
+    return stats['hits'] + stats['disk_hits'], stats['misses']
+
+
+def test_ask_counts_one_miss_then_one_hit(shop, client, fake_ai):
+    question = new_question()
+    hits, misses = counters(shop)
+
+    first = client.post('/api/ask-ai', json={'question': question}).get_json()
+    assert counters(shop) == (hits, misses + 1)
+    second = client.post('/api/ask-ai', json={'question': question}).get_json()
+    assert counters(shop) == (hits + 1, misses + 1)
+    assert first['answer'] == second['answer'] and fake_ai.calls == 1
+
+
+def test_stream_counts_misses_and_hits(shop, client, fake_ai):
+    question = new_question()
+    hits, misses = counters(shop)
+
+    body = client.post('/api/ask-ai/stream', json={'question': question}).get_data(as_text=True)
+    assert '"streamed": true' in body
+    assert counters(shop) == (hits, misses + 1)
+    body = client.post('/api/ask-ai/stream', json={'question': question}).get_data(as_text=True)
+    assert '"streamed": false' in body
+    assert counters(shop) == (hits + 1, misses + 1)
+    assert fake_ai.calls == 1
+
+
+def test_ready_answer_is_served_without_a_second_lookup(shop, client, fake_ai, monkeypatch):
+    lookups = []
+
+    def get_then_expire(key):
+        lookups.append(key)
+        return 'cached answer' if len(lookups) == 1 else None
+    monkeypatch.setattr(shop.answer_cache, 'get', get_then_expire)
+
+    body = client.post('/api/ask-ai', json={'question': new_question()}).get_json()
+    assert body['answer'] == 'cached answer'
+    assert len(lookups) == 1 and fake_ai.calls == 0
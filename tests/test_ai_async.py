@@ -0,0 +1,105 @@
+"""เส้นทาง AI แบบ async (ai_async.py + route async ใน app.py) ไม่มีการเรียก OpenAI จริง"""
+import asyncio
+import time
+
+import pytest
+
+from ai_async import SingleFlight
+
+
+def test_single_flight_shares_one_result():
+    flights = SingleFlight()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return 'answer'
+
+    async def main():
+        return await asyncio.gather(*(flights.do('k', compute) for _ in range(5)))
+
+    assert asyncio.run(main()) == ['answer'] * 5
+    assert len(calls) == 1
+
+
+def test_single_flight_error_reaches_every_waiter():
+    flights = SingleFlight()
+
+    async def compute():
+        await asyncio.sleep(0.01)
+        raise RuntimeError('upstream down')
+
+    async def main():
+        return await asyncio.gather(*(flights.do('k', compute) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_cancelled_leader_does_not_strand_followers():
+    flights = SingleFlight()
+    started = []
+
+    async def compute():
+        started.append(1)
+        await asyncio.sleep(0.05)
+        return f'answer {len(started)}'
+
+    async def main():
+        leader = asyncio.create_task(flights.do('k', compute))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flights.do('k', compute))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.wait_for(follower, 1)
+
+    assert asyncio.run(main()) == 'answer 2'
+    assert len(started) == 2
+
+
+def test_cancelled_follower_leaves_the_flight_running():
+    flights = SingleFlight()
+
+    async def compute():
+        await asyncio.sleep(0.03)
+        return 'answer'
+
+    async def main():
+        leader = asyncio.create_task(flights.do('k', compute))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flights.do('k', compute))
+        await asyncio.sleep(0.01)
+        follower.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        return await leader
+
+    assert asyncio.run(main()) == 'answer'
+
+
+def test_slow_cache_lookup_does_not_block_the_event_loop(shop, monkeypatch):
+    def slow_get(key):
+        time.sleep(0.2)   # เหมือน SQLite ที่ติด lock ของ writer อื่น
+        return 'cached answer'
+    monkeypatch.setattr(shop.answer_cache, 'get', slow_get)
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        answer = await shop.cached_ai_answer('ask:slow', None)
+        task.cancel()
+        return answer, ticks
+
+    answer, ticks = asyncio.run(main())
+    assert answer == 'cached answer'
+    assert ticks >= 5
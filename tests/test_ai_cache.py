@@ -0,0 +1,36 @@
+"""AnswerCache (ai_cache.py): ตาราง ai_answer_cache บนดิสก์ไม่โตเกินกำหนดและไม่เก็บแถวที่หมดอายุ"""
+import sqlite3
+import time
+
+from ai_cache import AnswerCache
+
+
+def disk_keys(path):
+    conn = sqlite3.connect(path)
+    try:
+        return {row[0] for row in conn.execute('SELECT key FROM ai_answer_cache')}
+    finally:
+        conn.close()
+
+
+def test_disk_rows_are_capped_to_the_newest_entries(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = AnswerCache(path, max_entries=4, max_disk_entries=10, prune_every=5)
+    for i in range(40):
+        cache.set(f'q{i}', f'answer {i}')
+
+    assert disk_keys(path) == {f'q{i}' for i in range(30, 40)}
+    assert cache.stats()['disk_pruned'] == 30
+    assert cache.get('q39') == 'answer 39'
+
+
+def test_expired_rows_are_pruned_while_writing(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = AnswerCache(path, ttl=0.05, prune_every=3)
+    cache.set('old1', 'a')
+    cache.set('old2', 'b')
+    time.sleep(0.1)
+    cache.ttl = 60
+    cache.set('new', 'c')
+
+    assert disk_keys(path) == {'new'}
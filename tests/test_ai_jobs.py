@@ -0,0 +1,162 @@
+"""Job สร้างคำอธิบายสินค้า (ai_jobs.py + DescriptionJobStore ใน app.py) กับ OpenAI ปลอม (offline)"""
+import json
+import re
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import ai_jobs
+from ai_jobs import DescriptionJobQueue, MemoryJobStore
+from benchmarks.fake_openai import FakeOpenAI
+
+
+def wait_for(jobs, job_id, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = jobs.get(job_id)
+        if job and job['status'] not in ('queued', 'running'):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f'job {job_id} did not finish: {jobs.get(job_id)}')
+
+
+def products(n):
+    return [{'id': i, 'name': f'Coffee {i}', 'price': 100 + i} for i in range(1, n + 1)]
+
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    """ไม่รอ backoff จริง แต่เก็บเวลาที่จะรอไว้ตรวจ"""
+    delays = []
+    monkeypatch.setattr(ai_jobs, 'time', SimpleNamespace(sleep=delays.append, time=time.time))
+    return delays
+
+
+@pytest.fixture
+def fake_ai(shop, monkeypatch):
+    fake = FakeOpenAI()
+    monkeypatch.setattr(shop, 'openai_client', fake)
+    return fake
+
+
+def test_products_are_chunked_into_batch_prompts(shop, fake_ai):
+    prompts = []
+    create = fake_ai.chat.completions.create
+
+    def recording_create(**kwargs):
+        prompts.append(kwargs['messages'][-1]['content'])
+        return create(**kwargs)
+    fake_ai.chat.completions.create = recording_create
+
+    saved = {}
+    jobs = DescriptionJobQueue(shop.generate_product_descriptions_batch, saved.update, max_workers=1, batch_size=5)
+    job = wait_for(jobs, jobs.submit(products(12)))
+    jobs.shutdown()
+
+    assert job['status'] == 'done' and job['completed'] == 12
+    assert [len(re.findall(r'^- id \d+:', p, flags=re.MULTILINE)) for p in prompts] == [5, 5, 2]
+    assert sorted(saved) == list(range(1, 13))
+    assert saved[7] == 'กาแฟพรีเมียม Coffee 7 ราคา 107 บาท หอม กลมกล่อม'
+
+
+def test_failing_upstream_is_retried_with_exponential_backoff(no_sleep):
+    calls = []
+
+    def flaky(batch):
+        calls.append([p['id'] for p in batch])
+        if len(calls) <= 2:
+            raise RuntimeError('upstream 503')
+        if len(calls) == 3:
+            return {batch[0]['id']: 'first only'}  # ผลไม่ครบ: ชิ้นที่ขาด retry ต่อ
+        return {p['id']: f'desc {p["id"]}' for p in batch}
+
+    saved = {}
+    jobs = DescriptionJobQueue(flaky, saved.update, max_workers=1, batch_size=3, max_retries=3, backoff=0.5)
+    job = wait_for(jobs, jobs.submit(products(3)))
+    jobs.shutdown()
+
+    assert job['status'] == 'done' and job['failed'] == 0
+    assert calls == [[1, 2, 3], [1, 2, 3], [1, 2, 3], [2, 3]]
+    assert saved == {1: 'first only', 2: 'desc 2', 3: 'desc 3'}
+    assert len(no_sleep) == 3
+    for attempt, delay in enumerate(no_sleep):
+        assert 0.5 * 2 ** attempt <= delay <= 0.5 * 2 ** attempt * 1.25
+
+
+def test_permanent_failure_marks_job_failed_and_saves_nothing(no_sleep):
+    saved = {}
+
+    def broken(batch):
+        raise RuntimeError('quota exceeded')
+
+    jobs = DescriptionJobQueue(broken, saved.update, max_workers=1, batch_size=2, max_retries=2, backoff=0.1)
+    job = wait_for(jobs, jobs.submit(products(3)))
+    jobs.shutdown()
+
+    assert job['status'] == 'failed'
+    assert job['completed'] == 0 and job['failed'] == 3
+    assert job['errors'] == {1: 'quota exceeded', 2: 'quota exceeded', 3: 'quota exceeded'}
+    assert saved == {}
+    assert len(no_sleep) == 2 * 2  # สองกลุ่ม กลุ่มละ max_retries ครั้ง
+
+
+def test_partial_job():
+    jobs = DescriptionJobQueue(lambda batch: {p['id']: 'ok' for p in batch if p['id'] % 2},
+                               lambda results: None, max_workers=1, batch_size=10, max_retries=0)
+    job = wait_for(jobs, jobs.submit(products(4)))
+    jobs.shutdown()
+    assert job['status'] == 'partial' and job['completed'] == 2 and job['failed'] == 2
+    assert job['errors'] == {2: 'missing from AI response', 4: 'missing from AI response'}
+
+
+def test_memory_store_keeps_recent_jobs():
+    store = MemoryJobStore(max_jobs=2)
+    for job_id in ('a', 'b', 'c'):
+        store.create(job_id, 0, 0)
+        store.chunk_done(job_id)
+    assert store.get('a') is None and store.get('c')['status'] == 'done'
+
+
+def test_batch_job_writes_descriptions_to_products(shop, admin_client, make_product, fake_ai):
+    ids = [make_product(description='old copy') for _ in range(7)]
+    response = admin_client.post('/api/generate-description/batch', json={'product_ids': ids + [999999]})
+    assert response.status_code == 202
+    body = response.get_json()
+    assert body['total'] == 7 and body['not_found'] == [999999]
+
+    with shop.app.app_context():
+        job = wait_for(shop.description_jobs, body['job_id'])
+    assert job['status'] == 'done' and job['completed'] == 7
+
+    # poll ผ่าน API ด้วยข้อมูลจากฐานข้อมูล (worker process อื่นก็อ่านได้)
+    polled = admin_client.get(body['status_url']).get_json()
+    assert polled['status'] == 'done'
+    assert json.loads(json.dumps(job['results'])) == polled['results']
+    with shop.app.app_context():
+        descriptions = dict(shop.db.session.query(shop.Product.id, shop.Product.description)
+                            .filter(shop.Product.id.in_(ids)))
+        assert shop.DescriptionJobStore().get(body['job_id'])['completed'] == 7
+    assert all(text.startswith('กาแฟพรีเมียม Test Coffee') for text in descriptions.values())
+    assert fake_ai.calls == 2  # batch_size 5: 7 ชิ้น = 2 prompt
+
+
+def test_job_status_is_shared_through_the_database(shop, admin_client):
+    with shop.app.app_context():
+        shop.DescriptionJobStore().create('f' * 32, 3, 1)
+    # job ที่สร้างโดย process อื่น: process นี้ไม่มีใน memory แต่ยัง poll ได้
+    job = admin_client.get('/api/jobs/' + 'f' * 32).get_json()
+    assert job['status'] == 'queued' and job['total'] == 3
+    assert admin_client.get('/api/jobs/' + 'e' * 32).status_code == 404
+
+
+def test_batch_endpoint_refuses_without_openai_and_keeps_descriptions(shop, admin_client, make_product, monkeypatch):
+    monkeypatch.setattr(shop, 'openai_client', None)
+    pid = make_product(description='real copy')
+    response = admin_client.post('/api/generate-description/batch', json={'product_ids': [pid]})
+    assert response.status_code == 503
+
+    with pytest.raises(RuntimeError):
+        shop.generate_product_descriptions_batch([{'id': pid, 'name': 'x', 'price': 1}])
+    with shop.app.app_context():
+        assert shop.db.session.get(shop.Product, pid).description == 'real copy'
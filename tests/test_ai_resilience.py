@@ -0,0 +1,105 @@
+"""OpenAI client ที่ห่อด้วย ResilientClient (ai_resilience.py) กับ stub server ในเครื่อง:
+circuit breaker เปิดเมื่อ upstream ช้า/ล่ม, route ได้คำตอบ fallback ทันที และกลับมาปิดเมื่อ upstream หาย
+"""
+import os
+import time
+
+import pytest
+
+from ai_resilience import AIUnavailableError, ResilientClient
+from benchmarks.stub_openai_server import start_stub_server
+
+openai = pytest.importorskip('openai')
+
+MESSAGES = [{'role': 'user', 'content': 'hello'}]
+
+
+@pytest.fixture
+def stub():
+    server, state, base_url = start_stub_server()
+    yield state, base_url
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def resilient(stub):
+    _, base_url = stub
+    return ResilientClient(
+        None,
+        client_factory=lambda: openai.OpenAI(api_key='test', base_url=base_url, timeout=0.2, max_retries=0),
+        timeout=0.2, failure_threshold=3, reset_timeout=0.3
+    )
+
+
+def ask(client):
+    return client.chat.completions.create(model='gpt-3.5-turbo', messages=MESSAGES).choices[0].message.content
+
+
+def test_breaker_opens_after_timeouts_and_short_circuits(stub, resilient):
+    state, _ = stub
+    assert ask(resilient).startswith('คำตอบจาก stub')
+
+    state.delay = 1.0
+    for _ in range(3):
+        with pytest.raises(Exception) as error:
+            ask(resilient)
+        assert not isinstance(error.value, AIUnavailableError)
+    assert resilient.breaker.state == 'open'
+
+    calls = state.calls
+    started = time.perf_counter()
+    with pytest.raises(AIUnavailableError):
+        ask(resilient)
+    assert time.perf_counter() - started < 0.05
+    assert state.calls == calls   # ไม่ถึง upstream
+    assert resilient.snapshot()['counters']['short_circuited'] == 1
+
+
+def test_breaker_recovers_through_a_half_open_probe(stub, resilient):
+    state, _ = stub
+    state.fail = True
+    for _ in range(3):
+        with pytest.raises(Exception):
+            ask(resilient)
+    assert resilient.breaker.state == 'open'
+
+    state.fail = False
+    time.sleep(0.35)
+    assert ask(resilient).startswith('คำตอบจาก stub')
+    assert resilient.breaker.state == 'closed'
+
+    # probe ที่ล้มเหลวเปิด breaker อีกครั้งทันที (ไม่ต้องรอครบ failure_threshold)
+    state.fail = True
+    for _ in range(3):
+        with pytest.raises(Exception):
+            ask(resilient)
+    time.sleep(0.35)
+    with pytest.raises(Exception):
+        ask(resilient)
+    assert resilient.breaker.state == 'open'
+    assert resilient.breaker.opened_count == 3
+
+
+def test_ask_route_falls_back_while_open_and_answers_after_recovery(shop, client, stub, resilient, monkeypatch):
+    state, _ = stub
+    monkeypatch.setattr(shop, 'openai_client', resilient)
+    question = f'zqx resilience {os.urandom(4).hex()}'
+
+    state.fail = True
+    for _ in range(3):
+        assert client.post('/api/ask-ai', json={'question': question}).get_json()['answer'] == shop.AI_ERROR_ANSWER
+    assert resilient.breaker.state == 'open'
+
+    calls = state.calls
+    started = time.perf_counter()
+    body = client.post('/api/ask-ai', json={'question': question}).get_json()
+    assert body['answer'] == shop.AI_ERROR_ANSWER and body['success'] is True
+    assert time.perf_counter() - started < 0.1 and state.calls == calls
+
+    # fallback ไม่ถูก cache: เมื่อ upstream กลับมา คำถามเดิมได้คำตอบจริง
+    state.fail = False
+    time.sleep(0.35)
+    body = client.post('/api/ask-ai', json={'question': question}).get_json()
+    assert body['answer'].startswith('คำตอบจาก stub')
+    assert resilient.breaker.state == 'closed'
@@ -0,0 +1,52 @@
+"""Change feed ของแคตตาล็อก (/api/products/changes): tombstone ของสินค้าที่ถูกลบต้องคงอยู่"""
+
+import pytest
+
+
+def feed(client, since):
+    response = client.get('/api/products/changes', query_string={'since': since, 'fields': 'id'})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_late_popularity_flush_keeps_the_tombstone(shop, client, admin_client, make_product):
+    pid = make_product()
+    since = feed(client, 0)['version']
+
+    shop.popularity_counter.flush()
+    assert client.post(f'/toggle-favorite/{pid}').get_json()['is_favorite'] is True
+    assert admin_client.delete(f'/api/products/{pid}').status_code == 200
+    # delta ของคลิกก่อนลบถูก flush หลังสินค้าหายไปแล้ว
+    shop.popularity_counter.flush()
+
+    body = feed(client, since)
+    assert pid in body['deleted']
+    assert pid not in [row['id'] for row in body['upserts']]
+    with shop.app.app_context():
+        assert shop.db.session.get(shop.ProductChange, pid).deleted is True
+
+
+def test_updates_are_reported_as_upserts(shop, client, admin_client, make_product):
+    pid = make_product()
+    since = feed(client, 0)['version']
+    admin_client.put(f'/api/products/{pid}', json={'price': 150})
+    body = feed(client, since)
+    assert [row['id'] for row in body['upserts']] == [pid] and body['deleted'] == []
+
+
+@pytest.mark.parametrize('args', [{'since': 'abc'}, {'since': 1, 'after_id': 'x'}, {'since': 1, 'limit': 'ten'}])
+def test_non_integer_params_are_rejected_instead_of_resetting(client, args):
+    response = client.get('/api/products/changes', query_string=args)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_compaction_runs_on_bumps_with_nothing_to_record(shop, monkeypatch):
+    compactions = []
+    monkeypatch.setattr(shop, 'CHANGE_FEED_COMPACT_EVERY', 1)
+    monkeypatch.setattr(shop, 'compact_product_changes', lambda: compactions.append(1))
+    with shop.app.app_context():
+        # id ที่ไม่มีสินค้าแล้ว: ไม่มีแถวให้บันทึก แต่เวอร์ชันยังเพิ่ม
+        shop.bump_catalog_version(changed=[999999])
+        shop.db.session.commit()
+    assert compactions == [1]
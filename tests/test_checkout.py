@@ -0,0 +1,69 @@
+"""Checkout (POST /checkout): ยอดเงินมาจากแคตตาล็อกเสมอ และต้องมีสินค้าในคำสั่งซื้อ"""
+import json
+import uuid
+
+import pytest
+
+
+def checkout_form(items, **values):
+    return {
+        'payment_method': 'cod',
+        'cod_confirm': '1',
+        'idempotency_key': uuid.uuid4().hex,
+        'order_items': json.dumps(items),
+        **values,
+    }
+
+
+def order_count(shop):
+    with shop.app.app_context():
+        return shop.db.session.query(shop.Order).count()
+
+
+@pytest.mark.parametrize('order_items', ['', '[]'])
+def test_checkout_without_items_is_rejected(shop, client, order_items):
+    before = order_count(shop)
+    response = client.post('/checkout', data={**checkout_form([], amount='999'), 'order_items': order_items})
+    assert response.status_code == 200
+    assert 'ไม่มีสินค้าในคำสั่งซื้อ' in response.get_data(as_text=True)
+    assert order_count(shop) == before
+
+
+def test_checkout_ignores_submitted_amount_and_prices(shop, client, make_product):
+    pid = make_product(price=120.0)
+    form = checkout_form([{'id': pid, 'quantity': 2, 'price': 1, 'name': 'cheap'}], amount='1')
+    response = client.post('/checkout', data=form)
+    assert response.status_code == 302
+
+    with client.session_transaction() as sess:
+        order_id = sess['order_id']
+    with shop.app.app_context():
+        order = shop.db.session.get(shop.Order, order_id)
+        expected = shop.order_totals(240.0)
+        assert (order.subtotal, order.shipping, order.tax, order.total) == (
+            expected['subtotal'], expected['shipping'], expected['tax'], expected['total'])
+        item = shop.db.session.query(shop.OrderItem).filter_by(order_id=order_id).one()
+        assert item.unit_price == 120.0 and item.quantity == 2
+
+
+def test_checkout_with_unknown_product_is_rejected(shop, client):
+    before = order_count(shop)
+    response = client.post('/checkout', data=checkout_form([{'id': 999999, 'quantity': 1}], amount='50'))
+    assert response.status_code == 200
+    assert 'ไม่มีจำหน่ายแล้ว' in response.get_data(as_text=True)
+    assert order_count(shop) == before
+
+
+def test_failed_write_returns_the_submitted_idempotency_key(shop, client, make_product, monkeypatch):
+    pid = make_product()
+    submitted = []
+
+    def failing_submit(order):
+        submitted.append(order['idempotency_key'])
+        raise TimeoutError('writer is busy')
+    monkeypatch.setattr(shop.order_writer, 'submit', failing_submit)
+
+    form = checkout_form([{'id': pid, 'quantity': 1}], idempotency_key='')
+    response = client.post('/checkout', data=form)
+    assert response.status_code == 503
+    assert submitted[0] and f'value="{submitted[0]}"' in response.get_data(as_text=True)
@@ -0,0 +1,70 @@
+"""สินค้าโปรด (/toggle-favorite): กดพร้อมกันจากหลาย thread แล้วไม่มีการสลับที่หาย และ popularity ตรงกับตาราง favorite"""
+import random
+import threading
+import uuid
+
+import pytest
+
+
+def toggle_concurrently(shop, owners, products, toggles=20):
+    """ทุก thread กดสินค้าแรก (hot) สลับกับสินค้าสุ่ม คืน ([(owner, product_id, is_favorite)], errors)"""
+    hot = products[0]
+    results, errors, lock = [], [], threading.Lock()
+    barrier = threading.Barrier(len(owners))
+
+    def worker(owner, seed):
+        rng = random.Random(seed)
+        client = shop.app.test_client()
+        with client.session_transaction() as sess:
+            sess['visitor_id'] = owner
+        mine = []
+        barrier.wait()
+        for i in range(toggles):
+            pid = hot if i % 2 == 0 else rng.choice(products)
+            response = client.post(f'/toggle-favorite/{pid}')
+            if response.status_code == 200:
+                mine.append((owner, pid, response.get_json()['is_favorite']))
+            else:
+                with lock:
+                    errors.append(response.get_json())
+        with lock:
+            results.extend(mine)
+
+    threads = [threading.Thread(target=worker, args=(owner, n)) for n, owner in enumerate(owners)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, errors
+
+
+def lost_toggles(results, product_id, is_favorite):
+    """|(#เปิด - #ปิด) - สถานะสุดท้าย| ต่อเจ้าของ: การสลับที่เรียงกันจริงได้ 0"""
+    net = {}
+    for owner, pid, state in results:
+        if pid == product_id:
+            net[owner] = net.get(owner, 0) + (1 if state else -1)
+    return sum(abs(value - int(is_favorite(owner, product_id))) for owner, value in net.items())
+
+
+@pytest.mark.parametrize('same_user', [False, True], ids=['many-users', 'same-user'])
+def test_concurrent_toggles_lose_nothing_and_popularity_matches(shop, make_product, same_user):
+    products = [make_product() for _ in range(4)]
+    owner = uuid.uuid4().hex
+    owners = [owner] * 8 if same_user else [uuid.uuid4().hex for _ in range(8)]
+
+    results, errors = toggle_concurrently(shop, owners, products)
+    shop.popularity_counter.flush()
+
+    assert errors == []
+    assert len(results) == 8 * 20
+    with shop.app.app_context():
+        rows = set(shop.db.session.query(shop.Favorite.owner, shop.Favorite.product_id)
+                   .filter(shop.Favorite.product_id.in_(products)))
+        popularity = dict(shop.db.session.query(shop.Product.id, shop.Product.popularity)
+                          .filter(shop.Product.id.in_(products)))
+    counts = {pid: sum(1 for _, p in rows if p == pid) for pid in products}
+
+    for pid in products:
+        assert lost_toggles(results, pid, lambda o, p: (o, p) in rows) == 0
+    assert popularity == counts
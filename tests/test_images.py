@@ -0,0 +1,184 @@
+"""รูปสินค้า (images.py): ตรวจชนิดไฟล์, จำกัดขนาด, thumbnail, cache header และกัน SSRF ตอนดึงรูปจาก URL
+
+ใช้รูป fixture ที่สร้างด้วย Pillow และ HTTP server ในเครื่องเท่านั้น
+"""
+import io
+import ipaddress
+
+import pytest
+
+import images
+from images import ImageError, ImageStore, sniff_type
+
+Image = pytest.importorskip('PIL.Image')
+
+
+def fixture_image(fmt='JPEG', size=(1200, 800), mode='RGB') -> bytes:
+    out = io.BytesIO()
+    Image.new(mode, size, 'saddlebrown').save(out, fmt)
+    return out.getvalue()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ImageStore(str(tmp_path), max_bytes=2 * 1024 * 1024)
+
+
+@pytest.mark.parametrize('fmt, ext, mode', [
+    ('JPEG', 'jpg', 'RGB'), ('PNG', 'png', 'RGBA'), ('GIF', 'gif', 'P'), ('WEBP', 'webp', 'RGB'),
+])
+def test_sniff_type_uses_magic_bytes(fmt, ext, mode):
+    assert sniff_type(fixture_image(fmt, (8, 8), mode)) == ext
+
+
+def test_sniff_type_rejects_non_images():
+    assert sniff_type(b'<svg xmlns="http://www.w3.org/2000/svg"/>') is None
+    assert sniff_type(b'GIF') is None
+
+
+def test_save_is_content_addressed(store):
+    data = fixture_image()
+    name = store.save(data)
+    assert name.endswith('.jpg') and len(name) == 64 + 4
+    assert store.save(data) == name
+    assert store.original_path(name)
+
+
+def test_save_rejects_oversized_empty_and_fake_images(tmp_path):
+    small = ImageStore(str(tmp_path), max_bytes=1000)
+    with pytest.raises(ImageError, match='larger than'):
+        small.save(fixture_image(size=(400, 400)) + b'\0' * 1000)
+    with pytest.raises(ImageError, match='empty'):
+        small.save(b'')
+    with pytest.raises(ImageError, match='unsupported'):
+        small.save(b'#!/bin/sh\necho hi\n')
+    with pytest.raises(ImageError, match='corrupt'):
+        small.save(b'\xff\xd8\xff' + b'not really a jpeg')
+
+
+@pytest.mark.parametrize('fmt, content_type', [('webp', 'image/webp'), ('jpg', 'image/jpeg')])
+def test_thumbnail_width_content_type_and_immutable_cache(shop, client, fmt, content_type):
+    url = images.URL_PREFIX + shop.image_store.save(fixture_image(size=(1200, 800)))
+    thumb = shop.image_store.src(url, 320, fmt)
+    assert thumb.endswith(f'-320w.{fmt}')
+
+    response = client.get(thumb)
+    assert response.status_code == 200
+    assert response.mimetype == content_type
+    with Image.open(io.BytesIO(response.data)) as image:
+        assert image.size == (320, 213)
+        assert image.format == {'webp': 'WEBP', 'jpg': 'JPEG'}[fmt]
+    cache = response.cache_control
+    assert cache.public and cache.immutable and cache.max_age == shop.IMAGE_MAX_AGE
+
+    original = client.get(url)
+    assert original.mimetype == 'image/jpeg' and original.cache_control.immutable
+
+
+def test_unknown_sizes_and_names_are_404(shop, client):
+    url = images.URL_PREFIX + shop.image_store.save(fixture_image())
+    digest = shop.image_store.digest_of(url)
+    assert client.get(f'/images/{digest}-321w.webp').status_code == 404
+    assert client.get('/images/..%2Fshop.db').status_code == 404
+
+
+@pytest.mark.parametrize('url', [
+    'http://127.0.0.1/a.jpg',
+    'http://localhost:5000/a.jpg',
+    'http://10.1.2.3/a.jpg',
+    'http://192.168.1.1/a.jpg',
+    'http://169.254.169.254/latest/meta-data/',
+    'http://[::1]/a.jpg',
+    'http://[::ffff:127.0.0.1]/a.jpg',
+    'http://0.0.0.0/a.jpg',
+    'ftp://example.com/a.jpg',
+    'file:///etc/passwd',
+])
+def test_check_url_rejects_non_public_targets(store, url):
+    with pytest.raises(ImageError):
+        store.check_url(url)
+
+
+def test_fetch_refuses_loopback_without_connecting(store, http_server):
+    base_url, routes, hits = http_server
+    routes['/a.jpg'] = (200, {'Content-Type': 'image/jpeg'}, fixture_image())
+    with pytest.raises(ImageError, match='non-public'):
+        store.fetch(base_url + '/a.jpg')
+    assert hits == []
+
+
+def test_fetch_allowed_network_and_redirect_checks_every_hop(tmp_path, http_server):
+    base_url, routes, hits = http_server
+    store = ImageStore(str(tmp_path), max_bytes=100_000, allow_networks=('127.0.0.0/8',))
+    data = fixture_image(size=(64, 64))
+    routes['/a.jpg'] = (200, {'Content-Type': 'image/jpeg'}, data)
+    routes['/hop'] = (302, {'Location': '/a.jpg'}, b'')
+    routes['/metadata'] = (302, {'Location': 'http://169.254.169.254/latest/meta-data/'}, b'')
+    routes['/big.jpg'] = (200, {}, data + b'\0' * 100_000)
+
+    assert store.save(data) == store.fetch(base_url + '/hop')
+    assert hits == ['/hop', '/a.jpg']
+    with pytest.raises(ImageError, match='non-public address 169.254.169.254'):
+        store.fetch(base_url + '/metadata')
+    with pytest.raises(ImageError, match='larger than'):
+        store.fetch(base_url + '/big.jpg')
+
+    routes['/loop'] = (302, {'Location': '/loop'}, b'')
+    with pytest.raises(ImageError, match='too many redirects'):
+        store.fetch(base_url + '/loop')
+
+
+def test_public_product_api_never_fetches_image_urls(shop, client, admin_client, http_server, monkeypatch):
+    base_url, routes, hits = http_server
+    monkeypatch.setattr(shop.image_store, 'allow_networks', (ipaddress.ip_network('127.0.0.0/8'),))
+    routes['/p.jpg'] = (200, {'Content-Type': 'image/jpeg'}, fixture_image(size=(32, 32)))
+
+    response = client.post('/api/products', json={'name': 'SSRF probe', 'price': 1, 'image_url': base_url + '/p.jpg'})
+    assert response.status_code == 201
+    assert response.get_json()['product']['image_url'] == base_url + '/p.jpg'
+    product_id = response.get_json()['product']['id']
+    client.put(f'/api/products/{product_id}', json={'image_url': base_url + '/p.jpg?again'})
+    assert hits == []
+
+    # admin ที่ login แล้วยังดึงรูปได้ (และโดนตรวจ IP เหมือนเดิม)
+    response = admin_client.put(f'/api/products/{product_id}', json={'image_url': base_url + '/p.jpg'})
+    assert images.is_local(response.get_json()['product']['image_url'])
+    assert hits == ['/p.jpg']
+
+
+def fake_dns(monkeypatch, answers):
+    """แทน getaddrinfo: ชื่อ images.example ได้ IP ถัดไปจาก answers ทุกครั้งที่ resolve (IP literal ใช้ของจริง)"""
+    real = images.socket.getaddrinfo
+    lookups = []
+
+    def getaddrinfo(host, port, *args, **kwargs):
+        if host != 'images.example':
+            return real(host, port, *args, **kwargs)
+        lookups.append(host)
+        address = answers[min(len(lookups), len(answers)) - 1]
+        return [(images.socket.AF_INET, images.socket.SOCK_STREAM, 6, '', (address, port))]
+    monkeypatch.setattr(images.socket, 'getaddrinfo', getaddrinfo)
+    return lookups
+
+
+def test_fetch_refuses_dns_rebinding_between_check_and_connect(store, http_server, monkeypatch):
+    base_url, routes, hits = http_server
+    routes['/a.jpg'] = (200, {'Content-Type': 'image/jpeg'}, fixture_image())
+    port = base_url.rsplit(':', 1)[1]
+    lookups = fake_dns(monkeypatch, ['93.184.216.34', '127.0.0.1'])
+
+    with pytest.raises(ImageError, match='non-public address 127.0.0.1'):
+        store.fetch(f'http://images.example:{port}/a.jpg')
+    assert len(lookups) == 2 and hits == []
+
+
+def test_fetch_connects_to_the_checked_address(tmp_path, http_server, monkeypatch):
+    base_url, routes, hits = http_server
+    store = ImageStore(str(tmp_path), allow_networks=('127.0.0.0/8',))
+    data = fixture_image(size=(32, 32))
+    routes['/a.jpg'] = (200, {'Content-Type': 'image/jpeg'}, data)
+    port = base_url.rsplit(':', 1)[1]
+    fake_dns(monkeypatch, ['127.0.0.1'])
+
+    assert store.fetch(f'http://images.example:{port}/a.jpg') == store.save(data)
+    assert hits == ['/a.jpg']
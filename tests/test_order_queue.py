@@ -0,0 +1,42 @@
+"""คิวเขียนคำสั่งซื้อแบบรวมชุด (order_queue.py)"""
+import threading
+
+import pytest
+
+from order_queue import WriteBehindQueue
+
+
+def test_concurrent_submits_share_one_flush():
+    flushed = []
+
+    def flush(items):
+        flushed.append(list(items))
+        return [item * 10 for item in items]
+
+    writer = WriteBehindQueue(flush, max_batch=10, max_delay=0.2)
+    futures = [writer.submit(i) for i in range(5)]
+    assert [f.result(timeout=5) for f in futures] == [0, 10, 20, 30, 40]
+    assert flushed == [[0, 1, 2, 3, 4]]
+    assert writer.stats()['batches'] == 1
+
+
+def test_failed_batch_is_retried_item_by_item():
+    flushed = []
+    lock = threading.Lock()
+
+    def flush(items):
+        with lock:
+            flushed.append(list(items))
+        if 'bad' in items:
+            raise ValueError('constraint failed')
+        return [item.upper() for item in items]
+
+    writer = WriteBehindQueue(flush, max_batch=10, max_delay=0.2)
+    futures = [writer.submit(item) for item in ('a', 'bad', 'c')]
+
+    assert futures[0].result(timeout=5) == 'A'
+    assert futures[2].result(timeout=5) == 'C'
+    with pytest.raises(ValueError, match='constraint failed'):
+        futures[1].result(timeout=5)
+    assert flushed == [['a', 'bad', 'c'], ['a'], ['bad'], ['c']]
+    assert writer.stats()['items'] == 2
@@ -0,0 +1,23 @@
+"""รายการสินค้า (/api/products): แบ่งหน้าแบบ keyset และ query param ที่ไม่ใช่ตัวเลขได้ 400 ไม่ใช่รายการเต็ม"""
+import pytest
+
+
+@pytest.mark.parametrize('args', [
+    {'limit': 'abc'}, {'limit': '1.5'}, {'after_id': 'x'}, {'limit': 5, 'after_popularity': 'hot'}, {'limit': 0},
+])
+def test_invalid_paging_params_are_rejected(client, args):
+    response = client.get('/api/products', query_string=args)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_keyset_pages_follow_after_id(client, make_product):
+    for _ in range(3):
+        make_product()
+    first = client.get('/api/products', query_string={'limit': 2, 'fields': 'id'})
+    assert first.status_code == 200 and len(first.get_json()) == 2
+    last_id = first.get_json()[-1]['id']
+
+    second = client.get('/api/products', query_string={'limit': 2, 'after_id': last_id, 'fields': 'id'})
+    assert second.status_code == 200
+    assert last_id not in [row['id'] for row in second.get_json()]
@@ -0,0 +1,47 @@
+"""รีวิวสินค้าและหน้าแรก: rate limit ของการส่งรีวิว และ ETag ของหน้าแรก"""
+import pytest
+
+from admission import TokenBucketStore
+
+
+@pytest.fixture
+def review_limit(shop, monkeypatch):
+    monkeypatch.setattr(shop, 'review_rate_limits', TokenBucketStore())
+    monkeypatch.setattr(shop, 'REVIEW_RATE_BURST', 2)
+    monkeypatch.setattr(shop, 'REVIEW_RATE_PER_HOUR', 1)
+
+
+def test_reviews_are_throttled_per_visitor(shop, client, make_product, review_limit):
+    pid = make_product()
+    with client.session_transaction() as sess:
+        sess['visitor_id'] = 'v-reviewer'
+    statuses = [client.post(f'/api/products/{pid}/reviews', json={'rating': 5}).status_code for _ in range(3)]
+    assert statuses == [201, 201, 429]
+
+    response = client.post(f'/api/products/{pid}/reviews', json={'rating': 4})
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+    assert response.get_json()['success'] is False
+
+    other = shop.app.test_client()
+    with other.session_transaction() as sess:
+        sess['visitor_id'] = 'v-other'
+    assert other.post(f'/api/products/{pid}/reviews', json={'rating': 3}).status_code == 201
+
+
+def test_invalid_reviews_do_not_use_up_the_limit(shop, client, make_product, review_limit):
+    pid = make_product()
+    for _ in range(3):
+        assert client.post(f'/api/products/{pid}/reviews', json={'rating': 9}).status_code == 400
+    assert client.post(f'/api/products/{pid}/reviews', json={'rating': 5}).status_code == 201
+
+
+def test_index_etag_changes_with_the_asset_manifest(shop, client, monkeypatch):
+    first = client.get('/')
+    etag = first.headers['ETag']
+    assert shop.asset_manifest.version in etag
+    assert client.get('/', headers={'If-None-Match': etag}).status_code == 304
+
+    monkeypatch.setattr(shop.asset_manifest, 'version', 'newdeploy123')
+    response = client.get('/', headers={'If-None-Match': etag})
+    assert response.status_code == 200 and response.headers['ETag'] != etag
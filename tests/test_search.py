@@ -0,0 +1,69 @@
+"""ค้นหาสินค้า (/api/products/search): FTS5 + bm25() ใน SQLite และ index ที่แอปซิงก์เอง (ไม่มี trigger)"""
+import os
+import sqlite3
+
+import pytest
+
+
+@pytest.fixture
+def fts(shop):
+    with shop.app.app_context():
+        if not shop.fts_ready():
+            pytest.skip('SQLite without FTS5')
+    return shop
+
+
+def search_ids(client, q, limit=20):
+    response = client.get('/api/products/search', query_string={'q': q, 'limit': limit, 'fields': 'id'})
+    assert response.status_code == 200
+    return [row['id'] for row in response.get_json()['results']]
+
+
+def token():
+    return 'tok' + os.urandom(4).hex()
+
+
+def test_name_match_outranks_many_newer_description_matches(fts, client, make_product):
+    word = token()
+    best = make_product(name=f'{word} Reserve')
+    with fts.app.app_context():
+        start = fts.db.session.query(fts.db.func.max(fts.Product.id)).scalar() + 1
+        fts.db.session.execute(fts.db.insert(fts.Product), [
+            {'name': f'Blend {i} {os.urandom(3).hex()}', 'price': 100, 'description': f'notes of {word}'}
+            for i in range(300)
+        ])
+        fts.bump_catalog_version(changed=list(range(start, start + 300)))
+        fts.db.session.commit()
+
+    ids = search_ids(client, word, limit=5)
+    assert ids[0] == best and len(ids) == 5
+
+
+def test_thai_prefix_and_updates_are_indexed(fts, client, admin_client, make_product):
+    pid = make_product(name=f'กาแฟดอยช้าง {token()}')
+    assert pid in search_ids(client, 'ดอยช')
+
+    new_word = token()
+    admin_client.put(f'/api/products/{pid}', json={'name': f'Kenya {new_word}'})
+    assert search_ids(client, new_word) == [pid]
+    assert pid not in search_ids(client, 'ดอยช้าง')
+
+    admin_client.delete(f'/api/products/{pid}')
+    assert search_ids(client, new_word) == []
+
+
+def test_external_connections_can_write_products(fts, client):
+    word = token()
+    with fts.app.app_context():
+        path = fts.db.engine.url.database
+    conn = sqlite3.connect(path)   # connection ธรรมดาที่ไม่มีฟังก์ชันของแอป (เหมือน sqlite3 CLI)
+    with conn:
+        pid = conn.execute('INSERT INTO product (name, price, description) VALUES (?, 1, ?)',
+                           (f'External {word}', 'added outside the app')).lastrowid
+        conn.execute('UPDATE product SET description = ? WHERE id = ?', ('edited outside', pid))
+    conn.close()
+
+    assert search_ids(client, word) == []
+    result = fts.app.test_cli_runner().invoke(args=['rebuild-search'])
+    assert result.exit_code == 0, result.output
+    assert search_ids(client, word) == [pid]
@@ -0,0 +1,11 @@
+"""WSGI entry point สำหรับ production
+
+    gunicorn wsgi:app                 (ค่าตั้งต้นอยู่ใน gunicorn.conf.py)
+    waitress-serve --port=5000 wsgi:app
+
+migration/seed และ warm-up ทำตอน import module นี้ (ดู create_app ใน app.py)
+ส่วน openai ถูก import ตอนเรียก AI ครั้งแรก
+"""
+from app import create_app
+
+app = create_app()